@@ -0,0 +1,65 @@
+"""
+Benchmark parsing and serializing a document with each json backend
+installed (qjsoncodec), against ast.literal_eval() which used to parse
+the raw view and the added entries
+
+Usage:
+    python benchmark/codec.py
+"""
+
+
+import ast
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))))
+
+from jsonViewer import qjsoncodec
+
+
+SIZE = 10 ** 5
+REPEAT = 3
+
+
+def makeValue():
+    """
+    List of SIZE records
+    """
+    return [{'id': row, 'name': 'item{}'.format(row), 'active': bool(row % 2),
+             'tags': ['a', 'b'], 'score': row * 0.5, 'parent': None}
+            for row in range(SIZE)]
+
+
+def best(function):
+    """
+    Get the best time of a function
+    """
+    return min(timeit.repeat(function, number=1, repeat=REPEAT))
+
+
+def run():
+    value = makeValue()
+    literal = repr(value)
+    literalTime = best(lambda: ast.literal_eval(literal))
+    print('{} records, ast.literal_eval {:.3f} s'.format(SIZE, literalTime))
+
+    current = qjsoncodec.backend()
+    try:
+        for name in qjsoncodec.available():
+            qjsoncodec.setBackend(name)
+            text = qjsoncodec.dumps(value)
+            parseTime = best(lambda: qjsoncodec.parse(text))
+            dumpTime = best(lambda: qjsoncodec.dumps(value))
+            indentTime = best(lambda: qjsoncodec.dumps(value, indent=2))
+            print('{:<9} parse {:.3f} s ({:.1f}x literal_eval), dumps '
+                  '{:.3f} s, indented {:.3f} s'.format(
+                      name, parseTime, literalTime / parseTime, dumpTime,
+                      indentTime))
+    finally:
+        qjsoncodec.setBackend(current)
+
+
+if __name__ == '__main__':
+    run()
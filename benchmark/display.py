@@ -0,0 +1,84 @@
+"""
+Benchmark scrolling a tree view through a document of long string values,
+like base64 blobs, with the values cut for display against the values
+shown whole
+
+Usage:
+    python benchmark/display.py
+"""
+
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from Qt import QtWidgets
+
+from jsonViewer import qjsonnode
+from jsonViewer.qjsonnode import QJsonNode
+from jsonViewer.qjsonmodel import QJsonModel
+from jsonViewer.qjsonproxy import QJsonProxyModel
+from jsonViewer.qjsonview import QJsonView
+
+
+ROWS = 1000
+# characters of each blob
+BLOB = 10 ** 5
+# rows scrolled per step
+STEP = 20
+
+
+def scroll(app, view):
+    """
+    Scroll the view from the top to the bottom, painting every step
+    """
+    bar = view.verticalScrollBar()
+    for position in range(0, bar.maximum() + 1, STEP):
+        bar.setValue(position)
+        view.viewport().grab()
+    app.processEvents()
+
+
+def measure(app, value):
+    """
+    Time the scrolling of a new view over the document
+    """
+    proxy = QJsonProxyModel()
+    proxy.setSourceModel(QJsonModel(QJsonNode.load(value, lazy=True)))
+    view = QJsonView()
+    view.setModel(proxy)
+    view.resize(800, 600)
+    view.show()
+    app.processEvents()
+    while proxy.canFetchMore(proxy.index(-1, -1)):
+        proxy.fetchMore(proxy.index(-1, -1))
+    return timeit.timeit(lambda: scroll(app, view), number=1)
+
+
+def run():
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+    # distinct strings, so nothing is shared between the rows
+    value = {'blob{}'.format(row): str(row) * (BLOB // len(str(row)))
+             for row in range(ROWS)}
+    print('{} rows of {} characters'.format(ROWS, BLOB))
+
+    cut = measure(app, value)
+    print('scroll, values cut to {} characters {:.3f} s'.format(
+        qjsonnode.DISPLAY_LENGTH, cut))
+
+    length = qjsonnode.DISPLAY_LENGTH
+    qjsonnode.DISPLAY_LENGTH = sys.maxsize
+    try:
+        whole = measure(app, value)
+    finally:
+        qjsonnode.DISPLAY_LENGTH = length
+    print('scroll, values shown whole {:.3f} s'.format(whole))
+
+
+if __name__ == '__main__':
+    run()
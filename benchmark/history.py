@@ -0,0 +1,86 @@
+"""
+Benchmark the memory held by the undo history of QJsonModel while
+editing a large document, commands only record what changed so the
+history should stay in the kilobytes for hundreds of edits
+
+Usage:
+    python benchmark/history.py
+"""
+
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from Qt import QtWidgets, QtCore
+
+from jsonViewer.qjsonnode import QJsonNode
+from jsonViewer.qjsonmodel import QJsonModel
+
+
+SIZE = 10 ** 6
+EDITS = 500
+
+
+def makeModel():
+    """
+    Create a model of a list of SIZE records, the first batch fetched
+    """
+    value = [{'id': row, 'name': 'item{}'.format(row), 'tags': ['a', 'b']}
+             for row in range(SIZE)]
+    model = QJsonModel(QJsonNode.load(value, lazy=True))
+    model.fetchMore(QtCore.QModelIndex())
+    return model
+
+
+def edit(model, step):
+    """
+    Apply one random edit among the recorded operations
+    """
+    count = model.rowCount()
+    row = random.randrange(count)
+    record = model.index(row, 0)
+    model.fetchAll(record)
+
+    kind = step % 4
+    if kind == 0:
+        model.setData(model.index(1, 1, record), 'edited{}'.format(step),
+                      QtCore.Qt.EditRole)
+    elif kind == 1:
+        model.addChildren([QJsonNode.load({'note': step}).child(0)], record)
+    elif kind == 2:
+        model.removeChild(row)
+    else:
+        target = model.index(random.randrange(count - 1), 0)
+        model.moveIndices([model.index(2, 0, record)], target)
+
+
+def run():
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    random.seed(0)
+
+    model = makeModel()
+    history = model.history()
+    editTime = timeit.timeit(
+        lambda: [edit(model, step) for step in range(EDITS)], number=1)
+    print('{} edits on {} records in {:.3f} s, history {:.1f} KB'
+          .format(EDITS, SIZE, editTime, history.memoryUsage() / 1024.0))
+
+    undoTime = timeit.timeit(
+        lambda: [model.undo() for _ in range(history.count())], number=1)
+    redoTime = timeit.timeit(
+        lambda: [model.redo() for _ in range(EDITS)], number=1)
+    print('undo all {:.3f} s, redo all {:.3f} s'.format(undoTime, redoTime))
+
+    clearTime = timeit.timeit(model.clear, number=1)
+    print('clear {:.3f} s, history {:.1f} MB ({} commands kept)'.format(
+        clearTime, history.memoryUsage() / 1024.0 ** 2, history.count()))
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,107 @@
+"""
+Benchmark a large JSON Lines file: indexing the lines, expanding many
+records with a bounded cache of parsed records, and saving a few edited
+records in place against streaming a new file
+
+Usage:
+    python benchmark/jsonLines.py
+"""
+
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from Qt import QtWidgets, QtCore
+
+from jsonViewer.qjsonlines import QJsonLinesDocument
+
+
+SIZE = 10 ** 6
+EXPANDED = 20000
+EDITS = 10
+
+
+def writeFile(path):
+    """
+    Write SIZE records, one per line
+    """
+    with open(path, 'w') as stream:
+        for row in range(SIZE):
+            json.dump({'id': row, 'name': 'item{}'.format(row),
+                       'tags': ['a', 'b'], 'score': row * 0.5}, stream)
+            stream.write('\n')
+
+
+def expand(app, model):
+    """
+    Fetch the rows of EXPANDED records like a view scrolling down
+    """
+    root = QtCore.QModelIndex()
+    for row in range(EXPANDED):
+        while row >= model.rowCount(root):
+            model.fetchMore(root)
+        model.fetchMore(model.index(row, 0))
+        if not row % 1000:
+            app.processEvents()
+    app.processEvents()
+
+
+def edit(model, value):
+    """
+    Edit the 'id' value of EDITS records spread over the file
+    """
+    for row in range(0, EXPANDED, EXPANDED // EDITS):
+        record = model.index(row, 0)
+        model.fetchAll(record)
+        model.setData(model.index(0, 1, record), value, QtCore.Qt.EditRole)
+
+
+def run():
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    directory = tempfile.mkdtemp()
+
+    try:
+        path = os.path.join(directory, 'data.jsonl')
+        writeFile(path)
+        print('{} records ({:.0f} MB)'.format(
+            SIZE, os.path.getsize(path) / 1024.0 ** 2))
+
+        documents = []
+        openTime = timeit.timeit(
+            lambda: documents.append(QJsonLinesDocument(path)), number=1)
+        document = documents.pop()
+        model = document.model()
+        print('open (line index) {:.3f} s'.format(openTime))
+
+        # the time includes the tracing of the allocations
+        tracemalloc.start()
+        expandTime = timeit.timeit(lambda: expand(app, model), number=1)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print('expand {} records {:.3f} s, {:.1f} MB held ({:.1f} MB peak), '
+              'cache of {} records'.format(
+                  EXPANDED, expandTime, current / 1024.0 ** 2,
+                  peak / 1024.0 ** 2, document.cacheSize))
+
+        # a shorter value fits in the line of the record
+        edit(model, 0)
+        inPlaceTime = timeit.timeit(document.save, number=1)
+        edit(model, 10 ** 9)
+        streamTime = timeit.timeit(document.save, number=1)
+        print('save {} edited records: in place {:.4f} s, new file {:.3f} s'
+              .format(EDITS, inPlaceTime, streamTime))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,114 @@
+"""
+Benchmark opening a large json file read-only through a memory map,
+QJsonFile only indexes the rows shown, against json.load() and a model
+of the whole document
+
+The time and the python memory are measured up to the first rows
+shown, for a document that is a list of records and for a dictionary
+holding that list, whose first row has to be skipped as a whole
+
+Usage:
+    python benchmark/mmapOpen.py
+"""
+
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from Qt import QtWidgets, QtCore
+
+from jsonViewer.qjsonmmap import QJsonFile
+from jsonViewer.qjsonnode import QJsonNode
+from jsonViewer.qjsonmodel import QJsonModel
+
+
+SIZE = 10 ** 6
+
+
+def writeFile(path, wrapped):
+    """
+    Write a list of SIZE records, wrapped in a dictionary or not
+    """
+    with open(path, 'w') as stream:
+        stream.write('{"data": [' if wrapped else '[')
+        for row in range(SIZE):
+            if row:
+                stream.write(', ')
+            json.dump({'id': row, 'name': 'item{}'.format(row),
+                       'tags': ['a', 'b'], 'score': row * 0.5}, stream)
+        stream.write('], "count": {}}}'.format(SIZE) if wrapped else ']')
+
+
+def show(model):
+    """
+    Fetch and read the first rows like a view, expanding the first row
+    of a wrapped document
+    """
+    parent = QtCore.QModelIndex()
+    model.fetchMore(parent)
+    if model.data(model.index(0, 0), QtCore.Qt.DisplayRole) == 'data':
+        parent = model.index(0, 0)
+        model.fetchMore(parent)
+    for row in range(model.rowCount(parent)):
+        model.data(model.index(row, 0, parent), QtCore.Qt.DisplayRole)
+        model.data(model.index(row, 1, parent), QtCore.Qt.DisplayRole)
+
+
+def measure(function):
+    """
+    Get the time of a function, then its peak python memory in a second
+    run, as tracing the allocations slows it down
+    """
+    seconds = timeit.timeit(function, number=1)
+    tracemalloc.start()
+    result = function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return seconds, peak / 1024.0 ** 2
+
+
+def run():
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    directory = tempfile.mkdtemp()
+
+    try:
+        for wrapped in (False, True):
+            path = os.path.join(directory, 'data.json')
+            writeFile(path, wrapped)
+            size = os.path.getsize(path) / 1024.0 ** 2
+
+            def openMapped():
+                model = QJsonModel(QJsonFile(path).root())
+                show(model)
+                return model
+
+            def openLoaded():
+                with open(path) as stream:
+                    value = json.load(stream)
+                model = QJsonModel(QJsonNode.load(value, lazy=True))
+                show(model)
+                return model
+
+            mappedTime, mappedMemory = measure(openMapped)
+            loadedTime, loadedMemory = measure(openLoaded)
+            print('{} ({:.0f} MB): QJsonFile {:.3f} s {:.1f} MB, '
+                  'json.load {:.3f} s {:.1f} MB'.format(
+                      'dict of records' if wrapped else 'list of records',
+                      size, mappedTime, mappedMemory,
+                      loadedTime, loadedMemory))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    run()
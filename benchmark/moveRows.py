@@ -0,0 +1,75 @@
+"""
+Benchmark moving a large subtree with QJsonModel.moveIndices(), which
+moves the nodes by reference, against the previous round-trip through
+str(), ast.literal_eval() and QJsonNode.load(), and copying it with
+QJsonNode.copy(), which clones the container nodes, against rebuilding
+it from its values
+
+Usage:
+    python benchmark/moveRows.py
+"""
+
+
+import ast
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from Qt import QtWidgets
+
+from jsonViewer.qjsonnode import QJsonNode
+from jsonViewer.qjsonmodel import QJsonModel
+
+
+SIZES = [10 ** 4, 10 ** 5]
+
+
+def makeModel(size):
+    """
+    Create a model with a fully fetched 'source' subtree and an empty
+    'target' dictionary
+    """
+    value = {
+        'source': {'items': [{'id': row, 'name': 'item{}'.format(row)}
+                             for row in range(size)]},
+        'target': {},
+    }
+    model = QJsonModel(QJsonNode.load(value))
+    return model, model.index(0, 0), model.index(1, 0)
+
+
+def run():
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+    for size in SIZES:
+        model, source, target = makeModel(size)
+        moveTime = timeit.timeit(
+            lambda: model.moveIndices([source], target), number=1)
+
+        model, source, target = makeModel(size)
+
+        def roundTrip():
+            text = str(model.asDict(source))
+            model.removeChild(source.row())
+            root = QJsonNode.load(ast.literal_eval(text))
+            model.addChildren(root.children, target)
+        roundTripTime = timeit.timeit(roundTrip, number=1)
+
+        print('{:>7} items: moveIndices() {:.4f} s, str/literal_eval {:.3f} s'
+              .format(size, moveTime, roundTripTime))
+
+        model, source, target = makeModel(size)
+        node = source.internalPointer()
+        copyTime = timeit.timeit(node.copy, number=1)
+        rebuildTime = timeit.timeit(
+            lambda: QJsonNode.load(node.getChildrenValue(node)), number=1)
+        print('{:>7} items: copy() {:.4f} s, values/load() {:.4f} s'.format(
+            size, copyTime, rebuildTime))
+
+
+if __name__ == '__main__':
+    run()
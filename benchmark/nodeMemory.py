@@ -0,0 +1,168 @@
+"""
+Benchmark the memory used by a QJsonNode tree, compared to the QJsonNode
+of the first revision (one python object, with an instance dictionary
+and a children list, per key and value of the document)
+
+The tree is measured once loaded, after every row was read the way the
+search index and find() read them (raw leaves are wrapped into nodes that
+are not kept), and after every row was indexed the way a view showing
+the whole tree indexes them (raw leaves are wrapped into nodes kept in
+the tree, model indexes refer to them): the steady state of a document
+fully expanded once
+
+Usage:
+    python benchmark/nodeMemory.py
+"""
+
+
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))))
+
+from jsonViewer.qjsonnode import QJsonNode
+
+
+SIZE = 100000
+
+
+class BaselineNode(object):
+    """
+    QJsonNode of the first revision, reduced to what loading uses
+    """
+
+    def __init__(self, parent=None):
+        self._key = ""
+        self._value = ""
+        self._dtype = None
+        self._parent = parent
+        self._children = list()
+
+    @classmethod
+    def load(cls, value, parent=None):
+        rootNode = cls(parent)
+        rootNode.key = "root"
+        rootNode.dtype = type(value)
+
+        if isinstance(value, dict):
+            nodes = sorted(value.items())
+
+            for key, value in nodes:
+                child = cls.load(value, rootNode)
+                child.key = key
+                child.dtype = type(value)
+                rootNode.addChild(child)
+        elif isinstance(value, list):
+            for index, value in enumerate(value):
+                child = cls.load(value, rootNode)
+                child.key = 'list[{}]'.format(index)
+                child.dtype = type(value)
+                rootNode.addChild(child)
+        else:
+            rootNode.value = value
+
+        return rootNode
+
+    @property
+    def key(self):
+        return self._key
+
+    @key.setter
+    def key(self, key):
+        self._key = key
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+
+    @property
+    def dtype(self):
+        return self._dtype
+
+    @dtype.setter
+    def dtype(self, dtype):
+        self._dtype = dtype
+
+    def addChild(self, node):
+        self._children.append(node)
+        node._parent = self
+
+
+def makeDocument(size):
+    """
+    Array of objects sharing the same keys, parsed from text so values
+    are owned by the document and not by the benchmark
+    """
+    document = [
+        {
+            'id': i,
+            'name': 'item',
+            'enabled': True,
+            'position': [1.0, 2.0, 3.0],
+            'tags': {'a': 1, 'b': 'x'},
+        }
+        for i in range(size)
+    ]
+    return json.loads(json.dumps(document))
+
+
+def walk(root, read):
+    """
+    Read every row of a tree
+
+    :param root: QJsonNode. root node
+    :param read: function. (node, row) -> child node
+    """
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        for row in range(node.childCount):
+            child = read(node, row)
+            if child.childCount:
+                stack.append(child)
+
+
+def measure(loader, document, read=None):
+    gc.collect()
+    tracemalloc.start()
+    tree = loader(document)
+    if read is not None:
+        walk(tree, read)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tree
+    return current
+
+
+def run():
+    sys.setrecursionlimit(10000)
+    document = makeDocument(SIZE)
+    nodes = SIZE * 11 + 1
+
+    baseline = measure(BaselineNode.load, document)
+    results = (
+        ('loaded', measure(QJsonNode.load, document)),
+        ('rows read', measure(QJsonNode.load, document, QJsonNode.peekChild)),
+        ('rows indexed', measure(QJsonNode.load, document, QJsonNode.child)),
+    )
+
+    print('{} nodes'.format(nodes))
+    print('{:14} {:8.1f} MB, {:6.1f} bytes/node'.format(
+        'baseline:', baseline / 1e6, float(baseline) / nodes))
+    for name, size in results:
+        print('{:14} {:8.1f} MB, {:6.1f} bytes/node, {:.2f}x smaller'.format(
+            name + ':', size / 1e6, float(size) / nodes,
+            float(baseline) / size))
+
+
+if __name__ == '__main__':
+    run()
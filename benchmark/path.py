@@ -0,0 +1,84 @@
+"""
+Benchmark jumping to paths in a document of a million nodes: the first
+jump, fetching the rows on the way, then lookups through the key maps
+against a linear scan of the keys
+
+Usage:
+    python benchmark/path.py
+"""
+
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from Qt import QtWidgets
+
+from jsonViewer.qjsonnode import QJsonNode
+from jsonViewer.qjsonmodel import QJsonModel
+from jsonViewer.qjsonproxy import QJsonProxyModel
+from jsonViewer.qjsonview import QJsonView
+
+
+# records of 4 nodes
+RECORDS = 250000
+LOOKUPS = 1000
+
+
+def makeDocument():
+    return {'item{:07d}'.format(row): {
+        'id': row, 'name': 'name{}'.format(row), 'value': row * 0.5}
+        for row in range(RECORDS)}
+
+
+def run():
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+    model = QJsonModel(QJsonNode.load(makeDocument(), lazy=True))
+    proxy = QJsonProxyModel()
+    proxy.setSourceModel(model)
+    proxy.setDynamicSortFilter(True)
+    proxy.setSortRole(QJsonModel.sortRole)
+    view = QJsonView()
+    view.setModel(proxy)
+    view.resize(800, 600)
+    view.show()
+    app.processEvents()
+    print('{} nodes'.format(RECORDS * 4))
+
+    last = '/item{:07d}/name'.format(RECORDS - 1)
+    seconds = timeit.timeit(lambda: view.jumpToPath(last), number=1)
+    print('first jump to {}, fetching the rows {:.3f} s'.format(
+        last, seconds))
+
+    paths = ['/item{:07d}/value'.format(random.randrange(RECORDS))
+             for _ in range(LOOKUPS)]
+    seconds = timeit.timeit(
+        lambda: [model.indexFromPath(path) for path in paths], number=1)
+    print('{} lookups through the key maps {:.4f} s'.format(
+        LOOKUPS, seconds))
+
+    root = model.getNode(model.index(-1, -1))
+    keys = [root.childKey(row) for row in range(root.childCount)]
+
+    def scan():
+        for path in paths:
+            _, key, field = path.split('/')
+            node = root.child(keys.index(key))
+            node.child([node.childKey(row) for row in range(
+                node.childCount)].index(field))
+    seconds = timeit.timeit(scan, number=1)
+    print('{} lookups scanning the keys {:.4f} s'.format(LOOKUPS, seconds))
+
+    seconds = timeit.timeit(
+        lambda: [view.jumpToPath(path) for path in paths[:100]], number=1)
+    print('100 jumps in the view {:.4f} s'.format(seconds))
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,50 @@
+"""
+Benchmark QJsonModel.removeIndices() on a wide dictionary, selections
+are removed as contiguous ranges or, when scattered, as a single
+layout change, so the time should stay well under a second
+
+Usage:
+    python benchmark/removeRows.py
+"""
+
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from Qt import QtWidgets
+
+from jsonViewer.qjsonnode import QJsonNode
+from jsonViewer.qjsonmodel import QJsonModel
+
+
+SIZE = 10 ** 5
+SELECTIONS = [
+    ('contiguous', lambda: range(SIZE // 4, SIZE // 4 * 3)),
+    ('every 5th', lambda: range(0, SIZE, 5)),
+    ('every 2nd', lambda: range(0, SIZE, 2)),
+]
+
+
+def run():
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+    for name, selection in SELECTIONS:
+        value = dict(('key{}'.format(row), {'value': row})
+                     for row in range(SIZE))
+        model = QJsonModel(QJsonNode.load(value, lazy=True))
+        model.fetchAll()
+        indices = [model.index(row, 0) for row in selection()]
+
+        removeTime = timeit.timeit(
+            lambda: model.removeIndices(indices), number=1)
+        print('{:>10}: {:>6} of {} rows removed in {:.3f} s'
+              .format(name, len(indices), SIZE, removeTime))
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,58 @@
+"""
+Benchmark QJsonNode.row() and QJsonModel.parent() on very wide lists,
+the time per call should stay flat as the number of siblings grows
+
+Usage:
+    python benchmark/rowLookup.py
+"""
+
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from Qt import QtWidgets
+
+from jsonViewer.qjsonnode import QJsonNode
+from jsonViewer.qjsonmodel import QJsonModel
+
+
+SIZES = [10 ** 5, 10 ** 6]
+CALLS = 10000
+
+
+def run():
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+    for size in SIZES:
+        root = QJsonNode.load({'items': [[0]] * size}, lazy=True)
+        model = QJsonModel(root)
+        model.fetchAll()
+        listIndex = model.index(0, 0)
+        model.fetchAll(listIndex)
+
+        # pick grand-children so parent() has to look up the list row
+        rows = [random.randrange(size) for _ in range(CALLS)]
+        nodes = [root.child(0).child(row) for row in rows]
+        for node in nodes:
+            node.fetchMore(1)
+        indices = [model.createIndex(0, 0, node.child(0)) for node in nodes]
+
+        rowTime = timeit.timeit(
+            lambda: [node.row() for node in nodes], number=1)
+        parentTime = timeit.timeit(
+            lambda: [model.parent(index) for index in indices], number=1)
+
+        print('{:>9} siblings: row() {:.3f} us/call, parent() {:.3f} us/call'
+              .format(size,
+                      rowTime / CALLS * 1e6,
+                      parentTime / CALLS * 1e6))
+
+
+if __name__ == '__main__':
+    run()
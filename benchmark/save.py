@@ -0,0 +1,104 @@
+"""
+Benchmark saving a document again after editing a single value: the whole
+text streamed from the tree, as File > Save As used to, against the
+background save copying the text cached for the containers not edited,
+and the time the GUI thread is blocked by it
+
+Usage:
+    python benchmark/save.py
+"""
+
+
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from Qt import QtWidgets, QtCore
+
+from jsonViewer.qjsonnode import QJsonNode
+from jsonViewer.qjsonmodel import QJsonModel
+from jsonViewer.qjsonsaver import QJsonSaver
+
+
+# records of 11 nodes
+RECORDS = 100000
+
+
+def makeDocument():
+    return {'records': [
+        {'id': row,
+         'name': 'record {}'.format(row),
+         'active': bool(row % 2),
+         'score': row / 3.0,
+         'tags': ['tag{}'.format(row % 7), 'group{}'.format(row % 5)],
+         'meta': {'created': '2020-01-{:02d}'.format(row % 28 + 1),
+                  'parent': row - 1 if row else None}}
+        for row in range(RECORDS)]}
+
+
+def edit(model, row):
+    """
+    Change the id of a record, fetching the rows on the way
+    """
+    index = model.indexFromPath('/records/{}/id'.format(row))
+    model.setData(index.sibling(index.row(), 1), -row, QtCore.Qt.EditRole)
+
+
+def save(app, saver, path):
+    """
+    Save in the background and wait for the file to be replaced
+
+    :return: tuple. (seconds blocking the GUI thread, total seconds)
+    """
+    done = list()
+    saver.saved.connect(done.append)
+    start = time.time()
+    saver.save(path)
+    blocked = time.time() - start
+    while not done:
+        app.processEvents()
+        time.sleep(0.001)
+    saver.saved.disconnect(done.append)
+    return blocked, time.time() - start
+
+
+def run():
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    model = QJsonModel(QJsonNode.load(makeDocument()))
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'document.json')
+    print('{} nodes'.format(RECORDS * 11))
+
+    try:
+        edit(model, 0)
+
+        def dump():
+            with io.open(path, 'w', encoding='utf-8') as stream:
+                model.dump(stream, indent=4)
+        print('stream the whole text {:.3f} s'.format(
+            timeit.timeit(dump, number=1)))
+
+        saver = QJsonSaver(model)
+        blocked, total = save(app, saver, path)
+        print('first background save {:.3f} s, GUI blocked {:.4f} s'.format(
+            total, blocked))
+
+        for row in (RECORDS // 2, RECORDS - 1):
+            edit(model, row)
+            blocked, total = save(app, saver, path)
+            print('save after one edit {:.3f} s, GUI blocked {:.4f} s'
+                  .format(total, blocked))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,115 @@
+"""
+Benchmark validating a document against a JSON Schema: the whole
+document once on the worker thread, then the validation after editing a
+single value, of the entry edited only or of its ancestor whose keywords
+depend on its children
+
+Usage:
+    python benchmark/schema.py
+"""
+
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from Qt import QtWidgets, QtCore
+
+from jsonViewer.qjsonnode import QJsonNode
+from jsonViewer.qjsonmodel import QJsonModel
+from jsonViewer.qjsonschema import QJsonSchema, QJsonValidator
+
+
+# records of 11 nodes
+RECORDS = 100000
+SCHEMA = {
+    'type': 'object',
+    'required': ['records'],
+    'properties': {'records': {
+        'type': 'array',
+        'items': {'$ref': '#/definitions/record'},
+    }},
+    'definitions': {'record': {
+        'type': 'object',
+        'required': ['id', 'name', 'active'],
+        'additionalProperties': False,
+        'properties': {
+            'id': {'type': 'integer', 'minimum': 0},
+            'name': {'type': 'string', 'pattern': '^record [0-9]+$'},
+            'active': {'type': 'boolean'},
+            'score': {'type': 'number'},
+            # uniqueItems depends on every tag
+            'tags': {'type': 'array', 'uniqueItems': True,
+                     'items': {'type': 'string'}},
+            'meta': {'type': 'object', 'properties': {
+                'created': {'type': 'string', 'minLength': 10},
+                'parent': {'type': ['integer', 'null']},
+            }},
+        },
+    }},
+}
+
+
+def makeDocument():
+    return {'records': [
+        {'id': row,
+         'name': 'record {}'.format(row),
+         'active': bool(row % 2),
+         'score': row / 3.0,
+         'tags': ['tag{}'.format(row % 7), 'group{}'.format(row % 5)],
+         'meta': {'created': '2020-01-{:02d}'.format(row % 28 + 1),
+                  'parent': row - 1 if row else None}}
+        for row in range(RECORDS)]}
+
+
+def edit(model, path, value):
+    """
+    Change a leaf value, fetching the rows on the way
+    """
+    index = model.indexFromPath(path)
+    model.setData(index.sibling(index.row(), 1), value, QtCore.Qt.EditRole)
+
+
+def validate(app, validator):
+    """
+    Wait for the changes to be validated in the background
+
+    :return: tuple. (seconds blocking the GUI thread, total seconds)
+    """
+    blocked = 0.0
+    start = time.time()
+    while validator.isPending():
+        before = time.time()
+        app.processEvents()
+        blocked = max(blocked, time.time() - before)
+        time.sleep(0.001)
+    return blocked, time.time() - start
+
+
+def run():
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    model = QJsonModel(QJsonNode.load(makeDocument(), lazy=True))
+    print('{} nodes'.format(RECORDS * 11))
+
+    # validated as soon as changed
+    QJsonValidator.validateDelay = 0
+    validator = QJsonValidator(model, QJsonSchema(SCHEMA))
+    blocked, total = validate(app, validator)
+    print('whole document {:.3f} s, GUI blocked {:.4f} s, {} errors'.format(
+        total, blocked, validator.errorCount()))
+
+    for path, value in (('/records/50000/id', -1),
+                        ('/records/99999/name', 'renamed'),
+                        ('/records/70000/tags/0', 'group0')):
+        edit(model, path, value)
+        blocked, total = validate(app, validator)
+        print('edit {} {:.4f} s, GUI blocked {:.4f} s, {} errors'.format(
+            path, total, blocked, validator.errorCount()))
+
+
+if __name__ == '__main__':
+    run()
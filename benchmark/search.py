@@ -0,0 +1,85 @@
+"""
+Benchmark building and querying QJsonSearchIndex on a document of
+about one million nodes
+
+Usage:
+    python benchmark/search.py
+"""
+
+
+import os
+import random
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))))
+
+from jsonViewer.qjsonnode import QJsonNode
+from jsonViewer.qjsonsearch import QJsonSearchIndex
+
+
+RECORDS = 100000
+REPEAT = 5
+QUERIES = ['smith', 'lin', 'city tokyo', 'record12345', 'user99', 'zzz']
+
+FIRST_NAMES = ['john', 'mary', 'wei', 'ana', 'ivan', 'fatima', 'kenji']
+CITIES = ['new york', 'paris', 'tokyo', 'lagos', 'lima', 'oslo']
+
+
+def makeDocument(size):
+    random.seed(0)
+    return [
+        {
+            'id': 'record{}'.format(i),
+            'user': 'user{}'.format(random.randint(0, size)),
+            'name': '{} {}'.format(random.choice(FIRST_NAMES),
+                                   'smith' if i % 997 == 0 else 'doe'),
+            'address': {'city': random.choice(CITIES), 'zip': i % 90000},
+            'active': i % 3 == 0,
+            'score': i * 0.5,
+            'tags': ['t{}'.format(i % 50), 'linked' if i % 5000 else 'lin'],
+        }
+        for i in range(size)
+    ]
+
+
+def countNodes(root):
+    count, stack = 0, [root]
+    while stack:
+        node = stack.pop()
+        count += node.childCount
+        stack.extend(child for _, child in node.childContainers())
+    return count
+
+
+def run():
+    root = QJsonNode.load(makeDocument(RECORDS))
+    print('{} nodes'.format(countNodes(root)))
+
+    start = time.time()
+    index = QJsonSearchIndex(root)
+    print('build {:.2f} s, {} tokens'.format(time.time() - start, len(index)))
+
+    for query in QUERIES:
+        matches = index.search(query)
+        elapsed = min(timeit.repeat(
+            lambda: index.search(query), number=1, repeat=REPEAT))
+        count = sum(len(rows) for rows in matches.values())
+        print('{:<14} {:>6} matches {:>9.3f} ms'.format(
+            repr(query), count, elapsed * 1000))
+
+    # incremental update of one entry
+    record = root.child(RECORDS // 2)
+    row = record.child(0).row()
+    start = time.time()
+    key, value = record.child(row).key, record.child(row).value
+    record.child(row).value = 'record zzz'
+    index.updateRow(record, row, key, value)
+    index.search('zzz')
+    print('update + search {:.3f} ms'.format((time.time() - start) * 1000))
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,87 @@
+"""
+Benchmark the streaming serializer against json.dumps() of the
+getChildrenValue() copy, for throughput and peak memory
+
+Usage:
+    python benchmark/serialize.py
+"""
+
+
+import io
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))))
+
+from jsonViewer.qjsonnode import QJsonNode
+from jsonViewer import qjsonwriter
+
+
+SIZE = 50000
+REPEAT = 3
+
+
+class NullStream(object):
+    """
+    File object discarding the text, only counting its size
+    """
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, text):
+        self.size += len(text)
+
+
+def makeDocument(size):
+    return {
+        'item{}'.format(i): {
+            'id': i,
+            'name': 'item number {}'.format(i),
+            'position': [i * 0.5, i * 1.5, 0.0],
+            'enabled': i % 2 == 0,
+            'tags': {'group': 'g{}'.format(i % 10), 'parent': None},
+        }
+        for i in range(size)
+    }
+
+
+def viaDict(root, stream, indent):
+    json.dump(root.getChildrenValue(root), stream, indent=indent,
+              sort_keys=True)
+
+
+def viaWriter(root, stream, indent):
+    qjsonwriter.dump(root, stream, indent=indent, sortKeys=True)
+
+
+def peak(function, root, indent):
+    tracemalloc.start()
+    function(root, NullStream(), indent)
+    _, result = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result
+
+
+def run():
+    root = QJsonNode.load(makeDocument(SIZE))
+    size = len(qjsonwriter.dumps(root, indent=4))
+
+    for indent in (None, 4):
+        for name, function in (('json.dumps', viaDict),
+                               ('qjsonwriter', viaWriter)):
+            seconds = min(timeit.repeat(
+                lambda: function(root, NullStream(), indent),
+                number=1, repeat=REPEAT))
+            print('indent={!s:<4} {:<11} {:6.3f} s {:7.1f} MB/s '
+                  'peak {:7.2f} MB'.format(
+                      indent, name, seconds, size / seconds / 1e6,
+                      peak(function, root, indent) / 1e6))
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,75 @@
+"""
+Benchmark the cold start of the editor: each run is a new python process
+importing main and showing the main window, with the widgets created by
+the generated ui class and by parsing the .ui file
+
+Usage:
+    python benchmark/startup.py
+"""
+
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PACKAGE_PARENT = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+
+RUNS = 10
+# measured in the new process, the times are printed as json
+SCRIPT = '''
+import functools, json, os, time
+start = time.perf_counter()
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from Qt import QtWidgets
+qt = time.perf_counter()
+from jsonViewer import main
+imported = time.perf_counter()
+app = QtWidgets.QApplication([])
+main.setupUi = functools.partial(main.setupUi, generated={generated})
+window = main.MainWindow()
+window.show()
+app.processEvents()
+shown = time.perf_counter()
+print(json.dumps({{'Qt': qt - start, 'main': imported - qt,
+                  'window': shown - imported}}))
+'''
+
+
+def measure(generated):
+    """
+    Start the editor in a new process
+
+    :param generated: bool. use the generated ui class
+    :return: dict. seconds of the steps and of the whole process
+    """
+    environment = dict(os.environ)
+    environment['PYTHONPATH'] = os.pathsep.join(
+        [PACKAGE_PARENT] + environment.get('PYTHONPATH', '').split(
+            os.pathsep)).rstrip(os.pathsep)
+    environment.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    start = time.perf_counter()
+    output = subprocess.check_output(
+        [sys.executable, '-c', SCRIPT.format(generated=generated)],
+        env=environment, stderr=subprocess.DEVNULL)
+    times = json.loads(output.decode().strip().splitlines()[-1])
+    times['process'] = time.perf_counter() - start
+    return times
+
+
+def run():
+    for generated in (True, False):
+        runs = [measure(generated) for _ in range(RUNS)]
+        print('{}: {}'.format(
+            'generated ui class' if generated else '.ui file',
+            ', '.join('{} {:.3f} s'.format(
+                step, statistics.median(times[step] for times in runs))
+                for step in ('Qt', 'main', 'window', 'process'))))
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,295 @@
+"""
+Benchmark suite of the tree nodes, the model and the view on synthetic
+documents, to compare the results between revisions
+
+Three shapes of document are generated for each size, in nodes:
+- wide: a dictionary of many small records
+- deep: a chain of nested dictionaries
+- mixed: a list of records mixing leaf types, lists and dictionaries
+
+For each document, the time (best of the runs) and the peak python memory
+(in a separate run, as tracing the allocations slows it down) are measured
+for QJsonNode.load(), getChildrenValue(), row(), QJsonModel.index(),
+parent() and data(), a walk of every index the way QTreeView requests
+them while expanding the whole tree, and QJsonView.asDict()
+
+Usage:
+    python benchmark/suite.py
+    python benchmark/suite.py --sizes 3 4 --shapes mixed
+    python benchmark/suite.py --save
+    python benchmark/suite.py --compare
+"""
+
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import Qt
+from Qt import QtWidgets, QtCore
+
+from jsonViewer.qjsonnode import QJsonNode
+from jsonViewer.qjsonmodel import QJsonModel
+from jsonViewer.qjsonproxy import QJsonProxyModel
+from jsonViewer.qjsonview import QJsonView
+
+
+# sizes as powers of ten of the number of nodes
+SIZES = (3, 4, 5, 6)
+REPEAT = 3
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'baseline.json')
+# ratio to the baseline above which a result is reported as a regression
+THRESHOLD = 1.25
+# differences below these are noise, whatever their ratio
+MIN_SECONDS = 0.005
+MIN_MEGABYTES = 0.5
+
+ROLES = (QtCore.Qt.DisplayRole, QtCore.Qt.SizeHintRole)
+
+
+def makeWide(size):
+    """
+    Dictionary of small records, 4 nodes each
+    """
+    return {'item{:07d}'.format(row): {
+        'id': row, 'name': 'name{}'.format(row), 'value': row * 0.5}
+        for row in range(size // 4)}
+
+
+def makeDeep(size):
+    """
+    Chain of nested dictionaries, 2 nodes per level
+    """
+    value = {'level': size // 2}
+    for level in range(size // 2 - 1, 0, -1):
+        value = {'level': level, 'child': value}
+    return value
+
+
+def makeMixed(size):
+    """
+    List of records of leaves, lists and dictionaries, 11 nodes each
+    """
+    return [{'id': row,
+             'name': 'record {}'.format(row),
+             'active': bool(row % 2),
+             'score': row / 3.0,
+             'tags': ['tag{}'.format(row % 7), 'group{}'.format(row % 5)],
+             'meta': {'created': '2020-01-{:02d}'.format(row % 28 + 1),
+                      'parent': row - 1 if row else None}}
+            for row in range(size // 11)]
+
+
+SHAPES = {
+    'wide': makeWide,
+    'deep': makeDeep,
+    'mixed': makeMixed,
+}
+
+
+def containers(root):
+    """
+    Collect the container nodes of a fully loaded tree
+
+    :param root: QJsonNode. root node
+    :return: list of QJsonNode. nodes
+    """
+    nodes = [root]
+    for node in nodes:
+        nodes.extend(child for child in node.children
+                     if isinstance(child, QJsonNode))
+    return nodes
+
+
+def walk(model):
+    """
+    Request every index like a QTreeView expanding the whole tree:
+    fetch the rows of a parent, then for each row its indices, display
+    data, size hint, flags, children and parent
+
+    :param model: QJsonModel. model
+    :return: list of QModelIndex. first column indices of every row
+    """
+    indices = list()
+    parents = [QtCore.QModelIndex()]
+    while parents:
+        parent = parents.pop()
+        while model.canFetchMore(parent):
+            model.fetchMore(parent)
+        for row in range(model.rowCount(parent)):
+            index = model.index(row, 0, parent)
+            for column in (0, 1):
+                cell = model.index(row, column, parent)
+                for role in ROLES:
+                    model.data(cell, role)
+                model.flags(cell)
+            model.parent(index)
+            if model.hasChildren(index):
+                parents.append(index)
+            indices.append(index)
+    return indices
+
+
+def cases(value):
+    """
+    Generate the benchmark cases of a document, in order as the later
+    ones share the tree and the indices of the first ones
+
+    :param value: dict or list. document
+    :return: generator of (str, function). name and function of a case
+    """
+    state = dict()
+
+    def load():
+        state['root'] = QJsonNode.load(value)
+    yield 'load', load
+
+    yield 'getChildrenValue', \
+        lambda: state['root'].getChildrenValue(state['root'])
+
+    nodes = containers(state['root'])
+    yield 'row', lambda: [node.row() for node in nodes]
+
+    def walkModel():
+        # the rows are fetched on the way, as in an expanding view
+        state['model'] = QJsonModel(QJsonNode.load(value, lazy=True))
+        state['indices'] = walk(state['model'])
+    yield 'walk', walkModel
+
+    model = state['model']
+    indices = state['indices']
+    pairs = [(index.row(), index.parent()) for index in indices]
+    yield 'index', lambda: [model.index(row, 1, parent)
+                            for row, parent in pairs]
+    yield 'parent', lambda: [model.parent(index) for index in indices]
+    yield 'data', lambda: [model.data(index, QtCore.Qt.DisplayRole)
+                           for index in indices]
+
+    proxy = QJsonProxyModel()
+    proxy.setSourceModel(QJsonModel(state['root']))
+    view = QJsonView()
+    view.setModel(proxy)
+    yield 'asDict', lambda: view.asDict([])
+
+
+def measure(function, repeat):
+    """
+    Get the best time of a function, then its peak python memory in a
+    separate run
+
+    :param function: function. case
+    :param repeat: int. number of timed runs
+    :return: dict. seconds and peak megabytes
+    """
+    seconds = min(timeit.repeat(function, number=1, repeat=repeat))
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': seconds, 'megabytes': peak / 1024.0 ** 2}
+
+
+def revision():
+    """
+    Get the git revision of the sources, if any
+
+    :return: str. commit hash or None
+    """
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """
+    Print the results against a baseline
+
+    :param results: dict. results by case name
+    :param baseline: dict. saved results by case name
+    :param threshold: float. ratio above which a result is a regression
+    :return: int. number of regressions
+    """
+    regressions = 0
+    for name, result in sorted(results.items()):
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        for metric, noise in (('seconds', MIN_SECONDS),
+                              ('megabytes', MIN_MEGABYTES)):
+            old, new = reference[metric], result[metric]
+            ratio = new / old if old else float('inf')
+            regressed = ratio > threshold and new - old > noise
+            regressions += regressed
+            print('{:<28} {:<9} {:>10.4f} -> {:>10.4f} {:>6.2f}x{}'.format(
+                name, metric, old, new, ratio,
+                '  REGRESSION' if regressed else ''))
+    return regressions
+
+
+def run(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark the nodes, the model and the view')
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=SIZES,
+        help='sizes as powers of ten of the number of nodes')
+    parser.add_argument(
+        '--shapes', nargs='+', choices=sorted(SHAPES), default=sorted(SHAPES))
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument(
+        '--save', nargs='?', const=BASELINE, metavar='PATH',
+        help='save the results as a baseline')
+    parser.add_argument(
+        '--compare', nargs='?', const=BASELINE, metavar='PATH',
+        help='compare the results to a baseline, the exit status is 1 '
+             'when a result regressed')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD)
+    args = parser.parse_args(argv)
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+    results = dict()
+    for shape in args.shapes:
+        for size in args.sizes:
+            value = SHAPES[shape](10 ** size)
+            for case, function in cases(value):
+                name = '{}/1e{}/{}'.format(shape, size, case)
+                result = results[name] = measure(function, args.repeat)
+                print('{:<28} {:>10.4f} s {:>10.1f} MB'.format(
+                    name, result['seconds'], result['megabytes']))
+            del value
+            app.processEvents()
+
+    if args.save:
+        with open(args.save, 'w') as stream:
+            json.dump({'revision': revision(),
+                       'python': platform.python_version(),
+                       'qt': '{} {}'.format(
+                           Qt.__binding__, Qt.__qt_version__),
+                       'results': results}, stream, indent=2, sort_keys=True)
+        print('saved to {}'.format(args.save))
+
+    if args.compare:
+        with open(args.compare) as stream:
+            baseline = json.load(stream)
+        print('compared to revision {}'.format(baseline.get('revision')))
+        if compare(results, baseline['results'], args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(run())
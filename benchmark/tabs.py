@@ -0,0 +1,81 @@
+"""
+Benchmark several large documents opened in tabs: the memory held with
+and without a memory budget, and the time to show a tab whose tree was
+evicted
+
+Usage:
+    python benchmark/tabs.py
+"""
+
+
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from Qt import QtWidgets
+
+from jsonViewer.qjsonnode import QJsonNode
+from jsonViewer.qjsonmodel import QJsonModel
+from jsonViewer.qjsontabs import QJsonTab, QJsonTabWidget
+
+
+TABS = 6
+# records of 11 nodes per document
+RECORDS = 20000
+BUDGET = 64 * 1024 ** 2
+
+
+def makeDocument(seed):
+    return [{'id': row,
+             'name': 'record {} {}'.format(seed, row),
+             'active': bool(row % 2),
+             'score': row / 3.0,
+             'tags': ['tag{}'.format(row % 7), 'group{}'.format(row % 5)],
+             'meta': {'created': '2020-01-{:02d}'.format(row % 28 + 1),
+                      'parent': row - 1 if row else None}}
+            for row in range(RECORDS)]
+
+
+def openTabs(app, budget):
+    """
+    Open TABS fully loaded documents, showing each of them in turn
+
+    :return: QJsonTabWidget. tabs
+    """
+    tabs = QJsonTabWidget()
+    tabs.memoryBudget = budget
+    for seed in range(TABS):
+        root = QJsonNode.load(makeDocument(seed))
+        tabs.addDocument(QJsonTab(QJsonModel(root)), str(seed))
+        app.processEvents()
+    return tabs
+
+
+def run():
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    print('{} tabs of {} nodes'.format(TABS, RECORDS * 11))
+
+    for budget in (float('inf'), BUDGET):
+        tracemalloc.start()
+        tabs = openTabs(app, budget)
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        evicted = sum(tab.isEvicted() for tab in tabs.tabs())
+        print('budget {}: {:.1f} MB held, {} tabs evicted'.format(
+            'none' if budget == float('inf') else '{:.0f} MB'.format(
+                budget / 1024.0 ** 2),
+            current / 1024.0 ** 2, evicted))
+
+    seconds = timeit.timeit(lambda: tabs.setCurrentIndex(0), number=1)
+    print('show an evicted tab {:.3f} s'.format(seconds))
+    for tab in tabs.tabs():
+        tab.close()
+
+
+if __name__ == '__main__':
+    run()
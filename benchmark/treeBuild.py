@@ -0,0 +1,65 @@
+"""
+Benchmark QJsonNode.load() and getChildrenValue() on a wide document,
+and check both handle a document nested deeper than the recursion limit
+
+Usage:
+    python benchmark/treeBuild.py
+"""
+
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))))
+
+from jsonViewer.qjsonnode import QJsonNode
+
+
+WIDE_SIZE = 100000
+DEEP_SIZE = 100000
+REPEAT = 3
+
+
+def makeWide(size):
+    return {
+        'item{}'.format(i): {'id': i, 'values': [i, i + 1], 'name': 'n'}
+        for i in range(size)
+    }
+
+
+def makeDeep(depth):
+    document = value = dict()
+    for i in range(depth):
+        child = dict()
+        value['next'] = child
+        value['index'] = i
+        value = child
+    return document
+
+
+def run():
+    wide = makeWide(WIDE_SIZE)
+    root = QJsonNode.load(wide)
+
+    loadTime = min(timeit.repeat(
+        lambda: QJsonNode.load(wide), number=1, repeat=REPEAT))
+    dumpTime = min(timeit.repeat(
+        lambda: root.getChildrenValue(root), number=1, repeat=REPEAT))
+    print('wide {} keys: load {:.3f} s, getChildrenValue {:.3f} s'.format(
+        WIDE_SIZE, loadTime, dumpTime))
+
+    deep = makeDeep(DEEP_SIZE)
+    root = QJsonNode.load(deep)
+    output = root.getChildrenValue(root)
+
+    depth = 0
+    while 'next' in output:
+        output = output['next']
+        depth += 1
+    print('deep {} levels: round trip depth {}'.format(DEEP_SIZE, depth))
+
+
+if __name__ == '__main__':
+    run()
@@ -3,22 +3,35 @@ Main window to launch JsonViewer
 """
 
 
-import ast
-import json
 import os
 import sys
 
-from Qt import QtWidgets, QtCore, QtGui
+from Qt import QtWidgets, QtCore
 from Qt import _loadUi
 
+# the file formats, the profiler, the schema validation and the
+# highlighter are imported when first used, to start faster
+from jsonViewer import qjsoncodec
 from jsonViewer.qjsonnode import QJsonNode
-from jsonViewer.qjsonview import QJsonView
+from jsonViewer.qjsontabs import QJsonTab, QJsonTabWidget
+from jsonViewer.qjsontext import QJsonTextSync
 from jsonViewer.qjsonmodel import QJsonModel
-from codeEditor.highlighter.jsonHighlight import JsonHighlighter
+from jsonViewer.ui import compileUi
 
 
 MODULE_PATH = os.path.dirname(os.path.abspath(__file__))
 UI_PATH = os.path.join(MODULE_PATH, 'ui', 'jsonEditor.ui')
+# extensions of the files opened as JSON Lines
+LINES_EXTENSIONS = ('.jsonl', '.ndjson')
+# maximum number of filter matches expanded in the tree view
+EXPAND_LIMIT = 200
+# environment variable recording the calls from the start when set
+PROFILE_VARIABLE = 'JSON_EDITOR_PROFILE'
+# main window methods recorded by the profiler
+PROFILED_METHODS = ('updateModel', 'updateBrowser', 'openFile',
+                    'openReadOnly', 'openLines', 'save', 'saveFile',
+                    'saveLines', 'newTab', 'closeTab', 'setSchema',
+                    '_onFilterApplied', '_onTabChanged')
 TEST_DICT = {
     "firstName": "John",
     "lastName": "Smith",
@@ -42,54 +55,549 @@ TEST_DICT = {
 }
 
 
+def setupUi(window, generated=True):
+    """
+    Create the widgets of the main window with the ui class generated by
+    ui/compileUi.py, or from the .ui file when the class is missing or
+    generated from another version of it
+
+    :param window: QMainWindow. main window
+    :param generated: bool. use the generated class when up to date
+    :return: bool. whether the generated class was used
+    """
+    if generated:
+        try:
+            from jsonViewer.ui import jsonEditorUi
+        except ImportError:
+            jsonEditorUi = None
+        if jsonEditorUi is not None \
+                and jsonEditorUi.SOURCE_HASH == compileUi.sourceHash(UI_PATH):
+            ui = jsonEditorUi.Ui_MainWindow()
+            ui.setupUi(window)
+            # widgets as attributes of the window, like the .ui file loader
+            vars(window).update(vars(ui))
+            return True
+
+    _loadUi(UI_PATH, window)
+    return False
+
+
 class MainWindow(QtWidgets.QMainWindow):
     def __init__(self):
         super(MainWindow, self).__init__()
-        _loadUi(UI_PATH, self)
-
-        self.ui_tree_view = QJsonView()
-        self.ui_tree_view.setStyleSheet('QWidget{font: 10pt "Bahnschrift";}')
-        self.ui_grid_layout.addWidget(self.ui_tree_view, 1, 0)
+        setupUi(self)
 
-        root = QJsonNode.load(TEST_DICT)
-        self._model = QJsonModel(root, self)
+        # documents, the model, proxy and view of the tab shown are bound
+        # to the window by _bindTab()
+        self.ui_tab_widget = QJsonTabWidget()
+        self.ui_tab_widget.setStyleSheet('QWidget{font: 10pt "Bahnschrift";}')
+        self.ui_grid_layout.addWidget(self.ui_tab_widget, 1, 0)
+        self._tab = None
+        self._model = None
+        self._proxyModel = None
+        self.ui_tree_view = None
+        # schema errors panel of the tab shown, created when first shown
+        self.ui_errors_dock = None
 
-        # proxy model
-        self._proxyModel = QtCore.QSortFilterProxyModel(self)
-        self._proxyModel.setSourceModel(self._model)
-        self._proxyModel.setDynamicSortFilter(False)
-        self._proxyModel.setSortRole(QJsonModel.sortRole)
-        self._proxyModel.setFilterCaseSensitivity(QtCore.Qt.CaseInsensitive)
-        self._proxyModel.setFilterRole(QJsonModel.filterRole)
-        self._proxyModel.setFilterKeyColumn(0)
+        # Json Viewer, follows the model changes once written, highlighted
+        # once the window is shown
+        self._highlighter = None
+        QtCore.QTimer.singleShot(0, self._setHighlighter)
+        self._textSync = QJsonTextSync(
+            self.ui_view_edit.document(), parent=self)
 
-        self.ui_tree_view.setModel(self._proxyModel)
+        # lambdas, so the profiler records the calls once enabled
+        self.ui_tab_widget.currentChanged.connect(
+            lambda: self._onTabChanged())
+        self.ui_tab_widget.tabCloseRequested.connect(
+            lambda index: self.closeTab(index))
+        self.ui_filter_edit.textChanged.connect(
+            lambda text: self._proxyModel.setFilterText(text))
+        self.ui_out_btn.clicked.connect(lambda: self.updateBrowser())
+        self.ui_update_btn.clicked.connect(lambda: self.updateModel())
+        self.ui_open_action.triggered.connect(lambda: self.openFile())
+        self.ui_open_read_only_action.triggered.connect(
+            lambda: self.openReadOnly())
+        self.ui_save_action.triggered.connect(lambda: self.save())
+        self.ui_save_as_action.triggered.connect(lambda: self.saveFile())
+        self.ui_autosave_action.toggled.connect(self.setAutosave)
+        self.ui_undo_action.triggered.connect(lambda: self._model.undo())
+        self.ui_redo_action.triggered.connect(lambda: self._model.redo())
+        self.ui_schema_action.triggered.connect(lambda: self.setSchema())
+        self.ui_clear_schema_action.triggered.connect(
+            lambda: self.clearSchema())
+        self.ui_errors_action.triggered.connect(self.showErrors)
+        self.ui_profiler_action.triggered.connect(self.showProfiler)
 
-        self.ui_filter_edit.textChanged.connect(self._proxyModel.setFilterRegExp)
-        self.ui_out_btn.clicked.connect(self.updateBrowser)
-        self.ui_update_btn.clicked.connect(self.updateModel)
+        # file loading
+        self.ui_load_progress = QtWidgets.QProgressBar()
+        self.ui_load_progress.setMaximumWidth(200)
+        self.ui_cancel_btn = QtWidgets.QPushButton('Cancel')
+        self.ui_cancel_btn.clicked.connect(self.cancelLoad)
+        self.statusBar().addPermanentWidget(self.ui_load_progress)
+        self.statusBar().addPermanentWidget(self.ui_cancel_btn)
+        self.ui_load_progress.hide()
+        self.ui_cancel_btn.hide()
 
-        # Json Viewer
-        JsonHighlighter(self.ui_view_edit.document())
+        self.newTab(QJsonModel(QJsonNode.load(TEST_DICT, lazy=True)),
+                    'untitled')
         self.updateBrowser()
 
+        # profiler panel, created when first shown
+        self.ui_profiler_dock = None
+        if os.environ.get(PROFILE_VARIABLE):
+            self.showProfiler()
+            self.ui_profiler_dock.setRecording(True)
+
     def updateModel(self):
         text = self.ui_view_edit.toPlainText()
-        jsonDict = ast.literal_eval(text)
-        root = QJsonNode.load(jsonDict)
+        jsonDict = qjsoncodec.parse(text)
+
+        # only the rows that changed are updated
+        self.cancelLoad()
+        self._model.updateValue(jsonDict)
+
+    def openFile(self, path=None):
+        """
+        Load a json file in the background in a new tab, the tree view
+        is filled as the file is parsed
+
+        :param path: str. path of the json file, ask the user if not specified
+        """
+        if not path:
+            path, _ = QtWidgets.QFileDialog.getOpenFileName(
+                self, 'Open', '', 'JSON (*.json);;'
+                'JSON Lines (*.jsonl *.ndjson);;All Files (*)')
+            if not path:
+                return
+
+        if path.lower().endswith(LINES_EXTENSIONS):
+            self.openLines(path)
+            return
+        if self._showOpened(path):
+            return
+
+        from jsonViewer.qjsonloader import QJsonLoader
+
+        tab = self.newTab(QJsonModel(QJsonNode.load(dict(), lazy=True)),
+                          os.path.basename(path), path)
+        loader = tab.loader = QJsonLoader(path, tab)
+        # the tab is bound to the handlers, several files may be loading
+        loader.rootLoaded.connect(lambda root: self._setRoot(tab, root))
+        loader.batchReady.connect(
+            lambda nodes: self._addLoadedChildren(tab, nodes))
+        loader.progress.connect(
+            lambda value: self._onLoadProgress(tab, value))
+        loader.failed.connect(
+            lambda message: self._onLoadFailed(tab, message))
+        loader.finished.connect(lambda: self._onLoadFinished(tab))
+
+        self.ui_load_progress.setValue(0)
+        self.ui_load_progress.show()
+        self.ui_cancel_btn.show()
+        self.statusBar().showMessage('Loading {}'.format(path))
+        loader.start()
+
+    def openReadOnly(self, path=None):
+        """
+        Show a json file without loading it in a new tab, the file is
+        memory-mapped and the entries are decoded as they are shown,
+        nothing can be edited
+
+        :param path: str. path of the json file, ask the user if not specified
+        """
+        if not path:
+            path, _ = QtWidgets.QFileDialog.getOpenFileName(
+                self, 'Open Read-Only', '', 'JSON (*.json);;All Files (*)')
+            if not path:
+                return
+        if self._showOpened(path):
+            return
+
+        from jsonViewer.qjsonmmap import QJsonFile
+
+        try:
+            jsonFile = QJsonFile(path)
+        except (IOError, OSError, ValueError) as error:
+            self.statusBar().showMessage('Opening failed: {}'.format(error))
+            return
+        try:
+            root = jsonFile.root()
+        except ValueError as error:
+            jsonFile.close()
+            self.statusBar().showMessage('Opening failed: {}'.format(error))
+            return
+
+        model = QJsonModel(root)
+        model.setReadOnly(True)
+        tab = QJsonTab(model, path)
+        tab.file = jsonFile
+        self.newTab(tab=tab, title=os.path.basename(path))
+        self.statusBar().showMessage('Opened {} (read-only)'.format(path))
+
+    def openLines(self, path):
+        """
+        Show a JSON Lines file as a list of records in a new tab, a record
+        is only parsed when it is expanded or searched
+
+        :param path: str. path of the file
+        """
+        if self._showOpened(path):
+            return
+
+        from jsonViewer.qjsonlines import QJsonLinesDocument
+
+        try:
+            lines = QJsonLinesDocument(path)
+        except (IOError, OSError, ValueError) as error:
+            self.statusBar().showMessage('Opening failed: {}'.format(error))
+            return
+
+        tab = QJsonTab(lines.model(), path)
+        lines.setParent(tab)
+        tab.lines = lines
+        self.newTab(tab=tab, title=os.path.basename(path))
+        self.statusBar().showMessage('Opened {}'.format(path))
+
+    def saveLines(self):
+        """
+        Write the edited records back to the JSON Lines file
+        """
+        lines = self._tab.lines
+        if lines is None:
+            return
+        try:
+            inPlace = lines.save()
+        except (IOError, OSError, TypeError, ValueError) as error:
+            self.statusBar().showMessage('Saving failed: {}'.format(error))
+            return
+        self.statusBar().showMessage('Saved {} ({})'.format(
+            lines.path(), 'in place' if inPlace else 'rewritten'), 3000)
+
+    def save(self):
+        """
+        Write the document of the current tab to its file, see saveFile(),
+        a document without file or read-only is saved as a new file
+        """
+        tab = self._tab
+        if tab.lines is not None:
+            self.saveLines()
+        elif tab.path and tab.file is None:
+            self.saveFile(tab.path)
+        else:
+            self.saveFile()
+
+    def saveFile(self, path=None):
+        """
+        Write the model to a json file in the background, only the
+        entries changed since the last save are serialized again, an
+        editable json document takes the file as its own
+
+        :param path: str. path of the json file, ask the user if not specified
+        """
+        if not path:
+            path, _ = QtWidgets.QFileDialog.getSaveFileName(
+                self, 'Save As', '', 'JSON (*.json);;All Files (*)')
+            if not path:
+                return
+
+        tab = self._tab
+        if tab.lines is not None and path.lower().endswith(LINES_EXTENSIONS):
+            try:
+                tab.lines.save(path)
+            except (IOError, OSError, TypeError, ValueError) as error:
+                self.statusBar().showMessage(
+                    'Saving failed: {}'.format(error))
+                return
+            self.statusBar().showMessage('Saved {}'.format(path), 3000)
+            return
+
+        if not tab.save(path):
+            self.statusBar().showMessage(
+                'Saving failed: the document is not completely loaded')
+            return
+        self.statusBar().showMessage('Saving {}'.format(path))
+
+    def setAutosave(self, enabled):
+        """
+        Save the modified documents to their json file periodically, see
+        QJsonTab.autosaveInterval
+
+        :param enabled: bool.
+        """
+        for tab in self.ui_tab_widget.tabs():
+            tab.setAutosave(enabled)
+
+    def newTab(self, model=None, title='untitled', path=None, tab=None):
+        """
+        Show a document in a new tab, the trees of the idle tabs are
+        evicted above the memory budget of the tabs
+
+        :param model: QJsonModel. model of the document, ignored with a tab
+        :param title: str. title of the tab
+        :param path: str. path of the file of the document, if any
+        :param tab: QJsonTab. document, created from the model if not
+                    specified
+        :return: QJsonTab. document
+        """
+        if tab is None:
+            tab = QJsonTab(model, path)
+        # lambdas, so the profiler records the calls once enabled
+        tab.proxyModel().filterApplied.connect(
+            lambda count: self._onFilterApplied(count, tab))
+        tab.saver().saved.connect(lambda path: self._onSaved(tab, path))
+        tab.saver().failed.connect(
+            lambda message: self.statusBar().showMessage(
+                'Saving failed: {}'.format(message)))
+        tab.setAutosave(self.ui_autosave_action.isChecked())
+        self._connectModel(tab)
+        self.ui_tab_widget.addDocument(tab, title)
+        return tab
+
+    def closeTab(self, index):
+        """
+        Close a tab, its loading is stopped, a new tab is created in place
+        of the last one
+
+        :param index: int. index of the tab
+        """
+        self.ui_tab_widget.closeDocument(index)
+        if not self.ui_tab_widget.count():
+            self.newTab(QJsonModel(QJsonNode.load(dict(), lazy=True)))
+
+    def setSchema(self, path=None):
+        """
+        Validate the document of the current tab against a JSON Schema,
+        the errors show in the tree view and the schema errors panel
+
+        :param path: str. path of the schema file, ask the user if not
+                     specified
+        """
+        if not path:
+            path, _ = QtWidgets.QFileDialog.getOpenFileName(
+                self, 'Set Schema', '', 'JSON Schema (*.json);;All Files (*)')
+            if not path:
+                return
+
+        from jsonViewer.qjsonschema import QJsonSchema, QJsonValidator
+
+        try:
+            schema = QJsonSchema.load(path)
+        except (IOError, OSError, ValueError) as error:
+            self.statusBar().showMessage('Invalid schema: {}'.format(error))
+            return
+
+        tab = self._tab
+        validator = tab.validator()
+        if validator is None:
+            validator = QJsonValidator(tab.model(), schema, tab)
+            validator.failed.connect(
+                lambda message: self.statusBar().showMessage(
+                    'Validation failed: {}'.format(message)))
+            tab.setValidator(validator)
+        else:
+            validator.setSchema(schema)
+        self.showErrors()
+
+    def clearSchema(self):
+        """
+        Stop validating the document of the current tab
+        """
+        validator = self._tab.validator()
+        if validator is not None:
+            validator.setSchema(None)
+
+    def showErrors(self):
+        """
+        Show the schema errors panel, listing the errors of the current tab
+        """
+        if self.ui_errors_dock is None:
+            from jsonViewer.qjsonschema import QJsonErrorPanel
+
+            self.ui_errors_dock = QJsonErrorPanel(parent=self)
+            self.ui_errors_dock.pathActivated.connect(
+                lambda path: self._jumpToError(path))
+            self.addDockWidget(
+                QtCore.Qt.BottomDockWidgetArea, self.ui_errors_dock)
+        self.ui_errors_dock.setValidator(self._tab.validator())
+        self.ui_errors_dock.show()
+        self.ui_errors_dock.raise_()
+
+    def showProfiler(self):
+        """
+        Show the profiler panel, the profiler records the calls once
+        turned on from it
+        """
+        if self.ui_profiler_dock is None:
+            from jsonViewer.qjsonprofile import \
+                QJsonProfiler, QJsonProfilerPanel
+
+            profiler = QJsonProfiler.instance()
+            profiler.register(MainWindow, PROFILED_METHODS)
+            if self._highlighter is not None:
+                profiler.register(type(self._highlighter), ('highlightBlock',))
+            self.ui_profiler_dock = QJsonProfilerPanel(profiler, self)
+            self.addDockWidget(
+                QtCore.Qt.BottomDockWidgetArea, self.ui_profiler_dock)
+        self.ui_profiler_dock.show()
+        self.ui_profiler_dock.raise_()
+
+    def cancelLoad(self):
+        """
+        Stop the file loading of the current tab, entries already loaded
+        are kept
+        """
+        loader = self._tab.loader
+        if loader and loader.isRunning():
+            loader.cancel()
+            loader.wait()
+            self.statusBar().showMessage('Loading cancelled')
+
+    def closeEvent(self, event):
+        """
+        Override: stop the loadings, wait for the saves and remove the
+        evicted trees
+        """
+        while self.ui_tab_widget.count():
+            self.ui_tab_widget.closeDocument(0)
+        super(MainWindow, self).closeEvent(event)
+
+    def _setRoot(self, tab, root):
+        model = QJsonModel(root)
+        tab.setModel(model)
+        self._connectModel(tab)
+        if tab is self._tab:
+            self._bindTab(tab)
+
+    def _setHighlighter(self):
+        # syntax highlighting is optional
+        try:
+            from codeEditor.highlighter.jsonHighlight import JsonHighlighter
+        except ImportError:
+            return
+        self._highlighter = JsonHighlighter(self.ui_view_edit.document())
+        if self.ui_profiler_dock is not None:
+            self.ui_profiler_dock.profiler().register(
+                JsonHighlighter, ('highlightBlock',))
+
+    def _connectModel(self, tab):
+        model = tab.model()
+        model.history().changed.connect(
+            lambda: self._updateHistoryActions())
+        model.rowsInserted.connect(lambda: self._checkFileError(tab))
+
+    def _onTabChanged(self):
+        tab = self.ui_tab_widget.currentWidget()
+        if tab is not None:
+            self._bindTab(tab)
+
+    def _bindTab(self, tab):
+        self._tab = tab
+        self._model = tab.model()
+        self._proxyModel = tab.proxyModel()
+        self.ui_tree_view = tab.view()
+
+        readOnly = self._model.isReadOnly()
+        self._textSync.setModel(self._model)
+        self.ui_update_btn.setEnabled(not readOnly and tab.lines is None)
+        self._updateHistoryActions()
+
+        self.ui_filter_edit.blockSignals(True)
+        self.ui_filter_edit.setText(self._proxyModel.filterText())
+        self.ui_filter_edit.blockSignals(False)
+
+        loading = tab.isLoading()
+        self.ui_load_progress.setVisible(loading)
+        self.ui_cancel_btn.setVisible(loading)
+
+        if self.ui_errors_dock is not None:
+            self.ui_errors_dock.setValidator(tab.validator())
+
+    def _checkFileError(self, tab):
+        # mapped files are only indexed or parsed as the rows are fetched
+        if tab.file is not None:
+            error = tab.file.error
+        elif tab.lines is not None:
+            error = tab.lines.error()
+        else:
+            return
+        if error and tab is self._tab:
+            self.statusBar().showMessage('Malformed file: {}'.format(error))
+
+    def _addLoadedChildren(self, tab, nodes):
+        tab.model().appendChildren(nodes)
+        tab.loader.batchConsumed()
+
+    def _onLoadProgress(self, tab, value):
+        if tab is self._tab:
+            self.ui_load_progress.setValue(value)
+
+    def _onLoadFailed(self, tab, message):
+        tab.loadError = message
+        self.statusBar().showMessage('Loading failed: {}'.format(message))
+
+    def _onLoadFinished(self, tab):
+        if tab is self._tab:
+            self.ui_load_progress.hide()
+            self.ui_cancel_btn.hide()
+        if not tab.loader.isCancelled() and tab.loadError is None:
+            self.statusBar().showMessage('Loaded', 3000)
+            # the loaded tree is the file
+            tab.saver().setModified(False)
+        # the loaded tree counts from now on
+        self.ui_tab_widget.enforceBudget()
+
+    def _onSaved(self, tab, path):
+        if tab.path == path:
+            index = self.ui_tab_widget.indexOf(tab)
+            self.ui_tab_widget.setTabText(index, os.path.basename(path))
+            self.ui_tab_widget.setTabToolTip(index, path)
+        self.statusBar().showMessage('Saved {}'.format(path), 3000)
+
+    def _jumpToError(self, path):
+        # the entry may be filtered out or removed since
+        if not self.ui_tree_view.jumpToPath(path):
+            self.statusBar().showMessage(
+                'Entry not shown: {}'.format(path or '/'), 3000)
+
+    def _updateHistoryActions(self):
+        history = self._model.history()
+        self.ui_undo_action.setEnabled(history.canUndo())
+        self.ui_undo_action.setText(
+            'Undo {}'.format(history.undoText()).strip())
+        self.ui_redo_action.setEnabled(history.canRedo())
+        self.ui_redo_action.setText(
+            'Redo {}'.format(history.redoText()).strip())
+
+    def _onFilterApplied(self, count, tab=None):
+        if tab is not None and tab is not self._tab:
+            return
+        if not self._proxyModel.filterText().strip():
+            self.statusBar().clearMessage()
+            return
+        self.statusBar().showMessage('{} match(es)'.format(count))
+        # reveal the matches when there are few enough, the inside of
+        # matching containers stays collapsed
+        if count <= EXPAND_LIMIT:
+            for index in self._proxyModel.matchParents():
+                self.ui_tree_view.expand(index)
 
-        self._model = QJsonModel(root)
-        self._proxyModel.setSourceModel(self._model)
+    def _showOpened(self, path):
+        # a file already opened is shown rather than read again
+        tab = self.ui_tab_widget.findPath(path)
+        if tab is None:
+            return False
+        self.ui_tab_widget.setCurrentWidget(tab)
+        return True
 
     def updateBrowser(self):
-        self.ui_view_edit.clear()
-        output = self.ui_tree_view.asDict(None)
-        jsonDict = json.dumps(output, indent=4, sort_keys=True)
-        self.ui_view_edit.setPlainText(str(jsonDict))
+        # only the entries changed since the last update are written again,
+        # unless the text was edited
+        self._textSync.update()
 
     def pprint(self):
         output = self.ui_tree_view.asDict(self.ui_tree_view.getSelectedIndices())
-        jsonDict = json.dumps(output, indent=4, sort_keys=True)
+        jsonDict = qjsoncodec.dumps(output, indent=4, sortKeys=True)
 
         print(jsonDict)
 
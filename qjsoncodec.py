@@ -0,0 +1,259 @@
+"""
+Json parsing and serialization through the fastest library installed
+
+The backend is picked at import time among BACKENDS, the json module is
+always available as the fallback. The text accepted and the values read
+are the same whatever the backend: input a backend rejects or reads
+differently (NaN, integers beyond 64 bits) is parsed by the json module,
+and parse() also accepts python literals, as typed in the raw view or
+dropped from python code.
+
+The fast backends write compact utf-8 text, not escaped to ascii. Values
+they cannot write or would write differently (orjson writes NaN and
+infinite floats as null), and indentations other than 2 spaces for orjson,
+are written by the json module in the same format, so the text only
+depends on the backend, not on the value.
+
+The incremental interfaces of the streaming reader and writer only exist
+in the json module, rawDecode(), encoder() and encodeString() expose them,
+every parse and serialization goes through this module.
+"""
+
+
+import json
+
+# encode a string the way json.dumps() does, quoted and escaped to ascii,
+# the function of the json module is called as it is on every string
+try:
+    from json.encoder import encode_basestring_ascii as encodeString
+except ImportError:
+    encodeString = json.encoder.py_encode_basestring_ascii
+
+
+# in order of preference
+BACKENDS = ('orjson', 'simdjson', 'ujson', 'json')
+# digits to '0' and other bytes to ' ', to find runs of digits with a
+# substring search, faster than a regular expression
+DIGITS = bytes(bytearray(48 if 48 <= byte <= 57 else 32
+                         for byte in range(256)))
+# run of digits that may be an integer beyond 64 bits, orjson reads them
+# as floats (from -9223372036854775809, 19 digits)
+LONG_DIGITS = b'0' * 19
+INFINITY = float('inf')
+
+_decoder = json.JSONDecoder()
+
+
+def _jsonDumps(value, indent, sortKeys, compact=False):
+    """
+    Serialize a value with the json module, see dumps()
+
+    :param compact: bool. write the format of the fast backends, without
+                    space after the item separators and not escaped to ascii
+    """
+    if not compact:
+        return json.dumps(value, indent=indent, sort_keys=sortKeys)
+    separators = (',', ':') if indent is None else (',', ': ')
+    return json.dumps(value, indent=indent, sort_keys=sortKeys,
+                      separators=separators, ensure_ascii=False)
+
+
+def _hasNonFinite(value):
+    """
+    Check if a value holds NaN or infinite floats, keys aside
+
+    :param value: mixed. value
+    :return: bool.
+    """
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if value != value or value == INFINITY or value == -INFINITY:
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+
+def _loadBackend(name):
+    """
+    Import a backend library
+
+    :param name: str. backend name, one of BACKENDS
+    :return: tuple. (loads function, dumps function or None when
+             writing is left to the json module)
+    """
+    if name == 'orjson':
+        import orjson
+
+        def loads(text):
+            if not isinstance(text, bytes):
+                text = text.encode('utf-8')
+            if LONG_DIGITS in text.translate(DIGITS):
+                return json.loads(text)
+            return orjson.loads(text)
+
+        def dumps(value, indent, sortKeys):
+            if indent not in (None, 2):
+                return _jsonDumps(value, indent, sortKeys, compact=True)
+            option = orjson.OPT_NON_STR_KEYS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            if sortKeys:
+                option |= orjson.OPT_SORT_KEYS
+            text = orjson.dumps(value, option=option)
+            # NaN and infinite floats were written as null, only a text
+            # holding null is checked for them
+            if b'null' in text and _hasNonFinite(value):
+                return _jsonDumps(value, indent, sortKeys, compact=True)
+            return text.decode('utf-8')
+        return loads, dumps
+
+    elif name == 'simdjson':
+        import simdjson
+        return simdjson.loads, None
+
+    elif name == 'ujson':
+        import ujson
+
+        def dumps(value, indent, sortKeys):
+            if isinstance(indent, str):
+                return _jsonDumps(value, indent, sortKeys, compact=True)
+            return ujson.dumps(value, indent=indent or 0,
+                               sort_keys=sortKeys, ensure_ascii=False)
+        return ujson.loads, dumps
+
+    elif name == 'json':
+        return json.loads, None
+
+    raise ValueError('Unknown json backend: {}'.format(name))
+
+
+def setBackend(name=None):
+    """
+    Switch the backend
+
+    :param name: str. backend name, the first one installed if not specified
+    :raise ImportError: the backend is not installed
+    """
+    global _backend, _loads, _dumps
+
+    if name is None:
+        for name in BACKENDS:
+            try:
+                _loads, _dumps = _loadBackend(name)
+            except ImportError:
+                continue
+            break
+    else:
+        _loads, _dumps = _loadBackend(name)
+    _backend = name
+
+
+def backend():
+    """
+    Get the name of the current backend
+
+    :return: str. backend name
+    """
+    return _backend
+
+
+def available():
+    """
+    Get the names of the backends installed
+
+    :return: list of str. backend names
+    """
+    names = list()
+    for name in BACKENDS:
+        try:
+            _loadBackend(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def loads(text):
+    """
+    Parse json text
+
+    :param text: str or bytes. json text, bytes are read as utf-8
+    :return: mixed. value
+    :raise ValueError: the text is not valid json
+    """
+    try:
+        return _loads(text)
+    except (ValueError, OverflowError):
+        if _loads is json.loads:
+            raise
+    # the json module accepts more: NaN, Infinity and big integers
+    return json.loads(text)
+
+
+def parse(text):
+    """
+    Parse json text, or a python literal
+
+    :param text: str. json or python literal text
+    :return: mixed. value
+    :raise ValueError: or SyntaxError, the text is neither
+    """
+    try:
+        return loads(text)
+    except ValueError:
+        import ast
+        return ast.literal_eval(text)
+
+
+def rawDecode(text, position=0):
+    """
+    Parse the json value starting at a position of a text, with the json
+    module, the text may go on after it
+
+    :param text: str. json text
+    :param position: int. offset of the value, without leading whitespaces
+    :return: tuple. (value, offset of the end of the value)
+    :raise ValueError: the text is not valid json
+    """
+    return _decoder.raw_decode(text, position)
+
+
+def dumps(value, indent=None, sortKeys=False):
+    """
+    Serialize a value to json text
+
+    :param value: mixed. value
+    :param indent: int or str. indentation, None for a single line
+    :param sortKeys: bool. sort dictionary keys
+    :return: str. json text
+    """
+    if _dumps is not None:
+        try:
+            return _dumps(value, indent, sortKeys)
+        except (TypeError, ValueError, OverflowError):
+            # NaN and integers beyond 64 bits for ujson
+            return _jsonDumps(value, indent, sortKeys, compact=True)
+    return _jsonDumps(value, indent, sortKeys)
+
+
+def encoder(indent=None, sortKeys=False):
+    """
+    Get an encoder writing the text of json.dumps() in chunks, with its
+    iterencode() method
+
+    :param indent: int or str. indentation, None for a single line
+    :param sortKeys: bool. sort dictionary keys
+    :return: json.JSONEncoder. encoder
+    """
+    return json.JSONEncoder(indent=indent, sort_keys=sortKeys)
+
+
+_backend = None
+_loads = json.loads
+_dumps = None
+setBackend()
@@ -0,0 +1,546 @@
+"""
+Undo/redo history of a QJsonModel
+
+A command is the list of deltas recorded by one model operation: rows
+inserted, removed or moved, a value or key set, the pending children or
+the value of a node replaced, the root replaced. Deltas hold references
+to the nodes they touch and to the detached subtrees they removed,
+nothing is copied, so the history of a huge document only costs the
+size of what was removed or replaced.
+The memory held by the history is estimated and the oldest commands
+are dropped above memoryLimit
+"""
+
+
+import abc
+import sys
+
+from Qt import QtCore
+
+from .qjsonnode import QJsonNode
+
+
+# estimated bytes of a command, of an entry of a container
+COMMAND_COST = 256
+ENTRY_COST = 96
+
+
+def estimateCost(values, limit):
+    """
+    Estimate the memory held by nodes or raw values, the walk stops once
+    the limit is reached
+
+    :param values: list. QJsonNode or raw values
+    :param limit: int. bytes above which the estimate is not refined
+    :return: int. bytes
+    """
+    cost = 0
+    stack = list(values)
+    while stack and cost <= limit:
+        value = stack.pop()
+        if isinstance(value, QJsonNode):
+            if value.dtype is not dict and value.dtype is not list:
+                cost += ENTRY_COST + _scalarCost(value.value)
+                continue
+            # only the pending items held in memory, the base class does
+            # not read the children of a file to count them
+            pending = [item for _, item in QJsonNode._iterPending(value)]
+            cost += ENTRY_COST * (value.childCount + len(pending))
+            # json text cached by the last save
+            if value._fragment is not None:
+                cost += sys.getsizeof(value._fragment[1])
+            # entries, raw leaves are not wrapped into nodes to be counted
+            stack.extend(value.entry(row) for row in range(value.childCount))
+            stack.extend(pending)
+        elif isinstance(value, dict):
+            cost += ENTRY_COST * len(value)
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            cost += ENTRY_COST * len(value)
+            stack.extend(value)
+        else:
+            cost += _scalarCost(value)
+    return cost
+
+
+def _scalarCost(value):
+    """
+    Estimate the memory of a raw leaf value, shared small values are free
+
+    :param value: mixed. raw value
+    :return: int. bytes
+    """
+    if isinstance(value, str) and len(value) > 1:
+        return sys.getsizeof(value)
+    return 0
+
+
+class QJsonCommand(object):
+    """
+    Deltas recorded by one model operation
+    """
+
+    def __init__(self, text):
+        """
+        Initialization
+
+        :param text: str. name of the operation
+        """
+        self.text = text
+        self.deltas = list()
+        self.cost = COMMAND_COST
+
+    def __len__(self):
+        return len(self.deltas)
+
+    def append(self, delta):
+        """
+        Record a delta
+
+        :param delta: _Delta. change applied to the model
+        """
+        self.deltas.append(delta)
+        self.cost += delta.cost
+
+
+class QJsonHistory(QtCore.QObject):
+    # emitted when commands are pushed, undone, redone or dropped
+    changed = QtCore.Signal()
+
+    # bytes of deltas kept, the oldest commands are dropped above
+    memoryLimit = 64 * 1024 * 1024
+
+    def __init__(self, model):
+        """
+        Initialization
+
+        :param model: QJsonModel. model the commands apply to
+        """
+        super(QJsonHistory, self).__init__(model)
+        self._model = model
+        self._undoCommands = list()
+        self._redoCommands = list()
+        self._memoryUsage = 0
+
+    def canUndo(self):
+        """
+        Custom: check if there is a command to undo
+
+        :return: bool.
+        """
+        return bool(self._undoCommands)
+
+    def canRedo(self):
+        """
+        Custom: check if there is a command to redo
+
+        :return: bool.
+        """
+        return bool(self._redoCommands)
+
+    def undoText(self):
+        """
+        Custom: get the name of the command to undo
+
+        :return: str. empty if there is none
+        """
+        return self._undoCommands[-1].text if self._undoCommands else ''
+
+    def redoText(self):
+        """
+        Custom: get the name of the command to redo
+
+        :return: str. empty if there is none
+        """
+        return self._redoCommands[-1].text if self._redoCommands else ''
+
+    def count(self):
+        """
+        Custom: get the number of commands that can be undone
+
+        :return: int.
+        """
+        return len(self._undoCommands)
+
+    def memoryUsage(self):
+        """
+        Custom: get the estimated memory held by the history
+
+        :return: int. bytes
+        """
+        return self._memoryUsage
+
+    def setMemoryLimit(self, limit):
+        """
+        Custom: set the memory held by the history before the oldest
+        commands are dropped
+
+        :param limit: int. bytes
+        """
+        self.memoryLimit = limit
+        self._evict()
+        self.changed.emit()
+
+    def push(self, command):
+        """
+        Custom: add a command that was just applied, the commands that
+        were undone cannot be redone anymore
+
+        :param command: QJsonCommand. recorded command
+        """
+        for dropped in self._redoCommands:
+            self._memoryUsage -= dropped.cost
+        self._redoCommands = list()
+
+        self._undoCommands.append(command)
+        self._memoryUsage += command.cost
+        self._evict()
+        self.changed.emit()
+
+    def undo(self):
+        """
+        Custom: revert the last command
+        """
+        if not self._undoCommands:
+            return
+        command = self._undoCommands.pop()
+        self._model._replay(command, undo=True)
+        self._redoCommands.append(command)
+        self.changed.emit()
+
+    def redo(self):
+        """
+        Custom: apply again the last command undone
+        """
+        if not self._redoCommands:
+            return
+        command = self._redoCommands.pop()
+        self._model._replay(command, undo=False)
+        self._undoCommands.append(command)
+        self.changed.emit()
+
+    def clear(self):
+        """
+        Custom: drop all the commands
+        """
+        self._undoCommands = list()
+        self._redoCommands = list()
+        self._memoryUsage = 0
+        self.changed.emit()
+
+    def _evict(self):
+        """
+        Drop the oldest commands until the memory limit is met, the last
+        command applied is kept however large, so that it can be undone
+        """
+        commands = self._undoCommands
+        dropped = 0
+        while len(commands) - dropped > 1 \
+                and self._memoryUsage > self.memoryLimit:
+            self._memoryUsage -= commands[dropped].cost
+            dropped += 1
+        if dropped:
+            del commands[:dropped]
+
+        # what is left over is held by the commands to redo, the farthest
+        # first, the next one is kept when there is nothing to undo
+        commands = self._redoCommands
+        kept = 0 if self._undoCommands else 1
+        dropped = 0
+        while len(commands) - dropped > kept \
+                and self._memoryUsage > self.memoryLimit:
+            self._memoryUsage -= commands[dropped].cost
+            dropped += 1
+        if dropped:
+            del commands[:dropped]
+
+
+class _Delta(abc.ABC):
+    """
+    Change applied to a model, that can be reverted and applied again
+    """
+    cost = ENTRY_COST
+
+    @abc.abstractmethod
+    def undo(self, model):
+        """
+        Revert the change
+
+        :param model: QJsonModel. model the change was applied to
+        """
+
+    @abc.abstractmethod
+    def redo(self, model):
+        """
+        Apply the change again
+
+        :param model: QJsonModel. model the change was reverted on
+        """
+
+
+class RowsInserted(_Delta):
+    def __init__(self, parent, position, count):
+        """
+        :param parent: QJsonNode. container node
+        :param position: int. first new row
+        :param count: int. number of rows
+        """
+        self.parent = parent
+        self.position = position
+        self.count = count
+        # detached nodes while undone
+        self.nodes = None
+
+    def undo(self, model):
+        self.nodes = model._removeRows(
+            model._indexOf(self.parent), self.parent,
+            self.position, self.position + self.count - 1)
+
+    def redo(self, model):
+        model._insertRows(model._indexOf(self.parent), self.parent,
+                          self.position, _items(self.parent, self.nodes))
+        self.nodes = None
+
+
+class RowsRemoved(_Delta):
+    def __init__(self, parent, position, nodes, limit):
+        """
+        :param parent: QJsonNode. container node
+        :param position: int. first removed row
+        :param nodes: list of QJsonNode. removed nodes
+        :param limit: int. bytes above which the cost is not refined
+        """
+        self.parent = parent
+        self.position = position
+        self.nodes = nodes
+        self.cost = estimateCost(nodes, limit)
+
+    def undo(self, model):
+        model._insertRows(model._indexOf(self.parent), self.parent,
+                          self.position, _items(self.parent, self.nodes))
+
+    def redo(self, model):
+        model._removeRows(model._indexOf(self.parent), self.parent,
+                          self.position, self.position + len(self.nodes) - 1)
+
+
+class RowsRemovedAt(_Delta):
+    def __init__(self, parent, rows, nodes, limit):
+        """
+        :param parent: QJsonNode. container node
+        :param rows: list of int. sorted removed rows
+        :param nodes: list of QJsonNode. removed nodes
+        :param limit: int. bytes above which the cost is not refined
+        """
+        self.parent = parent
+        self.rows = rows
+        self.nodes = nodes
+        self.cost = estimateCost(nodes, limit)
+
+    def undo(self, model):
+        parent = model._indexOf(self.parent)
+        offset = 0
+        # from the first range so the rows before are already back
+        for first, last in rowRanges(self.rows):
+            count = last - first + 1
+            model._insertRows(parent, self.parent, first, _items(
+                self.parent, self.nodes[offset:offset + count]))
+            offset += count
+
+    def redo(self, model):
+        model._removeScattered(model._indexOf(self.parent), self.parent,
+                               self.rows, rowRanges(self.rows))
+
+
+class RowsMoved(_Delta):
+    def __init__(self, source, first, destination, position, nodes, keys):
+        """
+        :param source: QJsonNode. source container node
+        :param first: int. first row before the move
+        :param destination: QJsonNode. destination container node
+        :param position: int. first row after the move
+        :param nodes: list of QJsonNode. moved nodes
+        :param keys: list of str. keys of the nodes before the move, the
+                     keys in a list are lost once moved to a dictionary
+        """
+        self.source = source
+        self.first = first
+        self.count = len(nodes)
+        self.destination = destination
+        self.position = position
+        self.keys = keys
+        self.newKeys = [node.key for node in nodes]
+        self.cost = ENTRY_COST * (1 + self.count)
+
+    def undo(self, model):
+        self._move(model, self.destination, self.position,
+                   self.source, self.first, self.keys)
+
+    def redo(self, model):
+        self._move(model, self.source, self.first,
+                   self.destination, self.position, self.newKeys)
+
+    def _move(self, model, source, first, destination, position, keys):
+        """
+        Move the rows so that they start at the position afterwards
+        """
+        if source is destination and position > first:
+            # the destination row counts the moved rows
+            position += self.count
+        model._moveRows(model._indexOf(source), source,
+                        first, first + self.count - 1,
+                        model._indexOf(destination), destination, position,
+                        keys)
+
+
+class _Toggle(_Delta):
+    """
+    Change that is reverted and applied again by swapping a state
+    """
+
+    def undo(self, model):
+        self.swap(model)
+
+    def redo(self, model):
+        self.swap(model)
+
+    @abc.abstractmethod
+    def swap(self, model):
+        """
+        Swap the state held with the state of the model
+
+        :param model: QJsonModel. model the change was applied to
+        """
+
+
+class DataChanged(_Toggle):
+    def __init__(self, node, column, value):
+        """
+        :param node: QJsonNode. edited node
+        :param column: int. 0 for the key, 1 for the value
+        :param value: mixed. key or value to swap back
+        """
+        self.node = node
+        self.column = column
+        self.value = value
+        self.cost = ENTRY_COST + _scalarCost(value)
+
+    def swap(self, model):
+        self.value = model._setNodeData(self.node, self.column, self.value)
+
+
+class LeafChanged(_Toggle):
+    def __init__(self, parent, row, value):
+        """
+        :param parent: QJsonNode. container node
+        :param row: int. row of the leaf
+        :param value: mixed. raw value to swap back
+        """
+        self.parent = parent
+        self.row = row
+        self.value = value
+        self.cost = ENTRY_COST + _scalarCost(value)
+
+    def swap(self, model):
+        self.value = model._setLeaf(model._indexOf(self.parent), self.parent,
+                                    self.row, self.value)
+
+
+class PendingChanged(_Toggle):
+    def __init__(self, node, count, items, limit):
+        """
+        :param node: QJsonNode. container node
+        :param count: int. number of rows before the pending children
+        :param items: list. pending items to swap back
+        :param limit: int. bytes above which the cost is not refined
+        """
+        self.node = node
+        self.count = count
+        self.items = items
+        # number of the pending children that were fetched
+        self.fetched = 0
+        self.cost = estimateCost(
+            [item for _, item in _pairs(node.dtype, items)], limit)
+
+    def swap(self, model):
+        self.items, self.fetched = model._swapPending(
+            self.node, self.count, self.items, self.fetched)
+
+
+class NodeReset(_Toggle):
+    def __init__(self, node, dtype, content, fetched, limit):
+        """
+        :param node: QJsonNode. node in a container
+        :param dtype: type. value type to swap back
+        :param content: mixed. leaf value or pending items to swap back
+        :param fetched: int. number of the children that were created
+        :param limit: int. bytes above which the cost is not refined
+        """
+        self.node = node
+        self.dtype = dtype
+        self.content = content
+        self.fetched = fetched
+        if dtype is dict or dtype is list:
+            self.cost = estimateCost(
+                [item for _, item in _pairs(dtype, content)], limit)
+        else:
+            self.cost = ENTRY_COST + _scalarCost(content)
+
+    def swap(self, model):
+        self.dtype, self.content, self.fetched = model._resetNode(
+            self.node, self.dtype, self.content, self.fetched)
+
+
+class RootChanged(_Toggle):
+    def __init__(self, root, limit):
+        """
+        :param root: QJsonNode. root node to swap back
+        :param limit: int. bytes above which the cost is not refined
+        """
+        self.root = root
+        self.cost = estimateCost([root], limit)
+
+    def swap(self, model):
+        self.root = model._setRootNode(self.root)
+
+
+def _items(parent, nodes):
+    """
+    Get the insertion items of detached nodes
+
+    :param parent: QJsonNode. container node
+    :param nodes: list of QJsonNode. detached nodes with their key
+    :return: list. (key, node) pairs for a dictionary, nodes for a list
+    """
+    if parent.dtype is dict:
+        return [(node.key, node) for node in nodes]
+    return list(nodes)
+
+
+def _pairs(dtype, items):
+    """
+    Get pending items as (key, value) pairs
+
+    :param dtype: type. dict or list
+    :param items: list. pending items
+    :return: list of (key, value)
+    """
+    if dtype is dict:
+        return items
+    return [(None, item) for item in items]
+
+
+def rowRanges(rows):
+    """
+    Group sorted rows into contiguous ranges
+
+    :param rows: list of int. sorted rows
+    :return: list of [first, last]
+    """
+    ranges = list()
+    for row in rows:
+        if ranges and ranges[-1][1] == row - 1:
+            ranges[-1][1] = row
+        else:
+            ranges.append([row, row])
+    return ranges
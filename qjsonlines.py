@@ -0,0 +1,775 @@
+"""
+JSON Lines (NDJSON) documents, one json value per line
+
+The file is memory-mapped and the byte range of every record is indexed
+in a single pass, each record is shown as a top-level row of a list.
+A record is only parsed when its row is expanded, fetched or searched,
+and the parsed records are kept in a bounded LRU, the least recently
+used ones are unloaded back to their line.
+
+Saving rewrites in place the lines of the edited records when the new
+text fits in them, the line is padded with spaces and the new lines are
+written to a journal first, replayed when the file is opened again after
+an interrupted save. Otherwise a new file is streamed, the lines of the
+unchanged records are copied as they are, with their line ending
+"""
+
+
+import array
+import collections
+import io
+import mmap
+import os
+import re
+import struct
+import weakref
+import zlib
+
+from Qt import QtCore
+
+from . import qjsoncodec, qjsonwriter
+from .qjsonnode import QJsonNode
+from .qjsonmodel import QJsonModel
+
+
+# a line holding something else than whitespaces
+LINE = re.compile(br'[^\S\n]*\S[^\n]*')
+OPENINGS = {b'{': dict, b'[': list}
+# header of the journal of an in-place save, followed by the
+# (offset, length, text) of every line and the crc32 of the lines
+JOURNAL = b'QJSONLINES1\n'
+PATCH = struct.Struct('<qq')
+CHECKSUM = struct.Struct('<I')
+
+
+class QJsonLinesFile(object):
+    """
+    Memory map of a JSON Lines file with the byte range of its records
+    """
+
+    def __init__(self, path):
+        """
+        Initialization
+
+        :param path: str. path of the file
+        """
+        self.recover(path)
+        self._path = path
+        self._buffer = b''
+        with io.open(path, 'rb') as stream:
+            if os.fstat(stream.fileno()).st_size:
+                # the map keeps its own handle of the file
+                self._buffer = mmap.mmap(
+                    stream.fileno(), 0, access=mmap.ACCESS_READ)
+
+        # blank lines are not records
+        self._starts = array.array('q')
+        self._ends = array.array('q')
+        for match in LINE.finditer(self._buffer):
+            self._starts.append(match.start())
+            self._ends.append(match.end())
+
+        # first malformed record met while parsing
+        self.error = None
+        # record nodes reading the file
+        self._nodes = weakref.WeakSet()
+
+    @staticmethod
+    def recover(path):
+        """
+        Finish the in-place save interrupted while writing a file, a
+        journal left incomplete is discarded, the file was not touched
+
+        :param path: str. path of the file
+        """
+        journal = path + '.journal'
+        if not os.path.exists(journal):
+            return
+        with io.open(journal, 'rb') as stream:
+            data = stream.read()
+
+        body = data[len(JOURNAL):-CHECKSUM.size]
+        if data.startswith(JOURNAL) \
+                and len(data) >= len(JOURNAL) + CHECKSUM.size \
+                and CHECKSUM.unpack(data[-CHECKSUM.size:])[0] \
+                == zlib.crc32(body):
+            lines = list()
+            offset = 0
+            while offset < len(body):
+                start, length = PATCH.unpack_from(body, offset)
+                offset += PATCH.size
+                lines.append((start, body[offset:offset + length]))
+                offset += length
+            QJsonLinesFile._write(path, lines)
+        os.remove(journal)
+
+    @staticmethod
+    def _write(path, lines):
+        """
+        Write lines at their offset and flush them to the disk
+
+        :param path: str. path of the file
+        :param lines: list of (int, bytes). offset and text of the lines
+        """
+        with io.open(path, 'r+b') as stream:
+            for start, text in lines:
+                stream.seek(start)
+                stream.write(text)
+            stream.flush()
+            os.fsync(stream.fileno())
+
+    @property
+    def path(self):
+        """
+        Get the path of the file
+        """
+        return self._path
+
+    @property
+    def count(self):
+        """
+        Get the number of records
+        """
+        return len(self._starts)
+
+    @property
+    def newline(self):
+        """
+        Get the line ending of the file, the one of its first record
+        """
+        if not self.count:
+            return b'\n'
+        return self.ending(0)
+
+    def span(self, record):
+        """
+        Get the byte range of a record
+
+        :param record: int. record number
+        :return: tuple. (start, end) offsets, trailing whitespaces included
+        but not the carriage return of the line ending
+        """
+        end = self._ends[record]
+        if self._buffer[end - 1:end] == b'\r':
+            end -= 1
+        return self._starts[record], end
+
+    def ending(self, record):
+        """
+        Get the line ending of a record
+
+        :param record: int. record number
+        :return: bytes. b'\\r\\n' or b'\\n'
+        """
+        end = self._ends[record]
+        if self._buffer[end - 1:end] == b'\r':
+            return b'\r\n'
+        return b'\n'
+
+    def line(self, record):
+        """
+        Get the text of a record
+
+        :param record: int. record number
+        :return: bytes. json text
+        """
+        return self._buffer[self._starts[record]:self._ends[record]].strip()
+
+    def parse(self, record):
+        """
+        Parse a record, a malformed one is reported by the error
+        attribute and read as None
+
+        :param record: int. record number
+        :return: mixed. value
+        """
+        try:
+            return qjsoncodec.loads(self.line(record))
+        except ValueError as error:
+            if self.error is None:
+                self.error = '{} (record {}, around byte {})'.format(
+                    error, record + 1, self._starts[record])
+            return None
+
+    def patch(self, lines):
+        """
+        Rewrite lines in place, they are written to a journal first so
+        that an interrupted save is finished by recover()
+
+        :param lines: list of (int, bytes). offset and text of the lines,
+        each text is as long as the line it replaces
+        """
+        body = b''.join(
+            PATCH.pack(start, len(text)) + text for start, text in lines)
+        journal = self._path + '.journal'
+        with io.open(journal, 'wb') as stream:
+            stream.write(JOURNAL + body + CHECKSUM.pack(zlib.crc32(body)))
+            stream.flush()
+            os.fsync(stream.fileno())
+        self._write(self._path, lines)
+        os.remove(journal)
+
+    def attach(self, node):
+        """
+        Keep track of a record node reading the file
+
+        :param node: QJsonRecordNode. node
+        """
+        self._nodes.add(node)
+
+    def detach(self):
+        """
+        Parse the record nodes still reading the file, they no longer
+        need it once it is closed
+        """
+        for node in list(self._nodes):
+            if node._source is self:
+                node.detach()
+        self._nodes = weakref.WeakSet()
+
+    def close(self):
+        """
+        Release the map of the file, the record nodes still reading it
+        must not be used anymore, see detach()
+        """
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        self._buffer = b''
+
+
+class QJsonRecordNode(QJsonNode):
+    """
+    Node of a record of a QJsonLinesFile, a container record is parsed
+    the first time its children are needed, without a source it behaves
+    as a regular QJsonNode
+    """
+
+    __slots__ = (
+        '_source',
+        '_record',
+        '_parsed',
+        '__weakref__',
+    )
+
+    def __init__(self, parent=None):
+        """
+        Initialization
+
+        :param parent: QJsonNode. parent of the current node
+        """
+        super(QJsonRecordNode, self).__init__(parent)
+        self._source = None
+        self._record = 0
+        self._parsed = True
+
+    @classmethod
+    def fromRecord(cls, source, record, parent=None):
+        """
+        Create the node of a record, only a leaf or an empty container
+        is parsed right away
+
+        :param source: QJsonLinesFile. file
+        :param record: int. record number
+        :param parent: QJsonNode. parent of the node
+        :return: QJsonRecordNode. node
+        """
+        node = cls(parent)
+        node._source = source
+        node._record = record
+        source.attach(node)
+
+        line = source.line(record)
+        dtype = OPENINGS.get(line[:1])
+        if dtype is None or not line[1:-1].strip():
+            node.resetValue(source.parse(record))
+        else:
+            node._dtype = dtype
+            node.unload()
+        return node
+
+    @property
+    def record(self):
+        """
+        Get the record number of the node in its file
+        """
+        return self._record
+
+    def canUnload(self):
+        """
+        Override: a parsed container record
+        """
+        return self._source is not None and self._parsed \
+            and (self._dtype is dict or self._dtype is list)
+
+    def unload(self):
+        """
+        Override: the record is parsed again on demand
+        """
+        self._children = list()
+        self._keys = list() if self._dtype is dict else None
+        self._keyMap = None
+        # pending items are kept while the record is not parsed
+        self._pending = [list(), 0]
+        self._parsed = False
+
+    def detach(self):
+        """
+        Custom: parse the record, the node no longer reads its file
+        """
+        self._parse()
+        self._source = None
+
+    def resetValue(self, value):
+        """
+        Extend: the record no longer needs parsing
+        """
+        self._parsed = True
+        super(QJsonRecordNode, self).resetValue(value)
+
+    @property
+    def pendingCount(self):
+        """
+        Override: parse the record first
+        """
+        self._parse()
+        return super(QJsonRecordNode, self).pendingCount
+
+    def pendingItems(self):
+        """
+        Override: parse the record first
+        """
+        self._parse()
+        return super(QJsonRecordNode, self).pendingItems()
+
+    def canFetchMore(self):
+        """
+        Override: a record not parsed yet is not empty
+        """
+        return not self._parsed \
+            or super(QJsonRecordNode, self).canFetchMore()
+
+    def fetchMore(self, count, lazy=True):
+        """
+        Override: parse the record first
+        """
+        self._parse()
+        return super(QJsonRecordNode, self).fetchMore(count, lazy)
+
+    def setPending(self, items):
+        """
+        Override: parse the record first
+        """
+        self._parse()
+        return super(QJsonRecordNode, self).setPending(items)
+
+    def addPending(self, items):
+        """
+        Override: parse the record first
+        """
+        self._parse()
+        super(QJsonRecordNode, self).addPending(items)
+
+    def _parse(self):
+        """
+        Parse the record into pending children, a malformed record
+        is an empty container
+        """
+        if self._parsed:
+            return
+
+        value = self._source.parse(self._record)
+        if not isinstance(value, self._dtype):
+            value = self._dtype()
+        self.resetValue(value)
+
+    def _iterPending(self):
+        """
+        Extend: a record not parsed yet is read without being kept
+        """
+        if self._parsed:
+            for item in super(QJsonRecordNode, self)._iterPending():
+                yield item
+            return
+
+        value = self._source.parse(self._record)
+        if isinstance(value, dict):
+            for item in value.items():
+                yield item
+        elif isinstance(value, list):
+            for item in value:
+                yield None, item
+
+
+class QJsonLinesNode(QJsonNode):
+    """
+    Root list node of a QJsonLinesFile, the record nodes are created as
+    they are fetched, without a source it behaves as a regular QJsonNode
+    """
+
+    __slots__ = (
+        '_source',
+        '_next',
+    )
+
+    def __init__(self, parent=None):
+        """
+        Initialization
+
+        :param parent: QJsonNode. parent of the current node
+        """
+        super(QJsonLinesNode, self).__init__(parent)
+        self._source = None
+        # number of the next record to create a node for
+        self._next = 0
+
+    @classmethod
+    def fromFile(cls, source):
+        """
+        Create the root node of a file
+
+        :param source: QJsonLinesFile. file
+        :return: QJsonLinesNode. root node
+        """
+        node = cls()
+        node._key = 'root'
+        node._dtype = list
+        node._children = list()
+        node.follow(source, 0)
+        return node
+
+    def follow(self, source, record):
+        """
+        Create the remaining children from the records of a file
+
+        :param source: QJsonLinesFile. file
+        :param record: int. number of the first record not fetched yet
+        """
+        self._source = source
+        self._next = record
+        if self._pending is None and record < source.count:
+            # pending items are kept while the file has records left
+            self._pending = [list(), 0]
+
+    def resetValue(self, value):
+        """
+        Extend: the node no longer follows the file
+        """
+        self._source = None
+        super(QJsonLinesNode, self).resetValue(value)
+
+    @property
+    def pendingCount(self):
+        """
+        Override: the records not created yet are pending as well
+        """
+        return super(QJsonLinesNode, self).pendingCount + self._remaining()
+
+    def pendingItems(self):
+        """
+        Override: create every remaining record node
+        """
+        self._createRecords()
+        return super(QJsonLinesNode, self).pendingItems()
+
+    def fetchMore(self, count, lazy=True):
+        """
+        Override: create the next record nodes first
+        """
+        self._createRecords(count)
+        count = super(QJsonLinesNode, self).fetchMore(count, lazy)
+        if self._pending is None and self._remaining():
+            self._pending = [list(), 0]
+        return count
+
+    def setPending(self, items):
+        """
+        Override: the records not fetched yet are replaced as well
+        """
+        self._createRecords()
+        return super(QJsonLinesNode, self).setPending(items)
+
+    def addPending(self, items):
+        """
+        Override: queued after the records of the file
+        """
+        self._createRecords()
+        super(QJsonLinesNode, self).addPending(items)
+
+    def _remaining(self):
+        """
+        Get the number of records without a node yet
+
+        :return: int.
+        """
+        if self._source is None:
+            return 0
+        return self._source.count - self._next
+
+    def _createRecords(self, count=None):
+        """
+        Queue the nodes of the next records as raw pending items
+
+        :param count: int. number of records, None for all of them
+        """
+        remaining = self._remaining()
+        if count is None or count > remaining:
+            count = remaining
+        if not count:
+            return
+
+        if self._pending is None:
+            self._pending = [list(), 0]
+        items = self._pending[0]
+        source = self._source
+        start = self._next
+        for record in range(start, start + count):
+            items.append(QJsonRecordNode.fromRecord(source, record))
+        self._next = start + count
+
+    def _iterPending(self):
+        """
+        Extend: the records not created yet are read as detached nodes
+        """
+        for item in super(QJsonLinesNode, self)._iterPending():
+            yield item
+
+        source = self._source
+        if source is None:
+            return
+        for record in range(self._next, source.count):
+            yield None, QJsonRecordNode.fromRecord(source, record)
+
+
+class QJsonLinesDocument(QtCore.QObject):
+    """
+    Model of a JSON Lines file with the parsed records cache and the
+    edited records to save
+    """
+
+    # number of parsed container records kept
+    cacheSize = 1000
+
+    def __init__(self, path, parent=None):
+        """
+        Initialization
+
+        :param path: str. path of the file
+        :param parent: QObject. parent object
+        """
+        super(QJsonLinesDocument, self).__init__(parent)
+        self._file = QJsonLinesFile(path)
+        self._root = QJsonLinesNode.fromFile(self._file)
+        self._model = QJsonModel(self._root, self)
+        self._model.valueChanged.connect(self._onValueChanged)
+        self._model.rowsInserted.connect(self._onRowsInserted)
+
+        # {record node: None}, the least recently used first
+        self._parsed = collections.OrderedDict()
+        # edited record nodes, never unloaded
+        self._edited = set()
+        # record nodes edited since the last save
+        self._dirty = set()
+        self._modified = False
+
+        self._evictTimer = QtCore.QTimer(self)
+        self._evictTimer.setSingleShot(True)
+        self._evictTimer.setInterval(0)
+        self._evictTimer.timeout.connect(self._evict)
+
+    def path(self):
+        """
+        Custom: get the path of the file
+        """
+        return self._file.path
+
+    def model(self):
+        """
+        Custom: get the model showing the records as a list
+        """
+        return self._model
+
+    def error(self):
+        """
+        Custom: get the first malformed record met, see QJsonLinesFile
+
+        :return: str. error message, None if there is none
+        """
+        return self._file.error
+
+    def close(self):
+        """
+        Custom: release the map of the file, the records are no longer
+        read
+        """
+        self._file.close()
+
+    def isModified(self):
+        """
+        Custom: check if the records changed since the last save
+
+        :return: bool.
+        """
+        return self._modified
+
+    def save(self, path=None):
+        """
+        Custom: write the records, the lines of the edited records are
+        rewritten in place when the rows still follow the lines of the
+        file and every new text fits in its line, otherwise a new file
+        is streamed and replaces the previous one
+
+        :param path: str. path of the file, the current one if not specified
+        :return: bool. whether the file was rewritten in place
+        """
+        current = os.path.abspath(self._file.path)
+        if path is None:
+            path = current
+        path = os.path.abspath(path)
+
+        if path == current:
+            lines = self._inPlaceLines()
+            if lines is not None:
+                self._file.patch(lines)
+                self._dirty = set()
+                self._modified = False
+                return True
+
+        self._stream(path)
+        self._dirty = set()
+        self._modified = False
+        return False
+
+    def _inPlaceLines(self):
+        """
+        Get the text of the edited records with their offset, padded to
+        the length of their line, its line ending is kept
+
+        :return: list of (int, bytes). None when a new file is needed
+        """
+        root = self._root
+        source = self._file
+        children = root._children
+        if root._source is not source or root._next != len(children) \
+                or root.pendingCount != source.count - len(children):
+            return None
+
+        lines = list()
+        for row, entry in enumerate(children):
+            if not isinstance(entry, QJsonRecordNode) \
+                    or entry._source is not source or entry._record != row:
+                return None
+            if entry not in self._dirty:
+                continue
+
+            start, end = source.span(row)
+            text = qjsonwriter.dumps(entry).encode('utf-8')
+            if len(text) > end - start:
+                return None
+            lines.append((start, text.ljust(end - start)))
+        return lines
+
+    def _stream(self, path):
+        """
+        Write every record to a new file replacing the specified one,
+        the lines of the unchanged records are copied, each record keeps
+        its line ending
+
+        :param path: str. path of the file
+        """
+        root = self._root
+        source = self._file
+        temporary = path + '.tmp'
+        with io.open(temporary, 'wb') as stream:
+            for entry in root._children:
+                stream.write(self._recordLine(entry))
+            for _, entry in root._iterPending():
+                stream.write(self._recordLine(entry))
+
+        entries = list(root._children)
+        if root._pending is not None:
+            items, position = root._pending
+            entries.extend(items[position:])
+        # the map is released before the file is replaced, the detached
+        # record nodes are parsed, the others read the new file
+        for entry in entries:
+            if isinstance(entry, QJsonRecordNode) \
+                    and entry._source is source:
+                entry._source = None
+        source.detach()
+        source.close()
+        os.replace(temporary, path)
+
+        self._file = QJsonLinesFile(path)
+        for row, entry in enumerate(entries):
+            if isinstance(entry, QJsonRecordNode):
+                entry._source = self._file
+                entry._record = row
+                self._file.attach(entry)
+        root.follow(self._file, len(entries))
+
+    def _recordLine(self, entry):
+        """
+        Get the line of a top-level entry with its line ending
+
+        :param entry: QJsonNode or mixed. entry of the root node
+        :return: bytes. json text
+        """
+        source = self._file
+        if isinstance(entry, QJsonRecordNode) and entry._source is source:
+            ending = source.ending(entry._record)
+            if entry not in self._dirty:
+                return source.line(entry._record) + ending
+        else:
+            ending = source.newline
+        return qjsonwriter.dumps(entry).encode('utf-8') + ending
+
+    def _topRecord(self, node, row):
+        """
+        Get the top-level entry holding a changed node
+
+        :param node: QJsonNode. node emitted by QJsonModel.valueChanged
+        :param row: int. row of the changed leaf, -1 for the node itself
+        :return: QJsonNode. top-level node, None for the root itself
+        """
+        if node is self._root:
+            if row < 0:
+                return None
+            return self._root.entry(row)
+
+        while node is not None and node.parent is not self._root:
+            node = node.parent
+        return node
+
+    def _onValueChanged(self, node, row):
+        self._modified = True
+        record = self._topRecord(node, row)
+        if isinstance(record, QJsonRecordNode):
+            self._dirty.add(record)
+            self._edited.add(record)
+            self._parsed.pop(record, None)
+
+    def _onRowsInserted(self, parent, first, last):
+        if not parent.isValid():
+            return
+        record = self._topRecord(parent.internalPointer(), -1)
+        if record in self._edited or not isinstance(record, QJsonRecordNode):
+            return
+        self._parsed[record] = None
+        self._parsed.move_to_end(record)
+        if len(self._parsed) > self.cacheSize:
+            self._evictTimer.start()
+
+    def _evict(self):
+        """
+        Unload the least recently used records above the cache size
+        """
+        while len(self._parsed) > self.cacheSize:
+            record, _ = self._parsed.popitem(last=False)
+            # removed or moved records are not unloaded
+            if record.parent is not self._root:
+                continue
+            index = self._model.index(record.row(), 0)
+            if not self._model.unloadChildren(index):
+                # nodes are kept by the search index
+                self._parsed = collections.OrderedDict()
+                return
@@ -0,0 +1,150 @@
+"""
+Background loader building QJsonNode trees from a json file
+
+The file is parsed incrementally on a worker thread, each top-level
+entry of the document is turned into a QJsonNode subtree and handed
+over to the GUI thread in batches, ready for QJsonModel.appendChildren()
+"""
+
+
+import os
+import threading
+import time
+
+from Qt import QtCore
+
+from .qjsonnode import QJsonNode
+from .qjsonstream import JsonEventParser
+
+
+class QJsonLoader(QtCore.QThread):
+    # QJsonNode. empty root node, emitted before any batch
+    rootLoaded = QtCore.Signal(object)
+    # list of QJsonNode. top-level children to add to the root
+    batchReady = QtCore.Signal(object)
+    # int. percentage of the file read
+    progress = QtCore.Signal(int)
+    # str. error message
+    failed = QtCore.Signal(str)
+
+    # minimum time (in seconds) between two batches
+    batchInterval = 0.1
+    # maximum number of nodes in a batch
+    batchSize = 1000
+
+    def __init__(self, path, parent=None):
+        """
+        Initialization
+
+        :param path: str. path of the json file
+        """
+        super(QJsonLoader, self).__init__(parent)
+        self._path = path
+
+        # only one batch is handed over at a time, parsing pauses when the
+        # next batch is full and the GUI is still busy with the previous one
+        self._consumed = threading.Event()
+        self._consumed.set()
+        self._cancelled = False
+
+    def batchConsumed(self):
+        """
+        Custom: notify that the last batch was added to the model,
+        to be called by the receiver of batchReady
+        """
+        self._consumed.set()
+
+    def cancel(self):
+        """
+        Custom: stop loading, nodes already emitted are kept
+        """
+        self._cancelled = True
+        self.requestInterruption()
+
+    def isCancelled(self):
+        """
+        Custom: check if the loading was cancelled, unlike
+        isInterruptionRequested() it is kept after the thread finished
+
+        :return: bool.
+        """
+        return self._cancelled
+
+    def run(self):
+        """
+        Override: parse the file and emit the top-level nodes
+        """
+        try:
+            self._load()
+        except (IOError, OSError, ValueError) as error:
+            self.failed.emit(str(error))
+
+    def _load(self):
+        """
+        Parse the file and emit the nodes in batches
+        """
+        size = os.path.getsize(self._path) or 1
+        percent = -1
+
+        with open(self._path, 'rb') as stream:
+            parser = JsonEventParser(stream, depth=1)
+            root = None
+            key = None
+            batch = list()
+            lastEmit = time.time()
+
+            for event, value in parser:
+                if self.isInterruptionRequested():
+                    return
+
+                if root is None:
+                    if event == 'value':
+                        # the document is a single value
+                        root = QJsonNode.load(value)
+                    else:
+                        root = QJsonNode()
+                        root.key = 'root'
+                        root.dtype = dict if event == 'start_map' else list
+                    self.rootLoaded.emit(root)
+
+                elif event == 'map_key':
+                    key = value
+
+                elif event == 'value':
+                    node = QJsonNode.load(value)
+                    node.key = key
+                    batch.append(node)
+
+                current = parser.bytesRead * 100 // size
+                if current != percent:
+                    percent = current
+                    self.progress.emit(percent)
+
+                if not batch:
+                    continue
+
+                last = event in ('end_map', 'end_array')
+                if len(batch) >= self.batchSize or last:
+                    if not self._waitConsumed():
+                        return
+                elif not self._consumed.is_set() \
+                        or time.time() - lastEmit < self.batchInterval:
+                    continue
+
+                self._consumed.clear()
+                self.batchReady.emit(batch)
+                batch = list()
+                lastEmit = time.time()
+
+        self.progress.emit(100)
+
+    def _waitConsumed(self):
+        """
+        Wait until the last batch is consumed
+
+        :return: bool. False if the loading was cancelled while waiting
+        """
+        while not self._consumed.wait(0.05):
+            if self.isInterruptionRequested():
+                return False
+        return True
@@ -0,0 +1,475 @@
+"""
+Read-only access to a json file through a memory map
+
+The file is never parsed as a whole: a container is indexed by scanning
+its bytes for the offsets of its children, a batch at a time as its rows
+are fetched, nested containers are skipped by bracket matching and only
+indexed when they are expanded in turn. Keys and leaf values are decoded
+from their byte range when their row is fetched, so the memory used
+follows the rows shown rather than the size of the file
+"""
+
+
+import collections
+import io
+import mmap
+import re
+
+from . import qjsoncodec
+from .qjsonnode import QJsonNode
+
+
+WHITESPACE = re.compile(br'[ \t\n\r]*')
+STRING = br'"[^"\\]*(?:\\.[^"\\]*)*"'
+STRING_END = re.compile(STRING, re.DOTALL)
+SCALAR_END = re.compile(br'[^ \t\n\r,:\[\]{}"]+')
+
+# the patterns are unrolled, a run of plain bytes can only be matched
+# one way, so a failed match does not backtrack exponentially
+_PLAIN = br'[^\[\]{}"]*'
+# content of a container without nested containers
+_FLAT = _PLAIN + br'(?:' + STRING + _PLAIN + br')*'
+# content of a container whose children are flat at most
+_NESTED = _PLAIN + br'(?:(?:' + STRING + br'|\[' + _FLAT + br'\]|\{' \
+    + _FLAT + br'\})' + _PLAIN + br')*'
+# run of strings, scalars, punctuation and containers up to two levels
+# deep, up to the next bracket of a deeper container, bounded to keep the
+# regex stack small
+SKIP = re.compile(
+    _PLAIN + br'(?:(?:' + STRING + br'|\[' + _NESTED + br'\]|\{' + _NESTED
+    + br'\})' + _PLAIN + br'){0,1024}',
+    re.DOTALL)
+
+LITERALS = {b'true': True, b'false': False, b'null': None}
+OPENINGS = {b'{': dict, b'[': list}
+
+
+def _error(message, offset):
+    """
+    Raise a ValueError located at an offset
+
+    :param message: str. error message
+    :param offset: int. offset in bytes
+    """
+    raise ValueError('{} (around byte {})'.format(message, offset))
+
+
+class QJsonFile(object):
+    """
+    Memory map of a json file, the source of the QJsonFileNode trees
+    """
+
+    def __init__(self, path):
+        """
+        Initialization
+
+        :param path: str. path of the json file
+        """
+        self._path = path
+        with io.open(path, 'rb') as stream:
+            try:
+                # the map keeps its own handle of the file
+                self._buffer = mmap.mmap(
+                    stream.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError('Empty file: {}'.format(path))
+
+        # first malformed part met while indexing
+        self.error = None
+
+    @property
+    def path(self):
+        """
+        Get the path of the json file
+        """
+        return self._path
+
+    @property
+    def size(self):
+        """
+        Get the size of the json file in bytes
+        """
+        return len(self._buffer)
+
+    @property
+    def buffer(self):
+        """
+        Get the memory map of the json file
+        """
+        return self._buffer
+
+    def root(self):
+        """
+        Create the root node of the document, its children are indexed
+        on demand through fetchMore()
+
+        :return: QJsonFileNode. root node
+        """
+        buffer = self._buffer
+        start = WHITESPACE.match(buffer).end()
+        end = len(buffer)
+        while end > start and buffer[end - 1:end] in b' \t\n\r':
+            end -= 1
+        if start == end:
+            raise ValueError('Empty document: {}'.format(self._path))
+
+        node = QJsonFileNode.fromSpan(self, start, end)
+        node._key = 'root'
+        return node
+
+    def close(self):
+        """
+        Release the memory map, the nodes still following the file
+        cannot read it anymore
+        """
+        self._buffer.close()
+
+    def report(self, message, offset):
+        """
+        Keep the first malformed part met, see the error attribute
+
+        :param message: str. error message
+        :param offset: int. offset in bytes
+        """
+        if self.error is None:
+            self.error = '{} (around byte {})'.format(message, offset)
+
+    def read(self, start, end):
+        """
+        Decode a value from its byte range, a malformed one is reported
+        by the error attribute and read as its text
+
+        :param start: int. offset of the first byte
+        :param end: int. offset after the last byte
+        :return: mixed. value
+        """
+        try:
+            return self.decode(start, end)
+        except ValueError as error:
+            self.report(error, start)
+            return self._buffer[start:end].decode('utf-8', 'replace')
+
+    def decode(self, start, end):
+        """
+        Decode a leaf value, or a whole container, from its byte range
+
+        :param start: int. offset of the first byte
+        :param end: int. offset after the last byte
+        :return: mixed. value
+        """
+        text = self._buffer[start:end]
+        char = text[:1]
+        if char == b'"':
+            if b'\\' not in text:
+                return text[1:-1].decode('utf-8')
+        elif char in OPENINGS:
+            pass
+        elif text in LITERALS:
+            return LITERALS[text]
+        elif b'.' in text or b'e' in text or b'E' in text:
+            return float(text)
+        else:
+            return int(text)
+        return qjsoncodec.loads(text)
+
+    def valueEnd(self, start):
+        """
+        Find the end of the value starting at an offset, nested
+        containers are matched without being decoded
+
+        :param start: int. offset of the first byte
+        :return: int. offset after the last byte
+        """
+        buffer = self._buffer
+        char = buffer[start:start + 1]
+        if char == b'"':
+            match = STRING_END.match(buffer, start)
+            if match is None:
+                _error('Unterminated string', start)
+            return match.end()
+        elif char not in OPENINGS:
+            match = SCALAR_END.match(buffer, start)
+            if match is None:
+                _error('Expecting value', start)
+            return match.end()
+
+        depth = 1
+        position = start + 1
+        while True:
+            position = SKIP.match(buffer, position).end()
+            char = buffer[position:position + 1]
+            if not char:
+                _error('Unterminated container', start)
+            elif char in b'[{':
+                depth += 1
+            elif char in b']}':
+                depth -= 1
+                if not depth:
+                    return position + 1
+            else:
+                # the run was cut by its repeat bound before a string
+                match = STRING_END.match(buffer, position)
+                if match is None:
+                    _error('Unterminated string', position)
+                position = match.end()
+                continue
+            position += 1
+
+    def skip(self, position, separator=None):
+        """
+        Skip the whitespaces and an optional separator after an offset
+
+        :param position: int. offset
+        :param separator: bytes. separator expected after the whitespaces
+        :return: int. offset of the next significant byte
+        """
+        buffer = self._buffer
+        position = WHITESPACE.match(buffer, position).end()
+        if separator is not None:
+            if buffer[position:position + 1] != separator:
+                _error(
+                    "Expecting '{}' delimiter".format(separator.decode()),
+                    position)
+            position = WHITESPACE.match(buffer, position + 1).end()
+        return position
+
+
+class QJsonFileNode(QJsonNode):
+    """
+    Node of a QJsonFile, its children are created from byte ranges
+    indexed as they are fetched, without a source it behaves as a
+    regular QJsonNode
+    """
+
+    __slots__ = (
+        '_source',
+        '_cursor',
+        '_spans',
+    )
+
+    def __init__(self, parent=None):
+        """
+        Initialization
+
+        :param parent: QJsonNode. parent of the current node
+        """
+        super(QJsonFileNode, self).__init__(parent)
+        self._source = None
+        # offset of the next child to index, None once the closing bracket
+        # is reached
+        self._cursor = None
+        # (key range, value range) of a dictionary or value ranges of
+        # a list, indexed but not fetched yet
+        self._spans = None
+
+    @classmethod
+    def fromSpan(cls, source, start, end, parent=None):
+        """
+        Create the node of a value of a file from its byte range
+
+        :param source: QJsonFile. file
+        :param start: int. offset of the first byte
+        :param end: int. offset after the last byte
+        :param parent: QJsonNode. parent of the node
+        :return: QJsonFileNode. node
+        """
+        node = cls(parent)
+        dtype = OPENINGS.get(source.buffer[start:start + 1])
+        if dtype is None:
+            node.resetValue(source.read(start, end))
+            return node
+
+        node._dtype = dtype
+        node._children = list()
+        node._keys = list() if dtype is dict else None
+        node._source = source
+        node._spans = collections.deque()
+
+        position = source.skip(start + 1)
+        if source.buffer[position:position + 1] not in b']}':
+            node._cursor = position
+            # pending items are kept while the file has children left
+            node._pending = [list(), 0]
+        return node
+
+    def resetValue(self, value):
+        """
+        Extend: the node no longer follows the file
+        """
+        self._source = self._cursor = self._spans = None
+        super(QJsonFileNode, self).resetValue(value)
+
+    @property
+    def pendingCount(self):
+        """
+        Override: index every remaining child
+        """
+        self._decodeSpans()
+        return super(QJsonFileNode, self).pendingCount
+
+    def countPending(self, limit=None):
+        """
+        Override: only index up to the limit
+        """
+        if self._spans is None:
+            return super(QJsonFileNode, self).countPending(limit)
+
+        self._index(limit)
+        pending = self._pending
+        count = len(self._spans)
+        if pending is not None:
+            count += len(pending[0]) - pending[1]
+        return count if limit is None else min(count, limit)
+
+    def pendingItems(self):
+        """
+        Override: decode every remaining child
+        """
+        self._decodeSpans()
+        return super(QJsonFileNode, self).pendingItems()
+
+    def canFetchMore(self):
+        """
+        Override: children not indexed yet are pending as well
+        """
+        return bool(self._spans) or self._cursor is not None \
+            or super(QJsonFileNode, self).canFetchMore()
+
+    def fetchMore(self, count, lazy=True):
+        """
+        Override: decode the next children from their byte range first
+        """
+        self._decodeSpans(count)
+        count = super(QJsonFileNode, self).fetchMore(count, lazy)
+        if self._pending is None \
+                and (self._spans or self._cursor is not None):
+            self._pending = [list(), 0]
+        return count
+
+    def setPending(self, items):
+        """
+        Override: the children not fetched yet no longer follow the file
+        """
+        self._decodeSpans()
+        return super(QJsonFileNode, self).setPending(items)
+
+    def addPending(self, items):
+        """
+        Override: queued after the children of the file
+        """
+        self._decodeSpans()
+        super(QJsonFileNode, self).addPending(items)
+
+    def _index(self, limit=None):
+        """
+        Index the byte ranges of the next children, a malformed part
+        ends the container and is reported by QJsonFile.error
+
+        :param limit: int. number of children to have indexed,
+                      None for all of them
+        """
+        source = self._source
+        spans = self._spans
+        cursor = self._cursor
+        isDict = self._dtype is dict
+        try:
+            while cursor is not None \
+                    and (limit is None or len(spans) < limit):
+                if isDict:
+                    keyEnd = source.valueEnd(cursor)
+                    key = (cursor, keyEnd)
+                    cursor = source.skip(keyEnd, b':')
+
+                end = source.valueEnd(cursor)
+                span = (cursor, end)
+                spans.append((key, span) if isDict else span)
+
+                cursor = source.skip(end)
+                char = source.buffer[cursor:cursor + 1]
+                if char == b',':
+                    cursor = source.skip(cursor + 1)
+                elif char and char in b']}':
+                    cursor = None
+                else:
+                    _error("Expecting ',' delimiter", cursor)
+        except ValueError as error:
+            if source.error is None:
+                source.error = str(error)
+            cursor = None
+        self._cursor = cursor
+
+    def _decodeSpans(self, count=None):
+        """
+        Move the next indexed children to the raw pending items,
+        decoded from their byte range
+
+        :param count: int. number of children, None for all of them
+        """
+        spans = self._spans
+        if spans is None:
+            return
+
+        self._index(count)
+        if count is None:
+            count = len(spans)
+        else:
+            count = min(count, len(spans))
+        if not count:
+            return
+
+        if self._pending is None:
+            self._pending = [list(), 0]
+        items = self._pending[0]
+        for _ in range(count):
+            items.append(self._decode(spans.popleft()))
+
+    def _decode(self, span):
+        """
+        Decode a child from its byte range
+
+        :param span: tuple. (key range, value range) of a dictionary or
+                     value range of a list
+        :return: mixed. (key, value) pair or value, a container value
+                 is a lazy QJsonFileNode
+        """
+        if self._dtype is dict:
+            (start, end), span = span
+            if self._source.buffer[start:start + 1] == b'"':
+                key = self._source.read(start, end)
+            else:
+                # only strings are keys, the text is shown as it is
+                self._source.report('Expecting property name', start)
+                key = self._source.buffer[start:end].decode(
+                    'utf-8', 'replace')
+            return key, self._decodeValue(span)
+        return self._decodeValue(span)
+
+    def _decodeValue(self, span):
+        """
+        Decode a value from its byte range
+
+        :param span: tuple. (start, end) offsets
+        :return: mixed. raw leaf value or detached QJsonFileNode
+        """
+        source = self._source
+        start, end = span
+        if source.buffer[start:start + 1] in OPENINGS:
+            return self.fromSpan(source, start, end)
+        return source.read(start, end)
+
+    def _iterPending(self):
+        """
+        Extend: decode the children not indexed yet on the way
+        """
+        for item in super(QJsonFileNode, self)._iterPending():
+            yield item
+
+        if self._spans is None:
+            return
+        self._index()
+        isDict = self._dtype is dict
+        for span in self._spans:
+            if isDict:
+                yield self._decode(span)
+            else:
+                yield None, self._decode(span)
@@ -4,15 +4,39 @@ and providing functionalities to manipulate QJsonNode objects within the model
 """
 
 
-from Qt import QtWidgets, QtCore, QtGui
+import contextlib
 
+from Qt import QtCore
+
+from . import qjsonhistory, qjsonpath, qjsonwriter
 from .qjsonnode import QJsonNode
+from .qjsonsearch import QJsonSearchIndex
 
 
 class QJsonModel(QtCore.QAbstractItemModel):
     sortRole = QtCore.Qt.UserRole
     filterRole = QtCore.Qt.UserRole + 1
 
+    # maximum number of children created per fetchMore() in lazy mode
+    batchSize = 1000
+    # number of row ranges of a parent above which removeIndices()
+    # removes them together as a layout change
+    rangeLimit = 32
+    # number of characters of a cut value shown in its tooltip
+    toolTipLength = 4096
+    # shared by every row, rather than a new size for each request
+    sizeHint = QtCore.QSize(-1, 22)
+
+    # emitted when the json value changes, with a node and the row of
+    # a leaf replaced by another leaf, or -1 when the node changed as a
+    # whole (rows, keys or subtree), fetching rows does not emit it
+    valueChanged = QtCore.Signal(object, int)
+    # emitted after rows are inserted into a container node and before
+    # rows are removed from it by an edit, with the node and the sorted
+    # rows, followed by valueChanged, fetching rows does not emit them
+    entriesInserted = QtCore.Signal(object, object)
+    entriesAboutToBeRemoved = QtCore.Signal(object, object)
+
     def __init__(self, root, parent=None):
         """
         Initialization
@@ -21,6 +45,16 @@ class QJsonModel(QtCore.QAbstractItemModel):
         """
         super(QJsonModel, self).__init__(parent)
         self._rootNode = root
+        # built on the first search, then kept up to date
+        self._searchIndex = None
+
+        self._history = qjsonhistory.QJsonHistory(self)
+        # command recording the deltas of the current operation
+        self._command = None
+        self._replaying = False
+        self._readOnly = False
+        # QJsonValidator showing the schema errors of the entries, if any
+        self._validator = None
 
     def rowCount(self, parent=QtCore.QModelIndex()):
         """
@@ -33,6 +67,167 @@ class QJsonModel(QtCore.QAbstractItemModel):
 
         return parentNode.childCount
 
+    def hasChildren(self, parent=QtCore.QModelIndex()):
+        """
+        Override: report unfetched children of lazy nodes
+        """
+        if parent.column() > 0:
+            return False
+        return self.getNode(parent).hasChildren
+
+    def canFetchMore(self, parent):
+        """
+        Override
+        """
+        if parent.column() > 0:
+            return False
+        return self.getNode(parent).canFetchMore()
+
+    def fetchMore(self, parent):
+        """
+        Override: create the next batch of children for a lazy node
+        """
+        parentNode = self.getNode(parent)
+        self._insertPending(parent, parentNode.countPending(self.batchSize))
+
+    def fetchAll(self, parent=QtCore.QModelIndex()):
+        """
+        Custom: create all the remaining children of a lazy node
+
+        :param parent: QModelIndex. specified index
+        """
+        parentNode = self.getNode(parent)
+        self._insertPending(parent, parentNode.pendingCount)
+
+    def fetchTree(self, parent=QtCore.QModelIndex()):
+        """
+        Custom: create all the remaining children of a lazy node and of
+        its descendants, leaf values stay raw
+
+        :param parent: QModelIndex. specified index
+        """
+        parentNode = self.getNode(parent)
+        self._insertPending(parent, parentNode.pendingCount, lazy=False)
+        self._fetchSubtrees(parentNode)
+
+    def unloadChildren(self, parent):
+        """
+        Custom: remove the rows of a node that can create its children
+        again on demand, to release their memory, see QJsonNode.unload(),
+        the nodes are kept once the search index is built
+
+        :param parent: QModelIndex. specified index
+        :return: bool. whether the children were unloaded
+        """
+        parentNode = self.getNode(parent)
+        if self._searchIndex is not None or not parentNode.canUnload():
+            return False
+
+        count = parentNode.childCount
+        if not count:
+            parentNode.unload()
+            return True
+        self.beginRemoveRows(parent, 0, count - 1)
+        parentNode.unload()
+        self.endRemoveRows()
+        return True
+
+    def isReadOnly(self):
+        """
+        Custom: check if the entries can be edited, moved or dropped on
+        through the views
+
+        :return: bool.
+        """
+        return self._readOnly
+
+    def setReadOnly(self, readOnly):
+        """
+        Custom: prevent the views from editing the entries, the model
+        can still be changed through its custom methods
+
+        :param readOnly: bool. read-only state
+        """
+        self._readOnly = readOnly
+
+    def validator(self):
+        """
+        Custom: get the validator showing the schema errors of the entries
+
+        :return: QJsonValidator. validator, None if there is none
+        """
+        return self._validator
+
+    def setValidator(self, validator):
+        """
+        Custom: set the validator showing the schema errors of the
+        entries, see QJsonValidator.setModel()
+
+        :param validator: QJsonValidator. validator, None for none
+        """
+        self._validator = validator
+
+    def history(self):
+        """
+        Custom: get the undo/redo history of the changes made through the
+        model, loading and fetching rows are not recorded
+
+        :return: QJsonHistory. history
+        """
+        return self._history
+
+    def undo(self):
+        """
+        Custom: revert the last change, see QJsonHistory.undo()
+        """
+        self._history.undo()
+
+    def redo(self):
+        """
+        Custom: apply again the last change undone, see QJsonHistory.redo()
+        """
+        self._history.redo()
+
+    def searchIndex(self):
+        """
+        Custom: get the full-text index of the keys and values, the first
+        call creates every child node of a lazy model and builds the
+        index, it is then updated along with the model
+
+        :return: QJsonSearchIndex. search index
+        """
+        for _ in self.iterSearchIndex():
+            pass
+        return self._searchIndex
+
+    def iterSearchIndex(self):
+        """
+        Custom: build the search index step by step, see searchIndex(),
+        the model must not change before the iteration is over
+
+        :return: generator, the index is set once it is exhausted
+        """
+        if self._searchIndex is not None:
+            return
+
+        self.fetchTree()
+        yield
+        index = QJsonSearchIndex()
+        for _ in index.iterAddRows(
+                self._rootNode, 0, self._rootNode.childCount - 1):
+            yield
+        self._searchIndex = index
+
+    def search(self, text):
+        """
+        Custom: find the entries whose key or value match a query,
+        see QJsonSearchIndex.search()
+
+        :param text: str. query
+        :return: dict. {parent QJsonNode: set of matching rows}
+        """
+        return self.searchIndex().search(text)
+
     def columnCount(self, parent=QtCore.QModelIndex()):
         """
         Override
@@ -49,7 +244,8 @@ class QJsonModel(QtCore.QAbstractItemModel):
             if index.column() == 0:
                 return node.key
             elif index.column() == 1:
-                return node.value
+                # cut and cached, the full value is only read to be edited
+                return node.display
 
         elif role == QtCore.Qt.EditRole:
             if index.column() == 0:
@@ -58,30 +254,42 @@ class QJsonModel(QtCore.QAbstractItemModel):
                 return node.value
 
         elif role == QJsonModel.sortRole:
-            return node.key
+            return node.sortKey
 
         elif role == QJsonModel.filterRole:
             return node.key
 
+        elif role == QtCore.Qt.DecorationRole:
+            # schema errors of the entry, see QJsonValidator
+            if index.column() == 0 and self._validator is not None:
+                return self._validator.decoration(node)
+
+        elif role == QtCore.Qt.ToolTipRole:
+            if index.column() == 0 and self._validator is not None:
+                return self._validator.toolTip(node)
+            # the value of a cut value, bounded as a tooltip is laid out
+            # as a whole
+            if index.column() == 1 and node.display is not node.value:
+                value = node.value
+                if isinstance(value, str):
+                    return value[:self.toolTipLength]
+                return node.display
+
         elif role == QtCore.Qt.SizeHintRole:
-            return QtCore.QSize(-1, 22)
+            return self.sizeHint
 
     def setData(self, index, value, role):
         """
         Override
         """
+        if self._readOnly:
+            return False
         node = self.getNode(index)
 
-        if role == QtCore.Qt.EditRole:
-            if index.column() == 0:
-                node.key = value
-                self.dataChanged.emit(index, index)
-                return True
-
-            if index.column() == 1:
-                node.value = value
-                self.dataChanged.emit(index, index)
-                return True
+        if role == QtCore.Qt.EditRole and index.column() in (0, 1):
+            with self._recording('Edit'):
+                self._setNodeData(node, index.column(), value)
+            return True
 
         return False
 
@@ -100,6 +308,8 @@ class QJsonModel(QtCore.QAbstractItemModel):
         Override
         """
         flags = super(QJsonModel, self).flags(index)
+        if self._readOnly:
+            return QtCore.Qt.ItemIsDragEnabled | flags
         return (QtCore.Qt.ItemIsEditable
                 | QtCore.Qt.ItemIsDragEnabled
                 | QtCore.Qt.ItemIsDropEnabled
@@ -109,15 +319,15 @@ class QJsonModel(QtCore.QAbstractItemModel):
         """
         Override
         """
-        if not self.hasIndex(row, column, parent):
+        # bounds checked here rather than with hasIndex(), which calls
+        # back into rowCount() and columnCount()
+        parentNode = self.getNode(parent)
+        if row < 0 or column < 0 or column > 1 \
+                or row >= parentNode.childCount:
             return QtCore.QModelIndex()
 
-        parentNode = self.getNode(parent)
         currentNode = parentNode.child(row)
-        if currentNode:
-            return self.createIndex(row, column, currentNode)
-        else:
-            return QtCore.QModelIndex()
+        return self.createIndex(row, column, currentNode)
 
     def parent(self, index):
         """
@@ -126,7 +336,7 @@ class QJsonModel(QtCore.QAbstractItemModel):
         currentNode = self.getNode(index)
         parentNode = currentNode.parent
 
-        if parentNode == self._rootNode:
+        if parentNode is None or parentNode == self._rootNode:
             return QtCore.QModelIndex()
 
         return self.createIndex(parentNode.row(), 0, parentNode)
@@ -135,44 +345,263 @@ class QJsonModel(QtCore.QAbstractItemModel):
         """
         Custom: add children QJsonNode to the specified index
         """
-        self.beginInsertRows(parent, 0, len(children) - 1)
+        return self.addItems(
+            [(child.key, child) for child in children], parent)
+
+    def addItems(self, items, parent=QtCore.QModelIndex()):
+        """
+        Custom: add children to the specified index from their key and
+        value, raw leaf values are kept raw rather than wrapped into nodes
+
+        :param items: list of (key, value). value can be a raw value or a
+                      detached QJsonNode, the key is ignored in a list
+        :param parent: QModelIndex. parent index
+        """
+        # new children go after the remaining raw ones of a lazy node
+        self.fetchAll(parent)
 
         if parent == QtCore.QModelIndex():
             parentNode = self._rootNode
         else:
             parentNode = parent.internalPointer()
 
-        for child in children:
-            parentNode.addChild(child)
+        if parentNode.dtype is not dict:
+            items = [value for _, value in items]
+        with self._recording('Add'):
+            self._insertRows(parent, parentNode, parentNode.childCount, items)
+        return True
 
-        self.endInsertRows()
+    def appendChildren(self, children, parent=QtCore.QModelIndex()):
+        """
+        Custom: append children QJsonNode to the specified index,
+        rows are only inserted until the parent shows batchSize rows,
+        the rest is queued and fetched on demand like lazy children,
+        the history is kept as the rows before are left in place
+
+        :param children: list of QJsonNode. detached nodes
+        :param parent: QModelIndex. parent index
+        """
+        parentNode = self.getNode(parent)
+        if parentNode.dtype is dict:
+            parentNode.addPending([(child.key, child) for child in children])
+        else:
+            parentNode.addPending(children)
+
+        self._fetchPending(parent)
+        self._notifyChanged(parentNode, -1)
         return True
 
     def removeChild(self, position, parent=QtCore.QModelIndex()):
         """
         Custom: remove child of position for the specified index
         """
-        self.beginRemoveRows(parent, position, position)
-
         if parent == QtCore.QModelIndex():
             parentNode = self._rootNode
         else:
             parentNode = parent.internalPointer()
 
-        parentNode.removeChild(position)
+        with self._recording('Remove'):
+            self._removeRows(parent, parentNode, position, position)
+        return True
 
-        self.endRemoveRows()
+    def removeRows(self, row, count, parent=QtCore.QModelIndex()):
+        """
+        Override
+        """
+        parentNode = self.getNode(parent)
+        if count <= 0 or row < 0 or row + count > parentNode.childCount:
+            return False
+
+        with self._recording('Remove'):
+            self._removeRows(parent, parentNode, row, row + count - 1)
         return True
 
+    def removeIndices(self, indices):
+        """
+        Custom: remove the nodes of the specified indices, rows are grouped
+        by parent into contiguous ranges, each removed with a single signal
+        indices inside another removed index are skipped
+
+        :param indices: list of QModelIndex. specified indices, any column
+        """
+        nodes = set(index.internalPointer() for index in indices
+                    if index.isValid() and index.model() is self)
+
+        # {parent node: rows}, each parent is checked once
+        parentRows = dict()
+        skipped = set()
+        for node in nodes:
+            parentNode = node.parent
+            rows = parentRows.get(parentNode)
+            if rows is None:
+                if parentNode in skipped:
+                    continue
+                if not self._isRemovable(parentNode, nodes):
+                    skipped.add(parentNode)
+                    continue
+                rows = parentRows[parentNode] = list()
+            rows.append(node.row())
+
+        with self._recording('Remove'):
+            for parentNode, rows in parentRows.items():
+                parent = self._indexOf(parentNode)
+                rows.sort()
+                ranges = qjsonhistory.rowRanges(rows)
+
+                if len(ranges) > self.rangeLimit:
+                    # one re-numbering of the rows instead of one per range
+                    self._removeScattered(parent, parentNode, rows, ranges)
+                    continue
+                # from the last range so rows do not shift
+                for first, last in reversed(ranges):
+                    self._removeRows(parent, parentNode, first, last)
+
+    def moveRows(self, sourceParent, sourceRow, count,
+                 destinationParent, destinationChild):
+        """
+        Override: move the child nodes by reference
+        """
+        sourceNode = self.getNode(sourceParent)
+        destinationNode = self.getNode(destinationParent)
+        last = sourceRow + count - 1
+        if count <= 0 or sourceRow < 0 or last >= sourceNode.childCount \
+                or destinationNode.dtype not in (dict, list) \
+                or not 0 <= destinationChild <= destinationNode.childCount:
+            return False
+
+        # a node cannot be moved inside itself
+        ancestors = self._ancestors(destinationNode)
+        if any(sourceNode.entry(row) in ancestors
+               for row in range(sourceRow, last + 1)):
+            return False
+
+        with self._recording('Move'):
+            return self._moveRows(sourceParent, sourceNode, sourceRow, last,
+                                  destinationParent, destinationNode,
+                                  destinationChild)
+
+    def moveIndices(self, indices, parent=QtCore.QModelIndex()):
+        """
+        Custom: move the nodes of the specified indices at the end of the
+        parent by reference, the subtrees are neither serialized nor
+        created again, indices inside another moved index move with it
+        and the nodes containing the parent are not moved
+
+        :param indices: list of QModelIndex. specified indices, any column
+        :param parent: QModelIndex. destination index
+        :return: bool. whether nodes were moved
+        """
+        destinationNode = self.getNode(parent)
+        if destinationNode.dtype not in (dict, list):
+            return False
+        # new children go after the remaining raw ones of a lazy node
+        self.fetchAll(parent)
+
+        ancestors = self._ancestors(destinationNode)
+        nodes = set(index.internalPointer() for index in indices
+                    if index.isValid() and index.model() is self)
+        nodes.difference_update(ancestors)
+
+        # {parent node: rows}, each parent is checked once
+        parentRows = dict()
+        order = list()
+        skipped = set()
+        seen = set()
+        for index in indices:
+            node = index.internalPointer()
+            if node not in nodes or node in seen:
+                continue
+            seen.add(node)
+            sourceNode = node.parent
+            rows = parentRows.get(sourceNode)
+            if rows is None:
+                if sourceNode in skipped:
+                    continue
+                if not self._isRemovable(sourceNode, nodes):
+                    skipped.add(sourceNode)
+                    continue
+                rows = parentRows[sourceNode] = list()
+                order.append(sourceNode)
+            rows.append(node.row())
+
+        moved = False
+        with self._recording('Move'):
+            for sourceNode in order:
+                sourceParent = self._indexOf(sourceNode)
+
+                # from the first range, the rows left shift as ranges move out
+                shift = 0
+                for first, last in qjsonhistory.rowRanges(
+                        sorted(parentRows[sourceNode])):
+                    if self._moveRows(sourceParent, sourceNode,
+                                      first - shift, last - shift,
+                                      parent, destinationNode,
+                                      destinationNode.childCount):
+                        moved = True
+                        shift += last - first + 1
+        return moved
+
+    def updateValue(self, value, index=QtCore.QModelIndex()):
+        """
+        Custom: update the node of the specified index to a new value
+        by comparing them, only the rows that changed are signaled so
+        the expansion and selection of the others are kept
+        children not fetched yet are replaced without comparison
+
+        :param value: mixed. new value
+        :param index: QModelIndex. specified index, the root by default
+        """
+        with self._recording('Update'):
+            self._updateValue(value, index)
+
     def clear(self):
         """
         Custom: clear the model data
         """
-        self.beginResetModel()
-        self._rootNode = QJsonNode()
-        self.endResetModel()
+        with self._recording('Clear'):
+            self._setRootNode(QJsonNode())
         return True
 
+    def resetRoot(self, root):
+        """
+        Custom: replace the root node without recording it, the history
+        is cleared as its commands refer to the nodes replaced
+
+        :param root: QJsonNode. new root node
+        :return: QJsonNode. previous root node
+        """
+        oldRoot = self._setRootNode(root)
+        self._history.clear()
+        return oldRoot
+
+    def _updateValue(self, value, index):
+        """
+        Update the node of the specified index, see updateValue()
+
+        :param value: mixed. new value
+        :param index: QModelIndex. specified index
+        """
+        if index.isValid():
+            parent = index.parent()
+            parentNode = self.getNode(parent)
+            stack = list()
+            self._updateRow(parent, parentNode, index.row(), value, stack)
+        elif self._rootNode.dtype in (dict, list) \
+                and type(value) is self._rootNode.dtype:
+            stack = [(index, value)]
+        else:
+            self._setRootNode(QJsonNode.load(value, lazy=True))
+            return
+
+        # explicit stack of (index, value) containers of the same type
+        while stack:
+            index, value = stack.pop()
+            node = self.getNode(index)
+            if node.dtype is dict:
+                self._updateDict(index, node, value, stack)
+            else:
+                self._updateList(index, node, value, stack)
+
     def getNode(self, index):
         """
         Custom: get QJsonNode from model index
@@ -185,6 +614,40 @@ class QJsonModel(QtCore.QAbstractItemModel):
                 return currentNode
         return self._rootNode
 
+    def indexFromPath(self, path):
+        """
+        Custom: get the index of the node at a path, the rows leading to
+        it are fetched on the way, a key is then found in constant time
+        through the key map of its parent (see QJsonNode.childRow())
+
+        :param path: str or list. JSON Pointer, dotted path or keys
+        :return: QModelIndex. index of the node, invalid if the path
+                 does not lead to a row
+        :raise ValueError: malformed path
+        """
+        index = QtCore.QModelIndex()
+        node = self._rootNode
+        for key in qjsonpath.split(path):
+            row = node.childRow(key)
+            if row < 0:
+                position = node.pendingRow(key)
+                if position < 0:
+                    return QtCore.QModelIndex()
+                row = node.childCount + position
+                self._insertPending(index, position + 1)
+            index = self.index(row, 0, index)
+            node = self.getNode(index)
+        return index
+
+    def pathFromIndex(self, index):
+        """
+        Custom: get the JSON Pointer of an index
+
+        :param index: QModelIndex. specified index
+        :return: str. JSON Pointer, '' for the whole document
+        """
+        return self.getNode(index).path
+
     def asDict(self, index=QtCore.QModelIndex()):
         """
         Custom: serialize specified index to dictionary
@@ -196,6 +659,667 @@ class QJsonModel(QtCore.QAbstractItemModel):
         """
         node = self.getNode(index)
         if node == self._rootNode:
-            return node.asDict().values()[0]
+            return node.getChildrenValue(node)
 
         return node.asDict()
+
+    def dump(self, stream, index=QtCore.QModelIndex(), indent=None,
+             sortKeys=False):
+        """
+        Custom: write the json text of specified index to a file object,
+        straight from the nodes without an intermediate dictionary
+        if no index is specified, the whole model will be written
+        without the root key, otherwise the key is not written either
+
+        :param stream: file. text file object
+        :param index: QModelIndex. specified index
+        :param indent: int or str. indentation, None for a single line
+        :param sortKeys: bool. sort dictionary keys
+        """
+        qjsonwriter.dump(self.getNode(index), stream, indent, sortKeys)
+
+    def dumps(self, index=QtCore.QModelIndex(), indent=None, sortKeys=False):
+        """
+        Custom: get the json text of specified index, see dump()
+
+        :param index: QModelIndex. specified index
+        :param indent: int or str. indentation, None for a single line
+        :param sortKeys: bool. sort dictionary keys
+        :return: str. json text
+        """
+        return qjsonwriter.dumps(self.getNode(index), indent, sortKeys)
+
+    @contextlib.contextmanager
+    def _recording(self, name):
+        """
+        Record the deltas applied within the block as one command of the
+        history, nested blocks add to the outermost command
+
+        :param name: str. name of the command
+        """
+        if self._command is not None or self._replaying:
+            yield
+            return
+
+        self._command = qjsonhistory.QJsonCommand(name)
+        try:
+            yield
+        finally:
+            command, self._command = self._command, None
+            if len(command):
+                self._history.push(command)
+
+    def _record(self, deltaType, *args):
+        """
+        Add a delta to the command being recorded, if any, the delta is
+        only created while recording
+
+        :param deltaType: type. delta class of qjsonhistory
+        :param args: arguments of the delta
+        """
+        if self._command is not None:
+            self._command.append(deltaType(*args))
+
+    def _replay(self, command, undo):
+        """
+        Revert or apply again the deltas of a command, see QJsonHistory
+
+        :param command: QJsonCommand. recorded command
+        :param undo: bool. revert the deltas, from the last one
+        """
+        self._replaying = True
+        try:
+            if undo:
+                for delta in reversed(command.deltas):
+                    delta.undo(self)
+            else:
+                for delta in command.deltas:
+                    delta.redo(self)
+        finally:
+            self._replaying = False
+
+    def _indexOf(self, node):
+        """
+        Get the model index of a node in the tree
+
+        :param node: QJsonNode. node
+        :return: QModelIndex. first column, invalid for the root
+        """
+        if node is self._rootNode:
+            return QtCore.QModelIndex()
+        return self.createIndex(node.row(), 0, node)
+
+    def _notifyChanged(self, node, row):
+        """
+        Drop the json text cached for a node that changed and its ancestors,
+        then emit valueChanged
+
+        :param node: QJsonNode. node whose value changed
+        :param row: int. row of the leaf replaced, -1 for the node as a whole
+        """
+        if node is not None:
+            node.markChanged()
+        self.valueChanged.emit(node, row)
+
+    def _setRootNode(self, root):
+        """
+        Replace the root node of the model
+
+        :param root: QJsonNode. new root node
+        :return: QJsonNode. previous root node
+        """
+        oldRoot = self._rootNode
+        self.beginResetModel()
+        self._rootNode = root
+        self._searchIndex = None
+        self.endResetModel()
+        self._record(
+            qjsonhistory.RootChanged, oldRoot, self._history.memoryLimit)
+        return oldRoot
+
+    def _setNodeData(self, node, column, value):
+        """
+        Set the key or the value of a node
+
+        :param node: QJsonNode. node
+        :param column: int. 0 for the key, 1 for the value
+        :param value: mixed. new key or value
+        :return: mixed. previous key or value
+        """
+        key, oldValue = node.key, node.value
+        if column == 0:
+            node.key = value
+        else:
+            node.value = value
+
+        if self._searchIndex is not None:
+            self._searchIndex.updateRow(node.parent, node.row(), key, oldValue)
+        self._record(qjsonhistory.DataChanged, node, column,
+                     key if column == 0 else oldValue)
+
+        index = self.createIndex(node.row(), column, node)
+        self.dataChanged.emit(index, index)
+        if column == 0:
+            # the key order of the parent may change
+            self._notifyChanged(node.parent, -1)
+            return key
+        self._notifyChanged(node.parent, node.row())
+        return oldValue
+
+    def _setLeaf(self, parent, parentNode, row, value):
+        """
+        Replace the value of a leaf child by a leaf value
+
+        :param parent: QModelIndex. parent index
+        :param parentNode: QJsonNode. parent node
+        :param row: int. row of the child
+        :param value: mixed. raw leaf value
+        :return: mixed. previous raw leaf value
+        """
+        entry = parentNode.entry(row)
+        oldValue = entry.value if isinstance(entry, QJsonNode) else entry
+        parentNode.setChildValue(row, value)
+
+        if self._searchIndex is not None:
+            self._searchIndex.updateRow(
+                parentNode, row, parentNode.childKey(row), oldValue)
+        self._record(qjsonhistory.LeafChanged, parentNode, row, oldValue)
+        self._notifyChanged(parentNode, row)
+        self.dataChanged.emit(self.index(row, 0, parent),
+                              self.index(row, 1, parent))
+        return oldValue
+
+    def _resetNode(self, node, dtype, content, fetched=0):
+        """
+        Replace the value of a child node, its children are detached and
+        kept with the pending items so that the node can be reset back
+
+        :param node: QJsonNode. node in a container
+        :param dtype: type. new value type
+        :param content: mixed. leaf value, or pending items of a container,
+                        see QJsonNode.setPending()
+        :param fetched: int. number of children to create at least
+        :return: tuple. previous (type, content, number of children)
+        """
+        parentNode = node.parent
+        row = node.row()
+        index = self.createIndex(row, 0, node)
+        if self._searchIndex is not None:
+            self._searchIndex.removeRows(parentNode, row, row)
+
+        oldType = node.dtype
+        oldFetched = node.childCount
+        if oldType is dict or oldType is list:
+            # taken first, nothing is left to fetch while rows are removed
+            pending = node.pendingItems()
+            node.setPending(())
+            nodes = list()
+            if oldFetched:
+                self.beginRemoveRows(index, 0, oldFetched - 1)
+                nodes = node.removeChildren(0, oldFetched)
+                self.endRemoveRows()
+            if oldType is dict:
+                oldContent = [(child.key, child) for child in nodes]
+            else:
+                oldContent = nodes
+            oldContent.extend(pending)
+        else:
+            oldContent = node.value
+
+        if dtype is dict or dtype is list:
+            node.resetValue(dtype())
+            node.setPending(content)
+        else:
+            node.resetValue(content)
+
+        if self._searchIndex is not None:
+            self._searchIndex.addRows(parentNode, row, row)
+            self.fetchTree(index)
+        else:
+            self._insertPending(index, min(fetched, node.pendingCount))
+        self._record(qjsonhistory.NodeReset, node, oldType, oldContent,
+                     oldFetched, self._history.memoryLimit)
+
+        self._notifyChanged(node, -1)
+        self.dataChanged.emit(index, self.createIndex(row, 1, node))
+        return oldType, oldContent, oldFetched
+
+    def _setPending(self, parentNode, items):
+        """
+        Replace the children not fetched yet of a node
+
+        :param parentNode: QJsonNode. parent node
+        :param items: list. see QJsonNode.setPending()
+        """
+        oldItems = parentNode.pendingItems() \
+            if self._command is not None else None
+        if parentNode.setPending(items):
+            self._record(qjsonhistory.PendingChanged, parentNode,
+                         parentNode.childCount, oldItems,
+                         self._history.memoryLimit)
+            self._notifyChanged(parentNode, -1)
+
+    def _swapPending(self, parentNode, count, items, fetched):
+        """
+        Replace the children of a node after the first rows, the children
+        created since are detached and kept with the pending items so that
+        they can be swapped back
+
+        :param parentNode: QJsonNode. parent node
+        :param count: int. number of rows kept
+        :param items: list. see QJsonNode.setPending()
+        :param fetched: int. number of pending children to create at least
+        :return: tuple. previous (pending items, number of them created)
+        """
+        parent = self._indexOf(parentNode)
+        # taken first, nothing is left to fetch while rows are removed
+        pending = parentNode.pendingItems()
+        parentNode.setPending(())
+        oldFetched = parentNode.childCount - count
+        nodes = list()
+        if oldFetched > 0:
+            # the pending items are already taken
+            nodes = self._removeRows(
+                parent, parentNode, count, parentNode.childCount - 1,
+                announce=False)
+        if parentNode.dtype is dict:
+            oldItems = [(node.key, node) for node in nodes]
+        else:
+            oldItems = nodes
+        oldItems.extend(pending)
+
+        parentNode.setPending(items)
+        self._notifyChanged(parentNode, -1)
+        self._fetchPending(parent)
+        missing = count + fetched - parentNode.childCount
+        if missing > 0:
+            self._insertPending(parent, min(missing, parentNode.pendingCount))
+        return oldItems, max(oldFetched, 0)
+
+    def _insertPending(self, parent, count, lazy=True):
+        """
+        Insert rows for the next pending children of a lazy node, once
+        the search index is built the whole subtree of the new children
+        is created and indexed
+
+        :param parent: QModelIndex. specified index
+        :param count: int. number of children to create
+        :param lazy: bool. create the new child nodes as lazy nodes
+        """
+        if count <= 0:
+            return
+
+        parentNode = self.getNode(parent)
+        first = parentNode.childCount
+        indexed = self._searchIndex is not None
+        self.beginInsertRows(parent, first, first + count - 1)
+        parentNode.fetchMore(count, lazy=lazy and not indexed)
+        self.endInsertRows()
+
+        if indexed:
+            self._searchIndex.addRows(parentNode, first, first + count - 1)
+            # detached nodes added as pending children may still be lazy
+            self._fetchSubtrees(parentNode, first)
+
+    def _fetchSubtrees(self, parentNode, first=0):
+        """
+        Create the remaining children in the subtree of the children
+        of a node from the first row
+
+        :param parentNode: QJsonNode. parent node
+        :param first: int. first row
+        """
+        stack = [child for _, child in parentNode.childContainers(first)]
+        while stack:
+            node = stack.pop()
+            if node.pendingCount:
+                index = self.createIndex(node.row(), 0, node)
+                self._insertPending(index, node.pendingCount, lazy=False)
+            stack.extend(child for _, child in node.childContainers())
+
+    def _fetchPending(self, parent):
+        """
+        Fetch the children just queued to a node, they are fetched up to
+        batchSize rows like appended rows, all of them once the search
+        index is built
+
+        :param parent: QModelIndex. specified index
+        """
+        if self._searchIndex is not None:
+            # only created children can be searched
+            self.fetchAll(parent)
+        elif self.getNode(parent).childCount < self.batchSize:
+            self.fetchMore(parent)
+
+    def _insertRows(self, parent, parentNode, position, items):
+        """
+        Insert new children rows before the specified position
+
+        :param parent: QModelIndex. parent index
+        :param parentNode: QJsonNode. parent node
+        :param position: int. row of the first new child
+        :param items: list. see QJsonNode.insertChildren()
+        """
+        if not items:
+            return
+
+        last = position + len(items) - 1
+        indexed = self._searchIndex is not None
+        self.beginInsertRows(parent, position, last)
+        parentNode.insertChildren(position, items, lazy=not indexed)
+        self.endInsertRows()
+        self.entriesInserted.emit(parentNode, list(range(position, last + 1)))
+
+        if indexed:
+            self._searchIndex.addRows(parentNode, position, last)
+            # detached nodes inserted may still be lazy
+            self._fetchSubtrees(parentNode, position)
+        self._record(
+            qjsonhistory.RowsInserted, parentNode, position, len(items))
+        self._notifyChanged(parentNode, -1)
+
+    @staticmethod
+    def _ancestors(node):
+        """
+        Get a node and all its ancestors
+
+        :param node: QJsonNode. node
+        :return: set of QJsonNode.
+        """
+        ancestors = set()
+        while node is not None:
+            ancestors.add(node)
+            node = node.parent
+        return ancestors
+
+    def _isRemovable(self, parentNode, nodes):
+        """
+        Check if the children of a node can be removed on their own,
+        the node must be in the model and not inside a removed node
+
+        :param parentNode: QJsonNode. parent node
+        :param nodes: set of QJsonNode. nodes to remove
+        :return: bool.
+        """
+        node = parentNode
+        while node is not self._rootNode:
+            if node is None or node in nodes:
+                return False
+            node = node.parent
+        return True
+
+    def _removeRows(self, parent, parentNode, first, last, announce=True):
+        """
+        Remove a range of children rows
+
+        :param parent: QModelIndex. parent index
+        :param parentNode: QJsonNode. parent node
+        :param first: int. first row
+        :param last: int. last row
+        :param announce: bool. emit entriesAboutToBeRemoved, the node
+                         must hold its whole value
+        :return: list of QJsonNode. removed nodes
+        """
+        if announce:
+            self.entriesAboutToBeRemoved.emit(
+                parentNode, list(range(first, last + 1)))
+        self.beginRemoveRows(parent, first, last)
+        if self._searchIndex is not None:
+            self._searchIndex.removeRows(parentNode, first, last)
+        nodes = parentNode.removeChildren(first, last - first + 1)
+        self.endRemoveRows()
+        self._record(qjsonhistory.RowsRemoved, parentNode, first, nodes,
+                     self._history.memoryLimit)
+        self._notifyChanged(parentNode, -1)
+        return nodes
+
+    def _moveRows(self, sourceParent, sourceNode, first, last,
+                  destinationParent, destinationNode, position, keys=None):
+        """
+        Move a range of children rows by reference
+
+        :param sourceParent: QModelIndex. source parent index
+        :param sourceNode: QJsonNode. source parent node
+        :param first: int. first row
+        :param last: int. last row
+        :param destinationParent: QModelIndex. destination parent index
+        :param destinationNode: QJsonNode. destination parent node
+        :param position: int. destination row, before the move
+        :param keys: list of str. keys in a dictionary destination,
+                     the current keys by default
+        :return: bool. whether the rows moved
+        """
+        if not self.beginMoveRows(sourceParent, first, last,
+                                  destinationParent, position):
+            # already in place
+            return False
+
+        if self._searchIndex is not None:
+            self._searchIndex.removeRows(sourceNode, first, last)
+        nodes = sourceNode.removeChildren(first, last - first + 1)
+        if sourceNode is destinationNode and position > last:
+            position -= len(nodes)
+        sourceKeys = [node.key for node in nodes]
+        if destinationNode.dtype is dict:
+            items = list(zip(keys or sourceKeys, nodes))
+        else:
+            items = nodes
+        destinationNode.insertChildren(position, items)
+        self.endMoveRows()
+        self._record(qjsonhistory.RowsMoved, sourceNode, first,
+                     destinationNode, position, nodes, sourceKeys)
+
+        if self._searchIndex is not None:
+            self._searchIndex.addRows(
+                destinationNode, position, position + len(nodes) - 1)
+        self._notifyChanged(sourceNode, -1)
+        if destinationNode is not sourceNode:
+            self._notifyChanged(destinationNode, -1)
+        return True
+
+    def _removeScattered(self, parent, parentNode, rows, ranges):
+        """
+        Remove many ranges of children rows in a single layout change,
+        the persistent indices are moved to their new row or invalidated
+
+        :param parent: QModelIndex. parent index
+        :param parentNode: QJsonNode. parent node
+        :param rows: list of int. sorted rows
+        :param ranges: list of [first, last]. contiguous ranges of the rows
+        """
+        self.entriesAboutToBeRemoved.emit(parentNode, list(rows))
+        # PySide only emits the overload without the parents by default
+        self.layoutAboutToBeChanged.emit()
+        if self._searchIndex is not None:
+            for first, last in ranges:
+                self._searchIndex.removeRows(parentNode, first, last)
+        nodes = parentNode.removeChildrenAt(rows)
+
+        oldIndices = self.persistentIndexList()
+        newIndices = list()
+        attached = {self._rootNode: True}
+        for index in oldIndices:
+            node = index.internalPointer()
+            if self._isAttached(node, attached):
+                newIndices.append(
+                    self.createIndex(node.row(), index.column(), node))
+            else:
+                newIndices.append(QtCore.QModelIndex())
+        self.changePersistentIndexList(oldIndices, newIndices)
+
+        self.layoutChanged.emit()
+        self._record(qjsonhistory.RowsRemovedAt, parentNode, list(rows),
+                     nodes, self._history.memoryLimit)
+        self._notifyChanged(parentNode, -1)
+
+    @staticmethod
+    def _isAttached(node, attached):
+        """
+        Check if a node is still in the tree of the model
+
+        :param node: QJsonNode. node
+        :param attached: dict. {node: bool} known nodes, the root included
+        :return: bool.
+        """
+        path = list()
+        while node is not None and node not in attached:
+            path.append(node)
+            node = node.parent
+        result = node is not None and attached[node]
+        for node in path:
+            attached[node] = result
+        return result
+
+    def _updateDict(self, parent, parentNode, value, stack):
+        """
+        Update the fetched children of a dictionary node by key,
+        the other keys are queued as pending children
+
+        :param parent: QModelIndex. parent index
+        :param parentNode: QJsonNode. dictionary node
+        :param value: dict. new value
+        :param stack: list. containers left to update
+        """
+        wasComplete = not parentNode.canFetchMore()
+
+        removed = [row for row in range(parentNode.childCount)
+                   if parentNode.childKey(row) not in value]
+        # contiguous ranges, from the last one so rows do not shift
+        while removed:
+            last = first = removed.pop()
+            while removed and removed[-1] == first - 1:
+                first = removed.pop()
+            self._removeRows(parent, parentNode, first, last)
+
+        fetched = set()
+        for row in range(parentNode.childCount):
+            key = parentNode.childKey(row)
+            fetched.add(key)
+            self._updateRow(parent, parentNode, row, value[key], stack)
+
+        self._setPending(parentNode, [
+            item for item in value.items() if item[0] not in fetched])
+        if wasComplete:
+            self._fetchPending(parent)
+
+    def _updateList(self, parent, parentNode, value, stack):
+        """
+        Update the fetched children of a list node by position, the
+        common beginning and end are skipped for a fully fetched node
+        so that inserted and removed items are signaled as such
+
+        :param parent: QModelIndex. parent index
+        :param parentNode: QJsonNode. list node
+        :param value: list. new value
+        :param stack: list. containers left to update
+        """
+        count = parentNode.childCount
+        if parentNode.canFetchMore():
+            if len(value) < count:
+                self._removeRows(parent, parentNode, len(value), count - 1)
+            for row in range(min(count, len(value))):
+                self._updateRow(parent, parentNode, row, value[row], stack)
+            self._setPending(parentNode, value[count:])
+            return
+
+        size = min(count, len(value))
+        start = 0
+        while start < size and self._isSame(
+                parentNode.entry(start), value[start]):
+            start += 1
+        end = 0
+        while end < size - start and self._isSame(
+                parentNode.entry(count - 1 - end), value[-1 - end]):
+            end += 1
+
+        oldEnd, newEnd = count - end, len(value) - end
+        common = min(oldEnd, newEnd) - start
+        for row in range(start, start + common):
+            self._updateRow(parent, parentNode, row, value[row], stack)
+
+        if oldEnd - start > common:
+            self._removeRows(parent, parentNode, start + common, oldEnd - 1)
+        elif newEnd - start > common:
+            self._insertRows(parent, parentNode, start + common,
+                             value[start + common:newEnd])
+
+    def _updateRow(self, parent, parentNode, row, value, stack):
+        """
+        Update a child to a new value, a container of the same type is
+        queued to be compared, anything else is set in place
+
+        :param parent: QModelIndex. parent index
+        :param parentNode: QJsonNode. parent node
+        :param row: int. row of the child
+        :param value: mixed. new value
+        :param stack: list. containers left to update
+        """
+        entry = parentNode.entry(row)
+        if isinstance(entry, QJsonNode):
+            dtype, oldValue = entry.dtype, entry.value
+        else:
+            dtype, oldValue = type(entry), entry
+        isContainer = dtype in (dict, list)
+
+        if isContainer and type(value) is dtype:
+            stack.append((self.createIndex(row, 0, entry), value))
+            return
+
+        if not isContainer and not isinstance(value, (dict, list)):
+            if type(value) is dtype and value == oldValue:
+                return
+            self._setLeaf(parent, parentNode, row, value)
+        else:
+            # the node changes between leaf and container
+            if isinstance(value, dict):
+                content = list(value.items())
+            elif isinstance(value, list):
+                content = list(value)
+            else:
+                content = value
+            self._resetNode(parentNode.child(row), type(value), content)
+
+    @staticmethod
+    def _isSame(entry, value):
+        """
+        Check if a child entry holds the specified value, without reading
+        the value of its nodes: identity first, then type, length and keys,
+        the entries of a container are only compared when those match
+
+        :param entry: QJsonNode or mixed. child node or raw leaf value
+        :param value: mixed. value
+        :return: bool.
+        """
+        stack = [(entry, value)]
+        while stack:
+            entry, value = stack.pop()
+            if entry is value:
+                continue
+            if isinstance(entry, QJsonNode):
+                dtype = entry.dtype
+                if dtype is not dict and dtype is not list:
+                    entry = entry.value
+                elif type(value) is not dtype \
+                        or entry.childCount + entry.pendingCount != len(value):
+                    return False
+                else:
+                    entries = list(entry._children or ())
+                    pending = list(entry._iterPending())
+                    entries.extend(item for _, item in pending)
+                    if dtype is dict:
+                        keys = list(entry._keys or ())
+                        keys.extend(key for key, _ in pending)
+                        if keys != list(value) and (
+                                len(set(keys)) != len(keys)
+                                or value.keys() != set(keys)):
+                            return False
+                        value = [value[key] for key in keys]
+                    # raw leaves at once, a node stops the comparison
+                    if entries == value and list(map(type, entries)) \
+                            == list(map(type, value)):
+                        continue
+                    stack.extend(zip(entries, value))
+                    continue
+            if type(value) is not type(entry) or value != entry:
+                return False
+        return True
@@ -2,10 +2,156 @@
 The node module is for creating node data structure/class that supports
 hierarchical model. Each node object reflects to an abstract node which
 has child and parent relationships
+
+To keep large documents compact, leaf values are stored raw in their
+parent's children list. child() wraps a leaf into a QJsonNode kept in the
+tree the first time it is accessed, as model indexes and the undo history
+refer to it, peekChild() wraps it into a node that is not kept to only
+read it. The keys of a dictionary node are kept in a key tuple that is
+shared by every dictionary of the same shape
 """
 
 
+import re
+
+from . import qjsonpath
+
+try:
+    from sys import intern
+except ImportError:
+    # python 2: intern is a builtin
+    pass
+
+
+_NO_CHILDREN = ()
+
+# key tuples shared between dictionary nodes with identical keys
+_SHAPES = dict()
+_SHAPE_LIMIT = 4096
+_SHAPE_MAX_KEYS = 64
+
+# natural order sort keys of the dictionary keys, numbers are padded to
+# NATURAL_WIDTH digits so 'item10' compares after 'item2' as a string
+_SORT_KEYS = dict()
+_SORT_KEY_LIMIT = 65536
+_NUMBER = re.compile(r'[0-9]+')
+NATURAL_WIDTH = 20
+
+# number of characters of a string or an integer value shown in the view,
+# longer values are cut and end with ELLIPSIS
+DISPLAY_LENGTH = 256
+ELLIPSIS = u'\u2026'
+
+
+def _internShape(keys):
+    """
+    Get a shared key tuple equal to the specified keys
+
+    :param keys: tuple. keys of a dictionary node
+    :return: tuple. shared key tuple
+    """
+    if len(keys) > _SHAPE_MAX_KEYS:
+        return keys
+
+    shape = _SHAPES.get(keys)
+    if shape is None:
+        shape = tuple(intern(key) if isinstance(key, str) else key
+                      for key in keys)
+        if len(_SHAPES) < _SHAPE_LIMIT:
+            _SHAPES[shape] = shape
+    return shape
+
+
+def _padNumber(match):
+    """
+    Pad a number matched in a key with zeros
+    """
+    return match.group().zfill(NATURAL_WIDTH)
+
+
+def naturalKey(key):
+    """
+    Get the natural order sort key of a dictionary key, cached
+
+    :param key: str. dictionary key
+    :return: str. key with its numbers padded with zeros
+    """
+    sortKey = _SORT_KEYS.get(key)
+    if sortKey is None:
+        sortKey = _NUMBER.sub(_padNumber, str(key))
+        if len(_SORT_KEYS) < _SORT_KEY_LIMIT:
+            _SORT_KEYS[key] = sortKey
+    return sortKey
+
+
+def displayText(value):
+    """
+    Get the text shown for a leaf value, strings and integers longer
+    than DISPLAY_LENGTH are cut, other values are shown as they are
+
+    :param value: mixed. raw leaf value
+    :return: mixed. value or text shown
+    """
+    if isinstance(value, str):
+        if len(value) <= DISPLAY_LENGTH:
+            return value
+        return u'{}{} ({} characters)'.format(
+            value[:DISPLAY_LENGTH], ELLIPSIS, len(value))
+
+    elif isinstance(value, int) and not isinstance(value, bool) \
+            and not -2 ** 63 <= value < 2 ** 63:
+        # beyond 64 bits the view cannot show the integer, and converting
+        # a very long one to text is slow
+        # estimated from the bits, one digit short at most
+        digits = int((value.bit_length() - 1) * 0.30103) + 1
+        if digits > DISPLAY_LENGTH:
+            head = str(abs(value) // 10 ** (digits - DISPLAY_LENGTH))
+            digits += len(head) - DISPLAY_LENGTH
+        else:
+            head = str(abs(value))
+            digits = len(head)
+            if digits <= DISPLAY_LENGTH:
+                return str(value)
+        return u'{}{}{} ({} digits)'.format(
+            '-' if value < 0 else '', head[:DISPLAY_LENGTH], ELLIPSIS,
+            digits)
+
+    return value
+
+
+def _listIndex(key):
+    """
+    Get the list index of a path key
+
+    :param key: str or int. index, as text in a path
+    :return: int. index, -1 if the key is not an index
+    """
+    if isinstance(key, int) and not isinstance(key, bool):
+        return key if key >= 0 else -1
+    if isinstance(key, str) and key.isdigit():
+        try:
+            return int(key)
+        except ValueError:
+            # other digits than 0-9
+            pass
+    return -1
+
+
 class QJsonNode(object):
+    __slots__ = (
+        '_key',
+        '_value',
+        '_dtype',
+        '_parent',
+        '_row',
+        '_children',
+        '_keys',
+        '_pending',
+        '_display',
+        '_keyMap',
+        '_fragment',
+    )
+
     def __init__(self, parent=None):
         """
         Initialization
@@ -16,51 +162,138 @@ class QJsonNode(object):
         self._value = ""
         self._dtype = None
         self._parent = parent
-        self._children = list()
+        self._row = 0
+
+        # child nodes or raw leaf values, None for a leaf node
+        self._children = None
+        # keys of the children, only used by dictionary node
+        self._keys = None
+        # [raw items, position] not yet turned into children (lazy mode only)
+        self._pending = None
+        # text shown for the value, computed when first shown
+        self._display = None
+        # {key: row} of the children of a dictionary node, built by the
+        # first lookup of a key, dropped when rows shift
+        self._keyMap = None
+        # (options, json text, weight) of a container as last saved, see
+        # qjsonwriter.CachedEncoder, None once changed
+        self._fragment = None
 
     @classmethod
-    def load(cls, value, parent=None):
+    def load(cls, value, parent=None, lazy=False):
         """
         Generate the hierarchical node tree using dictionary
 
         :param value: dict. input dictionary
         :param parent: QJsonNode. for recursive use only
+        :param lazy: bool. only wrap the raw value, children are created
+                     on demand through fetchMore()
         :return: QJsonNode. the top node
         """
         rootNode = cls(parent)
-        rootNode.key = "root"
-        rootNode.dtype = type(value)
+        rootNode._key = "root"
+        rootNode._dtype = type(value)
+
+        if lazy or not isinstance(value, (dict, list)):
+            rootNode.resetValue(value)
+            return rootNode
+
+        # explicit stack instead of recursion, so nesting depth is only
+        # limited by memory
+        stack = [(rootNode, value)]
+        while stack:
+            node, value = stack.pop()
+            if isinstance(value, dict):
+                # insertion order, the view sorts the rows
+                items = list(value.items())
+                node._keys = _internShape(tuple(key for key, _ in items))
+                value = [item for _, item in items]
+
+            children = node._children = list()
+            for row, item in enumerate(value):
+                if isinstance(item, (dict, list)):
+                    child = cls(node)
+                    child._dtype = type(item)
+                    child._row = row
+                    children.append(child)
+                    stack.append((child, item))
+                else:
+                    children.append(item)
+
+        return rootNode
+
+    def resetValue(self, value):
+        """
+        Replace the value of the current node, the node must not have
+        any child, the children of a container are created on demand
+        through fetchMore()
+
+        :param value: mixed. raw value
+        """
+        self._value = ""
+        self._dtype = type(value)
+        self._children = self._keys = self._pending = None
+        self._display = self._keyMap = self._fragment = None
 
         if isinstance(value, dict):
-            # TODO: not sort will break things, but why?
-            nodes = sorted(value.items())
-
-            for key, value in nodes:
-                child = cls.load(value, rootNode)
-                child.key = key
-                child.dtype = type(value)
-                rootNode.addChild(child)
+            self._children = list()
+            self._keys = list()
+            self._pending = [list(value.items()), 0]
         elif isinstance(value, list):
-            for index, value in enumerate(value):
-                child = cls.load(value, rootNode)
-                child.key = 'list[{}]'.format(index)
-                child.dtype = type(value)
-                rootNode.addChild(child)
+            self._children = list()
+            self._pending = [list(value), 0]
         else:
-            rootNode.value = value
-
-        return rootNode
+            self._value = value
 
     @property
     def key(self):
         """
         Get key of the current node
         """
+        parent = self._parent
+        if parent is not None and self._isChildOf(parent):
+            if parent._dtype is dict:
+                return parent._keys[self._row]
+            elif parent._dtype is list:
+                return 'list[{}]'.format(self._row)
         return self._key
 
     @key.setter
     def key(self, key):
-        self._key = key
+        if isinstance(key, str):
+            key = intern(key)
+
+        parent = self._parent
+        if parent is not None and parent._dtype is dict \
+                and self._isChildOf(parent):
+            parent._renameKey(self._row, key)
+        else:
+            self._key = key
+
+    @property
+    def path(self):
+        """
+        Get the JSON Pointer of the current node from its top node
+        """
+        keys = list()
+        node, parent = self, self._parent
+        while parent is not None:
+            keys.append(node.row() if parent._dtype is list else node.key)
+            node, parent = parent, parent._parent
+        keys.reverse()
+        return qjsonpath.pointer(keys)
+
+    @property
+    def sortKey(self):
+        """
+        Get the natural order sort key of the current node: its row in
+        a list, its key with padded numbers otherwise
+        """
+        parent = self._parent
+        if parent is not None and parent._dtype is list \
+                and self._isChildOf(parent):
+            return self._row
+        return naturalKey(self.key)
 
     @property
     def value(self):
@@ -72,6 +305,18 @@ class QJsonNode(object):
     @value.setter
     def value(self, value):
         self._value = value
+        self._display = None
+
+    @property
+    def display(self):
+        """
+        Get the text shown for the value of the current node, long values
+        are cut (see displayText()), cached until the value changes
+        """
+        display = self._display
+        if display is None:
+            display = self._display = displayText(self._value)
+        return display
 
     @property
     def dtype(self):
@@ -94,10 +339,13 @@ class QJsonNode(object):
     @property
     def children(self):
         """
-        Get the children of the current node
+        Get the children of the current node, raw leaves are not kept
+        in the tree, see peekChild()
         :return: list.
         """
-        return self._children
+        if self._children is None:
+            return _NO_CHILDREN
+        return [self.peekChild(row) for row in range(len(self._children))]
 
     @property
     def childCount(self):
@@ -105,35 +353,413 @@ class QJsonNode(object):
         Get the number of children of the current node
         :return: int.
         """
+        if self._children is None:
+            return 0
         return len(self._children)
 
+    @property
+    def hasChildren(self):
+        """
+        Check if the current node has children, including the ones
+        that are not fetched yet
+        :return: bool.
+        """
+        return bool(self._children) or self.canFetchMore()
+
+    @property
+    def pendingCount(self):
+        """
+        Get the number of children not fetched yet
+        :return: int.
+        """
+        if self._pending is None:
+            return 0
+        items, position = self._pending
+        return len(items) - position
+
+    def countPending(self, limit=None):
+        """
+        Get the number of children not fetched yet, without counting
+        further than a limit
+
+        :param limit: int. maximum number to count, None for no limit
+        :return: int.
+        """
+        count = self.pendingCount
+        if limit is None:
+            return count
+        return min(count, limit)
+
+    def pendingItems(self):
+        """
+        Get the children not fetched yet
+
+        :return: list. (key, value) pairs for a dictionary node or
+                 values for a list node, see setPending()
+        """
+        if self._pending is None:
+            return list()
+        items, position = self._pending
+        return items[position:]
+
+    def childContainers(self, start=0):
+        """
+        Iterate over the child nodes holding a dictionary or a list
+
+        :param start: int. first row
+        :return: generator of (row, QJsonNode)
+        """
+        children = self._children or _NO_CHILDREN
+        for row in range(start, len(children)):
+            entry = children[row]
+            if isinstance(entry, QJsonNode) \
+                    and (entry._dtype is dict or entry._dtype is list):
+                yield row, entry
+
+    def canUnload(self):
+        """
+        Check if the children of the current node can be dropped by
+        unload() and created again on demand, the base node refuses as
+        the history and the persistent indices still refer to them
+
+        :return: bool.
+        """
+        return False
+
+    def unload(self):
+        """
+        Drop the children of the current node, they are turned back into
+        raw values and fetchMore() creates them again, see canUnload()
+        """
+        if self._dtype is dict or self._dtype is list:
+            self.resetValue(self.getChildrenValue(self))
+
+    def canFetchMore(self):
+        """
+        Check if the current node still has raw children to create
+
+        :return: bool.
+        """
+        return self.pendingCount > 0
+
+    def fetchMore(self, count, lazy=True):
+        """
+        Create the next batch of children from the raw value
+
+        :param count: int. maximum number of children to create
+        :param lazy: bool. create the new child nodes as lazy nodes,
+                     otherwise their whole subtree is created
+        :return: int. number of children created
+        """
+        if self._pending is None:
+            return 0
+
+        items, start = self._pending
+        end = min(start + count, len(items))
+        children = self._children
+        isDict = self._dtype is dict
+        if isDict:
+            keys = self._mutableKeys()
+            keyMap = self._keyMap
+
+        for position in range(start, end):
+            if isDict:
+                key, value = items[position]
+                if isinstance(key, str):
+                    key = intern(key)
+                if keyMap is not None:
+                    keyMap[key] = len(children)
+                keys.append(key)
+            else:
+                value = items[position]
+            children.append(self._makeEntry(len(children), value, lazy))
+
+        self._pending[1] = end
+        if end == len(items):
+            self._pending = None
+        return end - start
+
+    def setPending(self, items):
+        """
+        Replace the children not fetched yet
+
+        :param items: list. (key, value) pairs for a dictionary node or
+                      values for a list node
+        :return: bool. whether the children not fetched yet changed
+        """
+        items = list(items)
+        if self._pending is None:
+            old = list()
+        else:
+            old, start = self._pending
+            old = old[start:]
+        self._pending = [items, 0] if items else None
+        return items != old
+
+    def addPending(self, items):
+        """
+        Queue children to be created by fetchMore()
+
+        :param items: list. (key, value) pairs for a dictionary node or
+                      values for a list node, a value can also be a
+                      detached QJsonNode
+        """
+        if self._children is None:
+            self._children = list()
+        if self._dtype is dict:
+            self._mutableKeys()
+        if self._pending is None:
+            self._pending = [list(), 0]
+        self._pending[0].extend(items)
+
     def addChild(self, node):
         """
         Add a new child to the current node
 
         :param node: QJsonNode. child node
         """
+        if self._children is None:
+            self._children = list()
+        if self._dtype is dict:
+            key = node.key
+            if self._keyMap is not None:
+                self._keyMap[key] = len(self._children)
+            self._mutableKeys().append(key)
+
+        node._row = len(self._children)
         self._children.append(node)
         node._parent = self
 
+    def insertChildren(self, position, items, lazy=True):
+        """
+        Insert new children before the specified position
+
+        :param position: int. index of the first new child
+        :param items: list. (key, value) pairs for a dictionary node or
+                      values for a list node, a value can also be a
+                      detached QJsonNode
+        :param lazy: bool. create the new child nodes as lazy nodes
+        """
+        if position < len(self._children):
+            self._keyMap = None
+        if self._dtype is dict:
+            if self._keyMap is not None:
+                self._keyMap.update(
+                    (key, position + offset)
+                    for offset, (key, _) in enumerate(items))
+            self._mutableKeys()[position:position] = [
+                intern(key) if isinstance(key, str) else key
+                for key, _ in items]
+            values = [value for _, value in items]
+        else:
+            values = items
+
+        self._children[position:position] = [
+            self._makeEntry(position + offset, value, lazy)
+            for offset, value in enumerate(values)]
+        self._updateRows(position + len(values))
+
     def removeChild(self, position):
         """
         Remove child on row/position of the current node
 
         :param position: int. index of the children
         """
-        node = self._children.pop(position)
-        node._parent = None
+        self.removeChildren(position, 1)
+
+    def removeChildren(self, position, count):
+        """
+        Remove a range of children of the current node
+
+        :param position: int. index of the first child
+        :param count: int. number of children
+        :return: list of QJsonNode. removed nodes, detached with their key
+        """
+        end = position + count
+        nodes = [self.peekChild(row) for row in range(position, end)]
+        for node in nodes:
+            node._key = node.key
+
+        del self._children[position:end]
+        if self._dtype is dict:
+            del self._mutableKeys()[position:end]
+            self._keyMap = None
+
+        for node in nodes:
+            node._parent = None
+            node._row = 0
+        self._updateRows(position)
+        return nodes
+
+    def removeChildrenAt(self, rows):
+        """
+        Remove the children on several rows of the current node at once,
+        rows are re-numbered a single time
+
+        :param rows: list of int. sorted rows, without duplicates
+        :return: list of QJsonNode. removed nodes, detached with their key
+        """
+        nodes = [self.peekChild(row) for row in rows]
+        for node in nodes:
+            node._key = node.key
+
+        removed = set(rows)
+        self._children = [entry for row, entry in enumerate(self._children)
+                          if row not in removed]
+        if self._dtype is dict:
+            self._keys = [key for row, key in enumerate(self._keys)
+                          if row not in removed]
+            self._keyMap = None
+
+        for node in nodes:
+            node._parent = None
+            node._row = 0
+        if rows:
+            self._updateRows(rows[0])
+        return nodes
 
     def child(self, row):
         """
-        Get the child on row/position of the current node
+        Get the child on row/position of the current node, a raw leaf is
+        wrapped into a node kept in the tree, see peekChild()
+
+        :param row: int. index of the children
+        :return: QJsonNode. child node
+        """
+        entry = self._children[row]
+        if isinstance(entry, QJsonNode):
+            return entry
+
+        # wrap the raw leaf value on first access
+        node = self.__class__(self)
+        node._value = entry
+        node._dtype = type(entry)
+        node._row = row
+        self._children[row] = node
+        return node
+
+    def peekChild(self, row):
+        """
+        Get the child on row/position of the current node to read it, a
+        raw leaf is wrapped into a node that is not kept in the tree:
+        changing it does not change the tree
 
         :param row: int. index of the children
         :return: QJsonNode. child node
         """
+        entry = self._children[row]
+        if isinstance(entry, QJsonNode):
+            return entry
+
+        node = self.__class__(self)
+        node._key = self.childKey(row)
+        node._value = entry
+        node._dtype = type(entry)
+        node._row = row
+        return node
+
+    def entry(self, row):
+        """
+        Get the child entry on row/position without wrapping a raw leaf
+
+        :param row: int. index of the children
+        :return: QJsonNode or mixed. child node or raw leaf value
+        """
         return self._children[row]
 
+    def childKey(self, row):
+        """
+        Get the key of the child on row/position without wrapping a raw leaf
+
+        :param row: int. index of the children
+        :return: str. key
+        """
+        if self._dtype is dict:
+            return self._keys[row]
+        return 'list[{}]'.format(row)
+
+    def childRow(self, key):
+        """
+        Get the row of the child with a key among the created children,
+        in constant time through the key map of a dictionary node
+
+        :param key: str or int. dictionary key or list index
+        :return: int. row, -1 if there is no such child
+        """
+        if self._dtype is list:
+            row = _listIndex(key)
+            return row if row < len(self._children) else -1
+        elif self._dtype is not dict:
+            return -1
+
+        keyMap = self._keyMap
+        if keyMap is None:
+            # the last of duplicate keys, as in asDict()
+            keys = self._keys or ()
+            keyMap = self._keyMap = dict(zip(keys, range(len(keys))))
+        return keyMap.get(key, -1)
+
+    def pendingRow(self, key):
+        """
+        Get the position of the child with a key among the children not
+        fetched yet, the pending keys of a dictionary node are scanned
+
+        :param key: str or int. dictionary key or list index
+        :return: int. position, -1 if there is no such child
+        """
+        if self._dtype is list:
+            position = _listIndex(key) - len(self._children)
+            if position >= 0 and self.countPending(position + 1) > position:
+                return position
+        elif self._dtype is dict and self.canFetchMore():
+            for position, (itemKey, _) in enumerate(self.pendingItems()):
+                if itemKey == key:
+                    return position
+        return -1
+
+    def find(self, path):
+        """
+        Get a descendant node from its path, among the children already
+        created, see QJsonModel.indexFromPath() to fetch them on the way,
+        a raw leaf is not kept in the tree, see peekChild()
+
+        :param path: str or list. JSON Pointer, dotted path or keys
+        :return: QJsonNode. node, None if there is none
+        :raise ValueError: malformed path
+        """
+        node = self
+        for key in qjsonpath.split(path):
+            row = node.childRow(key)
+            if row < 0:
+                return None
+            node = node.peekChild(row)
+        return node
+
+    def setChildValue(self, row, value):
+        """
+        Set the value of a leaf child on row/position
+
+        :param row: int. index of the children
+        :param value: mixed. raw leaf value
+        """
+        entry = self._children[row]
+        if isinstance(entry, QJsonNode):
+            entry._value = value
+            entry._dtype = type(value)
+            entry._display = None
+        else:
+            self._children[row] = value
+
+    def markChanged(self):
+        """
+        Drop the json text cached for the current node and its ancestors,
+        the next save writes them again, see QJsonModel.valueChanged
+        """
+        node = self
+        while node is not None:
+            node._fragment = None
+            node = node._parent
+
     def row(self):
         """
         Get the current node's row/position in regards to its parent
@@ -141,9 +767,67 @@ class QJsonNode(object):
         :return: int. index of the current node
         """
         if self._parent:
-            return self.parent.children.index(self)
+            return self._row
         return 0
 
+    def copy(self):
+        """
+        Create a detached copy of the current node with its key, without
+        going through the values: the container nodes are cloned, raw
+        leaves, shared key tuples and raw values not fetched yet are
+        shared, leaf nodes are copied as raw leaves
+
+        :return: QJsonNode. copy
+        """
+        cls = self.__class__
+        root = cls()
+        root._key = self.key
+
+        # explicit stack instead of recursion, a clone is filled when
+        # its source node is popped
+        stack = [(self, root)]
+        while stack:
+            source, node = stack.pop()
+            dtype = node._dtype = source._dtype
+            if dtype is not dict and dtype is not list:
+                node._value = source._value
+                continue
+
+            keys = source._keys
+            if isinstance(keys, list):
+                keys = list(keys)
+            node._keys = keys
+
+            children = node._children = list(source._children or ())
+            for row, entry in enumerate(children):
+                if not isinstance(entry, QJsonNode):
+                    continue
+                if entry._dtype is dict or entry._dtype is list:
+                    child = cls(node)
+                    child._row = row
+                    children[row] = child
+                    stack.append((entry, child))
+                else:
+                    children[row] = entry._value
+
+            if source._pending is None:
+                continue
+            # read through _iterPending(), children of a file included
+            pending = list()
+            for key, entry in source._iterPending():
+                if isinstance(entry, QJsonNode):
+                    if entry._dtype is dict or entry._dtype is list:
+                        child = cls()
+                        stack.append((entry, child))
+                        entry = child
+                    else:
+                        entry = entry._value
+                pending.append((key, entry) if dtype is dict else entry)
+            if pending:
+                node._pending = [pending, 0]
+
+        return root
+
     def asDict(self):
         """
         Serialize the hierarchical structure of current node to a dictionary
@@ -160,14 +844,149 @@ class QJsonNode(object):
         :return: mixed. value
         """
         if node.dtype is dict:
-            output = dict()
-            for child in node.children:
-                output[child.key] = self.getChildrenValue(child)
-            return output
+            result = dict()
         elif node.dtype == list:
-            output = list()
-            for child in node.children:
-                output.append(self.getChildrenValue(child))
-            return output
+            result = list()
         else:
             return node.value
+
+        # explicit stack instead of recursion, containers are created
+        # in place and filled when their node is popped
+        stack = [(node, result)]
+        push = stack.append
+
+        def expand(entry):
+            # pending items can be raw values or detached nodes
+            if not isinstance(entry, QJsonNode):
+                return entry
+            if entry._dtype is dict or entry._dtype is list:
+                value = entry._dtype()
+                push((entry, value))
+                return value
+            return entry._value
+        while stack:
+            node, output = stack.pop()
+            children = node._children or ()
+
+            if node._dtype is dict:
+                for key, entry in zip(node._keys or (), children):
+                    if isinstance(entry, QJsonNode):
+                        dtype = entry._dtype
+                        if dtype is dict or dtype is list:
+                            value = dtype()
+                            push((entry, value))
+                            output[key] = value
+                        else:
+                            output[key] = entry._value
+                    else:
+                        output[key] = entry
+                if node._pending is not None:
+                    for key, entry in node._iterPending():
+                        output[key] = expand(entry)
+            else:
+                append = output.append
+                for entry in children:
+                    if isinstance(entry, QJsonNode):
+                        dtype = entry._dtype
+                        if dtype is dict or dtype is list:
+                            value = dtype()
+                            push((entry, value))
+                            append(value)
+                        else:
+                            append(entry._value)
+                    else:
+                        append(entry)
+                if node._pending is not None:
+                    for _, entry in node._iterPending():
+                        append(expand(entry))
+
+        return result
+
+    def _makeEntry(self, row, value, lazy=True):
+        """
+        Create the children list entry of a raw value, containers become
+        child nodes, leaf values are kept raw and detached nodes
+        are adopted as is
+
+        :param row: int. row of the entry
+        :param value: mixed. raw value
+        :param lazy: bool. create a lazy node for a container
+        :return: QJsonNode or mixed. children list entry
+        """
+        if isinstance(value, QJsonNode):
+            node = value
+            node._parent = self
+            node._row = row
+            return node
+        elif isinstance(value, (dict, list)):
+            node = self.load(value, self, lazy=lazy)
+            node._row = row
+            return node
+        return value
+
+    def _isChildOf(self, parent):
+        """
+        Check if the current node is already stored in the parent's children
+
+        :param parent: QJsonNode. parent node
+        :return: bool.
+        """
+        children = parent._children
+        return (children is not None
+                and self._row < len(children)
+                and children[self._row] is self)
+
+    def _renameKey(self, row, key):
+        """
+        Change the key of a child, the key map is updated unless the keys
+        are not unique
+
+        :param row: int. row of the child
+        :param key: str. new key
+        """
+        keys = self._mutableKeys()
+        keyMap = self._keyMap
+        if keyMap is not None:
+            if len(keyMap) == len(keys) and key not in keyMap:
+                del keyMap[keys[row]]
+                keyMap[key] = row
+            else:
+                self._keyMap = None
+        keys[row] = key
+
+    def _mutableKeys(self):
+        """
+        Get the keys of a dictionary node as a list that can be modified,
+        a shared key tuple is copied on first write
+
+        :return: list. keys of the children
+        """
+        if not isinstance(self._keys, list):
+            self._keys = list(self._keys or ())
+        return self._keys
+
+    def _updateRows(self, start=0):
+        """
+        Re-number the cached row of children from the start position
+
+        :param start: int. first position that changed
+        """
+        children = self._children
+        for position in range(start, len(children)):
+            entry = children[position]
+            if isinstance(entry, QJsonNode):
+                entry._row = position
+
+    def _iterPending(self):
+        """
+        Iterate over the raw (key, value) items not fetched yet
+        """
+        if self._pending is None:
+            return
+        items, start = self._pending
+        isDict = self._dtype is dict
+        for position in range(start, len(items)):
+            if isDict:
+                yield items[position]
+            else:
+                yield None, items[position]
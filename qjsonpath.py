@@ -0,0 +1,102 @@
+"""
+Paths addressing the nodes of a document, as JSON Pointers (RFC 6901)
+or dotted paths
+
+- JSON Pointer: '/users/0/name', '~1' escapes a '/' and '~0' a '~'
+  in a key, '' is the whole document
+- dotted path: 'users[0].name' or 'users.0.name', a backslash escapes
+  the next character of a key
+"""
+
+
+def split(path):
+    """
+    Split a path into its keys
+
+    :param path: str or list. JSON Pointer starting with '/', dotted path
+                 or list of keys, returned as is
+    :return: list. keys, the indices of list items are kept as text
+    :raise ValueError: malformed path
+    """
+    if not isinstance(path, str):
+        return list(path)
+    if not path:
+        return list()
+    if path.startswith('/'):
+        return [_unescape(token, path) for token in path[1:].split('/')]
+    return _splitDotted(path)
+
+
+def pointer(keys):
+    """
+    Get the JSON Pointer of a list of keys
+
+    :param keys: list. dictionary keys and list indices
+    :return: str. JSON Pointer
+    """
+    return ''.join('/' + str(key).replace('~', '~0').replace('/', '~1')
+                   for key in keys)
+
+
+def _unescape(token, path):
+    """
+    Get the key of a JSON Pointer token
+
+    :param token: str. token between two '/'
+    :param path: str. whole path, for the error message
+    :return: str. key
+    :raise ValueError: '~' not followed by '0' or '1'
+    """
+    if '~' not in token:
+        return token
+    if token.replace('~0', '').replace('~1', '').count('~'):
+        raise ValueError('Invalid escape in path: {}'.format(path))
+    return token.replace('~1', '/').replace('~0', '~')
+
+
+def _splitDotted(path):
+    """
+    Split a dotted path into its keys
+
+    :param path: str. dotted path
+    :return: list of str. keys
+    :raise ValueError: malformed path
+    """
+    keys = list()
+    key = list()
+    # a bracketed index just ended, the next character is a separator
+    closed = False
+    position = 0
+    while position < len(path):
+        char = path[position]
+        if char == '.':
+            if not closed:
+                keys.append(''.join(key))
+            key = list()
+            closed = False
+        elif char == '[':
+            end = path.find(']', position)
+            if end < 0:
+                raise ValueError('Unclosed bracket in path: {}'.format(path))
+            if key:
+                keys.append(''.join(key))
+                key = list()
+            keys.append(path[position + 1:end])
+            closed = True
+            position = end
+        elif closed:
+            raise ValueError(
+                'Expecting a separator at {} in path: {}'.format(
+                    position, path))
+        elif char == '\\':
+            position += 1
+            if position == len(path):
+                raise ValueError('Path ends with an escape: {}'.format(path))
+            key.append(path[position])
+        else:
+            key.append(char)
+        position += 1
+
+    if not closed:
+        keys.append(''.join(key))
+    return keys
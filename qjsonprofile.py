@@ -0,0 +1,382 @@
+"""
+Opt-in instrumentation of the model, the proxy and the view, to find where
+the time goes when the tree view stutters
+
+The profiler records the call count, the cumulative time and the latency
+percentiles of registered methods, and keeps their last calls as trace
+events. Methods are only wrapped while it is enabled, their class gets its
+own function back when it is disabled, so it costs nothing when off.
+
+Only methods defined in python are worth registering: a virtual method
+that a class does not reimplement is called by Qt without looking it up
+again, so wrapping it later has no effect. The same goes for a bound method
+connected to a signal before the profiler is enabled, connect a lambda
+calling it instead.
+"""
+
+
+import collections
+import functools
+import io
+import os
+import threading
+import time
+
+from Qt import QtWidgets, QtCore
+
+from . import qjsoncodec
+from .qjsonmodel import QJsonModel
+from .qjsonproxy import QJsonProxyModel
+from .qjsonsaver import QJsonSaver
+from .qjsonschema import QJsonSchema
+from .qjsonsearch import QJsonSearchIndex
+from .qjsontabs import QJsonTab, QJsonTabWidget
+from .qjsonview import QJsonView
+from .qjsonwriter import CachedEncoder
+
+
+# methods registered by default, by class
+TARGETS = (
+    (QJsonModel, ('data', 'setData', 'index', 'parent', 'rowCount',
+                  'hasChildren', 'canFetchMore', 'fetchMore', 'flags',
+                  'removeRows', 'moveRows', 'search', 'updateValue')),
+    (QJsonProxyModel, ('filterAcceptsRow', 'setFilterText',
+                       'invalidateFilter', 'sort')),
+    (QJsonSearchIndex, ('addRows', 'removeRows', 'updateRow')),
+    (QJsonView, ('setModel', 'add', 'remove', 'paste', 'dropEvent',
+                 'asDict', 'jumpToPath')),
+    (QJsonTab, ('evict', 'restore', 'memoryCost')),
+    (QJsonTabWidget, ('enforceBudget',)),
+    (QJsonSaver, ('save',)),
+    # on the worker threads of the saver and of the validator
+    (CachedEncoder, ('dump',)),
+    (QJsonSchema, ('validate',)),
+)
+PERCENTILES = (50, 90, 99)
+
+
+class QJsonProfiler(object):
+    """
+    Call counts and latencies of the registered methods
+    """
+
+    # number of latencies kept per method for the percentiles
+    sampleLimit = 10000
+    # number of calls kept as trace events
+    traceLimit = 200000
+
+    _instance = None
+
+    def __init__(self):
+        """
+        Initialization
+        """
+        # [(class, method name)]
+        self._targets = list()
+        # {(class, method name): own function of the class or None}
+        self._originals = dict()
+        self._enabled = False
+
+        # {label: [count, cumulative seconds, max seconds, latencies]}
+        self._stats = dict()
+        # (label, start, end, thread id) of the last calls
+        self._events = collections.deque(maxlen=self.traceLimit)
+        self._origin = time.perf_counter()
+
+    @classmethod
+    def instance(cls):
+        """
+        Get the shared profiler, with the default methods registered
+
+        :return: QJsonProfiler. profiler
+        """
+        if cls._instance is None:
+            cls._instance = cls()
+            for owner, names in TARGETS:
+                cls._instance.register(owner, names)
+        return cls._instance
+
+    def register(self, owner, names):
+        """
+        Add methods to instrument, wrapped at once if enabled
+
+        :param owner: type. class defining the methods
+        :param names: list of str. method names
+        """
+        for name in names:
+            target = (owner, name)
+            if target in self._targets:
+                continue
+            self._targets.append(target)
+            if self._enabled:
+                self._wrap(owner, name)
+
+    def isEnabled(self):
+        """
+        Check if the calls are recorded
+
+        :return: bool.
+        """
+        return self._enabled
+
+    def setEnabled(self, enabled):
+        """
+        Start or stop recording the calls, the records are kept
+
+        :param enabled: bool.
+        """
+        if enabled == self._enabled:
+            return
+        self._enabled = enabled
+        for owner, name in self._targets:
+            if enabled:
+                self._wrap(owner, name)
+            else:
+                self._unwrap(owner, name)
+
+    def reset(self):
+        """
+        Forget the recorded calls
+        """
+        self._stats = dict()
+        self._events.clear()
+        self._origin = time.perf_counter()
+
+    def stats(self):
+        """
+        Get the statistics of the recorded methods, the most expensive
+        first, the times are in seconds
+
+        :return: list of dict. name, count, total, mean, max and
+                 percentiles (p50, p90, p99)
+        """
+        result = list()
+        for label, (count, total, longest, samples) in self._stats.items():
+            entry = {'name': label, 'count': count, 'total': total,
+                     'mean': total / count, 'max': longest}
+            samples = sorted(samples)
+            for percentile in PERCENTILES:
+                position = min(len(samples) - 1,
+                               len(samples) * percentile // 100)
+                entry['p{}'.format(percentile)] = samples[position]
+            result.append(entry)
+        result.sort(key=lambda entry: entry['total'], reverse=True)
+        return result
+
+    def exportJson(self, path):
+        """
+        Write the statistics to a json file
+
+        :param path: str. path of the file
+        """
+        with io.open(path, 'w', encoding='utf-8') as stream:
+            stream.write(qjsoncodec.dumps({'stats': self.stats()}, indent=4))
+
+    def exportTrace(self, path):
+        """
+        Write the recorded calls as a trace event file, opened by
+        chrome://tracing or https://ui.perfetto.dev
+
+        :param path: str. path of the file
+        """
+        pid = os.getpid()
+        events = list()
+        for label, start, end, thread in self._events:
+            events.append({
+                'name': label,
+                'cat': label.partition('.')[0],
+                'ph': 'X',
+                'ts': (start - self._origin) * 1e6,
+                'dur': (end - start) * 1e6,
+                'pid': pid,
+                'tid': thread,
+            })
+        with io.open(path, 'w', encoding='utf-8') as stream:
+            stream.write(qjsoncodec.dumps(
+                {'traceEvents': events, 'displayTimeUnit': 'ms'}))
+
+    def _record(self, label, start, end):
+        """
+        Record a call
+
+        :param label: str. method label
+        :param start: float. performance counter at the call
+        :param end: float. performance counter at the return
+        """
+        duration = end - start
+        stats = self._stats.get(label)
+        if stats is None:
+            stats = self._stats[label] = [
+                0, 0.0, 0.0, collections.deque(maxlen=self.sampleLimit)]
+        stats[0] += 1
+        stats[1] += duration
+        if duration > stats[2]:
+            stats[2] = duration
+        stats[3].append(duration)
+        self._events.append((label, start, end, threading.get_ident()))
+
+    def _wrap(self, owner, name):
+        """
+        Replace a method of a class by a recording one
+
+        :param owner: type. class
+        :param name: str. method name
+        """
+        function = getattr(owner, name)
+        self._originals[(owner, name)] = owner.__dict__.get(name)
+        label = '{}.{}'.format(owner.__name__, name)
+        record = self._record
+        clock = time.perf_counter
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(label, start, clock())
+
+        setattr(owner, name, wrapper)
+
+    def _unwrap(self, owner, name):
+        """
+        Give a class its own method back
+
+        :param owner: type. class
+        :param name: str. method name
+        """
+        original = self._originals.pop((owner, name))
+        if original is None:
+            delattr(owner, name)
+        else:
+            setattr(owner, name, original)
+
+
+class QJsonProfilerPanel(QtWidgets.QDockWidget):
+    """
+    Dockable table of the profiler statistics
+    """
+
+    # milliseconds between refreshes of the table while recording
+    refreshInterval = 1000
+
+    COLUMNS = ('Method', 'Calls', 'Total (ms)', 'Mean (ms)', 'p50 (ms)',
+               'p90 (ms)', 'p99 (ms)', 'Max (ms)')
+    FIELDS = ('count', 'total', 'mean', 'p50', 'p90', 'p99', 'max')
+
+    def __init__(self, profiler=None, parent=None):
+        """
+        Initialization
+
+        :param profiler: QJsonProfiler. profiler shown, the shared one
+                         if not specified
+        :param parent: QWidget. parent widget
+        """
+        super(QJsonProfilerPanel, self).__init__('Profiler', parent)
+        self.setObjectName('ui_profiler_dock')
+        self._profiler = profiler or QJsonProfiler.instance()
+
+        self.ui_record_check = QtWidgets.QCheckBox('Record')
+        self.ui_record_check.setChecked(self._profiler.isEnabled())
+        self.ui_record_check.toggled.connect(self.setRecording)
+        self.ui_reset_btn = QtWidgets.QPushButton('Reset')
+        self.ui_reset_btn.clicked.connect(self.reset)
+        self.ui_export_btn = QtWidgets.QPushButton('Export...')
+        self.ui_export_btn.clicked.connect(lambda: self.export())
+
+        self.ui_stats_table = QtWidgets.QTableWidget(0, len(self.COLUMNS))
+        self.ui_stats_table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.ui_stats_table.setEditTriggers(
+            QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.ui_stats_table.verticalHeader().hide()
+        self.ui_stats_table.horizontalHeader().setStretchLastSection(True)
+
+        buttons = QtWidgets.QHBoxLayout()
+        buttons.addWidget(self.ui_record_check)
+        buttons.addStretch()
+        buttons.addWidget(self.ui_reset_btn)
+        buttons.addWidget(self.ui_export_btn)
+        layout = QtWidgets.QVBoxLayout()
+        layout.addLayout(buttons)
+        layout.addWidget(self.ui_stats_table)
+        widget = QtWidgets.QWidget()
+        widget.setLayout(layout)
+        self.setWidget(widget)
+
+        self._refreshTimer = QtCore.QTimer(self)
+        self._refreshTimer.setInterval(self.refreshInterval)
+        self._refreshTimer.timeout.connect(self.refresh)
+        self.visibilityChanged.connect(self._updateRefresh)
+
+    def profiler(self):
+        """
+        Custom: get the profiler shown
+
+        :return: QJsonProfiler. profiler
+        """
+        return self._profiler
+
+    def setRecording(self, recording):
+        """
+        Custom: start or stop the profiler
+
+        :param recording: bool.
+        """
+        self._profiler.setEnabled(recording)
+        self.ui_record_check.setChecked(recording)
+        self._updateRefresh()
+        self.refresh()
+
+    def reset(self):
+        """
+        Custom: forget the recorded calls
+        """
+        self._profiler.reset()
+        self.refresh()
+
+    def refresh(self):
+        """
+        Custom: show the current statistics
+        """
+        stats = self._profiler.stats()
+        table = self.ui_stats_table
+        table.setSortingEnabled(False)
+        table.setRowCount(len(stats))
+        for row, entry in enumerate(stats):
+            table.setItem(row, 0, QtWidgets.QTableWidgetItem(entry['name']))
+            for column, field in enumerate(self.FIELDS, 1):
+                value = entry[field]
+                if field != 'count':
+                    value = round(value * 1000.0, 3)
+                item = QtWidgets.QTableWidgetItem()
+                item.setData(QtCore.Qt.DisplayRole, value)
+                table.setItem(row, column, item)
+        table.setSortingEnabled(True)
+
+    def export(self, path=None):
+        """
+        Custom: write the statistics as json, or the recorded calls as a
+        trace event file when the path ends with .trace.json
+
+        :param path: str. path of the file, ask the user if not specified
+        """
+        if not path:
+            path, _ = QtWidgets.QFileDialog.getSaveFileName(
+                self, 'Export', '', 'Statistics (*.json);;'
+                'Trace Events (*.trace.json)')
+            if not path:
+                return
+
+        if path.endswith('.trace.json'):
+            self._profiler.exportTrace(path)
+        else:
+            self._profiler.exportJson(path)
+
+    def _updateRefresh(self):
+        """
+        Only refresh the table while it is shown and recording
+        """
+        if self.isVisible() and self._profiler.isEnabled():
+            self._refreshTimer.start()
+        else:
+            self._refreshTimer.stop()
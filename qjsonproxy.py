@@ -0,0 +1,288 @@
+"""
+The proxy model inheriting QSortFilterProxyModel for filtering QJsonModel
+with its search index, a row is kept when it matches, when it leads to a
+match (ancestor) or when it is inside a matching entry (descendant)
+
+Typing is debounced and the filter pass runs in small time slices on the
+event loop, a pass still running is dropped when the filter text changes
+
+Reference:
+https://doc.qt.io/qt-5/qsortfilterproxymodel.html#filterAcceptsRow
+"""
+
+
+import time
+
+from Qt import QtCore
+
+
+class QJsonProxyModel(QtCore.QSortFilterProxyModel):
+    # emitted with the number of matching entries once a filter is applied
+    filterApplied = QtCore.Signal(int)
+
+    # milliseconds without typing before filtering
+    filterDelay = 250
+    # seconds of filtering per event loop iteration
+    sliceTime = 0.02
+
+    def __init__(self, parent=None):
+        """
+        Initialization
+
+        :param parent: QObject. parent object
+        """
+        super(QJsonProxyModel, self).__init__(parent)
+
+        self._filterText = ''
+        # {source container node: set of rows}, None when not filtering
+        self._matchedRows = None
+        self._visibleRows = None
+        # memoized "inside a matching entry" state of container nodes
+        self._insideMatch = dict()
+
+        self._filterPass = None
+        self._sourceLocked = False
+
+        self._debounceTimer = QtCore.QTimer(self)
+        self._debounceTimer.setSingleShot(True)
+        self._debounceTimer.setInterval(self.filterDelay)
+        self._debounceTimer.timeout.connect(self._startFilterPass)
+
+        self._passTimer = QtCore.QTimer(self)
+        self._passTimer.setInterval(0)
+        self._passTimer.timeout.connect(self._continueFilterPass)
+
+    def setSourceModel(self, model):
+        """
+        Override: follow the changes of the source model to filter again
+
+        :param model: QJsonModel. source model
+        """
+        oldModel = self.sourceModel()
+        if oldModel is not None:
+            for signal in self._sourceSignals(oldModel):
+                signal.disconnect(self._onSourceChanged)
+
+        self._cancelFilterPass()
+        self._setVisibleRows(None, None)
+        super(QJsonProxyModel, self).setSourceModel(model)
+        if model is None:
+            return
+
+        for signal in self._sourceSignals(model):
+            signal.connect(self._onSourceChanged)
+        if self._filterText:
+            self._startFilterPass()
+
+    def filterText(self):
+        """
+        Custom: get the current filter text
+        """
+        return self._filterText
+
+    def setFilterText(self, text):
+        """
+        Custom: filter the rows with the key/value search of the source
+        model, after filterDelay milliseconds without a new text
+
+        :param text: str. query, see QJsonSearchIndex.search()
+        """
+        self._filterText = text
+        self._cancelFilterPass()
+        self._debounceTimer.start()
+
+    def isFiltering(self):
+        """
+        Custom: check if a filter pass is waiting or running
+
+        :return: bool.
+        """
+        return self._debounceTimer.isActive() or self._filterPass is not None
+
+    def filterAcceptsRow(self, sourceRow, sourceParent):
+        """
+        Override
+        """
+        if self._visibleRows is None:
+            return True
+
+        parentNode = self.sourceModel().getNode(sourceParent)
+        rows = self._visibleRows.get(parentNode)
+        if rows is not None and sourceRow in rows:
+            return True
+        return self._isInsideMatch(parentNode)
+
+    def matchParents(self):
+        """
+        Custom: get the indices of the rows leading to the matches, the
+        rows to expand to show every match without showing the inside
+        of matching containers
+
+        :return: list of QModelIndex. proxy indices, parents first
+        """
+        if self._visibleRows is None:
+            return list()
+
+        model = self.sourceModel()
+        root = model.getNode(QtCore.QModelIndex())
+        nodes = list()
+        for node in self._visibleRows:
+            depth = 0
+            parent = node
+            while parent is not root and parent is not None:
+                depth += 1
+                parent = parent.parent
+            if parent is root and node is not root:
+                nodes.append((depth, node))
+        nodes.sort(key=lambda item: item[0])
+
+        indices = list()
+        for _, node in nodes:
+            index = self.mapFromSource(model._indexOf(node))
+            if index.isValid():
+                indices.append(index)
+        return indices
+
+    def lessThan(self, sourceLeft, sourceRight):
+        """
+        Override: compare the sort keys of the nodes, a single call
+        rather than two calls of data() with the sort role, sorting the
+        rows fetched at once is about twice faster
+        """
+        if not (sourceLeft.isValid() and sourceRight.isValid()):
+            return super(QJsonProxyModel, self).lessThan(
+                sourceLeft, sourceRight)
+        left = sourceLeft.internalPointer()
+        right = sourceRight.internalPointer()
+        if left is None or right is None:
+            return super(QJsonProxyModel, self).lessThan(
+                sourceLeft, sourceRight)
+        return left.sortKey < right.sortKey
+
+    def _startFilterPass(self):
+        """
+        Start a new filter pass with the current filter text
+        """
+        self._cancelFilterPass()
+        if self.sourceModel() is None:
+            return
+
+        if not self._filterText.strip():
+            self._setVisibleRows(None, None)
+            self.invalidateFilter()
+            self.filterApplied.emit(0)
+            return
+
+        self._filterPass = self._iterFilterPass(self._filterText)
+        self._passTimer.start()
+
+    def _continueFilterPass(self):
+        """
+        Run the filter pass for one time slice
+        """
+        end = time.time() + self.sliceTime
+        try:
+            while time.time() < end:
+                next(self._filterPass)
+        except StopIteration:
+            self._cancelFilterPass()
+
+    def _cancelFilterPass(self):
+        """
+        Drop the filter pass in progress, the current filter is kept
+        """
+        self._passTimer.stop()
+        self._filterPass = None
+
+    def _iterFilterPass(self, text):
+        """
+        Filter pass as a generator, yields between small steps
+
+        :param text: str. query
+        """
+        model = self.sourceModel()
+        steps = model.iterSearchIndex()
+        while True:
+            # creating the nodes of a lazy model for the index inserts rows
+            self._sourceLocked = True
+            try:
+                next(steps)
+            except StopIteration:
+                break
+            finally:
+                self._sourceLocked = False
+            yield
+
+        index = model.searchIndex()
+        matches = dict()
+        for _ in index.iterSearch(text, matches):
+            yield
+
+        # bottom-up from the matches, each ancestor is visited once
+        visibleRows = dict((node, set(rows)) for node, rows in matches.items())
+        index.addAncestors(visibleRows)
+
+        self._setVisibleRows(matches, visibleRows)
+        self.invalidateFilter()
+        self.filterApplied.emit(sum(len(rows) for rows in matches.values()))
+
+    def _setVisibleRows(self, matchedRows, visibleRows):
+        """
+        Set the result of a filter pass
+
+        :param matchedRows: dict. {container node: set of matching rows}
+        :param visibleRows: dict. matching rows and their ancestor rows
+        """
+        self._matchedRows = matchedRows
+        self._visibleRows = visibleRows
+        self._insideMatch = dict()
+
+    def _isInsideMatch(self, node):
+        """
+        Check if a node is a matching entry or is inside one
+
+        :param node: QJsonNode. source node
+        :return: bool.
+        """
+        path = list()
+        result = False
+        while node is not None:
+            known = self._insideMatch.get(node)
+            if known is not None:
+                result = known
+                break
+
+            parent = node.parent
+            if parent is not None \
+                    and node.row() in self._matchedRows.get(parent, ()):
+                result = True
+                path.append(node)
+                break
+            path.append(node)
+            node = parent
+
+        for node in path:
+            self._insideMatch[node] = result
+        return result
+
+    def _onSourceChanged(self, *args):
+        """
+        Filter again once the source model stops changing
+        """
+        if self._sourceLocked or not self._filterText:
+            return
+        # rows may have moved, the previous result is only kept until then
+        self._cancelFilterPass()
+        self._insideMatch = dict()
+        self._debounceTimer.start()
+
+    @staticmethod
+    def _sourceSignals(model):
+        """
+        Get the source model signals that invalidate the filter result
+
+        :param model: QAbstractItemModel. source model
+        :return: list of signals
+        """
+        return [model.rowsInserted, model.rowsRemoved, model.rowsMoved,
+                model.dataChanged, model.modelReset, model.layoutChanged]
@@ -0,0 +1,282 @@
+"""
+Background saver writing a QJsonModel to a json file
+
+The json text is written on a worker thread to a temporary file next to
+the target, which then replaces it, so an interrupted save never leaves a
+partial file. The file and, once renamed, its directory are synced to
+the disk. The text of the containers that did not change since the
+last save is copied from their cache (qjsonwriter.CachedEncoder), saving
+again after a few edits only encodes the containers edited.
+
+The model can still be edited while it is saved: a save that overlapped
+a change of the tree, from the signal announcing it, is discarded with
+the text it cached, and written again from the tree changed
+"""
+
+
+import io
+import os
+import stat
+import tempfile
+
+from Qt import QtCore
+
+from . import qjsonwriter
+
+
+# permissions of the new files, umask aside
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+class QJsonSaver(QtCore.QThread):
+    # str. path of the file written
+    saved = QtCore.Signal(str)
+    # str. error message
+    failed = QtCore.Signal(str)
+
+    # indentation of the json text
+    indent = 4
+
+    def __init__(self, model, parent=None):
+        """
+        Initialization
+
+        :param model: QJsonModel. model to save
+        :param parent: QObject. parent object
+        """
+        super(QJsonSaver, self).__init__(parent)
+        self._model = None
+        self._encoder = qjsonwriter.CachedEncoder(self.indent)
+
+        # root node and path of the save running
+        self._root = None
+        self._path = None
+        # path to save to once the save running is done
+        self._queued = None
+        self._tempPath = None
+        self._error = None
+        # the tree changed while it was read
+        self._overlapped = False
+        # the value changed since the last save
+        self._modified = False
+
+        self.finished.connect(self._onFinished)
+        self.setModel(model)
+
+    def model(self):
+        """
+        Custom: get the model saved
+
+        :return: QJsonModel. model
+        """
+        return self._model
+
+    def setModel(self, model):
+        """
+        Custom: set the model to save, a save running is written again
+        from the new model
+
+        :param model: QJsonModel. model
+        """
+        if self._model is not None:
+            self._model.valueChanged.disconnect(self._onValueChanged)
+            self._model.modelReset.disconnect(self._onModelReset)
+            for signal in self._treeSignals(self._model):
+                signal.disconnect(self._onTreeChanged)
+
+        self._model = model
+        self._onModelReset()
+        model.valueChanged.connect(self._onValueChanged)
+        model.modelReset.connect(self._onModelReset)
+        for signal in self._treeSignals(model):
+            signal.connect(self._onTreeChanged)
+
+    def isModified(self):
+        """
+        Custom: check if the value changed since it was last saved
+
+        :return: bool.
+        """
+        return self._modified
+
+    def setModified(self, modified):
+        """
+        Custom: set whether the value changed since it was last saved, as
+        when the model was just loaded from its file
+
+        :param modified: bool.
+        """
+        self._modified = modified
+
+    def isSaving(self):
+        """
+        Custom: check if a save is pending, from the start of the thread
+        until the target is replaced
+
+        :return: bool.
+        """
+        return self._path is not None
+
+    def save(self, path):
+        """
+        Custom: write the model to a json file on the worker thread, the
+        file is saved again once the save pending is done
+
+        :param path: str. path of the json file
+        """
+        if self.isSaving():
+            self._queued = path
+            return
+
+        self._root = self._model.getNode(QtCore.QModelIndex())
+        self._path = path
+        self._error = None
+        self._overlapped = False
+        self._modified = False
+        self.start()
+
+    def waitSaved(self):
+        """
+        Custom: block until the save running and the saves it queued are
+        done, the target is replaced right away
+        """
+        # finished may not be handled yet once the thread is done
+        while self._path is not None:
+            self.wait()
+            self._onFinished()
+
+    def run(self):
+        """
+        Override: write the json text to a temporary file next to the
+        target, it replaces the target back on the GUI thread
+        """
+        directory, name = os.path.split(os.path.abspath(self._path))
+        try:
+            handle, tempPath = tempfile.mkstemp(
+                prefix='.{}.'.format(name), suffix='.tmp', dir=directory)
+        except (IOError, OSError) as error:
+            self._error = str(error)
+            return
+        self._tempPath = tempPath
+
+        try:
+            with io.open(handle, 'w', encoding='utf-8') as stream:
+                # the permissions of the file replaced
+                try:
+                    mode = stat.S_IMODE(os.stat(self._path).st_mode)
+                except OSError:
+                    mode = 0o666 & ~_UMASK
+                os.chmod(tempPath, mode)
+
+                self._encoder.dump(self._root, stream)
+                stream.flush()
+                os.fsync(stream.fileno())
+        except Exception as error:
+            # besides the write errors, the tree may change while it is
+            # read, which is checked once done
+            self._error = str(error) or type(error).__name__
+
+    def _onFinished(self):
+        """
+        Replace the target with the file written, unless the tree changed
+        in the meantime
+        """
+        if self._path is None:
+            # already done by waitSaved()
+            return
+        tempPath, self._tempPath = self._tempPath, None
+        path, self._path = self._path, None
+        self._root = None
+
+        if self._overlapped:
+            # the text read may mix states of the tree
+            self._encoder.discard()
+            self._modified = True
+            self._removeTemp(tempPath)
+            if self._queued is None:
+                self._queued = path
+        elif self._error is not None:
+            self._modified = True
+            self._removeTemp(tempPath)
+            self.failed.emit(self._error)
+        else:
+            try:
+                os.replace(tempPath, path)
+                self._syncDirectory(path)
+            except OSError as error:
+                self._modified = True
+                self._removeTemp(tempPath)
+                self.failed.emit(str(error))
+            else:
+                self.saved.emit(path)
+
+        if self._queued is not None:
+            path, self._queued = self._queued, None
+            self.save(path)
+
+    def _onValueChanged(self, *args):
+        """
+        Mark the value as modified
+        """
+        self._modified = True
+        self._onTreeChanged()
+
+    def _onTreeChanged(self, *args):
+        """
+        Mark the save pending as overlapping a change of the tree, rows
+        fetched or dropped included, the tree is already being changed
+        once the change is announced and the thread may be done before
+        the target is replaced
+        """
+        if self._path is not None:
+            self._overlapped = True
+
+    def _onModelReset(self):
+        """
+        Drop the text cached from the previous tree
+        """
+        if self._path is not None:
+            self._overlapped = True
+        else:
+            self._encoder = qjsonwriter.CachedEncoder(self.indent)
+
+    @staticmethod
+    def _treeSignals(model):
+        """
+        Get the signals of a model changing the rows of the tree
+
+        :param model: QJsonModel. model
+        :return: tuple of signals
+        """
+        return (model.rowsAboutToBeInserted, model.rowsInserted,
+                model.rowsAboutToBeRemoved, model.rowsRemoved,
+                model.rowsAboutToBeMoved, model.rowsMoved,
+                model.layoutAboutToBeChanged, model.layoutChanged,
+                model.modelAboutToBeReset, model.dataChanged)
+
+    @staticmethod
+    def _syncDirectory(path):
+        """
+        Sync the directory of a file renamed, so the rename is on the disk,
+        directories cannot be opened on Windows
+        """
+        if os.name == 'nt':
+            return
+        handle = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+        try:
+            os.fsync(handle)
+        finally:
+            os.close(handle)
+
+    @staticmethod
+    def _removeTemp(path):
+        """
+        Remove a temporary file written, if any
+        """
+        if path is None:
+            return
+        try:
+            os.remove(path)
+        except OSError:
+            pass
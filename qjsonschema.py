@@ -0,0 +1,1098 @@
+"""
+JSON Schema validation of a QJsonModel
+
+QJsonSchema checks the nodes, or raw values, of a document against a JSON
+Schema (draft 7 keywords, $ref within the schema, 'format' is not checked).
+Each entry is checked against the subschemas applying to it, found from
+the schemas of its parent through properties, items, $ref and allOf, so
+an entry can be checked on its own.
+
+QJsonValidator validates the whole document once on a worker thread,
+then after each change of the model only the entry changed: the errors
+under it are replaced and the others kept. The keywords of an ancestor
+depending on its whole value (anyOf, oneOf, not, if, enum, const,
+uniqueItems, contains, dependencies) are not checked by its children,
+the closest of these ancestors to the root is validated again instead.
+
+The model shows the errors as a warning icon on the key of the entries,
+with the messages as tooltip, QJsonErrorPanel lists them.
+"""
+
+
+import heapq
+import io
+import re
+
+from Qt import QtWidgets, QtCore
+
+from . import qjsoncodec, qjsonpath
+from .qjsonnode import ELLIPSIS, QJsonNode, naturalKey
+
+
+# keywords of a container schema depending on the value of its children,
+# its entry is validated as a whole after a change of any descendant
+DEEP_KEYWORDS = frozenset((
+    'anyOf', 'oneOf', 'not', 'if', 'enum', 'const', 'uniqueItems',
+    'contains', 'dependencies'))
+# keywords holding json values rather than subschemas
+_VALUE_KEYWORDS = frozenset(('enum', 'const', 'default', 'examples'))
+# maximum number of characters of a value quoted in a message
+QUOTE_LENGTH = 60
+
+_TYPE_NAMES = {
+    dict: 'object',
+    list: 'array',
+    str: 'string',
+    bool: 'boolean',
+    int: 'integer',
+    float: 'number',
+    type(None): 'null',
+}
+
+
+def _unwrap(entry):
+    """
+    Get the type and value of a child entry
+
+    :param entry: QJsonNode or mixed. node or raw value
+    :return: tuple. (type, value), the value of a container is the entry
+    """
+    if isinstance(entry, QJsonNode):
+        dtype = entry._dtype
+        if dtype is dict or dtype is list:
+            return dtype, entry
+        # the value setter of a leaf keeps its type
+        entry = entry._value
+    return type(entry), entry
+
+
+def _iterItems(entry, dtype):
+    """
+    Iterate over the items of a container without creating nodes
+
+    :param entry: QJsonNode or dict or list. container
+    :param dtype: type. dict or list
+    :return: generator of (key, entry), the key is None for a list
+    """
+    if not isinstance(entry, QJsonNode):
+        if dtype is dict:
+            for item in entry.items():
+                yield item
+        else:
+            for value in entry:
+                yield None, value
+        return
+
+    children = entry._children or ()
+    if dtype is dict:
+        for item in zip(entry._keys or (), children):
+            yield item
+    else:
+        for child in children:
+            yield None, child
+    for item in entry._iterPending():
+        yield item
+
+
+def _plainValue(entry):
+    """
+    Get the raw value of an entry, containers are copied from their node
+
+    :param entry: QJsonNode or mixed. node or raw value
+    :return: mixed. value
+    """
+    if isinstance(entry, QJsonNode):
+        return entry.getChildrenValue(entry)
+    return entry
+
+
+def _freeze(value):
+    """
+    Get a hashable key of a json value, equal for equal json values:
+    true and 1 differ, 1 and 1.0 do not
+
+    :param value: mixed. raw value
+    :return: tuple. key
+    """
+    if isinstance(value, bool):
+        return 'boolean', value
+    elif isinstance(value, dict):
+        return 'object', frozenset(
+            (key, _freeze(item)) for key, item in value.items())
+    elif isinstance(value, list):
+        return 'array', tuple(_freeze(item) for item in value)
+    elif isinstance(value, (int, float)):
+        return 'number', value
+    return _TYPE_NAMES.get(type(value), 'string'), value
+
+
+def _quote(value):
+    """
+    Get the json text of a value for a message, cut to QUOTE_LENGTH
+
+    :param value: mixed. raw value
+    :return: str. text
+    """
+    try:
+        text = qjsoncodec.dumps(value)
+    except (TypeError, ValueError):
+        text = str(value)
+    if len(text) > QUOTE_LENGTH:
+        text = text[:QUOTE_LENGTH] + ELLIPSIS
+    return text
+
+
+def _pathKey(path):
+    """
+    Get the natural order sort key of a JSON Pointer
+
+    :param path: str. JSON Pointer
+    :return: list. sort key
+    """
+    return [naturalKey(key) for key in qjsonpath.split(path)]
+
+
+class QJsonSchema(object):
+    """
+    JSON Schema checking json values or QJsonNode trees, the references
+    and patterns are resolved once when it is created
+    """
+
+    def __init__(self, schema):
+        """
+        Initialization
+
+        :param schema: dict or bool. schema
+        :raise ValueError: not a schema, a $ref not found or a pattern
+                           that is not a valid regular expression
+        """
+        if not isinstance(schema, (dict, bool)):
+            raise ValueError('A schema is an object or a boolean')
+        self._root = schema
+        # {$ref: schema}
+        self._refs = dict()
+        # {pattern: compiled pattern}
+        self._patterns = dict()
+        # {id(schema): tuple of schemas applying with it}
+        self._expanded = dict()
+        # {id(enum): set of frozen values}
+        self._enums = dict()
+        self._prepare()
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a schema from a json file
+
+        :param path: str. path of the json file
+        :return: QJsonSchema. schema
+        :raise ValueError: or IOError, the file is not a valid schema
+        """
+        with io.open(path, 'rb') as stream:
+            return cls(qjsoncodec.loads(stream.read()))
+
+    def root(self):
+        """
+        Custom: get the schemas applying to the whole document
+
+        :return: tuple of dict or bool. schemas, see expand()
+        """
+        return self.expand(self._root)
+
+    def expand(self, schema):
+        """
+        Custom: get a schema with the schemas applying along with it,
+        through $ref and allOf, cached
+
+        :param schema: dict or bool. schema
+        :return: tuple of dict or bool. schemas, true schemas left out
+        """
+        expanded = self._expanded.get(id(schema))
+        if expanded is not None:
+            return expanded
+
+        result = list()
+        seen = set()
+        stack = [schema]
+        while stack:
+            current = stack.pop()
+            # a $ref cycle only applies its schemas once
+            if current is True or id(current) in seen:
+                continue
+            seen.add(id(current))
+            result.append(current)
+            if current is False:
+                continue
+            if '$ref' in current:
+                stack.append(self._refs[current['$ref']])
+            stack.extend(reversed(current.get('allOf', ())))
+
+        expanded = self._expanded[id(schema)] = tuple(result)
+        return expanded
+
+    def isDeep(self, schemas):
+        """
+        Custom: check if schemas have keywords depending on the value of
+        the children, see DEEP_KEYWORDS
+
+        :param schemas: tuple of dict or bool. expanded schemas
+        :return: bool.
+        """
+        for schema in schemas:
+            if schema is not False and not DEEP_KEYWORDS.isdisjoint(schema):
+                return True
+        return False
+
+    def childSchemas(self, schemas, dtype, key):
+        """
+        Custom: get the schemas applying to a child of a container
+
+        :param schemas: tuple of dict or bool. expanded schemas of the
+                        container
+        :param dtype: type. dict or list, type of the container
+        :param key: str or int. key of the child, its index in a list
+        :return: tuple of dict or bool. expanded schemas of the child
+        """
+        result = list()
+        expand = self.expand
+        for schema in schemas:
+            if schema is False:
+                continue
+
+            if dtype is dict:
+                matched = False
+                properties = schema.get('properties')
+                if properties and key in properties:
+                    result.extend(expand(properties[key]))
+                    matched = True
+                for pattern, subschema in schema.get(
+                        'patternProperties', {}).items():
+                    if self._patterns[pattern].search(key):
+                        result.extend(expand(subschema))
+                        matched = True
+                if not matched and 'additionalProperties' in schema:
+                    result.extend(expand(schema['additionalProperties']))
+            else:
+                items = schema.get('items')
+                if isinstance(items, list):
+                    if key < len(items):
+                        result.extend(expand(items[key]))
+                    elif 'additionalItems' in schema:
+                        result.extend(expand(schema['additionalItems']))
+                elif items is not None:
+                    result.extend(expand(items))
+        return tuple(result)
+
+    def validate(self, entry, schemas=None, keys=()):
+        """
+        Custom: check an entry and its descendants against schemas
+
+        :param entry: QJsonNode or mixed. node or raw value
+        :param schemas: tuple of dict or bool. expanded schemas of the
+                        entry, the root schemas if not specified
+        :param keys: list. keys of the entry from the document root,
+                     prefixing the paths of the errors
+        :return: list of (str, str). JSON Pointer and message of the errors
+        """
+        if schemas is None:
+            schemas = self.root()
+        errors = list()
+        keys = list(keys)
+        try:
+            self._validate(entry, schemas, keys, errors)
+        except RecursionError:
+            errors.append((qjsonpath.pointer(keys),
+                           'is nested too deeply to be validated'))
+        return errors
+
+    def _prepare(self):
+        """
+        Resolve the references and compile the patterns of the schema
+        """
+        stack = [self._root]
+        while stack:
+            value = stack.pop()
+            if isinstance(value, list):
+                stack.extend(value)
+                continue
+            elif not isinstance(value, dict):
+                continue
+
+            ref = value.get('$ref')
+            if isinstance(ref, str) and ref not in self._refs:
+                self._refs[ref] = self._resolve(ref)
+            patterns = list(value.get('patternProperties', ()))
+            if isinstance(value.get('pattern'), str):
+                patterns.append(value['pattern'])
+            for pattern in patterns:
+                try:
+                    self._patterns[pattern] = re.compile(pattern)
+                except re.error as error:
+                    raise ValueError('Invalid pattern {!r}: {}'.format(
+                        pattern, error))
+
+            for keyword, item in value.items():
+                if keyword not in _VALUE_KEYWORDS:
+                    stack.append(item)
+
+    def _resolve(self, ref):
+        """
+        Get the schema a reference points to in the schema
+
+        :param ref: str. '#' followed by a JSON Pointer
+        :return: dict or bool. schema
+        :raise ValueError: not a local reference, or not found
+        """
+        if not ref.startswith('#'):
+            raise ValueError('Only local $ref are supported: {}'.format(ref))
+        target = self._root
+        try:
+            for key in qjsonpath.split(ref[1:]):
+                if isinstance(target, list):
+                    target = target[int(key)]
+                else:
+                    target = target[key]
+        except (KeyError, IndexError, TypeError, ValueError):
+            raise ValueError('$ref not found: {}'.format(ref))
+        if not isinstance(target, (dict, bool)):
+            raise ValueError('$ref is not a schema: {}'.format(ref))
+        return target
+
+    def _validate(self, entry, schemas, keys, errors):
+        """
+        Check an entry and its descendants against expanded schemas
+
+        :param entry: QJsonNode or mixed. node or raw value
+        :param schemas: tuple of dict or bool. expanded schemas
+        :param keys: list. keys of the entry, restored once done
+        :param errors: list. (JSON Pointer, message) found
+        """
+        dtype, value = _unwrap(entry)
+        # the raw value is only copied once for enum, const, uniqueItems
+        plain = list()
+        for schema in schemas:
+            if schema is False:
+                self._error(errors, keys, 'is not allowed by the schema')
+            elif schema:
+                self._check(schema, entry, dtype, value, keys, errors, plain)
+
+        if dtype is not dict and dtype is not list:
+            return
+        isDict = dtype is dict
+        childSchemas = self.childSchemas
+        validate = self._validate
+        for index, (key, child) in enumerate(_iterItems(value, dtype)):
+            if not isDict:
+                key = index
+            subschemas = childSchemas(schemas, dtype, key)
+            if subschemas:
+                keys.append(key)
+                validate(child, subschemas, keys, errors)
+                keys.pop()
+
+    def _check(self, schema, entry, dtype, value, keys, errors, plain):
+        """
+        Check the keywords of a schema applying to an entry itself, the
+        keywords of its children are checked by _validate()
+
+        :param plain: list. raw value of the entry once copied
+        """
+        if 'type' in schema:
+            self._checkType(schema['type'], dtype, value, keys, errors)
+
+        if 'enum' in schema or 'const' in schema:
+            if not plain:
+                plain.append(_plainValue(entry))
+            frozen = _freeze(plain[0])
+            if 'enum' in schema and frozen not in self._frozenEnum(
+                    schema['enum']):
+                self._error(errors, keys, 'is not one of {}'.format(
+                    _quote(schema['enum'])))
+            if 'const' in schema and frozen != _freeze(schema['const']):
+                self._error(errors, keys, 'must be {}'.format(
+                    _quote(schema['const'])))
+
+        if dtype is int or dtype is float:
+            self._checkNumber(schema, value, keys, errors)
+        elif dtype is str:
+            self._checkString(schema, value, keys, errors)
+        elif dtype is list:
+            self._checkArray(schema, entry, keys, errors, plain)
+        elif dtype is dict:
+            self._checkObject(schema, entry, keys, errors)
+
+        self._checkCombinators(schema, entry, keys, errors)
+
+    def _frozenEnum(self, values):
+        """
+        Get the frozen values of an enum keyword, cached
+
+        :param values: list. values of the enum
+        :return: set. values, see _freeze()
+        """
+        frozen = self._enums.get(id(values))
+        if frozen is None:
+            frozen = self._enums[id(values)] = set(
+                _freeze(value) for value in values)
+        return frozen
+
+    def _checkType(self, types, dtype, value, keys, errors):
+        """
+        Check the type keyword, an integral float is an integer
+        """
+        name = _TYPE_NAMES.get(dtype, dtype.__name__)
+        if dtype is float and value.is_integer():
+            name = 'integer'
+        if isinstance(types, str):
+            types = (types,)
+        for expected in types:
+            if expected == name or (
+                    expected == 'number' and name == 'integer'):
+                return
+        self._error(errors, keys, 'expected {}, got {}'.format(
+            ' or '.join(types), name))
+
+    def _checkNumber(self, schema, value, keys, errors):
+        """
+        Check the number keywords
+        """
+        minimum = schema.get('minimum')
+        exclusive = schema.get('exclusiveMinimum')
+        # draft 4: a boolean making the minimum exclusive
+        if exclusive is True:
+            exclusive, minimum = minimum, None
+        if minimum is not None and value < minimum:
+            self._error(errors, keys, 'must be >= {}'.format(minimum))
+        if isinstance(exclusive, (int, float)) \
+                and not isinstance(exclusive, bool) and value <= exclusive:
+            self._error(errors, keys, 'must be > {}'.format(exclusive))
+
+        maximum = schema.get('maximum')
+        exclusive = schema.get('exclusiveMaximum')
+        if exclusive is True:
+            exclusive, maximum = maximum, None
+        if maximum is not None and value > maximum:
+            self._error(errors, keys, 'must be <= {}'.format(maximum))
+        if isinstance(exclusive, (int, float)) \
+                and not isinstance(exclusive, bool) and value >= exclusive:
+            self._error(errors, keys, 'must be < {}'.format(exclusive))
+
+        multiple = schema.get('multipleOf')
+        if multiple:
+            # float divisions are off by a rounding error
+            quotient = value / multiple
+            if abs(quotient - round(quotient)) > 1e-9 * max(1, abs(quotient)):
+                self._error(errors, keys, 'must be a multiple of {}'.format(
+                    multiple))
+
+    def _checkString(self, schema, value, keys, errors):
+        """
+        Check the string keywords
+        """
+        if 'minLength' in schema and len(value) < schema['minLength']:
+            self._error(errors, keys, 'must be at least {} characters long'
+                        .format(schema['minLength']))
+        if 'maxLength' in schema and len(value) > schema['maxLength']:
+            self._error(errors, keys, 'must be at most {} characters long'
+                        .format(schema['maxLength']))
+        pattern = schema.get('pattern')
+        if pattern is not None and not self._patterns[pattern].search(value):
+            self._error(errors, keys, 'does not match {}'.format(
+                _quote(pattern)))
+
+    def _checkArray(self, schema, entry, keys, errors, plain):
+        """
+        Check the array keywords but items and additionalItems
+        """
+        if 'minItems' in schema or 'maxItems' in schema:
+            count = _count(entry)
+            if count < schema.get('minItems', 0):
+                self._error(errors, keys, 'must have at least {} items'
+                            .format(schema['minItems']))
+            if count > schema.get('maxItems', count):
+                self._error(errors, keys, 'must have at most {} items'
+                            .format(schema['maxItems']))
+
+        if schema.get('uniqueItems'):
+            if not plain:
+                plain.append(_plainValue(entry))
+            seen = set()
+            for item in plain[0]:
+                frozen = _freeze(item)
+                if frozen in seen:
+                    self._error(errors, keys, 'has duplicate items')
+                    break
+                seen.add(frozen)
+
+        if 'contains' in schema:
+            schemas = self.expand(schema['contains'])
+            for _, child in _iterItems(entry, list):
+                if not self._failures(child, schemas, keys):
+                    break
+            else:
+                self._error(errors, keys, 'does not contain a matching item')
+
+    def _checkObject(self, schema, entry, keys, errors):
+        """
+        Check the object keywords but properties, patternProperties and
+        additionalProperties
+        """
+        required = schema.get('required')
+        dependencies = schema.get('dependencies')
+        names = None
+        if required or dependencies or 'propertyNames' in schema \
+                or 'minProperties' in schema or 'maxProperties' in schema:
+            names = [key for key, _ in _iterItems(entry, dict)]
+
+        if names is None:
+            return
+        present = set(names)
+        for key in required or ():
+            if key not in present:
+                self._error(errors, keys, '{} is required'.format(
+                    _quote(key)))
+
+        if len(present) < schema.get('minProperties', 0):
+            self._error(errors, keys, 'must have at least {} properties'
+                        .format(schema['minProperties']))
+        if len(present) > schema.get('maxProperties', len(present)):
+            self._error(errors, keys, 'must have at most {} properties'
+                        .format(schema['maxProperties']))
+
+        if 'propertyNames' in schema:
+            schemas = self.expand(schema['propertyNames'])
+            for key in names:
+                keys.append(key)
+                for path, message in self._failures(key, schemas, keys):
+                    errors.append((path, 'key {}'.format(message)))
+                keys.pop()
+
+        for key, dependency in (dependencies or {}).items():
+            if key not in present:
+                continue
+            if isinstance(dependency, list):
+                for name in dependency:
+                    if name not in present:
+                        self._error(errors, keys, '{} is required by {}'
+                                    .format(_quote(name), _quote(key)))
+            else:
+                self._validate(entry, self.expand(dependency), keys, errors)
+
+    def _checkCombinators(self, schema, entry, keys, errors):
+        """
+        Check anyOf, oneOf, not and if, then, else, allOf is expanded
+        """
+        if 'anyOf' in schema:
+            failures = [self._failures(entry, self.expand(subschema), keys)
+                        for subschema in schema['anyOf']]
+            if all(failures):
+                self._error(errors, keys,
+                            'does not match any of the anyOf schemas')
+                # the closest match shows where to look
+                errors.extend(min(failures, key=len))
+
+        if 'oneOf' in schema:
+            failures = list()
+            matches = 0
+            for subschema in schema['oneOf']:
+                failure = self._failures(entry, self.expand(subschema), keys)
+                failures.append(failure)
+                if not failure:
+                    matches += 1
+                    if matches > 1:
+                        break
+            if not matches:
+                self._error(errors, keys,
+                            'does not match any of the oneOf schemas')
+                errors.extend(min(failures, key=len))
+            elif matches > 1:
+                self._error(errors, keys,
+                            'matches more than one of the oneOf schemas')
+
+        if 'not' in schema and not self._failures(
+                entry, self.expand(schema['not']), keys):
+            self._error(errors, keys, 'must not match the not schema')
+
+        if 'if' in schema:
+            if self._failures(entry, self.expand(schema['if']), keys):
+                branch = schema.get('else')
+            else:
+                branch = schema.get('then')
+            if branch is not None:
+                self._validate(entry, self.expand(branch), keys, errors)
+
+    def _failures(self, entry, schemas, keys):
+        """
+        Get the errors of an entry against a subschema, reported or not
+
+        :return: list of (str, str). JSON Pointer and message of the errors
+        """
+        errors = list()
+        self._validate(entry, schemas, keys, errors)
+        return errors
+
+    @staticmethod
+    def _error(errors, keys, message):
+        """
+        Add the error of an entry
+
+        :param errors: list. (JSON Pointer, message) found
+        :param keys: list. keys of the entry
+        :param message: str. message
+        """
+        errors.append((qjsonpath.pointer(keys), message))
+
+
+def _count(entry):
+    """
+    Get the number of items of a container
+
+    :param entry: QJsonNode or dict or list. container
+    :return: int.
+    """
+    if isinstance(entry, QJsonNode):
+        return entry.childCount + entry.countPending()
+    return len(entry)
+
+
+class QJsonValidator(QtCore.QThread):
+    # emitted once the errors changed
+    errorsChanged = QtCore.Signal()
+    # str. error message of a validation that failed
+    failed = QtCore.Signal(str)
+
+    # milliseconds without change before validating, a burst of edits or
+    # of batches loaded is validated once
+    validateDelay = 200
+
+    _icon = None
+
+    def __init__(self, model, schema=None, parent=None):
+        """
+        Initialization
+
+        :param model: QJsonModel. model to validate
+        :param schema: QJsonSchema. schema, nothing is validated without
+        :param parent: QObject. parent object
+        """
+        super(QJsonValidator, self).__init__(parent)
+        self._model = None
+        self._schema = schema
+        # {JSON Pointer: list of messages}
+        self._errors = dict()
+
+        # (node, row) entries changed, see QJsonModel.valueChanged
+        self._queue = list()
+        # entries of the validation running, its schema and (entry, keys,
+        # schemas) jobs, and its (JSON Pointer, errors) results
+        self._targets = None
+        self._jobs = None
+        self._results = None
+        self._error = None
+        # the tree changed while it was read
+        self._overlapped = False
+
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._start)
+        self.finished.connect(self._onFinished)
+        self.setModel(model)
+
+    def model(self):
+        """
+        Custom: get the model validated
+
+        :return: QJsonModel. model
+        """
+        return self._model
+
+    def setModel(self, model):
+        """
+        Custom: set the model to validate, its entries show the errors
+
+        :param model: QJsonModel. model
+        """
+        if self._model is not None:
+            self._model.valueChanged.disconnect(self._onValueChanged)
+            self._model.modelReset.disconnect(self._onModelReset)
+            for signal in self._treeSignals(self._model):
+                signal.disconnect(self._onTreeChanged)
+            if self._model.validator() is self:
+                self._model.setValidator(None)
+
+        self._model = model
+        model.setValidator(self)
+        model.valueChanged.connect(self._onValueChanged)
+        model.modelReset.connect(self._onModelReset)
+        for signal in self._treeSignals(model):
+            signal.connect(self._onTreeChanged)
+        self._onModelReset()
+
+    def schema(self):
+        """
+        Custom: get the schema the model is validated against
+
+        :return: QJsonSchema. schema, None if there is none
+        """
+        return self._schema
+
+    def setSchema(self, schema):
+        """
+        Custom: set the schema, the whole document is validated again
+
+        :param schema: QJsonSchema. schema, None to stop validating
+        """
+        self._schema = schema
+        self._onModelReset()
+
+    def errors(self, limit=None):
+        """
+        Custom: get the errors found, in the order of the document
+
+        :param limit: int. maximum number of entries of the errors, the
+                      first ones, no limit if not specified
+        :return: list of (str, str). JSON Pointer and message
+        """
+        if limit is None:
+            paths = sorted(self._errors, key=_pathKey)
+        else:
+            paths = heapq.nsmallest(limit, self._errors, key=_pathKey)
+        return [(path, message)
+                for path in paths for message in self._errors[path]]
+
+    def errorCount(self):
+        """
+        Custom: get the number of errors found
+
+        :return: int.
+        """
+        return sum(len(messages) for messages in self._errors.values())
+
+    def messages(self, path):
+        """
+        Custom: get the errors of an entry
+
+        :param path: str. JSON Pointer of the entry
+        :return: list of str. messages
+        """
+        return list(self._errors.get(path, ()))
+
+    def decoration(self, node):
+        """
+        Custom: get the icon shown on the key of a node with errors
+
+        :param node: QJsonNode. node of the model
+        :return: QIcon. warning icon, None without error
+        """
+        if not self._errors or node.path not in self._errors:
+            return None
+        if QJsonValidator._icon is None:
+            QJsonValidator._icon = QtWidgets.QApplication.style() \
+                .standardIcon(QtWidgets.QStyle.SP_MessageBoxWarning)
+        return QJsonValidator._icon
+
+    def toolTip(self, node):
+        """
+        Custom: get the error messages of a node as a tooltip
+
+        :param node: QJsonNode. node of the model
+        :return: str. messages, None without error
+        """
+        if not self._errors:
+            return None
+        messages = self._errors.get(node.path)
+        if messages:
+            return '\n'.join(messages)
+
+    def isPending(self):
+        """
+        Custom: check if changes are waiting to be validated or are being
+        validated
+
+        :return: bool.
+        """
+        return bool(self._queue) or self._jobs is not None
+
+    def validate(self, node=None, row=-1):
+        """
+        Custom: validate an entry again after validateDelay, the whole
+        document by default
+
+        :param node: QJsonNode. node of the model, the root if not specified
+        :param row: int. row of a leaf child of the node, -1 for the node
+        """
+        if node is None:
+            node = self._model.getNode(QtCore.QModelIndex())
+        self._queue.append((node, row))
+        self._timer.start(self.validateDelay)
+
+    def waitValidated(self):
+        """
+        Custom: validate the changes waiting right away and block until
+        they are validated
+        """
+        self._timer.stop()
+        self._start()
+        # finished may not be handled yet once the thread is done
+        while self._jobs is not None:
+            self.wait()
+            self._onFinished()
+            self._timer.stop()
+            self._start()
+
+    def run(self):
+        """
+        Override: validate the entries of the jobs
+        """
+        schema, jobs = self._jobs
+        results = list()
+        try:
+            for entry, keys, schemas in jobs:
+                results.append((qjsonpath.pointer(keys),
+                                schema.validate(entry, schemas, keys)))
+        except Exception as error:
+            # besides a schema error, the tree may change while it is
+            # read, which is checked once done
+            self._error = str(error) or type(error).__name__
+        self._results = results
+
+    def _start(self):
+        """
+        Start validating the entries changed, unless already validating
+        """
+        if self.isRunning() or not self._queue or self._schema is None:
+            return
+
+        self._targets, self._queue = self._queue, list()
+        self._jobs = self._schema, self._makeJobs(self._targets)
+        self._results = None
+        self._error = None
+        self._overlapped = False
+        self.start()
+
+    def _makeJobs(self, targets):
+        """
+        Get the entries to validate for entries changed: an entry, or
+        its closest ancestor to the root whose schemas depend on the
+        value of its children, entries under another one are left out
+
+        :param targets: list of (QJsonNode, int). entries changed
+        :return: list of (entry, keys, schemas), ancestors first
+        """
+        root = self._model.getNode(QtCore.QModelIndex())
+        schema = self._schema
+        jobs = dict()
+        for node, row in targets:
+            chain = list()
+            current = node
+            while current._parent is not None:
+                if not current._isChildOf(current._parent):
+                    break
+                chain.append(current)
+                current = current._parent
+            if current is not root:
+                # removed since
+                continue
+            chain.reverse()
+
+            entry = root
+            keys = list()
+            schemas = schema.root()
+            for child in chain:
+                if schema.isDeep(schemas):
+                    break
+                key = child._row if entry._dtype is list else child.key
+                schemas = schema.childSchemas(schemas, entry._dtype, key)
+                keys.append(key)
+                entry = child
+            else:
+                # a leaf replaced is validated alone
+                children = node._children or ()
+                if 0 <= row < len(children) and not schema.isDeep(schemas):
+                    key = row if node._dtype is list else node._keys[row]
+                    schemas = schema.childSchemas(schemas, node._dtype, key)
+                    keys.append(key)
+                    entry = children[row]
+            jobs[qjsonpath.pointer(keys)] = (entry, keys, schemas)
+
+        # an entry validated with an ancestor is left out
+        result = list()
+        validated = set()
+        for path in sorted(jobs, key=lambda path: len(jobs[path][1])):
+            keys = jobs[path][1]
+            if not any(qjsonpath.pointer(keys[:depth]) in validated
+                       for depth in range(len(keys))):
+                validated.add(path)
+                result.append(jobs[path])
+        return result
+
+    def _onFinished(self):
+        """
+        Replace the errors of the entries validated, unless the tree
+        changed in the meantime
+        """
+        if self._jobs is None:
+            # already done by waitValidated()
+            return
+        targets, self._targets = self._targets, None
+        self._jobs = None
+        results, self._results = self._results, None
+
+        if self._overlapped:
+            # the entries read may mix states of the tree
+            self._queue.extend(targets)
+        elif self._error is not None:
+            self.failed.emit(self._error)
+        else:
+            for path, errors in results:
+                self._replaceErrors(path, errors)
+            self.errorsChanged.emit()
+
+        if self._queue and not self._timer.isActive():
+            self._timer.start(self.validateDelay)
+
+    def _replaceErrors(self, path, errors):
+        """
+        Replace the errors of an entry and its descendants
+
+        :param path: str. JSON Pointer of the entry validated
+        :param errors: list of (str, str). errors found under it
+        """
+        prefix = path + '/'
+        for errorPath in [errorPath for errorPath in self._errors
+                          if errorPath == path
+                          or errorPath.startswith(prefix)]:
+            del self._errors[errorPath]
+        for errorPath, message in errors:
+            self._errors.setdefault(errorPath, list()).append(message)
+
+    def _onValueChanged(self, node, row):
+        """
+        Validate the entry changed
+        """
+        self._onTreeChanged()
+        if self._schema is not None:
+            self.validate(node, row)
+
+    def _onTreeChanged(self, *args):
+        """
+        Mark the validation running as overlapping a change of the tree,
+        rows fetched or dropped included
+        """
+        if self.isRunning():
+            self._overlapped = True
+
+    def _onModelReset(self):
+        """
+        Drop the errors of the previous tree and validate the new one
+        """
+        self._onTreeChanged()
+        self._queue = list()
+        if self._errors:
+            self._errors = dict()
+            self.errorsChanged.emit()
+        if self._schema is not None:
+            self.validate()
+
+    @staticmethod
+    def _treeSignals(model):
+        """
+        Get the signals of a model changing the rows of the tree
+
+        :param model: QJsonModel. model
+        :return: tuple of signals
+        """
+        return (model.rowsInserted, model.rowsRemoved, model.rowsMoved,
+                model.layoutChanged)
+
+
+class QJsonErrorPanel(QtWidgets.QDockWidget):
+    """
+    Dockable list of the errors of a QJsonValidator, clicking an error
+    emits the path of its entry
+    """
+
+    # str. JSON Pointer of the entry of an error clicked
+    pathActivated = QtCore.Signal(str)
+
+    # maximum number of errors listed
+    displayLimit = 1000
+
+    COLUMNS = ('Path', 'Error')
+
+    def __init__(self, validator=None, parent=None):
+        """
+        Initialization
+
+        :param validator: QJsonValidator. validator shown, if any
+        :param parent: QWidget. parent widget
+        """
+        super(QJsonErrorPanel, self).__init__('Schema Errors', parent)
+        self.setObjectName('ui_errors_dock')
+        self._validator = None
+
+        self.ui_count_label = QtWidgets.QLabel()
+        self.ui_errors_tree = QtWidgets.QTreeWidget()
+        self.ui_errors_tree.setColumnCount(len(self.COLUMNS))
+        self.ui_errors_tree.setHeaderLabels(self.COLUMNS)
+        self.ui_errors_tree.setRootIsDecorated(False)
+        self.ui_errors_tree.setUniformRowHeights(True)
+        self.ui_errors_tree.itemClicked.connect(
+            lambda item: self.pathActivated.emit(item.text(0)))
+
+        layout = QtWidgets.QVBoxLayout()
+        layout.addWidget(self.ui_count_label)
+        layout.addWidget(self.ui_errors_tree)
+        widget = QtWidgets.QWidget()
+        widget.setLayout(layout)
+        self.setWidget(widget)
+
+        self.visibilityChanged.connect(lambda visible: self.refresh())
+        self.setValidator(validator)
+
+    def validator(self):
+        """
+        Custom: get the validator shown
+
+        :return: QJsonValidator. validator, None if there is none
+        """
+        return self._validator
+
+    def setValidator(self, validator):
+        """
+        Custom: list the errors of another validator
+
+        :param validator: QJsonValidator. validator, None for none
+        """
+        if self._validator is not None:
+            self._validator.errorsChanged.disconnect(self.refresh)
+        self._validator = validator
+        if validator is not None:
+            validator.errorsChanged.connect(self.refresh)
+        self.refresh()
+
+    def refresh(self):
+        """
+        Custom: list the current errors, only while shown
+        """
+        if not self.isVisible():
+            return
+        tree = self.ui_errors_tree
+        tree.clear()
+        validator = self._validator
+        if validator is None or validator.schema() is None:
+            self.ui_count_label.setText('No schema')
+            return
+
+        count = validator.errorCount()
+        items = list()
+        for path, message in validator.errors(self.displayLimit):
+            item = QtWidgets.QTreeWidgetItem((path, message))
+            item.setToolTip(1, message)
+            items.append(item)
+        tree.addTopLevelItems(items)
+
+        text = '{} error(s)'.format(count)
+        if count > self.displayLimit:
+            text += ', the first {} listed'.format(self.displayLimit)
+        self.ui_count_label.setText(text)
@@ -0,0 +1,489 @@
+"""
+Full-text search index over the keys and values of a QJsonNode tree
+
+Every entry of a container node (a child, raw leaf or node) is split into
+lowercase word tokens from its key and, for a leaf, from its value. Only
+the first characters of a token are indexed, few for a number, which
+keeps the token list small for random numbers and long encoded strings.
+
+Entries of a regular container are indexed by container: each token maps
+to the containers holding entries with that token, with the number of
+such entries, so raw leaf values never need to be wrapped into nodes.
+Entries of a wide container are indexed by node, so a query does not
+have to check every entry of a container with a million children.
+
+A query word matches every token it is a prefix of, the tokens are found
+by bisection in a sorted token list, then only the candidates found for
+the most selective query word are checked against the whole query
+"""
+
+
+import bisect
+import re
+
+from .qjsonnode import QJsonNode
+
+
+TOKEN = re.compile(r'\w+', re.UNICODE)
+# number of indexed characters of a word and of a number token
+TOKEN_LENGTH = 16
+NUMBER_LENGTH = 4
+
+# number of children from which the entries are indexed by node
+WIDE_COUNT = 256
+# number of key token sets kept for reuse, keys are mostly shared
+KEY_CACHE_SIZE = 4096
+# number of new tokens inserted one by one into the sorted token list,
+# above that the list is merged in one go
+INSERT_LIMIT = 64
+# number of entries checked between two steps of iterSearch()
+CHECK_COUNT = 4096
+
+
+def tokenize(text):
+    """
+    Split a text into lowercase word tokens
+
+    :param text: str. text
+    :return: set of str. tokens
+    """
+    return set(TOKEN.findall(text.lower()))
+
+
+def indexToken(token):
+    """
+    Cut a token to the part stored in the index
+
+    :param token: str. lowercase token
+    :return: str.
+    """
+    if token.isdigit():
+        return token[:NUMBER_LENGTH]
+    return token[:TOKEN_LENGTH]
+
+
+def indexTokens(text):
+    """
+    Split a text into the lowercase tokens stored in the index
+
+    :param text: str. text
+    :return: set of str. tokens
+    """
+    return set(indexToken(token) for token in TOKEN.findall(text.lower()))
+
+
+def valueText(value):
+    """
+    Get the searchable text of a leaf value, the json spelling is used
+    for booleans and null
+
+    :param value: mixed. raw leaf value
+    :return: str.
+    """
+    if value is None:
+        return 'null'
+    elif value is True:
+        return 'true'
+    elif value is False:
+        return 'false'
+    return str(value)
+
+
+class QJsonSearchIndex(object):
+    """
+    Token index of the entries of a QJsonNode tree, only the children
+    already created are indexed, pending ones of lazy nodes are not
+    """
+
+    def __init__(self, root=None):
+        """
+        Initialization
+
+        :param root: QJsonNode. root node whose tree is indexed
+        """
+        # token: {container node: number of entries with the token}
+        self._postings = dict()
+        # token: set of entry nodes, for the entries of wide containers
+        self._entryPostings = dict()
+        self._wideContainers = set()
+
+        # sorted tokens, may hold tokens removed from the postings
+        self._tokens = list()
+        self._newTokens = list()
+        self._keyTokens = dict()
+        self._keyTexts = dict()
+
+        if root is not None:
+            self.addRows(root, 0, root.childCount - 1)
+
+    def __len__(self):
+        """
+        Get the number of distinct tokens
+        """
+        return len(set(self._postings).union(self._entryPostings))
+
+    def addRows(self, parent, first, last):
+        """
+        Index the entries of a container from first to last row,
+        including their subtree, the other rows must be indexed already
+
+        :param parent: QJsonNode. container node
+        :param first: int. first row
+        :param last: int. last row
+        """
+        for _ in self._walk(parent, first, last, 1):
+            pass
+
+    def iterAddRows(self, parent, first, last):
+        """
+        Index the entries step by step, see addRows(), the index must not
+        be used before the iteration is over
+
+        :param parent: QJsonNode. container node
+        :param first: int. first row
+        :param last: int. last row
+        :return: generator, yields after every CHECK_COUNT entries
+        """
+        return self._walk(parent, first, last, 1)
+
+    def removeRows(self, parent, first, last):
+        """
+        Remove the entries of a container from first to last row from
+        the index, including their subtree, must be called before the
+        rows are removed from the node
+
+        :param parent: QJsonNode. container node
+        :param first: int. first row
+        :param last: int. last row
+        """
+        for _ in self._walk(parent, first, last, -1):
+            pass
+
+    def updateRow(self, parent, row, key, value):
+        """
+        Re-index an entry after its key or value changed
+
+        :param parent: QJsonNode. container node
+        :param row: int. row of the entry
+        :param key: mixed. previous key of the entry
+        :param value: mixed. previous value of the entry
+        """
+        entry = parent.peekChild(row)
+        isLeaf = entry.dtype is not dict and entry.dtype is not list
+        if parent.dtype is not dict:
+            key = None
+        self._countRow(parent, row, self._entryTokens(key, value, isLeaf), -1)
+        self._countRow(parent, row, self._rowTokens(parent, row), 1)
+
+    def search(self, text):
+        """
+        Find the entries matching a query, each word of the query must be
+        the beginning of a word of the entry key or value, case insensitive
+
+        :param text: str. query
+        :return: dict. {container node: set of matching rows}
+        """
+        matches = dict()
+        for _ in self.iterSearch(text, matches):
+            pass
+        return matches
+
+    def iterSearch(self, text, matches):
+        """
+        Find the entries matching a query step by step, see search(),
+        the caller can stop iterating at any step to cancel the search
+
+        :param text: str. query
+        :param matches: dict. {container node: set of matching rows},
+                        filled in place
+        :return: generator, yields after every CHECK_COUNT checked entries
+        """
+        words = tokenize(text)
+        if not words:
+            return
+        self._flushTokens()
+
+        # candidates of the word with the fewest postings
+        best = None
+        for word in words:
+            containerPostings, entryPostings = self._postingsOf(word)
+            size = sum(len(postings) for postings in containerPostings) \
+                + sum(len(postings) for postings in entryPostings)
+            if best is None or size < best[0]:
+                best = size, containerPostings, entryPostings
+        _, containerPostings, entryPostings = best
+
+        # a word is the beginning of a token when no word character
+        # comes before it
+        patterns = [re.compile(r'(?<!\w)' + re.escape(word), re.UNICODE)
+                    for word in words]
+
+        def isMatch(container, row):
+            text = self._rowText(container, row)
+            for pattern in patterns:
+                if not pattern.search(text):
+                    return False
+            return True
+
+        checked = 0
+        for container in set().union(*containerPostings):
+            rows = set(row for row in range(container.childCount)
+                       if isMatch(container, row))
+            if rows:
+                matches[container] = rows
+
+            checked += container.childCount
+            if checked >= CHECK_COUNT:
+                checked = 0
+                yield
+
+        for entry in set().union(*entryPostings):
+            container, row = entry.parent, entry.row()
+            if isMatch(container, row):
+                matches.setdefault(container, set()).add(row)
+
+            checked += 1
+            if checked >= CHECK_COUNT:
+                checked = 0
+                yield
+
+    @staticmethod
+    def addAncestors(rows):
+        """
+        Add the rows of the ancestors of the specified rows, so that
+        every row can be reached from the root
+
+        :param rows: dict. {container node: set of rows}, updated in place
+        """
+        for node in list(rows):
+            parent = node.parent
+            while parent is not None:
+                known = parent in rows
+                rows.setdefault(parent, set()).add(node.row())
+                if known:
+                    break
+                node, parent = parent, parent.parent
+
+    def _walk(self, parent, first, last, sign):
+        """
+        Count the entries from first to last row and their subtree
+        in or out of the index
+
+        :param parent: QJsonNode. container node
+        :param first: int. first row
+        :param last: int. last row
+        :param sign: int. 1 to add, -1 to remove
+        :return: generator, yields after every CHECK_COUNT entries
+        """
+        checked = 0
+        stack = [(parent, first, last)]
+        while stack:
+            node, first, last = stack.pop()
+            if sign > 0 and node.childCount >= WIDE_COUNT \
+                    and node not in self._wideContainers:
+                self._widen(node, first, last)
+
+            children = node._children
+            for row in range(first, last + 1):
+                self._countRow(node, row, self._rowTokens(node, row), sign)
+                entry = children[row]
+                if isinstance(entry, QJsonNode) and entry._children:
+                    stack.append((entry, 0, len(entry._children) - 1))
+
+            # a removed subtree is no longer indexed at all
+            if sign < 0 and node is not parent:
+                self._wideContainers.discard(node)
+
+            checked += last - first + 1
+            if checked >= CHECK_COUNT:
+                checked = 0
+                yield
+
+    def _widen(self, container, first, last):
+        """
+        Index the entries of a container by node from now on
+
+        :param container: QJsonNode. container node
+        :param first: int. first row not indexed yet
+        :param last: int. last row not indexed yet
+        """
+        rows = [row for row in range(container.childCount)
+                if row < first or row > last]
+        for row in rows:
+            self._countRow(container, row,
+                           self._rowTokens(container, row), -1)
+        self._wideContainers.add(container)
+        for row in rows:
+            self._countRow(container, row,
+                           self._rowTokens(container, row), 1)
+
+    def _countRow(self, container, row, tokens, sign):
+        """
+        Add or remove the tokens of an entry
+
+        :param container: QJsonNode. container node
+        :param row: int. row of the entry
+        :param tokens: set of str. tokens of the entry
+        :param sign: int. 1 to add, -1 to remove
+        """
+        if container in self._wideContainers:
+            # the node is kept in the tree, the postings refer to it
+            self._countEntry(container.child(row), tokens, sign)
+            return
+
+        postings = self._postings
+        for token in tokens:
+            containers = postings.get(token)
+            if containers is None:
+                if sign < 0:
+                    continue
+                containers = postings[token] = dict()
+                self._newTokens.append(token)
+
+            count = containers.get(container, 0) + sign
+            if count > 0:
+                containers[container] = count
+            else:
+                containers.pop(container, None)
+                if not containers:
+                    del postings[token]
+
+    def _countEntry(self, entry, tokens, sign):
+        """
+        Add or remove the tokens of an entry indexed by node
+
+        :param entry: QJsonNode. entry node
+        :param tokens: set of str. tokens of the entry
+        :param sign: int. 1 to add, -1 to remove
+        """
+        postings = self._entryPostings
+        for token in tokens:
+            entries = postings.get(token)
+            if sign > 0:
+                if entries is None:
+                    entries = postings[token] = set()
+                    self._newTokens.append(token)
+                entries.add(entry)
+            elif entries is not None:
+                entries.discard(entry)
+                if not entries:
+                    del postings[token]
+
+    def _postingsOf(self, word):
+        """
+        Get the postings of the tokens starting with a query word
+
+        :param word: str. query word
+        :return: tuple. (list of {container: count}, list of entry sets)
+        """
+        word = indexToken(word)
+        tokens = self._tokens
+        first = bisect.bisect_left(tokens, word)
+        last = bisect.bisect_left(tokens, word + u'\U0010ffff', first)
+
+        containerPostings, entryPostings = list(), list()
+        for token in tokens[first:last]:
+            if token in self._postings:
+                containerPostings.append(self._postings[token])
+            if token in self._entryPostings:
+                entryPostings.append(self._entryPostings[token])
+        return containerPostings, entryPostings
+
+    def _rowTokens(self, container, row):
+        """
+        Get the index tokens of an entry of a container
+
+        :param container: QJsonNode. container node
+        :param row: int. row of the entry
+        :return: set of str. tokens
+        """
+        entry = container._children[row]
+        if container._dtype is dict:
+            key = container._keys[row]
+        else:
+            key = None
+
+        if isinstance(entry, QJsonNode):
+            dtype = entry._dtype
+            return self._entryTokens(
+                key, entry._value, dtype is not dict and dtype is not list)
+        return self._entryTokens(key, entry, True)
+
+    def _entryTokens(self, key, value, isLeaf):
+        """
+        Get the index tokens of an entry from its key and value
+
+        :param key: mixed. key of the entry, None for a list item
+        :param value: mixed. value of the entry
+        :param isLeaf: bool. the value is searchable
+        :return: set of str. tokens
+        """
+        if key is None:
+            tokens = None
+        else:
+            tokens = self._keyTokens.get(key)
+            if tokens is None:
+                tokens = frozenset(indexTokens(valueText(key)))
+                if len(self._keyTokens) < KEY_CACHE_SIZE:
+                    self._keyTokens[key] = tokens
+
+        if not isLeaf:
+            return tokens or ()
+        elif not tokens:
+            return indexTokens(valueText(value))
+        return tokens.union(indexTokens(valueText(value)))
+
+    def _rowText(self, container, row):
+        """
+        Get the lowercase searchable text of an entry of a container
+
+        :param container: QJsonNode. container node
+        :param row: int. row of the entry
+        :return: str. key and value text separated by a space
+        """
+        entry = container._children[row]
+        if container._dtype is dict:
+            key = container._keys[row]
+            keyText = self._keyTexts.get(key)
+            if keyText is None:
+                keyText = valueText(key).lower()
+                if len(self._keyTexts) < KEY_CACHE_SIZE:
+                    self._keyTexts[key] = keyText
+        else:
+            keyText = ''
+
+        if isinstance(entry, QJsonNode):
+            dtype = entry._dtype
+            if dtype is dict or dtype is list:
+                return keyText
+            entry = entry._value
+        return keyText + ' ' + valueText(entry).lower()
+
+    def _flushTokens(self):
+        """
+        Insert the new tokens into the sorted token list and drop the
+        removed ones once they outnumber the live tokens
+        """
+        tokens = self._tokens
+        live = len(self._postings) + len(self._entryPostings)
+        if len(tokens) > 2 * live + INSERT_LIMIT:
+            tokens[:] = [token for token in tokens
+                         if token in self._postings
+                         or token in self._entryPostings]
+
+        newTokens = self._newTokens
+        if not newTokens:
+            return
+        if len(newTokens) <= INSERT_LIMIT:
+            for token in newTokens:
+                position = bisect.bisect_left(tokens, token)
+                if position == len(tokens) or tokens[position] != token:
+                    tokens.insert(position, token)
+        else:
+            # two sorted runs are merged in linear time
+            newTokens.sort()
+            tokens.extend(newTokens)
+            tokens.sort()
+            tokens[:] = [token for index, token in enumerate(tokens)
+                         if not index or tokens[index - 1] != token]
+        self._newTokens = list()
@@ -0,0 +1,210 @@
+"""
+Incremental JSON parsing from a file object
+
+The document is read in chunks and reported as a flow of events, so the
+caller never needs the whole text in memory. Only the outer levels of
+the document are split into events, anything deeper than the requested
+depth is decoded in one go by the json decoder and reported as a single
+value event
+
+Events are (event, value) tuples:
+    ('start_map', None), ('map_key', key), ('end_map', None),
+    ('start_array', None), ('end_array', None), ('value', value)
+"""
+
+
+import codecs
+import re
+
+from . import qjsoncodec
+
+
+CHUNK_SIZE = 1 << 20
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+NUMBER_TAIL = re.compile(r'[-+.eE0-9]*')
+
+START_EVENTS = {'}': 'start_map', ']': 'start_array'}
+END_EVENTS = {'}': 'end_map', ']': 'end_array'}
+
+# parser states
+_VALUE, _FIRST, _KEY, _NEXT, _CLOSE = range(5)
+
+
+class JsonEventParser(object):
+    """
+    Event parser reading a binary file object chunk by chunk
+    """
+
+    def __init__(self, stream, depth=1, chunkSize=CHUNK_SIZE):
+        """
+        Initialization
+
+        :param stream: file. binary file object
+        :param depth: int. number of container levels split into events,
+                      deeper values are reported as a single value event
+        :param chunkSize: int. number of bytes read at a time
+        """
+        self._stream = stream
+        self._depth = depth
+        self._chunkSize = chunkSize
+        self._textDecoder = codecs.getincrementaldecoder('utf-8')()
+
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        self._bytesRead = 0
+
+    @property
+    def bytesRead(self):
+        """
+        Get the number of bytes read from the file so far
+        """
+        return self._bytesRead
+
+    def __iter__(self):
+        """
+        Parse the document
+
+        :return: generator of (event, value) tuples
+        """
+        stack = list()
+        state = _VALUE
+
+        while True:
+            if state == _VALUE:
+                char = self._peek()
+                if char and char in '{[' and len(stack) < self._depth:
+                    self._pos += 1
+                    stack.append('}' if char == '{' else ']')
+                    yield START_EVENTS[stack[-1]], None
+                    state = _FIRST
+                    continue
+
+                yield 'value', self._decode()
+                if not stack:
+                    break
+                state = _NEXT
+
+            elif state == _FIRST:
+                if self._peek() == stack[-1]:
+                    state = _CLOSE
+                else:
+                    state = _KEY if stack[-1] == '}' else _VALUE
+
+            elif state == _KEY:
+                if self._peek() != '"':
+                    self._error('Expecting property name')
+                yield 'map_key', self._decode()
+                self._expect(':')
+                state = _VALUE
+
+            elif state == _NEXT:
+                if self._expect(',' + stack[-1]) == ',':
+                    state = _KEY if stack[-1] == '}' else _VALUE
+                else:
+                    self._pos -= 1
+                    state = _CLOSE
+
+            elif state == _CLOSE:
+                self._pos += 1
+                yield END_EVENTS[stack.pop()], None
+                if not stack:
+                    break
+                state = _NEXT
+
+        if self._peek():
+            self._error('Extra data')
+
+    def _fill(self, size=0):
+        """
+        Read more text into the buffer
+
+        :param size: int. minimum number of bytes to read
+        :return: bool. False when the end of file was already reached
+        """
+        if self._eof:
+            return False
+
+        data = self._stream.read(max(size, self._chunkSize))
+        self._bytesRead += len(data)
+        text = self._textDecoder.decode(data, final=not data)
+        if not data:
+            self._eof = True
+
+        # drop the consumed text while growing the buffer
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        return True
+
+    def _peek(self):
+        """
+        Skip whitespace and get the next character without consuming it
+
+        :return: str. next character, empty at the end of file
+        """
+        while True:
+            self._pos = WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer) or not self._fill():
+                return self._buffer[self._pos:self._pos + 1]
+
+    def _expect(self, characters):
+        """
+        Consume the next character, it must be one of the specified ones
+
+        :param characters: str. allowed characters
+        :return: str. consumed character
+        """
+        char = self._peek()
+        if not char or char not in characters:
+            self._error('Expecting one of {!r}'.format(characters))
+        self._pos += 1
+        return char
+
+    def _decode(self):
+        """
+        Decode the next complete value, reading more text until
+        it fits in the buffer
+
+        :return: mixed. decoded value
+        """
+        self._peek()
+        while True:
+            try:
+                value, end = qjsoncodec.rawDecode(self._buffer, self._pos)
+            except ValueError as error:
+                if self._truncated(error) \
+                        and self._fill(len(self._buffer) - self._pos):
+                    continue
+                self._error(getattr(error, 'msg', str(error)))
+
+            # a number could go on in the next chunk
+            tail = NUMBER_TAIL.match(self._buffer, end).end()
+            if tail == len(self._buffer) and self._fill():
+                continue
+
+            self._pos = end
+            return value
+
+    def _truncated(self, error):
+        """
+        Check if a decode error may come from the end of the buffer
+        rather than from invalid json
+
+        :param error: ValueError. decode error
+        :return: bool.
+        """
+        position = getattr(error, 'pos', None)
+        if position is None:
+            return True
+        return (position >= len(self._buffer) - 5
+                or error.msg.startswith('Unterminated string'))
+
+    def _error(self, message):
+        """
+        Raise a ValueError located at the current position
+
+        :param message: str. error message
+        """
+        offset = self._bytesRead - (len(self._buffer) - self._pos)
+        raise ValueError('{} (around byte {})'.format(message, offset))
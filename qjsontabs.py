@@ -0,0 +1,500 @@
+"""
+Tabbed documents sharing one window, each tab has its own model, proxy
+and view
+
+The tabs are kept under a memory budget: when the estimated memory of
+the trees goes over it, the trees of the tabs that were not shown for
+the longest time are evicted. The node tree of an editable tab is
+pickled to a temporary file and read again as it was when the tab is
+shown, a read-only file only drops the nodes created from it. The tab
+shown, the tabs still loading or saving, the tabs with undo history,
+whose commands refer to the nodes of the tree, and JSON Lines documents,
+which bound their own cache of records, are never evicted.
+
+The documents are saved in the background (QJsonSaver), and optionally
+saved to their file every autosaveInterval seconds once modified. A
+document can be validated against a JSON Schema (QJsonValidator), its
+view shows the errors.
+"""
+
+
+import io
+import itertools
+import os
+import pickle
+import tempfile
+
+from Qt import QtWidgets, QtCore
+
+from . import qjsonhistory
+from .qjsonnode import QJsonNode
+from .qjsonmodel import QJsonModel
+from .qjsonproxy import QJsonProxyModel
+from .qjsonsaver import QJsonSaver
+from .qjsonview import QJsonView
+
+
+# order of use of the tabs
+_USES = itertools.count(1)
+
+
+class QJsonTab(QtWidgets.QWidget):
+    """
+    Document of a tab: the model, its proxy and the tree view, and the
+    file it comes from
+    """
+
+    # seconds between two saves of a modified document with autosave
+    autosaveInterval = 60
+
+    def __init__(self, model, path=None, parent=None):
+        """
+        Initialization
+
+        :param model: QJsonModel. model of the document
+        :param path: str. path of the file of the document, if any
+        :param parent: QWidget. parent widget
+        """
+        super(QJsonTab, self).__init__(parent)
+        self.path = path
+        # memory-mapped QJsonFile of a read-only document
+        self.file = None
+        # QJsonLinesDocument of a JSON Lines document
+        self.lines = None
+        # QJsonLoader filling the model in the background
+        self.loader = None
+        self.loadError = None
+
+        self._model = None
+        # path of the temporary file of the evicted tree
+        self._evictedPath = None
+        self._lastUse = next(_USES)
+        # estimated memory of the tree, None once it changed
+        self._cost = None
+
+        self._proxyModel = QJsonProxyModel(self)
+        # inserted and renamed rows are moved to their sorted position,
+        # the proxy is only sorted as a whole once
+        self._proxyModel.setDynamicSortFilter(True)
+        self._proxyModel.setSortRole(QJsonModel.sortRole)
+        self._view = QJsonView()
+        self._saver = None
+        self._validator = None
+        self._autosaveTimer = QtCore.QTimer(self)
+        self._autosaveTimer.timeout.connect(self._autosave)
+
+        layout = QtWidgets.QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self._view)
+        self.setLayout(layout)
+
+        self.setModel(model)
+        self._view.setModel(self._proxyModel)
+
+    def model(self):
+        """
+        Custom: get the model of the document
+
+        :return: QJsonModel. model
+        """
+        return self._model
+
+    def proxyModel(self):
+        """
+        Custom: get the sort and filter proxy of the model
+
+        :return: QJsonProxyModel. proxy
+        """
+        return self._proxyModel
+
+    def view(self):
+        """
+        Custom: get the tree view of the document
+
+        :return: QJsonView. view
+        """
+        return self._view
+
+    def setModel(self, model):
+        """
+        Custom: replace the model of the document
+
+        :param model: QJsonModel. model
+        """
+        self._discardEvicted()
+        self._model = model
+        self._cost = None
+        if self._saver is None:
+            self._saver = QJsonSaver(model, self)
+            self._saver.saved.connect(self._onSaved)
+        else:
+            self._saver.setModel(model)
+        if self._validator is not None:
+            self._validator.setModel(model)
+        for signal in (model.rowsInserted, model.rowsRemoved,
+                       model.modelReset, model.valueChanged):
+            signal.connect(self._onModelChanged)
+        self._proxyModel.setSourceModel(model)
+
+    def saver(self):
+        """
+        Custom: get the background saver of the document
+
+        :return: QJsonSaver. saver
+        """
+        return self._saver
+
+    def validator(self):
+        """
+        Custom: get the schema validator of the document
+
+        :return: QJsonValidator. validator, None if there is none
+        """
+        return self._validator
+
+    def setValidator(self, validator):
+        """
+        Custom: validate the document with a validator, the view shows
+        its errors, see QJsonValidator.setSchema() to stop validating
+
+        :param validator: QJsonValidator. validator
+        """
+        if self._validator is not None:
+            self._validator.errorsChanged.disconnect(self._onErrorsChanged)
+        self._validator = validator
+        if validator.model() is not self._model:
+            validator.setModel(self._model)
+        validator.errorsChanged.connect(self._onErrorsChanged)
+
+    def canSave(self):
+        """
+        Custom: check if the whole tree is there to be saved: the file is
+        loaded and the tree not evicted
+
+        :return: bool.
+        """
+        loader = self.loader
+        if loader is not None and (loader.isRunning() or loader.isCancelled()
+                                   or self.loadError is not None):
+            return False
+        return not self.isEvicted()
+
+    def save(self, path=None):
+        """
+        Custom: write the document to a json file in the background, an
+        editable json document takes the file as its own once saved
+
+        :param path: str. path of the file, the file of the document by
+                     default
+        :return: bool. whether the save started
+        """
+        path = path or self.path
+        if not path or not self.canSave():
+            return False
+        self._saver.save(path)
+        return True
+
+    def setAutosave(self, enabled):
+        """
+        Custom: save the document to its file every autosaveInterval
+        seconds once modified, read-only and JSON Lines documents are
+        saved explicitly
+
+        :param enabled: bool.
+        """
+        if enabled:
+            self._autosaveTimer.start(int(self.autosaveInterval * 1000))
+        else:
+            self._autosaveTimer.stop()
+
+    def lastUse(self):
+        """
+        Custom: get the order of the last time the tab was shown
+
+        :return: int. greater for a more recent use
+        """
+        return self._lastUse
+
+    def touch(self):
+        """
+        Custom: mark the tab as just used
+        """
+        self._lastUse = next(_USES)
+
+    def isLoading(self):
+        """
+        Custom: check if the model is still being filled from its file
+
+        :return: bool.
+        """
+        return self.loader is not None and self.loader.isRunning()
+
+    def isEvicted(self):
+        """
+        Custom: check if the tree is written out to a temporary file
+
+        :return: bool.
+        """
+        return self._evictedPath is not None
+
+    def canEvict(self):
+        """
+        Custom: check if the tree can be evicted, see evict()
+
+        :return: bool.
+        """
+        history = self._model.history()
+        return not self.isEvicted() and not self.isLoading() \
+            and not self._saver.isSaving() and self.lines is None \
+            and not history.canUndo() and not history.canRedo()
+
+    def memoryCost(self, limit):
+        """
+        Custom: estimate the memory held by the tree, cached until the
+        model changes
+
+        :param limit: int. bytes above which the estimate is not refined
+        :return: int. bytes, 0 once evicted
+        """
+        if self.isEvicted():
+            return 0
+        if self._cost is None:
+            root = self._model.getNode(QtCore.QModelIndex())
+            self._cost = qjsonhistory.estimateCost([root], limit)
+        return self._cost
+
+    def evict(self):
+        """
+        Custom: release the tree of the document, the tree of a read-only
+        file is created again from the file as its rows are fetched,
+        others are pickled to a temporary file and read again by
+        restore(), see canEvict()
+
+        :return: bool. whether the tree was released
+        """
+        if not self.canEvict():
+            return False
+
+        if self.file is not None:
+            self._model.resetRoot(self.file.root())
+            self._cost = None
+            return True
+
+        root = self._model.getNode(QtCore.QModelIndex())
+        handle, path = tempfile.mkstemp(
+            prefix='jsonEditor-', suffix='.pickle')
+        try:
+            # the nodes as they are, python values, duplicate keys and
+            # rows not fetched yet included
+            with io.open(handle, 'wb') as stream:
+                pickle.dump(root, stream, pickle.HIGHEST_PROTOCOL)
+        except (IOError, OSError, pickle.PicklingError, RecursionError):
+            os.remove(path)
+            return False
+
+        dtype = root.dtype
+        # an empty container of the same type until it is restored
+        self._model.resetRoot(QJsonNode.load(
+            dtype() if dtype in (dict, list) else dict()))
+        self._evictedPath = path
+        return True
+
+    def restore(self):
+        """
+        Custom: read the evicted tree again, see evict()
+
+        :return: bool. whether the tree was read again
+        """
+        path = self._evictedPath
+        if path is None:
+            return False
+
+        with io.open(path, 'rb') as stream:
+            root = pickle.load(stream)
+        self._discardEvicted()
+        self._model.resetRoot(root)
+        self._cost = None
+        return True
+
+    def close(self):
+        """
+        Extend: stop loading, wait for the save and the validation
+        running, remove the temporary file of the tree and release the
+        memory map of the file
+        """
+        if self.isLoading():
+            self.loader.cancel()
+            self.loader.wait()
+        self._autosaveTimer.stop()
+        self._saver.waitSaved()
+        if self._validator is not None:
+            # nothing is validated once closed
+            self._validator.setSchema(None)
+            self._validator.wait()
+        self._discardEvicted()
+        if self.file is not None:
+            self.file.close()
+        if self.lines is not None:
+            self.lines.close()
+        return super(QJsonTab, self).close()
+
+    def _discardEvicted(self):
+        """
+        Remove the temporary file of the evicted tree
+        """
+        if self._evictedPath is None:
+            return
+        try:
+            os.remove(self._evictedPath)
+        except OSError:
+            pass
+        self._evictedPath = None
+
+    def _autosave(self):
+        """
+        Save the document to its file if it was modified
+        """
+        if self.path and self.file is None and self.lines is None \
+                and self._saver.isModified() and not self._saver.isSaving():
+            self.save()
+
+    def _onSaved(self, path):
+        """
+        Take the file saved as the file of an editable json document
+        """
+        if self.file is None and self.lines is None:
+            self.path = path
+
+    def _onErrorsChanged(self):
+        """
+        Show the errors found, the icons of the rows are data of the model
+        """
+        self._view.viewport().update()
+
+    def _onModelChanged(self, *args):
+        """
+        Estimate the memory of the tree again when needed
+        """
+        self._cost = None
+
+
+class QJsonTabWidget(QtWidgets.QTabWidget):
+    """
+    Tabs of QJsonTab documents, the trees of the tabs not used recently
+    are evicted to stay under a memory budget
+    """
+
+    # estimated bytes of the trees before the idle tabs are evicted
+    memoryBudget = 512 * 1024 * 1024
+
+    def __init__(self, parent=None):
+        """
+        Initialization
+
+        :param parent: QWidget. parent widget
+        """
+        super(QJsonTabWidget, self).__init__(parent)
+        self.setTabsClosable(True)
+        self.setMovable(True)
+        self.setDocumentMode(True)
+        self.currentChanged.connect(self._onCurrentChanged)
+
+    def addDocument(self, tab, title):
+        """
+        Custom: add a tab and show it
+
+        :param tab: QJsonTab. document
+        :param title: str. title of the tab
+        :return: int. index of the tab
+        """
+        index = self.addTab(tab, title)
+        if tab.path:
+            self.setTabToolTip(index, tab.path)
+        self.setCurrentIndex(index)
+        return index
+
+    def tabs(self):
+        """
+        Custom: get the documents in the order of the tabs
+
+        :return: list of QJsonTab. documents
+        """
+        return [self.widget(index) for index in range(self.count())]
+
+    def findPath(self, path):
+        """
+        Custom: get the tab of a file already opened
+
+        :param path: str. path of the file
+        :return: QJsonTab. document, None if the file is not opened
+        """
+        path = os.path.normcase(os.path.abspath(path))
+        for tab in self.tabs():
+            if tab.path \
+                    and os.path.normcase(os.path.abspath(tab.path)) == path:
+                return tab
+        return None
+
+    def closeDocument(self, index):
+        """
+        Custom: close and remove a tab
+
+        :param index: int. index of the tab
+        """
+        tab = self.widget(index)
+        self.removeTab(index)
+        tab.close()
+        tab.deleteLater()
+
+    def setMemoryBudget(self, budget):
+        """
+        Custom: set the estimated memory of the trees before the idle tabs
+        are evicted, see enforceBudget()
+
+        :param budget: int. bytes
+        """
+        self.memoryBudget = budget
+        self.enforceBudget()
+
+    def memoryUsage(self):
+        """
+        Custom: get the estimated memory of the trees not evicted
+
+        :return: int. bytes
+        """
+        return sum(tab.memoryCost(self.memoryBudget) for tab in self.tabs())
+
+    def enforceBudget(self):
+        """
+        Custom: evict the trees of the idle tabs until the estimated memory
+        is under the budget, the least recently used first
+
+        :return: int. number of tabs evicted
+        """
+        current = self.currentWidget()
+        usage = self.memoryUsage()
+        candidates = sorted(
+            (tab for tab in self.tabs()
+             if tab is not current and tab.canEvict()),
+            key=lambda tab: tab.lastUse())
+
+        evicted = 0
+        for tab in candidates:
+            if usage <= self.memoryBudget:
+                break
+            cost = tab.memoryCost(self.memoryBudget)
+            if cost and tab.evict():
+                usage -= cost
+                evicted += 1
+        return evicted
+
+    def _onCurrentChanged(self, index):
+        """
+        Read the tree of the tab shown again, then evict the idle ones
+        """
+        tab = self.widget(index)
+        if tab is None:
+            return
+        tab.touch()
+        tab.restore()
+        self.enforceBudget()
@@ -0,0 +1,609 @@
+"""
+Incremental synchronization of a text document with a QJsonModel
+
+The document holds the indented json text of the model, each entry of
+a container starts on its own line, so the line of any entry can be
+computed from the number of lines of its previous siblings and ancestors.
+When the model value changes, only the text of the entries that changed
+is serialized again and replaced through a QTextCursor, the syntax
+highlighter of the document then only processes the replaced blocks.
+Rows inserted into or removed from a container only insert or remove
+the lines of their entries, found from the line layout of the container
+"""
+
+
+import bisect
+import itertools
+
+from Qt import QtCore, QtGui
+
+from . import qjsonwriter
+from .qjsonnode import QJsonNode
+
+
+class QJsonTextSync(QtCore.QObject):
+    # milliseconds to gather the model changes before updating the text
+    syncDelay = 0
+    # maximum number of lines written again as a whole without update()
+    renderLimit = 10000
+
+    def __init__(self, document, indent=4, sortKeys=True, parent=None):
+        """
+        Initialization
+
+        :param document: QTextDocument. document showing the json text
+        :param indent: int or str. indentation, lines are required to
+                       map the entries so it cannot be None
+        :param sortKeys: bool. sort dictionary keys
+        :param parent: QObject. parent object
+        """
+        super(QJsonTextSync, self).__init__(parent)
+        if isinstance(indent, int):
+            indent = ' ' * indent
+        self._indent = indent
+        self._sortKeys = sortKeys
+
+        self._document = document
+        self._document.contentsChange.connect(self._onContentsChange)
+        self._model = None
+        # the text matches the model, apart from the dirty entries
+        self._synced = False
+        self._editing = False
+
+        # container nodes whose text changed as a whole
+        self._dirtyNodes = set()
+        # {container node: set of rows} of leaves replaced by leaves
+        self._dirtyRows = dict()
+        # container nodes whose inserted or removed rows are written
+        # already, their next valueChanged only updates the layouts
+        self._patchedNodes = set()
+
+        # number of lines of container nodes
+        self._lineCounts = dict()
+        # {container node: (text position of the rows, line offsets)}
+        self._layouts = dict()
+
+        self._syncTimer = QtCore.QTimer(self)
+        self._syncTimer.setSingleShot(True)
+        self._syncTimer.setInterval(self.syncDelay)
+        self._syncTimer.timeout.connect(self._syncChanges)
+
+    def model(self):
+        """
+        Custom: get the model shown in the document
+
+        :return: QJsonModel. model, None if not set
+        """
+        return self._model
+
+    def setModel(self, model):
+        """
+        Custom: set the model to show, the text is written on the next
+        update()
+
+        :param model: QJsonModel. model, None to stop following a model
+        """
+        if self._model is not None:
+            self._model.valueChanged.disconnect(self._onValueChanged)
+            self._model.entriesInserted.disconnect(self._onEntriesInserted)
+            self._model.entriesAboutToBeRemoved.disconnect(
+                self._onEntriesAboutToBeRemoved)
+            self._model.modelReset.disconnect(self._onModelReset)
+
+        self._model = model
+        self._onModelReset()
+        if model is not None:
+            model.valueChanged.connect(self._onValueChanged)
+            model.entriesInserted.connect(self._onEntriesInserted)
+            model.entriesAboutToBeRemoved.connect(
+                self._onEntriesAboutToBeRemoved)
+            model.modelReset.connect(self._onModelReset)
+
+    def isSynced(self):
+        """
+        Custom: check if the text follows the model, it stops following
+        once the model is replaced or the text is edited by the user
+
+        :return: bool.
+        """
+        return self._synced
+
+    def update(self):
+        """
+        Custom: bring the text up to date with the model, the whole
+        text is written again if it does not follow the model
+        """
+        self._syncTimer.stop()
+        if self._model is None:
+            return
+        if not self._synced \
+                or self._model.getNode(QtCore.QModelIndex()) \
+                in self._dirtyNodes:
+            self._render()
+        else:
+            self._syncChanges()
+
+    def _render(self):
+        """
+        Write the whole text of the model
+        """
+        text = self._model.dumps(indent=self._indent, sortKeys=self._sortKeys)
+        self._clearChanges()
+        self._editing = True
+        try:
+            self._document.setPlainText(text)
+        finally:
+            self._editing = False
+        self._synced = True
+
+    def _syncChanges(self):
+        """
+        Replace the text of the dirty entries, in document order so the
+        line of an entry only depends on the text already up to date
+        """
+        if not self._synced or not (self._dirtyNodes or self._dirtyRows):
+            return
+
+        root = self._model.getNode(QtCore.QModelIndex())
+        if root in self._dirtyNodes:
+            # a large text waits for an explicit update()
+            if self._document.blockCount() <= self.renderLimit:
+                self._render()
+            return
+
+        # {(parent node, row): text path} of the outermost changes
+        entries = dict()
+        for node in self._dirtyNodes:
+            parent = node.parent
+            if parent is not None and not self._isCovered(parent, root):
+                entries[(parent, node.row())] = None
+        for node, rows in self._dirtyRows.items():
+            if not self._isCovered(node, root):
+                for row in rows:
+                    entries[(node, row)] = None
+        self._clearChanges(keepLayouts=True)
+
+        paths = dict()
+        for key in entries:
+            entries[key] = self._textPath(key[0], paths) \
+                + [self._textIndex(key[0], key[1])]
+
+        cursor = QtGui.QTextCursor(self._document)
+        self._editing = True
+        cursor.beginEditBlock()
+        try:
+            for (parent, row), path in sorted(
+                    entries.items(), key=lambda item: item[1]):
+                self._replaceEntry(cursor, parent, row, path)
+        finally:
+            cursor.endEditBlock()
+            self._editing = False
+
+    def _replaceEntry(self, cursor, parent, row, path):
+        """
+        Serialize an entry and replace its previous text
+
+        :param cursor: QTextCursor. cursor of the document
+        :param parent: QJsonNode. container node
+        :param row: int. row of the entry
+        :param path: list of int. text position of the entry and of its
+                     ancestors, from the top
+        """
+        first = self._entryLine(parent, path)
+        start = self._document.findBlockByNumber(first)
+        end = self._entryEnd(start, len(path))
+
+        lines = end.blockNumber() - start.blockNumber()
+
+        cursor.setPosition(start.position())
+        cursor.setPosition(end.position() + end.length() - 1,
+                           QtGui.QTextCursor.KeepAnchor)
+        text = self._entryText(parent, row, path)
+        cursor.insertText(text)
+        if text.count('\n') != lines:
+            # a leaf written as a list took or left several lines
+            self._forgetLayouts(parent)
+
+    def _entryText(self, parent, row, path):
+        """
+        Serialize an entry, with its indentation and key
+
+        :param parent: QJsonNode. container node
+        :param row: int. row of the entry
+        :param path: list of int. text position of the entry and of its
+                     ancestors, from the top
+        :return: str. text of the entry, without line break
+        """
+        depth = len(path)
+        chunks = [self._indent * depth]
+        if parent.dtype is dict:
+            chunks.append(qjsonwriter.encodeKey(parent.childKey(row)))
+        chunks.extend(qjsonwriter.iterencode(
+            parent.entry(row), self._indent, self._sortKeys, depth))
+        if path[-1] < self._entryCount(parent) - 1:
+            chunks.append(',')
+        return ''.join(chunks)
+
+    def _canPatch(self, node):
+        """
+        Check if the rows inserted into or removed from a container can be
+        written without the rest of its text: the text follows the model
+        apart from leaves replaced, which keep their line
+
+        :param node: QJsonNode. container node
+        :return: bool.
+        """
+        if not self._synced or self._dirtyNodes:
+            return False
+        root = self._model.getNode(QtCore.QModelIndex())
+        return not self._isCovered(node, root)
+
+    def _forgetLayouts(self, node):
+        """
+        Drop the line counts and layouts of a node and its ancestors
+
+        :param node: QJsonNode. container node
+        """
+        while node is not None:
+            self._lineCounts.pop(node, None)
+            self._layouts.pop(node, None)
+            node = node.parent
+
+    def _setComma(self, cursor, line, comma):
+        """
+        Add or remove the comma at the end of a line
+
+        :param cursor: QTextCursor. cursor of the document
+        :param line: int. line number
+        :param comma: bool. whether the line ends with a comma
+        """
+        block = self._document.findBlockByNumber(line)
+        end = block.position() + block.length() - 1
+        if block.text().endswith(',') == comma:
+            return
+        if comma:
+            cursor.setPosition(end)
+            cursor.insertText(',')
+        else:
+            cursor.setPosition(end - 1)
+            cursor.setPosition(end, QtGui.QTextCursor.KeepAnchor)
+            cursor.removeSelectedText()
+
+    def _onEntriesInserted(self, node, rows):
+        """
+        Insert the lines of the entries of rows inserted into a container,
+        see QJsonModel.entriesInserted
+        """
+        count = self._entryCount(node)
+        if not self._canPatch(node) or len(rows) == count:
+            # an empty container is written on a single line
+            return
+
+        dirtyRows = self._dirtyRows.get(node)
+        if dirtyRows:
+            self._dirtyRows[node] = set(
+                row + len(rows) if row >= rows[0] else row
+                for row in dirtyRows)
+        self._forgetLayouts(node)
+
+        path = self._textPath(node, dict())
+        entries = sorted((self._textIndex(node, row), row) for row in rows)
+        cursor = QtGui.QTextCursor(self._document)
+        self._editing = True
+        cursor.beginEditBlock()
+        try:
+            # in text order, so the lines before an entry are up to date
+            for position, row in entries:
+                entryPath = path + [position]
+                block = self._document.findBlockByNumber(
+                    self._entryLine(node, entryPath))
+                cursor.setPosition(block.position())
+                cursor.insertText(
+                    self._entryText(node, row, entryPath) + '\n')
+
+            # the entry written last before now needs a comma
+            if entries[-1][0] == count - 1:
+                inserted = set(position for position, _ in entries)
+                position = count - 1
+                while position in inserted:
+                    position -= 1
+                self._setComma(cursor, self._entryLine(
+                    node, path + [position + 1]) - 1, True)
+        finally:
+            cursor.endEditBlock()
+            self._editing = False
+        self._patchedNodes.add(node)
+
+    def _onEntriesAboutToBeRemoved(self, node, rows):
+        """
+        Remove the lines of the entries of rows about to be removed from
+        a container, see QJsonModel.entriesAboutToBeRemoved
+        """
+        count = self._entryCount(node)
+        if not self._canPatch(node) or len(rows) == count:
+            return
+
+        path = self._textPath(node, dict())
+        positions = sorted(self._textIndex(node, row) for row in rows)
+        cursor = QtGui.QTextCursor(self._document)
+        self._editing = True
+        cursor.beginEditBlock()
+        try:
+            # the entry written last from now on ends without a comma,
+            # removed first while the lines before it are unchanged
+            if positions[-1] == count - 1:
+                removed = set(positions)
+                position = count - 1
+                while position in removed:
+                    position -= 1
+                self._setComma(cursor, self._entryLine(
+                    node, path + [position + 1]) - 1, False)
+
+            # from the last one, so the lines of the others do not shift
+            for position in reversed(positions):
+                start = self._document.findBlockByNumber(
+                    self._entryLine(node, path + [position]))
+                end = self._document.findBlockByNumber(
+                    self._entryLine(node, path + [position + 1]))
+                cursor.setPosition(start.position())
+                cursor.setPosition(end.position(),
+                                   QtGui.QTextCursor.KeepAnchor)
+                cursor.removeSelectedText()
+        finally:
+            cursor.endEditBlock()
+            self._editing = False
+
+        dirtyRows = self._dirtyRows.get(node)
+        if dirtyRows:
+            removedRows = sorted(rows)
+            removed = set(rows)
+            self._dirtyRows[node] = set(
+                row - bisect.bisect_left(removedRows, row)
+                for row in dirtyRows if row not in removed)
+        self._forgetLayouts(node)
+        self._patchedNodes.add(node)
+
+    def _entryLine(self, parent, path):
+        """
+        Get the first line of an entry, from the number of lines of the
+        entries before it
+
+        :param parent: QJsonNode. container node of the entry
+        :param path: list of int. text position of the entry and of its
+                     ancestors, from the top
+        :return: int. line number
+        """
+        nodes = list()
+        while parent is not None:
+            nodes.append(parent)
+            parent = parent.parent
+        nodes.reverse()
+
+        line = 0
+        for node, position in zip(nodes, path):
+            line += 1 + self._layout(node)[1][position]
+        return line
+
+    def _entryEnd(self, block, depth):
+        """
+        Get the last block of the entry starting at a block
+
+        :param block: QTextBlock. first line of the entry
+        :param depth: int. indentation level of the entry
+        :return: QTextBlock.
+        """
+        text = block.text().rstrip(',')
+        if not text.endswith(('{', '[')):
+            return block
+
+        # the closing line is the first one back at the same indentation
+        pad = len(self._indent) * depth
+        block = block.next()
+        while block.isValid():
+            text = block.text()
+            if text[pad:pad + 1] in ('}', ']'):
+                return block
+            block = block.next()
+        return self._document.lastBlock()
+
+    def _textPath(self, node, paths):
+        """
+        Get the text position of a container node and of its ancestors
+
+        :param node: QJsonNode. container node
+        :param paths: dict. {node: path} paths already known
+        :return: list of int. positions from the top, empty for the root
+        """
+        path = paths.get(node)
+        if path is None:
+            parent = node.parent
+            if parent is None:
+                path = list()
+            else:
+                path = self._textPath(parent, paths) \
+                    + [self._textIndex(parent, node.row())]
+            paths[node] = path
+        return path
+
+    def _textIndex(self, node, row):
+        """
+        Get the text position of a child row
+
+        :param node: QJsonNode. container node
+        :param row: int. row of the child
+        :return: int. position of the child in the text of the node
+        """
+        rank = self._layout(node)[0]
+        if rank is None:
+            return row
+        return rank[row]
+
+    def _layout(self, node):
+        """
+        Get the text layout of a container node
+
+        :param node: QJsonNode. container node
+        :return: tuple. (text position of the rows, None when the text
+                 follows the rows, line offset of the entries in text order)
+        """
+        layout = self._layouts.get(node)
+        if layout is not None:
+            return layout
+
+        children = node._children or ()
+        entries = list(children)
+        rank = None
+        if node.dtype is dict:
+            keys = list(node._keys or ())
+            for key, entry in node._iterPending():
+                keys.append(key)
+                entries.append(entry)
+            if self._sortKeys:
+                order = sorted(range(len(keys)), key=keys.__getitem__)
+                entries = [entries[position] for position in order]
+                rank = [0] * len(order)
+                for position, row in enumerate(order):
+                    rank[row] = position
+        else:
+            entries.extend(entry for _, entry in node._iterPending())
+
+        offsets = [0] * (len(entries) + 1)
+        line = 0
+        for position, entry in enumerate(entries):
+            line += self._lineCount(entry)
+            offsets[position + 1] = line
+        layout = self._layouts[node] = (rank, offsets)
+        return layout
+
+    def _entryCount(self, node):
+        """
+        Get the number of entries written for a container node
+
+        :param node: QJsonNode. container node
+        :return: int.
+        """
+        return node.childCount + node.pendingCount
+
+    def _lineCount(self, entry):
+        """
+        Get the number of lines of an entry, without serializing it:
+        an entry is one line, plus the lines of every non-empty container
+        inside it, one per item and one for the closing bracket; tuples,
+        from python literals, are written as lists
+
+        :param entry: QJsonNode or mixed. node or raw value
+        :return: int.
+        """
+        if isinstance(entry, QJsonNode):
+            if entry.dtype is not dict and entry.dtype is not list:
+                entry = entry.value
+                if not isinstance(entry, tuple):
+                    return 1
+            else:
+                count = self._lineCounts.get(entry)
+                if count is not None:
+                    return count
+        elif not isinstance(entry, (dict, list, tuple)):
+            return 1
+
+        top = entry
+        count = 1
+        stack = [entry]
+        while stack:
+            entry = stack.pop()
+            if isinstance(entry, QJsonNode) \
+                    and entry.dtype is not dict and entry.dtype is not list:
+                entry = entry.value
+            if isinstance(entry, QJsonNode):
+                if entry is not top:
+                    known = self._lineCounts.get(entry)
+                    if known is not None:
+                        count += known - 1
+                        continue
+                size = self._entryCount(entry)
+                values = itertools.chain(
+                    entry._children or (),
+                    (value for _, value in entry._iterPending()))
+            else:
+                size = len(entry)
+                values = entry.values() if isinstance(entry, dict) else entry
+
+            if size:
+                count += size + 1
+                stack.extend(
+                    value for value in values
+                    if isinstance(value, (dict, list, tuple))
+                    or isinstance(value, QJsonNode)
+                    and (value.dtype is dict or value.dtype is list
+                         or isinstance(value.value, tuple)))
+
+        if isinstance(top, QJsonNode):
+            self._lineCounts[top] = count
+        return count
+
+    def _isCovered(self, node, root):
+        """
+        Check if a node or one of its ancestors changed as a whole,
+        detached nodes are considered covered
+
+        :param node: QJsonNode. container node
+        :param root: QJsonNode. root node of the model
+        :return: bool.
+        """
+        while node is not None:
+            if node in self._dirtyNodes:
+                return True
+            if node is root:
+                return False
+            node = node.parent
+        return True
+
+    def _clearChanges(self, keepLayouts=False):
+        """
+        Forget the dirty entries, and the cached layouts
+
+        :param keepLayouts: bool. keep the line counts and layouts, they
+                            follow the model, and the nodes patched
+        """
+        self._dirtyNodes = set()
+        self._dirtyRows = dict()
+        if not keepLayouts:
+            self._patchedNodes = set()
+            self._lineCounts = dict()
+            self._layouts = dict()
+
+    def _onValueChanged(self, node, row):
+        """
+        Record a change of the model value, see QJsonModel.valueChanged
+        """
+        if row >= 0:
+            # a leaf replaced by a leaf keeps its single line
+            self._dirtyRows.setdefault(node, set()).add(row)
+        elif node in self._patchedNodes:
+            # the rows inserted or removed are written already
+            self._patchedNodes.discard(node)
+            self._forgetLayouts(node)
+            return
+        else:
+            self._dirtyNodes.add(node)
+            # the node and its ancestors have new line counts
+            self._forgetLayouts(node)
+
+        if self._synced:
+            self._syncTimer.start()
+
+    def _onModelReset(self):
+        """
+        The text no longer follows the model
+        """
+        self._syncTimer.stop()
+        self._synced = False
+        self._clearChanges()
+
+    def _onContentsChange(self, position, removed, added):
+        """
+        Stop following the model once the text is edited by the user
+        """
+        if not self._editing:
+            self._synced = False
+            self._clearChanges()
@@ -9,16 +9,74 @@ https://doc.qt.io/qt-5/model-view-programming.html#mime-data
 https://doc.qt.io/qt-5/qitemselectionmodel.html
 https://stackoverflow.com/questions/10778936/qt-mousemoveevent-qtleftbutton
 https://doc.qt.io/qt-5/qmouseevent.html#button
+https://doc.qt.io/qt-5/qmimedata.html#retrieveData
 """
 
 
-import ast
-
 from Qt import QtWidgets, QtCore, QtGui
 
+from . import qjsoncodec
 from .qjsonnode import QJsonNode
 
 
+# mime type of the nodes dragged within the application
+NODE_MIME_TYPE = 'application/x-qjsonview-nodes'
+TEXT_MIME_TYPE = 'text/plain'
+
+
+class QJsonMimeData(QtCore.QMimeData):
+    """
+    Drag data of model indices, the nodes are moved by reference within
+    the application and the json text is only created when another
+    application asks for it
+    """
+
+    def __init__(self, indices):
+        """
+        Initialization
+
+        :param indices: list of QModelIndex. source model indices
+        """
+        super(QJsonMimeData, self).__init__()
+        self._indices = [QtCore.QPersistentModelIndex(index)
+                         for index in indices]
+
+    def indices(self):
+        """
+        Custom: get the dragged indices still in their model
+
+        :return: list of QModelIndex. source model indices
+        """
+        return [QtCore.QModelIndex(index) for index in self._indices
+                if index.isValid()]
+
+    def formats(self):
+        """
+        Override
+        """
+        return [NODE_MIME_TYPE, TEXT_MIME_TYPE]
+
+    def hasFormat(self, mimeType):
+        """
+        Override
+        """
+        return mimeType in self.formats()
+
+    def retrieveData(self, mimeType, preferredType):
+        """
+        Override: serialize the nodes on demand
+        """
+        if mimeType == TEXT_MIME_TYPE:
+            output = dict()
+            for index in self.indices():
+                output.update(index.model().asDict(index))
+            return qjsoncodec.dumps(output)
+        elif mimeType == NODE_MIME_TYPE:
+            return QtCore.QByteArray()
+        return super(QJsonMimeData, self).retrieveData(
+            mimeType, preferredType)
+
+
 class QJsonView(QtWidgets.QTreeView):
     dragStartPosition = None
 
@@ -28,7 +86,8 @@ class QJsonView(QtWidgets.QTreeView):
         """
         super(QJsonView, self).__init__()
 
-        self._clipBroad = ''
+        # detached nodes of the copied entries
+        self._clipBroad = []
 
         # set flags
         self.setSortingEnabled(True)
@@ -40,9 +99,26 @@ class QJsonView(QtWidgets.QTreeView):
         self.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
         self.customContextMenuRequested.connect(self.openContextMenu)
 
+        # jump-to-path box, shown over the header
+        self.ui_path_edit = QtWidgets.QLineEdit(self)
+        self.ui_path_edit.setPlaceholderText(
+            'Go to path: /key/0/child or key[0].child')
+        self.ui_path_edit.hide()
+        self.ui_path_edit.returnPressed.connect(
+            lambda: self._onPathEntered())
+        self.ui_path_edit.textEdited.connect(
+            lambda: self.ui_path_edit.setStyleSheet(''))
+        QtWidgets.QShortcut(
+            QtGui.QKeySequence('Ctrl+G'), self, self.showPathEdit,
+            context=QtCore.Qt.WidgetWithChildrenShortcut)
+        QtWidgets.QShortcut(
+            QtGui.QKeySequence(QtCore.Qt.Key_Escape), self.ui_path_edit,
+            self.hidePathEdit, context=QtCore.Qt.WidgetShortcut)
+
     def setModel(self, model):
         """
-        Extend: set the current model and sort it
+        Extend: set the current model and sort it, a proxy with dynamic
+        sorting then keeps the inserted rows sorted
 
         :param model: QSortFilterProxyModel. model
         """
@@ -56,6 +132,16 @@ class QJsonView(QtWidgets.QTreeView):
         contextMenu = QtWidgets.QMenu()
 
         indices = self.getSelectedIndices()
+        # entries of a read-only model can only be copied
+        if self.model().sourceModel().isReadOnly():
+            if indices:
+                copyAction = contextMenu.addAction('copy entry(s)')
+                copyAction.triggered.connect(self.copy)
+                if len(indices) == 1:
+                    self._addCopyPathAction(contextMenu, indices[0])
+                contextMenu.exec_(QtGui.QCursor().pos())
+            return
+
         # no selection
         if not indices:
             addAction = contextMenu.addAction('add entry')
@@ -74,6 +160,8 @@ class QJsonView(QtWidgets.QTreeView):
         if len(indices) == 1:
             index = indices[0]
 
+            self._addCopyPathAction(contextMenu, index)
+
             # only allow add when the index is a dictionary or list
             if index.internalPointer().dtype in [list, dict]:
                 addAction = contextMenu.addAction('add entry')
@@ -85,6 +173,87 @@ class QJsonView(QtWidgets.QTreeView):
 
         contextMenu.exec_(QtGui.QCursor().pos())
 
+    # jump to path
+
+    def jumpToPath(self, path):
+        """
+        Custom: expand the parents of the entry at a path, then select it
+        and scroll to it, see QJsonModel.indexFromPath()
+
+        :param path: str or list. JSON Pointer, dotted path or keys
+        :return: bool. whether the entry is shown
+        """
+        try:
+            sourceIndex = self.model().sourceModel().indexFromPath(path)
+        except ValueError:
+            return False
+
+        parents = list()
+        parent = sourceIndex.parent()
+        while parent.isValid():
+            parents.append(parent)
+            parent = parent.parent()
+        # expanding sorts the rows fetched, the proxy indices are only
+        # mapped once their parent is expanded
+        for parent in reversed(parents):
+            self.expand(self.model().mapFromSource(parent))
+
+        # filtered out rows have no proxy index
+        index = self.model().mapFromSource(sourceIndex)
+        if not index.isValid():
+            return False
+        self.setCurrentIndex(index)
+        self.scrollTo(index, QtWidgets.QAbstractItemView.PositionAtCenter)
+        return True
+
+    def showPathEdit(self):
+        """
+        Custom: show the jump-to-path box over the header, with the path
+        of the current entry
+        """
+        edit = self.ui_path_edit
+        header = self.header()
+        edit.setGeometry(
+            header.x(), header.y(), header.width(),
+            max(header.height(), edit.sizeHint().height()))
+
+        index = self.currentIndex()
+        if index.isValid() and not edit.isVisible():
+            index = self.model().mapToSource(index)
+            edit.setText(index.model().pathFromIndex(index))
+        edit.show()
+        edit.raise_()
+        edit.selectAll()
+        edit.setFocus()
+
+    def hidePathEdit(self):
+        """
+        Custom: hide the jump-to-path box
+        """
+        self.ui_path_edit.hide()
+        self.setFocus()
+
+    def _addCopyPathAction(self, menu, index):
+        """
+        Add the action copying the path of an entry to a menu
+
+        :param menu: QMenu. context menu
+        :param index: QModelIndex. source model index
+        """
+        action = menu.addAction('copy path')
+        action.triggered.connect(
+            lambda: QtWidgets.QApplication.clipboard().setText(
+                index.model().pathFromIndex(index)))
+
+    def _onPathEntered(self):
+        """
+        Jump to the path entered, the box stays shown if it leads nowhere
+        """
+        if self.jumpToPath(self.ui_path_edit.text()):
+            self.hidePathEdit()
+        else:
+            self.ui_path_edit.setStyleSheet('QLineEdit{color: red;}')
+
     # helper methods
 
     def getSelectedIndices(self):
@@ -137,12 +306,7 @@ class QJsonView(QtWidgets.QTreeView):
 
         if self.selectionModel().selectedRows():
             drag = QtGui.QDrag(self)
-            mimeData = QtCore.QMimeData()
-
-            selected = self.asDict(self.getSelectedIndices())
-            mimeData.setText(str(selected))
-            drag.setMimeData(mimeData)
-
+            drag.setMimeData(QJsonMimeData(self.getSelectedIndices()))
             drag.exec_()
 
     def dragEnterEvent(self, event):
@@ -161,6 +325,10 @@ class QJsonView(QtWidgets.QTreeView):
         if data.hasText():
             event.acceptProposedAction()
 
+        if self.model().sourceModel().isReadOnly():
+            event.ignore()
+            return
+
         dropIndex = self.indexAt(event.pos())
         dropIndex = self.model().mapToSource(dropIndex)
 
@@ -177,8 +345,22 @@ class QJsonView(QtWidgets.QTreeView):
         dropIndex = self.model().mapToSource(dropIndex)
 
         data = event.mimeData()
-        self.remove(self.getSelectedIndices())
-        self.add(data.text(), dropIndex)
+        model = self.model().sourceModel()
+        if model.isReadOnly():
+            event.ignore()
+            return
+
+        if isinstance(data, QJsonMimeData):
+            indices = data.indices()
+            if indices and indices[0].model() is model:
+                model.moveIndices(indices, dropIndex)
+            else:
+                # nodes of another model are copied
+                model.addChildren([index.internalPointer().copy()
+                                   for index in indices], dropIndex)
+        elif data.hasText():
+            # text dropped from another application
+            self.add(data.text(), dropIndex)
         event.acceptProposedAction()
 
     # custom behavior
@@ -189,12 +371,8 @@ class QJsonView(QtWidgets.QTreeView):
 
         :param indices: QModelIndex. specified indices
         """
-        for index in indices:
-            currentNode = index.internalPointer()
-            position = currentNode.row()
-
-            # let the model know we are removing
-            self.model().sourceModel().removeChild(position, index.parent())
+        # removed by contiguous ranges, so rows cannot shift under the loop
+        self.model().sourceModel().removeIndices(indices)
 
     def add(self, text=None, index=QtCore.QModelIndex()):
         """
@@ -204,10 +382,12 @@ class QJsonView(QtWidgets.QTreeView):
         :param index: QModelIndex. parent index
         """
         # populate items with a temp root
-        root = QJsonNode.load(ast.literal_eval(text))
+        root = QJsonNode.load(self._parseText(text))
+        items = [(root.childKey(row), root.entry(row))
+                 for row in range(root.childCount)]
 
-        self.model().sourceModel().addChildren(root.children, index)
-        self.model().sort(0, QtCore.Qt.AscendingOrder)
+        # the proxy inserts the rows at their sorted position
+        self.model().sourceModel().addItems(items, index)
 
     def clear(self):
         """
@@ -217,20 +397,21 @@ class QJsonView(QtWidgets.QTreeView):
 
     def copy(self):
         """
-        Custom: copy the selected indices by store the serialized value
+        Custom: copy the selected indices by storing a detached copy
+        of their node
         """
-        selected = self.asDict(self.getSelectedIndices())
-        self._clipBroad = str(selected)
+        self._clipBroad = [index.internalPointer().copy()
+                           for index in self.getSelectedIndices()]
 
     def paste(self, index):
         """
-        Custom: paste to index by de-serialize clipboard value
+        Custom: paste to index the copied nodes
 
         :param index: QModelIndex. target index
         """
-        self.customAdd(self._clipBroad, index)
-        self._clipBroad = ''
-        
+        self.model().sourceModel().addChildren(self._clipBroad, index)
+        self._clipBroad = []
+
     def customAdd(self, text=None, index=QtCore.QModelIndex()):
         """
         Custom: add node(s) under the specified index using specified values
@@ -248,3 +429,13 @@ class QJsonView(QtWidgets.QTreeView):
         if dialog.exec_():
             text = dialog.getTextEdit()
             self.add(text, index)
+
+    @staticmethod
+    def _parseText(text):
+        """
+        De-serialize json text, or python literal text
+
+        :param text: str. input text
+        :return: mixed. value
+        """
+        return qjsoncodec.parse(text)
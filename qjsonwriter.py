@@ -0,0 +1,652 @@
+"""
+Streaming serializer writing json text straight from a QJsonNode tree
+
+The tree is walked with an explicit stack and the text is written in
+chunks to a file object, so no intermediate dictionary copy of the
+document is built and memory only grows with the nesting depth.
+The output is the same as json.dump() with the same options
+"""
+
+
+from . import qjsoncodec
+from .qjsonnode import QJsonNode
+
+
+INFINITY = float('inf')
+
+# number of text chunks held before writing to the file object
+CHUNK_COUNT = 4096
+# number of encoded dictionary keys kept for reuse
+KEY_CACHE_SIZE = 1024
+# maximum weight, in text chunks, of the text cached for a container
+# by CachedEncoder, the largest containers under it keep their text
+FRAGMENT_WEIGHT = 4096
+# number of raw items not fetched yet whose text is cached together
+BLOCK_SIZE = 1024
+
+# item of a block of raw items, see CachedEncoder
+_BLOCK = object()
+
+
+def dump(node, stream, indent=None, sortKeys=False):
+    """
+    Serialize the value of a node to a file object
+
+    :param node: QJsonNode. node to serialize, its key is not written
+    :param stream: file. text file object or buffer
+    :param indent: int or str. indentation, None for a single line
+    :param sortKeys: bool. sort dictionary keys
+    """
+    chunks = list()
+    for chunk in iterencode(node, indent, sortKeys):
+        chunks.append(chunk)
+        if len(chunks) >= CHUNK_COUNT:
+            stream.write(''.join(chunks))
+            chunks = list()
+    stream.write(''.join(chunks))
+
+
+def dumps(node, indent=None, sortKeys=False):
+    """
+    Serialize the value of a node to a string
+
+    :param node: QJsonNode. node to serialize, its key is not written
+    :param indent: int or str. indentation, None for a single line
+    :param sortKeys: bool. sort dictionary keys
+    :return: str. json text
+    """
+    return ''.join(iterencode(node, indent, sortKeys))
+
+
+def encodeKey(key):
+    """
+    Encode a dictionary key followed by the key separator, the way
+    the keys are written by dump()
+
+    :param key: str. dictionary key
+    :return: str.
+    """
+    return _LeafEncoder(None, False).encodeKey(key)
+
+
+def iterencode(node, indent=None, sortKeys=False, level=0):
+    """
+    Encode the value of a node as a flow of text chunks
+
+    :param node: QJsonNode or mixed. node to serialize, its key is not
+                 written, or a raw value
+    :param indent: int or str. indentation, None for a single line
+    :param sortKeys: bool. sort dictionary keys
+    :param level: int. indentation level the node starts at
+    :return: generator of str
+    """
+    if isinstance(indent, int):
+        indent = ' ' * indent
+    if indent is None:
+        itemSeparator = ', '
+    else:
+        itemSeparator = ','
+    encoder = _LeafEncoder(indent, sortKeys)
+
+    if not isinstance(node, QJsonNode):
+        for chunk in encoder.encode(node, level):
+            yield chunk
+        return
+    if not _isContainer(node):
+        for chunk in encoder.encode(node.value, level):
+            yield chunk
+        return
+
+    # frames of [items iterator, closing text, item prefix, dictionary,
+    # first item]
+    stack = list()
+    yield _open(node, indent, sortKeys, level, stack)
+
+    encodeKey = encoder.encodeKey
+    simple = encoder.simple
+    while stack:
+        frame = stack[-1]
+        items, closing, prefix, isDict, first = frame
+
+        for key, entry in items:
+            if first:
+                first = frame[4] = False
+                separator = prefix
+            else:
+                separator = itemSeparator + prefix
+
+            if isDict:
+                separator += encodeKey(key)
+
+            function = simple.get(entry.__class__)
+            if function is not None:
+                yield separator + function(entry)
+                continue
+
+            if isinstance(entry, QJsonNode):
+                if _isContainer(entry):
+                    yield separator + _open(
+                        entry, indent, sortKeys, len(stack) + level, stack)
+                    break
+                entry = entry.value
+
+            yield separator
+            for chunk in encoder.encode(entry, len(stack) + level):
+                yield chunk
+        else:
+            stack.pop()
+            yield closing
+
+
+def _isContainer(node):
+    """
+    Check if a node holds a dictionary or a list
+
+    :param node: QJsonNode. node
+    :return: bool.
+    """
+    return node.dtype is dict or node.dtype is list
+
+
+def _open(node, indent, sortKeys, level, stack):
+    """
+    Push the frame of a container node and get its opening text
+
+    :param node: QJsonNode. dictionary or list node
+    :param indent: str. indentation, None for a single line
+    :param sortKeys: bool. sort dictionary keys
+    :param level: int. indentation level of the node
+    :param stack: list. frames of the open containers
+    :return: str. opening text, or the whole text of an empty container
+    """
+    isDict = node.dtype is dict
+    opening, closing = ('{', '}') if isDict else ('[', ']')
+    if not node.childCount and not node.canFetchMore():
+        return opening + closing
+
+    items = _iterItems(node)
+    if isDict and sortKeys:
+        items = sorted(items, key=lambda item: item[0])
+
+    if indent is None:
+        prefix = ''
+    else:
+        prefix = '\n' + indent * (level + 1)
+        closing = '\n' + indent * level + closing
+
+    stack.append([iter(items), closing, prefix, isDict, True])
+    return opening
+
+
+def _iterItems(node):
+    """
+    Iterate over the (key, entry) items of a container node without
+    creating nodes for the raw leaf values
+
+    :param node: QJsonNode. dictionary or list node
+    :return: generator of (key, entry), the entry is a QJsonNode or a raw value
+    """
+    children = node._children or ()
+    if node.dtype is dict:
+        for item in zip(node._keys, children):
+            yield item
+    else:
+        for entry in children:
+            yield None, entry
+
+    for item in node._iterPending():
+        yield item
+
+
+class CachedEncoder(object):
+    """
+    Encoder writing the json text of a tree again after some changes: the
+    text of the largest containers under FRAGMENT_WEIGHT chunks is cached
+    on their node, and the text of the raw items not fetched yet by blocks
+    of BLOCK_SIZE items, so only the containers that changed since the
+    last encoding (see QJsonNode.markChanged()) are encoded again, the
+    text of the others is copied. The output is the same as dump()
+
+    The tree is only read, so the encoding can run on a worker thread, the
+    text cached by an encoding that overlapped changes of the tree must be
+    dropped with discard()
+    """
+
+    def __init__(self, indent=None, sortKeys=False):
+        """
+        Initialization
+
+        :param indent: int or str. indentation, None for a single line
+        :param sortKeys: bool. sort dictionary keys
+        """
+        if isinstance(indent, int):
+            indent = ' ' * indent
+        self._indent = indent
+        self._sortKeys = sortKeys
+        self._itemSeparator = ', ' if indent is None else ','
+        self._encoder = _LeafEncoder(indent, sortKeys)
+
+        # {id(items): (items, {(start, level): text})} of the pending raw
+        # items of the nodes, None for a block holding nodes
+        self._blocks = dict()
+        # nodes whose text was cached by the last encoding
+        self._cached = list()
+
+    def dump(self, node, stream):
+        """
+        Serialize the value of a node to a file object
+
+        :param node: QJsonNode. node to serialize, its key is not written
+        :param stream: file. text file object or buffer
+        """
+        for chunk in self.iterencode(node):
+            stream.write(chunk)
+
+    def discard(self):
+        """
+        Drop the text cached by the last encoding, to be called when the
+        tree changed while it was encoded
+        """
+        for node in self._cached:
+            node._fragment = None
+        self._cached = list()
+
+    def iterencode(self, node, level=0):
+        """
+        Encode the value of a node as a flow of text chunks, the text of
+        the containers that did not change is copied from their cache
+
+        :param node: QJsonNode or mixed. node to serialize, its key is not
+                     written, or a raw value
+        :param level: int. indentation level the node starts at
+        :return: generator of str
+        """
+        encoder = self._encoder
+        if not isinstance(node, QJsonNode) or not _isContainer(node):
+            value = node.value if isinstance(node, QJsonNode) else node
+            for chunk in encoder.encode(value, level):
+                yield chunk
+            return
+
+        options = (self._indent, self._sortKeys)
+        fragment = node._fragment
+        if fragment is not None and fragment[0] == options + (level,):
+            yield fragment[1]
+            return
+
+        self._cached = list()
+        blocks = dict()
+        # text chunks not written yet and their weight, the text of a
+        # recording frame is cached once it is closed
+        buffer = list()
+        append = buffer.append
+        # frames of [items iterator, closing text, item prefix, dictionary,
+        # first item, node, cache key, buffer index, buffer weight, child
+        # nodes with a cached text], the frames from the recording one on
+        # are recording
+        stack = list()
+        recording = 0
+        opening = self._open(node, level, stack, blocks, 0, 0)
+        append(opening)
+        weight = 1
+        flushAt = FRAGMENT_WEIGHT
+
+        encodeKey = encoder.encodeKey
+        simple = encoder.simple
+        itemSeparator = self._itemSeparator
+        while stack:
+            frame = stack[-1]
+            items, closing, prefix, isDict, first = frame[:5]
+            depth = len(stack) + level
+
+            for key, entry in items:
+                if weight > flushAt:
+                    text, weight, recording, flushAt = self._flush(
+                        buffer, weight, stack, recording)
+                    yield text
+
+                if first:
+                    first = frame[4] = False
+                    separator = prefix
+                else:
+                    separator = itemSeparator + prefix
+
+                if key is _BLOCK:
+                    append(separator + entry)
+                    weight += BLOCK_SIZE
+                    # too large to be cached as a whole, as its parents
+                    if recording < len(stack):
+                        recording = len(stack)
+                        flushAt = -1
+                    continue
+                if isDict:
+                    separator += encodeKey(key)
+
+                function = simple.get(entry.__class__)
+                if function is not None:
+                    append(separator + function(entry))
+                    weight += 1
+                    continue
+
+                if isinstance(entry, QJsonNode):
+                    if _isContainer(entry):
+                        fragment = entry._fragment
+                        if fragment is not None \
+                                and fragment[0] == options + (depth,):
+                            append(separator + fragment[1])
+                            weight += fragment[2]
+                            frame[9].append(entry)
+                            continue
+                        append(separator)
+                        count = len(stack)
+                        append(self._open(entry, depth, stack, blocks,
+                                          len(buffer), weight + 1))
+                        weight += 2
+                        if len(stack) > count:
+                            if recording == count:
+                                flushAt = stack[-1][8] + FRAGMENT_WEIGHT
+                            break
+                        continue
+                    entry = entry.value
+
+                chunks = list(encoder.encode(entry, depth))
+                append(separator + ''.join(chunks))
+                weight += len(chunks)
+            else:
+                stack.pop()
+                append(closing)
+                weight += 1
+                if recording <= len(stack):
+                    self._cache(frame, buffer, weight)
+                    if recording < len(stack):
+                        stack[-1][9].append(frame[5])
+                else:
+                    recording = len(stack)
+                flushAt = stack[recording][8] + FRAGMENT_WEIGHT \
+                    if recording < len(stack) else CHUNK_COUNT
+
+        yield ''.join(buffer)
+        self._blocks = blocks
+
+    def _open(self, node, level, stack, blocks, index, weight):
+        """
+        Push the frame of a container node and get its opening text
+
+        :param node: QJsonNode. dictionary or list node
+        :param level: int. indentation level of the node
+        :param stack: list. frames of the open containers
+        :param blocks: dict. blocks of raw items used by the encoding
+        :param index: int. buffer index of the text of the node
+        :param weight: int. buffer weight before the text of the node
+        :return: str. opening text, or the whole text of an empty container
+        """
+        isDict = node.dtype is dict
+        opening, closing = ('{', '}') if isDict else ('[', ']')
+        if not node.childCount and not node.canFetchMore():
+            return opening + closing
+
+        indent = self._indent
+        if isDict and self._sortKeys:
+            items = iter(sorted(_iterItems(node), key=lambda item: item[0]))
+        else:
+            items = self._iterEntries(node, level + 1, blocks)
+
+        if indent is None:
+            prefix = ''
+        else:
+            prefix = '\n' + indent * (level + 1)
+            closing = '\n' + indent * level + closing
+
+        key = (indent, self._sortKeys, level)
+        stack.append([items, closing, prefix, isDict, True, node, key,
+                      index, weight, list()])
+        return opening
+
+    def _iterEntries(self, node, level, blocks):
+        """
+        Iterate over the (key, entry) items of a container node like
+        _iterItems(), full blocks of pending raw items come as a single
+        (_BLOCK, text) item
+
+        :param node: QJsonNode. dictionary or list node
+        :param level: int. indentation level of the children
+        :param blocks: dict. blocks of raw items used by the encoding
+        :return: generator of (key, entry)
+        """
+        pending = node._pending
+        if pending is None or pending[0].__class__ is not list \
+                or node.__class__._iterPending is not QJsonNode._iterPending:
+            for item in _iterItems(node):
+                yield item
+            return
+
+        children = node._children or ()
+        isDict = node.dtype is dict
+        if isDict:
+            for item in zip(node._keys, children):
+                yield item
+        else:
+            for entry in children:
+                yield None, entry
+
+        items, position = pending
+        count = len(items)
+        cached = self._blocks.get(id(items))
+        cached = cached[1] if cached and cached[0] is items else dict()
+        used = blocks.setdefault(id(items), (items, dict()))[1]
+
+        start = -(-position // BLOCK_SIZE) * BLOCK_SIZE
+        while start + BLOCK_SIZE <= count:
+            text = cached.get((start, level), False)
+            if text is False:
+                text = self._encodeBlock(
+                    items[start:start + BLOCK_SIZE], isDict, level)
+            used[(start, level)] = text
+            # blocks holding nodes are encoded item by item
+            if text is not None:
+                for row in range(position, start):
+                    yield items[row] if isDict else (None, items[row])
+                yield _BLOCK, text
+                position = start + BLOCK_SIZE
+            start += BLOCK_SIZE
+
+        for row in range(position, count):
+            yield items[row] if isDict else (None, items[row])
+
+    def _encodeBlock(self, items, isDict, level):
+        """
+        Encode a block of raw items, without the separator before the
+        first item
+
+        :param items: list. (key, value) pairs or values
+        :param isDict: bool. items of a dictionary
+        :param level: int. indentation level of the items
+        :return: str. text, None if an item is a node
+        """
+        encoder = self._encoder
+        texts = list()
+        for item in items:
+            key, value = item if isDict else (None, item)
+            if isinstance(value, QJsonNode):
+                return None
+            text = encoder.encodeSimple(value)
+            if text is None:
+                text = ''.join(encoder.encode(value, level))
+            if isDict:
+                text = encoder.encodeKey(key) + text
+            texts.append(text)
+
+        if self._indent is None:
+            return self._itemSeparator.join(texts)
+        separator = self._itemSeparator + '\n' + self._indent * level
+        return separator.join(texts)
+
+    def _cache(self, frame, buffer, weight):
+        """
+        Cache the text of a closed recording frame on its node, the text of
+        its children is dropped as it is copied in it
+
+        :param frame: list. closed frame
+        :param buffer: list. text chunks not written yet
+        :param weight: int. buffer weight
+        """
+        node, key, index = frame[5:8]
+        text = ''.join(buffer[index:])
+        del buffer[index:]
+        buffer.append(text)
+        node._fragment = (key, text, weight - frame[8])
+        self._cached.append(node)
+
+        for child in frame[9]:
+            child._fragment = None
+
+    @staticmethod
+    def _flush(buffer, weight, stack, recording):
+        """
+        Stop recording the lowest frames whose text is over FRAGMENT_WEIGHT
+        and take out of the buffer the text no frame records
+
+        :param buffer: list. text chunks not written yet
+        :param weight: int. buffer weight
+        :param stack: list. frames of the open containers
+        :param recording: int. index of the lowest recording frame
+        :return: tuple. (text to write, buffer weight, index of the lowest
+                 recording frame, weight of the next flush)
+        """
+        while recording < len(stack) \
+                and weight - stack[recording][8] > FRAGMENT_WEIGHT:
+            recording += 1
+
+        if recording == len(stack):
+            text = ''.join(buffer)
+            del buffer[:]
+            return text, 0, recording, CHUNK_COUNT
+
+        index, cut = stack[recording][7:9]
+        text = ''.join(buffer[:index])
+        del buffer[:index]
+        for frame in stack[recording:]:
+            frame[7] -= index
+            frame[8] -= cut
+        weight -= cut
+        return text, weight, recording, stack[recording][8] + FRAGMENT_WEIGHT
+
+
+class _LeafEncoder(object):
+    """
+    Encoding of keys and raw values, with the json module rules
+    """
+
+    def __init__(self, indent, sortKeys):
+        """
+        Initialization
+
+        :param indent: str. indentation, None for a single line
+        :param sortKeys: bool. sort dictionary keys
+        """
+        self._indent = indent
+        self._encoder = qjsoncodec.encoder(indent, sortKeys)
+        self._keySeparator = ': '
+        # keys are mostly shared between dictionaries
+        self._keys = dict()
+
+        # encoding function of the scalar types, by exact type
+        self.simple = {
+            str: qjsoncodec.encodeString,
+            int: int.__repr__,
+            float: self._encodeFloat,
+            bool: lambda value: 'true' if value else 'false',
+            type(None): lambda value: 'null',
+        }
+
+    def encodeKey(self, key):
+        """
+        Encode a dictionary key followed by the key separator
+
+        :param key: str. dictionary key
+        :return: str.
+        """
+        try:
+            return self._keys[key]
+        except KeyError:
+            pass
+        except TypeError:
+            # unhashable keys are rejected by the json module anyway
+            raise TypeError('keys must be str, int, float, bool or None, '
+                            'not {}'.format(type(key).__name__))
+
+        if isinstance(key, str):
+            text = key
+        elif key is True:
+            text = 'true'
+        elif key is False:
+            text = 'false'
+        elif key is None:
+            text = 'null'
+        elif isinstance(key, float):
+            text = self._encodeFloat(key)
+        elif isinstance(key, int):
+            text = int.__repr__(key)
+        else:
+            raise TypeError('keys must be str, int, float, bool or None, '
+                            'not {}'.format(type(key).__name__))
+
+        encoded = qjsoncodec.encodeString(text) + self._keySeparator
+        if len(self._keys) < KEY_CACHE_SIZE:
+            self._keys[key] = encoded
+        return encoded
+
+    def encodeSimple(self, value):
+        """
+        Encode a scalar value
+
+        :param value: mixed. raw value
+        :return: str. encoded text, None if the value is not a scalar
+        """
+        function = self.simple.get(value.__class__)
+        if function is None:
+            if isinstance(value, str):
+                function = qjsoncodec.encodeString
+            elif isinstance(value, int) and not isinstance(value, bool):
+                function = int.__repr__
+            elif isinstance(value, float):
+                function = self._encodeFloat
+            else:
+                return None
+        return function(value)
+
+    def encode(self, value, level):
+        """
+        Encode any value, containers found in raw values are encoded
+        by the json module and indented to the specified level
+
+        :param value: mixed. raw value
+        :param level: int. indentation level of the value
+        :return: generator of str
+        """
+        chunk = self.encodeSimple(value)
+        if chunk is not None:
+            yield chunk
+            return
+
+        prefix = None
+        if self._indent is not None and level:
+            prefix = '\n' + self._indent * level
+        for chunk in self._encoder.iterencode(value):
+            if prefix is not None:
+                # newlines only come from the indentation, strings are escaped
+                chunk = chunk.replace('\n', prefix)
+            yield chunk
+
+    @staticmethod
+    def _encodeFloat(value):
+        """
+        Encode a float the way the json module does
+        """
+        if value != value:
+            return 'NaN'
+        elif value == INFINITY:
+            return 'Infinity'
+        elif value == -INFINITY:
+            return '-Infinity'
+        return float.__repr__(value)
@@ -0,0 +1,62 @@
+"""
+Shared fixtures of the tests, run with the offscreen Qt platform
+
+Usage:
+    python -m pytest tests
+"""
+
+
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import pytest
+
+from Qt import QtWidgets
+
+from jsonViewer.qjsonnode import QJsonNode
+from jsonViewer.qjsonmodel import QJsonModel
+
+
+DOCUMENT = {
+    'name': 'document',
+    'count': 3,
+    'ratio': 0.5,
+    'enabled': True,
+    'missing': None,
+    'items': [1, 'two', {'three': 3}, [4, 5], [], {}],
+    'nested': {'a': {'b': {'c': [1, 2, 3]}}, 'd': 'e'},
+}
+
+
+def randomValue(depth=0):
+    """
+    Random json value of up to 3 levels of small containers
+    """
+    draw = random.random()
+    if depth < 3 and draw < 0.2:
+        return dict(('k{}'.format(random.randint(0, 9)),
+                     randomValue(depth + 1))
+                    for _ in range(random.randint(0, 4)))
+    if depth < 3 and draw < 0.4:
+        return [randomValue(depth + 1) for _ in range(random.randint(0, 4))]
+    return random.choice([0, 1, 'a', 'b', None, True, 2.5])
+
+
+@pytest.fixture(scope='session')
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+@pytest.fixture
+def model(app):
+    """
+    Model of DOCUMENT with every row fetched
+    """
+    model = QJsonModel(QJsonNode.load(DOCUMENT))
+    model.fetchTree()
+    return model
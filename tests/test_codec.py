@@ -0,0 +1,118 @@
+"""
+Parse and serialize through every json backend installed, the values
+read are the same and the text written only depends on the backend
+"""
+
+
+import json
+
+import pytest
+
+from jsonViewer import qjsoncodec
+
+from conftest import DOCUMENT
+
+
+@pytest.fixture(params=qjsoncodec.available())
+def backend(request):
+    qjsoncodec.setBackend(request.param)
+    yield request.param
+    qjsoncodec.setBackend()
+
+
+def test_available():
+    assert 'json' in qjsoncodec.available()
+    assert qjsoncodec.backend() == qjsoncodec.available()[0]
+    with pytest.raises(ValueError):
+        qjsoncodec.setBackend('unknown')
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('{"a": [1, 2.5, "\\u00e9", null, true]}',
+     {'a': [1, 2.5, u'\xe9', None, True]}),
+    # integers beyond 64 bits, with a sign
+    ('[123456789012345678901234567890, -9223372036854775809]',
+     [123456789012345678901234567890, -9223372036854775809]),
+    ('[9223372036854775807, 1e400]', [9223372036854775807, float('inf')]),
+    ('[Infinity, -Infinity]', [float('inf'), float('-inf')]),
+])
+def test_loads(backend, text, expected):
+    assert qjsoncodec.loads(text) == expected
+    assert qjsoncodec.loads(text.encode('utf-8')) == expected
+
+
+def test_loads_nan(backend):
+    value = qjsoncodec.loads('[NaN]')[0]
+    assert value != value
+
+
+def test_loads_invalid(backend):
+    for text in ('{"a": }', '[1, 2', '{tru: 1}', ''):
+        with pytest.raises(ValueError):
+            qjsoncodec.loads(text)
+
+
+def test_parse(backend):
+    assert qjsoncodec.parse('{"a": 1}') == {'a': 1}
+    # python literals, as dropped from python code
+    assert qjsoncodec.parse("{'a': (1, None), 'b': True}") == \
+        {'a': (1, None), 'b': True}
+    with pytest.raises((ValueError, SyntaxError)):
+        qjsoncodec.parse('{a: 1}')
+
+
+@pytest.mark.parametrize('indent', [None, 2, 4, '\t'])
+@pytest.mark.parametrize('sortKeys', [False, True])
+def test_round_trip(backend, indent, sortKeys):
+    text = qjsoncodec.dumps(DOCUMENT, indent, sortKeys)
+    assert qjsoncodec.loads(text) == DOCUMENT
+    if sortKeys:
+        assert list(json.loads(text)) == sorted(DOCUMENT)
+    if indent is not None:
+        assert text.count('\n') == json.dumps(DOCUMENT, indent=2).count('\n')
+
+
+@pytest.mark.parametrize('indent', [None, 2, 4])
+def test_dumps_format(backend, indent):
+    value = {'b': [None, u'\xe9', 1.5], 'a': {'c': None}}
+    text = qjsoncodec.dumps(value, indent)
+
+    # NaN, infinite floats and big integers leave the format as it is
+    for other, written in [(float('nan'), 'NaN'),
+                           (float('inf'), 'Infinity'),
+                           (float('-inf'), '-Infinity'),
+                           (10 ** 30, str(10 ** 30))]:
+        value['b'][2] = other
+        assert qjsoncodec.dumps(value, indent) == \
+            text.replace('1.5', written)
+
+
+def test_dumps_none(backend):
+    # null alone is not mistaken for a non-finite float
+    assert json.loads(qjsoncodec.dumps([None, {'a': None}])) == \
+        [None, {'a': None}]
+
+
+def test_json_backend():
+    qjsoncodec.setBackend('json')
+    try:
+        value = [None, u'\xe9', float('nan')]
+        assert qjsoncodec.dumps(value) == json.dumps(value)
+    finally:
+        qjsoncodec.setBackend()
+
+
+def test_raw_decode():
+    text = ' [1, {"a": 2}] [3]'
+    value, end = qjsoncodec.rawDecode(text, 1)
+    assert value == [1, {'a': 2}]
+    assert qjsoncodec.rawDecode(text, end + 1) == ([3], len(text))
+    with pytest.raises(ValueError):
+        qjsoncodec.rawDecode('[1, 2', 0)
+
+
+def test_encoder():
+    value = {'b': [1, {'c': u'\xe9'}], 'a': None}
+    chunks = qjsoncodec.encoder(2, True).iterencode(value)
+    assert ''.join(chunks) == json.dumps(value, indent=2, sort_keys=True)
+    assert qjsoncodec.encodeString(u'a"\xe9\n') == json.dumps(u'a"\xe9\n')
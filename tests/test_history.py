@@ -0,0 +1,184 @@
+"""
+Undo and redo every kind of delta recorded by QJsonModel
+"""
+
+
+import copy
+
+from Qt import QtCore
+
+from jsonViewer import qjsonhistory
+from jsonViewer.qjsonnode import QJsonNode
+from jsonViewer.qjsonmodel import QJsonModel
+
+from conftest import DOCUMENT
+
+
+def lastDeltas(model):
+    """
+    Get the types of the deltas of the last command recorded
+    """
+    return set(type(delta)
+               for delta in model.history()._undoCommands[-1].deltas)
+
+
+def checkUndoRedo(model, before, deltaType):
+    """
+    Check the last command, its delta type, that undo restores the
+    value before it and redo the value after it
+    """
+    after = model.asDict()
+    assert after != before
+    assert deltaType in lastDeltas(model)
+
+    model.undo()
+    assert model.asDict() == before
+    model.redo()
+    assert model.asDict() == after
+    model.undo()
+    assert model.asDict() == before
+
+
+def test_rows_inserted(model):
+    before = model.asDict()
+    items = model.index(list(DOCUMENT).index('items'), 0)
+    model.addItems([(None, 6), (None, {'seven': [7]})], items)
+    checkUndoRedo(model, before, qjsonhistory.RowsInserted)
+
+
+def test_rows_removed(model):
+    before = model.asDict()
+    model.removeRows(1, 2)
+    checkUndoRedo(model, before, qjsonhistory.RowsRemoved)
+
+
+def test_rows_removed_at(app):
+    value = list(range(200))
+    model = QJsonModel(QJsonNode.load(value))
+    model.fetchAll()
+    rows = range(0, 200, 3)
+    assert len(rows) > model.rangeLimit
+    model.removeIndices([model.index(row, 0) for row in rows])
+    checkUndoRedo(model, value, qjsonhistory.RowsRemovedAt)
+
+
+def test_rows_moved(model):
+    before = model.asDict()
+    items = model.index(list(DOCUMENT).index('items'), 0)
+    model.moveRows(items, 0, 2, items, 5)
+    checkUndoRedo(model, before, qjsonhistory.RowsMoved)
+
+
+def test_rows_moved_between_parents(model):
+    before = model.asDict()
+    items = model.index(list(DOCUMENT).index('items'), 0)
+    nested = model.index(list(DOCUMENT).index('nested'), 0)
+    model.moveIndices([model.index(2, 0, items)], nested)
+    checkUndoRedo(model, before, qjsonhistory.RowsMoved)
+
+
+def test_data_changed(model):
+    before = model.asDict()
+    row = list(DOCUMENT).index('nested')
+    model.setData(model.index(row, 0), 'renamed', QtCore.Qt.EditRole)
+    checkUndoRedo(model, before, qjsonhistory.DataChanged)
+
+    model.setData(model.index(0, 1), 'edited', QtCore.Qt.EditRole)
+    checkUndoRedo(model, before, qjsonhistory.DataChanged)
+
+
+def test_leaf_changed(model):
+    before = model.asDict()
+    value = copy.deepcopy(DOCUMENT)
+    value['items'][0] = 100
+    model.updateValue(value)
+    checkUndoRedo(model, before, qjsonhistory.LeafChanged)
+
+
+def test_pending_changed(app):
+    value = list(range(20))
+    model = QJsonModel(QJsonNode.load(value, lazy=True))
+    model.batchSize = 5
+    model.fetchMore(model.index(-1, -1))
+    assert model.getNode(model.index(-1, -1)).canFetchMore()
+    model.updateValue(value[:10] + ['changed'] * 3)
+    checkUndoRedo(model, value, qjsonhistory.PendingChanged)
+
+
+def test_node_reset(model):
+    before = model.asDict()
+    value = copy.deepcopy(DOCUMENT)
+    value['count'] = {'now': ['a', 'container']}
+    value['nested'] = 'now a leaf'
+    model.updateValue(value)
+    checkUndoRedo(model, before, qjsonhistory.NodeReset)
+
+
+def test_root_changed(model):
+    before = model.asDict()
+    model.clear()
+    checkUndoRedo(model, before, qjsonhistory.RootChanged)
+
+
+def test_sequence(model):
+    """
+    Undo a series of commands back to the start and redo them all
+    """
+    values = [model.asDict()]
+    items = model.index(list(DOCUMENT).index('items'), 0)
+    model.addItems([(None, 'added')], items)
+    values.append(model.asDict())
+    model.removeRows(0, 1)
+    values.append(model.asDict())
+    model.setData(model.index(0, 1), 'edited', QtCore.Qt.EditRole)
+    values.append(model.asDict())
+    model.clear()
+    values.append(model.asDict())
+
+    for value in reversed(values[:-1]):
+        model.undo()
+        assert model.asDict() == value
+    assert not model.history().canUndo()
+    for value in values[1:]:
+        model.redo()
+        assert model.asDict() == value
+    assert not model.history().canRedo()
+
+
+def test_memory_limit(app):
+    value = [{'id': row, 'name': 'item{}'.format(row)} for row in range(500)]
+    model = QJsonModel(QJsonNode.load(value))
+    model.fetchTree()
+    history = model.history()
+    history.setMemoryLimit(16 * 1024)
+
+    for row in range(20):
+        model.setData(model.index(1, 1, model.index(row, 0)),
+                      'edited{}'.format(row), QtCore.Qt.EditRole)
+    assert history.count() == 20
+    assert history.memoryUsage() <= 16 * 1024
+
+    # larger than the limit on its own, the oldest commands are dropped
+    edited = model.asDict()
+    model.clear()
+    cleared = model.asDict()
+    assert history.count() == 1
+    assert history.memoryUsage() > 16 * 1024
+    model.undo()
+    assert model.asDict() == edited
+    assert history.canRedo()
+
+    # the next command to redo is kept when there is nothing to undo
+    history.setMemoryLimit(0)
+    assert history.canRedo()
+    model.redo()
+    assert model.asDict() == cleared
+
+
+def test_abstract_deltas():
+    for deltaType in (qjsonhistory._Delta, qjsonhistory._Toggle):
+        try:
+            deltaType()
+        except TypeError:
+            continue
+        raise AssertionError(deltaType)
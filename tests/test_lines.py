@@ -0,0 +1,227 @@
+"""
+Read, edit and save JSON Lines documents, the records are parsed on
+demand and unloaded above the cache size
+"""
+
+
+import io
+import json
+import os
+
+import pytest
+
+from Qt import QtCore, QtWidgets
+
+from jsonViewer.qjsonlines import QJsonLinesDocument, QJsonLinesFile
+from jsonViewer.qjsonnode import QJsonNode
+
+from conftest import DOCUMENT
+
+
+RECORDS = [
+    {'id': 0, 'name': 'first', 'tags': ['a', 'b']},
+    [1, 2, {'three': 3}],
+    'scalar',
+    {'id': 3, 'nested': {'deep': [None, True]}},
+    {},
+]
+
+
+def writeLines(tmpdir, records=RECORDS, newline='\n', name='records.jsonl'):
+    path = str(tmpdir.join(name))
+    with io.open(path, 'wb') as stream:
+        for record in records:
+            stream.write((json.dumps(record) + newline).encode('utf-8'))
+    return path
+
+
+def readBytes(path):
+    with io.open(path, 'rb') as stream:
+        return stream.read()
+
+
+def readRecords(path):
+    with io.open(path, 'rb') as stream:
+        return [json.loads(line) for line in stream if line.strip()]
+
+
+def editName(document, text):
+    """
+    Edit the name of the first record
+    """
+    model = document.model()
+    model.fetchAll()
+    first = model.index(0, 0)
+    model.fetchAll(first)
+    row = list(RECORDS[0]).index('name')
+    model.setData(model.index(row, 1, first), text, QtCore.Qt.EditRole)
+
+
+def test_records(app, tmpdir):
+    document = QJsonLinesDocument(writeLines(tmpdir))
+    model = document.model()
+    model.fetchAll()
+    assert model.rowCount() == len(RECORDS)
+
+    # container records are parsed when their children are needed
+    node = model.index(0, 0).internalPointer()
+    assert not node._parsed
+    assert model.asDict() == RECORDS
+    document.close()
+
+
+def test_save_in_place(app, tmpdir):
+    path = writeLines(tmpdir)
+    document = QJsonLinesDocument(path)
+    editName(document, 'one')
+    assert document.isModified()
+
+    assert document.save()
+    assert not document.isModified()
+    assert not os.path.exists(path + '.journal')
+    expected = [dict(RECORDS[0], name='one')] + RECORDS[1:]
+    assert readRecords(path) == expected
+    # the line keeps its length, padded with spaces
+    assert len(readBytes(path)) == len(readBytes(writeLines(
+        tmpdir, name='other.jsonl')))
+    document.close()
+
+
+@pytest.mark.parametrize('inPlace', [True, False])
+def test_crlf(app, tmpdir, inPlace):
+    path = writeLines(tmpdir, newline='\r\n')
+    document = QJsonLinesDocument(path)
+    editName(document, 'one' if inPlace else 'a much longer name')
+
+    assert document.save() is inPlace
+    text = readBytes(path)
+    assert text.count(b'\r\n') == len(RECORDS)
+    assert text.count(b'\n') == len(RECORDS)
+    assert readRecords(path)[0]['name'] == \
+        ('one' if inPlace else 'a much longer name')
+    document.close()
+
+
+def test_mixed_endings(app, tmpdir):
+    path = str(tmpdir.join('mixed.jsonl'))
+    with io.open(path, 'wb') as stream:
+        stream.write(b'{"a": 1}\r\n[2]\n"three"\r\n')
+    document = QJsonLinesDocument(path)
+    model = document.model()
+    model.addItems([(None, 4)])
+
+    # a new file is streamed, the new record takes the first ending
+    assert not document.save()
+    assert readBytes(path) == b'{"a": 1}\r\n[2]\n"three"\r\n4\r\n'
+    document.close()
+
+
+def test_interrupted_save(app, tmpdir, monkeypatch):
+    path = writeLines(tmpdir)
+    before = readBytes(path)
+    document = QJsonLinesDocument(path)
+    editName(document, 'one')
+
+    def interrupt(path, lines):
+        raise OSError('interrupted')
+
+    monkeypatch.setattr(QJsonLinesFile, '_write', staticmethod(interrupt))
+    with pytest.raises(OSError):
+        document.save()
+    monkeypatch.undo()
+    document.close()
+    assert readBytes(path) == before
+    assert os.path.exists(path + '.journal')
+
+    # the journal is replayed when the file is opened again
+    source = QJsonLinesFile(path)
+    assert not os.path.exists(path + '.journal')
+    assert source.parse(0)['name'] == 'one'
+    source.close()
+
+
+def test_incomplete_journal(app, tmpdir):
+    path = writeLines(tmpdir)
+    before = readBytes(path)
+    with io.open(path + '.journal', 'wb') as stream:
+        stream.write(b'QJSONLINES1\n\x00\x00')
+
+    source = QJsonLinesFile(path)
+    assert not os.path.exists(path + '.journal')
+    assert readBytes(path) == before
+    source.close()
+
+
+def test_stream_undo(app, tmpdir):
+    path = writeLines(tmpdir)
+    document = QJsonLinesDocument(path)
+    model = document.model()
+    model.fetchAll()
+    removed = model.index(0, 0).internalPointer()
+    model.removeRows(0, 1)
+
+    assert not document.save()
+    assert readRecords(path) == RECORDS[1:]
+    # the removed record was parsed before its map was released
+    assert removed._source is None and removed._parsed
+
+    model.undo()
+    assert model.asDict() == RECORDS
+    assert not document.save()
+    assert readRecords(path) == RECORDS
+    document.close()
+
+
+def test_save_as(app, tmpdir):
+    path = writeLines(tmpdir)
+    document = QJsonLinesDocument(path)
+    editName(document, 'a much longer name')
+    other = str(tmpdir.join('other.jsonl'))
+
+    assert not document.save(other)
+    assert document.path() == other
+    assert readRecords(path) == RECORDS
+    assert readRecords(other)[0]['name'] == 'a much longer name'
+    document.close()
+
+
+def test_evict(app, tmpdir, monkeypatch):
+    monkeypatch.setattr(QJsonLinesDocument, 'cacheSize', 2)
+    records = [{'row': row, 'values': list(range(3))} for row in range(6)]
+    document = QJsonLinesDocument(writeLines(tmpdir, records))
+    model = document.model()
+    model.fetchAll()
+    for row in range(6):
+        model.fetchAll(model.index(row, 0))
+    QtWidgets.QApplication.processEvents()
+
+    # the least recently parsed records are unloaded back to their line
+    rows = [model.rowCount(model.index(row, 0)) for row in range(6)]
+    assert rows == [0, 0, 0, 0, 2, 2]
+    assert model.asDict() == records
+    document.close()
+
+
+def test_edited_not_evicted(app, tmpdir, monkeypatch):
+    monkeypatch.setattr(QJsonLinesDocument, 'cacheSize', 1)
+    document = QJsonLinesDocument(writeLines(tmpdir))
+    editName(document, 'one')
+    model = document.model()
+    model.fetchAll()
+    for row in (1, 3):
+        model.fetchAll(model.index(row, 0))
+    QtWidgets.QApplication.processEvents()
+
+    assert model.rowCount(model.index(0, 0)) == len(RECORDS[0])
+    assert model.asDict()[0]['name'] == 'one'
+    document.close()
+
+
+def test_unload():
+    node = QJsonNode.load(DOCUMENT)
+    node.fetchMore(node.pendingCount, lazy=False)
+    assert not node.canUnload()
+
+    node.unload()
+    assert not node._children and node.pendingCount == len(DOCUMENT)
+    assert node.asDict()['root'] == DOCUMENT
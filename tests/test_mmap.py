@@ -0,0 +1,119 @@
+"""
+Read a json file through a memory map, indexed and decoded as the rows
+are fetched
+"""
+
+
+import io
+import json
+import mmap
+
+import pytest
+
+from Qt import QtCore
+
+from jsonViewer.qjsonmmap import QJsonFile
+from jsonViewer.qjsonmodel import QJsonModel
+from jsonViewer.qjsontabs import QJsonTab
+
+from conftest import DOCUMENT
+
+
+VALUES = [
+    DOCUMENT,
+    # brackets, quotes and escapes inside strings
+    {'text': '[{"a": "]}\\"', 'k"[': ['\\', u'\xe9', '\n', '}'],
+     '': {'': ''}},
+    # more items than the scanner skips in one run, nested deeper than it
+    [list(range(3000)), [[[[[[['deep', {'a': [[{}]]}]]]]]]]],
+    [{'id': row, 'tags': ['x', {'y': None}]} for row in range(500)],
+    [1.5, -2e10, 10 ** 20, True, False, None, ''],
+    'scalar',
+    [],
+]
+
+
+def writeFile(tmpdir, text, name='document.json'):
+    path = str(tmpdir.join(name))
+    with io.open(path, 'w', encoding='utf-8') as stream:
+        stream.write(text)
+    return path
+
+
+def openModel(path):
+    jsonFile = QJsonFile(path)
+    model = QJsonModel(jsonFile.root())
+    model.setReadOnly(True)
+    return jsonFile, model
+
+
+@pytest.mark.parametrize('value', VALUES)
+@pytest.mark.parametrize('indent', [None, 2])
+def test_read(app, tmpdir, value, indent):
+    path = writeFile(tmpdir, json.dumps(value, indent=indent))
+    jsonFile, model = openModel(path)
+    model.fetchTree()
+    assert model.asDict() == value
+    assert jsonFile.error is None
+    jsonFile.close()
+
+
+def test_batches(app, tmpdir):
+    value = [{'id': row} for row in range(100)]
+    jsonFile, model = openModel(writeFile(tmpdir, json.dumps(value)))
+    model.batchSize = 30
+    parent = QtCore.QModelIndex()
+    assert model.canFetchMore(parent)
+
+    model.fetchMore(parent)
+    assert model.rowCount() == 30
+    assert model.asDict(model.index(29, 0)) == {'list[29]': {'id': 29}}
+    # the value of the document holds the rows not fetched yet
+    assert model.asDict() == value
+    while model.canFetchMore(parent):
+        model.fetchMore(parent)
+    assert model.rowCount() == 100
+    jsonFile.close()
+
+
+@pytest.mark.parametrize('text, value', [
+    ('{tru: 1, "b": 2}', {'tru': 1, 'b': 2}),
+    ('{"a": "\\x", "b": 2}', {'a': '"\\x"', 'b': 2}),
+    ('{"\\x": 1, "b": 2}', {'"\\x"': 1, 'b': 2}),
+    ('[1, tru, 3]', [1, 'tru', 3]),
+    ('[1, 2', [1, 2]),
+    ('{"a": 1 "b": 2}', {'a': 1}),
+])
+def test_malformed(app, tmpdir, text, value):
+    jsonFile, model = openModel(writeFile(tmpdir, text))
+    model.fetchMore(QtCore.QModelIndex())
+    model.fetchTree()
+    assert model.asDict() == value
+    assert jsonFile.error
+
+
+def test_malformed_scalar(app, tmpdir):
+    jsonFile = QJsonFile(writeFile(tmpdir, ' tru \n'))
+    root = jsonFile.root()
+    assert root.value == 'tru'
+    assert jsonFile.error
+
+
+def test_empty(tmpdir):
+    with pytest.raises(ValueError):
+        QJsonFile(writeFile(tmpdir, ''))
+    jsonFile = QJsonFile(writeFile(tmpdir, ' \n'))
+    with pytest.raises(ValueError):
+        jsonFile.root()
+    jsonFile.close()
+
+
+def test_close(app, tmpdir):
+    jsonFile, model = openModel(writeFile(tmpdir, json.dumps(DOCUMENT)))
+    tab = QJsonTab(model, jsonFile.path)
+    tab.file = jsonFile
+    tab.close()
+    assert jsonFile.buffer.closed
+    with pytest.raises(ValueError):
+        jsonFile.buffer[0:1]
+    assert isinstance(jsonFile.buffer, mmap.mmap)
@@ -0,0 +1,110 @@
+"""
+Move subtrees by reference and copy them by cloning the tree structure
+"""
+
+
+from Qt import QtCore
+
+from jsonViewer.qjsonnode import QJsonNode
+from jsonViewer.qjsonmodel import QJsonModel
+from jsonViewer.qjsonproxy import QJsonProxyModel
+from jsonViewer.qjsonview import QJsonView
+
+from conftest import DOCUMENT
+
+
+def test_move_within(app):
+    model = QJsonModel(QJsonNode.load(list(range(10))))
+    model.fetchAll()
+    parent = QtCore.QModelIndex()
+
+    assert model.moveRows(parent, 1, 2, parent, 6)
+    assert model.asDict() == [0, 3, 4, 5, 1, 2, 6, 7, 8, 9]
+    assert model.moveRows(parent, 7, 3, parent, 0)
+    assert model.asDict() == [7, 8, 9, 0, 3, 4, 5, 1, 2, 6]
+
+    model.undo()
+    model.undo()
+    assert model.asDict() == list(range(10))
+
+
+def test_move_between(model):
+    items = model.indexFromPath('/items')
+    nested = model.indexFromPath('/nested')
+    moved = model.getNode(model.index(2, 0, items))
+
+    assert model.moveRows(items, 2, 2, nested, 0)
+    value = model.asDict()
+    assert value['items'] == [1, 'two', [], {}]
+    assert value['nested'] == dict(DOCUMENT['nested'],
+                                   **{'list[2]': {'three': 3},
+                                      'list[3]': [4, 5]})
+    # the node itself is moved, not a copy of it
+    assert model.getNode(model.index(0, 0, nested)) is moved
+
+    model.undo()
+    assert model.asDict() == DOCUMENT
+    assert model.getNode(model.index(2, 0, items)) is moved
+
+
+def test_move_inside_itself(model):
+    nested = model.indexFromPath('/nested')
+    target = model.indexFromPath('/nested/a/b')
+    root = QtCore.QModelIndex()
+    assert not model.moveRows(root, nested.row(), 1, target, 0)
+    assert not model.moveIndices([nested], target)
+    assert model.asDict() == DOCUMENT
+    assert not model.history().canUndo()
+
+
+def test_move_indices(model):
+    items = model.indexFromPath('/items')
+    indices = [model.indexFromPath(path)
+               for path in ('/name', '/nested/d', '/items/0')]
+    assert model.moveIndices(indices, items)
+    value = model.asDict()
+    assert value['items'][-3:] == ['document', 'e', 1]
+    assert 'name' not in value and 'd' not in value['nested']
+
+    model.undo()
+    assert model.asDict() == DOCUMENT
+
+
+def test_copy(model):
+    root = model.getNode(QtCore.QModelIndex())
+    copy = root.copy()
+    assert copy.getChildrenValue(copy) == DOCUMENT
+
+    # the copy shares no container with the tree
+    copy.child(list(DOCUMENT).index('items')).removeChildren(0, 2)
+    copy.removeChildren(0, 1)
+    assert model.asDict() == DOCUMENT
+
+
+def test_copy_lazy(app):
+    value = [{'id': row, 'tags': [row]} for row in range(50)]
+    model = QJsonModel(QJsonNode.load(value, lazy=True))
+    model.batchSize = 10
+    model.fetchMore(QtCore.QModelIndex())
+    root = model.getNode(QtCore.QModelIndex())
+    copy = root.copy()
+    assert copy.getChildrenValue(copy) == value
+
+
+def test_copy_paste(model):
+    proxy = QJsonProxyModel()
+    proxy.setSourceModel(model)
+    view = QJsonView()
+    view.setModel(proxy)
+    index = proxy.mapFromSource(model.indexFromPath('/nested'))
+    view.selectionModel().select(
+        index, QtCore.QItemSelectionModel.Select
+        | QtCore.QItemSelectionModel.Rows)
+
+    view.copy()
+    view.paste(model.indexFromPath('/items'))
+    assert model.asDict()['items'][-1] == DOCUMENT['nested']
+
+    # pasted nodes are a copy
+    model.removeIndices([model.indexFromPath('/items/6/a')])
+    assert model.asDict()['nested'] == DOCUMENT['nested']
@@ -0,0 +1,77 @@
+"""
+Build node trees from values and serialize them back
+"""
+
+
+import io
+import json
+import sys
+
+import pytest
+
+from jsonViewer import qjsonwriter
+from jsonViewer.qjsonnode import QJsonNode
+from jsonViewer.qjsonmodel import QJsonModel
+
+from conftest import DOCUMENT
+
+
+VALUES = [
+    DOCUMENT,
+    [DOCUMENT, [DOCUMENT], {'x': [DOCUMENT]}],
+    {'unicode': u'\xe9中', 'escaped': 'a"b\\c\n', 'big': 2 ** 70},
+    {'empty': {}, 'nothing': [], 'zero': 0, 'false': False},
+    [],
+    {},
+]
+
+
+def nested(depth):
+    """
+    Chain of dictionaries and lists nested deeper than the recursion limit
+    """
+    value = top = dict()
+    for level in range(depth):
+        child = dict() if level % 2 else list()
+        if isinstance(value, dict):
+            value['k'] = child
+        else:
+            value.append(child)
+        value = child
+    return top
+
+
+@pytest.mark.parametrize('value', VALUES)
+@pytest.mark.parametrize('lazy', [False, True])
+def test_load_dump(value, lazy):
+    root = QJsonNode.load(value, lazy=lazy)
+    assert root.getChildrenValue(root) == value
+    assert json.loads(qjsonwriter.dumps(root)) == value
+
+
+@pytest.mark.parametrize('value', VALUES)
+@pytest.mark.parametrize('indent', [None, 4])
+def test_model_dump(app, value, indent):
+    model = QJsonModel(QJsonNode.load(value, lazy=True))
+    model.fetchMore(model.index(-1, -1))
+    text = model.dumps(indent=indent, sortKeys=True)
+    assert text == json.dumps(value, indent=indent, sort_keys=True)
+
+    stream = io.StringIO()
+    model.dump(stream, indent=indent, sortKeys=True)
+    assert stream.getvalue() == text
+    assert model.asDict() == value
+
+
+def test_deep():
+    depth = sys.getrecursionlimit() * 4
+    root = QJsonNode.load(nested(depth))
+    value = root.getChildrenValue(root)
+
+    node = root
+    for _ in range(depth):
+        node = node.child(0)
+    assert not node.childCount
+    text = qjsonwriter.dumps(root)
+    assert text.count('{') + text.count('[') == depth + 1
+    assert qjsonwriter.dumps(QJsonNode.load(value)) == text
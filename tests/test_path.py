@@ -0,0 +1,96 @@
+"""
+Split JSON Pointers and dotted paths into keys, and find the nodes they
+address
+"""
+
+
+import pytest
+
+from Qt import QtCore
+
+from jsonViewer import qjsonpath
+from jsonViewer.qjsonnode import QJsonNode
+from jsonViewer.qjsonmodel import QJsonModel
+
+from conftest import DOCUMENT
+
+
+@pytest.mark.parametrize('path, keys', [
+    ('', []),
+    ('/', ['']),
+    ('/items/2/three', ['items', '2', 'three']),
+    ('/a~1b/~0c/~01', ['a/b', '~c', '~1']),
+    ('//x/', ['', 'x', '']),
+    ('items', ['items']),
+    ('items[2].three', ['items', '2', 'three']),
+    ('items.2.three', ['items', '2', 'three']),
+    ('[0][1]', ['0', '1']),
+    ('a[0].b[1]', ['a', '0', 'b', '1']),
+    ('a[key.with.dots]', ['a', 'key.with.dots']),
+    ('a\\.b.c\\[d\\\\', ['a.b', 'c[d\\']),
+    ('a..b', ['a', '', 'b']),
+    ('.a', ['', 'a']),
+    (['a', 0], ['a', 0]),
+    (('a',), ['a']),
+])
+def test_split(path, keys):
+    assert qjsonpath.split(path) == keys
+
+
+@pytest.mark.parametrize('path', [
+    '/a~2', '/a~', 'a[0', 'a[0]b', 'a[0][1]c', 'a\\',
+])
+def test_split_malformed(path):
+    with pytest.raises(ValueError):
+        qjsonpath.split(path)
+
+
+@pytest.mark.parametrize('keys', [
+    [], [''], ['items', 2, 'three'], ['a/b', '~c', '~1', '~01', '/~'],
+])
+def test_pointer(keys):
+    path = qjsonpath.pointer(keys)
+    assert path == '' or path.startswith('/')
+    assert qjsonpath.split(path) == [str(key) for key in keys]
+
+
+def test_find():
+    node = QJsonNode.load({'a/b': {'~': [0, {'c': 'd'}]}, 'x': 1},
+                          lazy=True)
+    node.fetchMore(node.pendingCount)
+    # children not created yet are not found
+    assert node.find('/a~1b/~0/1') is None
+
+    child = node.peekChild(node.childRow('a/b'))
+    child.fetchMore(child.pendingCount, lazy=False)
+    found = node.find('/a~1b/~0/1')
+    assert found.asDict() == {'list[1]': {'c': 'd'}}
+    assert found.path == '/a~1b/~0/1'
+    assert node.find(['a/b', '~', '1']) is found
+    assert node.find('/missing') is None
+    assert node.find('/x/y') is None
+
+
+def test_index_from_path(model):
+    for path in ('/items/2/three', 'items[2].three', 'items.2.three',
+                 ['items', 2, 'three']):
+        index = model.indexFromPath(path)
+        assert index.isValid()
+        assert model.pathFromIndex(index) == '/items/2/three'
+        assert model.data(index.siblingAtColumn(1),
+                          QtCore.Qt.EditRole) == 3
+
+    assert not model.indexFromPath('/items/9').isValid()
+    assert not model.indexFromPath('/name/0').isValid()
+    assert model.pathFromIndex(model.indexFromPath('')) == ''
+    with pytest.raises(ValueError):
+        model.indexFromPath('items[2')
+
+
+def test_index_from_path_lazy(app):
+    model = QJsonModel(QJsonNode.load(DOCUMENT, lazy=True))
+    # the rows leading to the path are fetched on the way
+    index = model.indexFromPath('/nested/a/b/c/2')
+    assert index.isValid()
+    assert model.pathFromIndex(index) == '/nested/a/b/c/2'
+    assert model.data(index.siblingAtColumn(1), QtCore.Qt.EditRole) == 3
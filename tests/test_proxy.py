@@ -0,0 +1,97 @@
+"""
+Filter the rows of a model with its search index, the ancestors of the
+matches and the inside of matching containers are kept
+"""
+
+
+import pytest
+
+from Qt import QtCore
+
+from jsonViewer.qjsonproxy import QJsonProxyModel
+
+
+@pytest.fixture
+def proxy(model, monkeypatch):
+    monkeypatch.setattr(QJsonProxyModel, 'filterDelay', 0)
+    proxy = QJsonProxyModel()
+    proxy.setSourceModel(model)
+    return proxy
+
+
+def applyFilter(proxy, text=None):
+    """
+    Set a filter text, if any, and wait until it is applied
+
+    :return: list of int. match counts emitted
+    """
+    counts = list()
+    loop = QtCore.QEventLoop()
+
+    def onFilterApplied(count):
+        counts.append(count)
+        loop.quit()
+
+    proxy.filterApplied.connect(onFilterApplied)
+    if text is not None:
+        proxy.setFilterText(text)
+    QtCore.QTimer.singleShot(5000, loop.quit)
+    loop.exec_()
+    proxy.filterApplied.disconnect(onFilterApplied)
+    return counts
+
+
+def visiblePaths(proxy, parent=QtCore.QModelIndex()):
+    """
+    Get the source paths of the rows shown by the proxy
+    """
+    model = proxy.sourceModel()
+    paths = list()
+    for row in range(proxy.rowCount(parent)):
+        index = proxy.index(row, 0, parent)
+        paths.append(model.pathFromIndex(proxy.mapToSource(index)))
+        paths.extend(visiblePaths(proxy, index))
+    return sorted(paths)
+
+
+def test_filter(proxy):
+    assert applyFilter(proxy, 'three') == [1]
+    assert visiblePaths(proxy) == ['/items', '/items/2', '/items/2/three']
+
+    # the inside of a matching container is kept
+    assert applyFilter(proxy, 'nested') == [1]
+    assert visiblePaths(proxy) == [
+        '/nested', '/nested/a', '/nested/a/b', '/nested/a/b/c',
+        '/nested/a/b/c/0', '/nested/a/b/c/1', '/nested/a/b/c/2',
+        '/nested/d']
+
+    assert applyFilter(proxy, 'nothing matches') == [0]
+    assert not proxy.rowCount()
+
+    assert applyFilter(proxy, '') == [0]
+    assert proxy.rowCount() == proxy.sourceModel().rowCount()
+
+
+def test_debounce(proxy):
+    proxy.setFilterText('thr')
+    proxy.setFilterText('three')
+    assert proxy.isFiltering()
+    assert applyFilter(proxy) == [1]
+    assert not proxy.isFiltering()
+    assert proxy.filterText() == 'three'
+
+
+def test_source_changed(proxy):
+    model = proxy.sourceModel()
+    applyFilter(proxy, 'three')
+    model.addItems([('three', 3)])
+    assert applyFilter(proxy) == [2]
+    assert '/three' in visiblePaths(proxy)
+
+
+def test_match_parents(proxy):
+    applyFilter(proxy, 'c')
+    model = proxy.sourceModel()
+    paths = [model.pathFromIndex(proxy.mapToSource(index))
+             for index in proxy.matchParents()]
+    assert paths == ['/nested', '/nested/a', '/nested/a/b']
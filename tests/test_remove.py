@@ -0,0 +1,98 @@
+"""
+Remove many rows at once, grouped by parent into contiguous ranges
+"""
+
+
+import pytest
+
+from Qt import QtCore
+
+from jsonViewer.qjsonnode import QJsonNode
+from jsonViewer.qjsonmodel import QJsonModel
+from jsonViewer.qjsonproxy import QJsonProxyModel
+from jsonViewer.qjsonview import QJsonView
+
+from conftest import DOCUMENT
+
+
+@pytest.fixture
+def listModel(app):
+    model = QJsonModel(QJsonNode.load(
+        [{'id': row, 'tags': [row, row + 1]} for row in range(200)]))
+    model.fetchAll()
+    return model
+
+
+def ids(model):
+    return [record['id'] for record in model.asDict()]
+
+
+def test_ranges(listModel):
+    removed = list()
+    listModel.rowsRemoved.connect(
+        lambda parent, first, last: removed.append((first, last)))
+    rows = [1, 2, 3, 10, 11, 50]
+    listModel.removeIndices([listModel.index(row, 1) for row in rows])
+
+    # one signal per range, from the last one
+    assert removed == [(50, 50), (10, 11), (1, 3)]
+    assert ids(listModel) == [row for row in range(200) if row not in rows]
+    listModel.undo()
+    assert ids(listModel) == list(range(200))
+
+
+def test_scattered(listModel):
+    layouts = list()
+    listModel.layoutChanged.connect(lambda *args: layouts.append(args))
+    rows = list(range(0, 200, 3))
+    assert len(rows) > listModel.rangeLimit
+    kept = QtCore.QPersistentModelIndex(listModel.index(199, 0))
+    gone = QtCore.QPersistentModelIndex(listModel.index(198, 0))
+    listModel.removeIndices([listModel.index(row, 0) for row in rows])
+
+    assert len(layouts) == 1
+    remaining = [row for row in range(200) if row not in rows]
+    assert ids(listModel) == remaining
+    assert kept.isValid() and kept.row() == remaining.index(199)
+    assert not gone.isValid()
+
+    listModel.undo()
+    assert ids(listModel) == list(range(200))
+    listModel.redo()
+    assert ids(listModel) == remaining
+
+
+def test_parents(model):
+    items = model.indexFromPath('/items')
+    nested = model.indexFromPath('/nested')
+    model.removeIndices([
+        model.index(0, 0, items), model.index(2, 0, items),
+        model.index(0, 0, nested),
+        # inside a removed row, skipped
+        model.indexFromPath('/nested/a/b'),
+    ])
+    value = model.asDict()
+    assert value['items'] == [DOCUMENT['items'][1]] + DOCUMENT['items'][3:]
+    assert value['nested'] == {'d': 'e'}
+
+    model.undo()
+    assert model.asDict() == DOCUMENT
+
+
+def test_view(listModel):
+    proxy = QJsonProxyModel()
+    proxy.setSourceModel(listModel)
+    view = QJsonView()
+    view.setModel(proxy)
+    selection = QtCore.QItemSelection()
+    for row in range(0, 200, 2):
+        index = proxy.mapFromSource(listModel.index(row, 0))
+        selection.select(index, index)
+    view.selectionModel().select(
+        selection, QtCore.QItemSelectionModel.Select
+        | QtCore.QItemSelectionModel.Rows)
+
+    view.remove([proxy.mapToSource(index)
+                 for index in view.selectionModel().selectedRows()])
+    assert ids(listModel) == list(range(1, 200, 2))
+    assert proxy.rowCount() == 100
@@ -0,0 +1,173 @@
+"""
+Save a model on the worker thread while it is edited
+"""
+
+
+import json
+import os
+import stat
+import sys
+
+import pytest
+
+from Qt import QtCore
+
+from jsonViewer.qjsonnode import QJsonNode
+from jsonViewer.qjsonmodel import QJsonModel
+from jsonViewer.qjsonsaver import QJsonSaver
+
+from conftest import DOCUMENT
+
+
+def read(path):
+    with open(path) as stream:
+        return json.load(stream)
+
+
+def test_save(model, tmpdir):
+    path = str(tmpdir.join('document.json'))
+    saver = QJsonSaver(model)
+    saver.save(path)
+    saver.waitSaved()
+
+    assert read(path) == DOCUMENT
+    assert not saver.isSaving()
+    assert not saver.isModified()
+    # the temporary file replaced the target
+    assert os.listdir(str(tmpdir)) == ['document.json']
+
+
+def test_edit_while_saving(model, tmpdir):
+    path = str(tmpdir.join('document.json'))
+    saver = QJsonSaver(model)
+    saver.save(path)
+    # the tree changes while the thread reads it, the save runs again
+    model.removeRows(0, 1)
+    assert saver.isSaving()
+    saver.waitSaved()
+
+    assert read(path) == model.asDict()
+    assert not saver.isModified()
+
+
+def test_edit_after_thread(model, tmpdir):
+    path = str(tmpdir.join('document.json'))
+    saver = QJsonSaver(model)
+    saver.save(path)
+    # finished is not handled yet, the save is still pending
+    saver.wait()
+    assert saver.isSaving()
+    model.removeRows(0, 1)
+    saver.waitSaved()
+
+    assert read(path) == model.asDict()
+
+
+def test_queued_save(model, tmpdir):
+    first = str(tmpdir.join('first.json'))
+    second = str(tmpdir.join('second.json'))
+    saver = QJsonSaver(model)
+    saver.save(first)
+    saver.save(second)
+    saver.waitSaved()
+
+    assert read(first) == DOCUMENT
+    assert read(second) == DOCUMENT
+
+
+def test_modified(model, tmpdir):
+    saver = QJsonSaver(model)
+    assert not saver.isModified()
+    model.removeRows(0, 1)
+    assert saver.isModified()
+
+    saver.save(str(tmpdir.join('document.json')))
+    saver.waitSaved()
+    assert not saver.isModified()
+
+
+def test_failed(model, tmpdir):
+    errors = list()
+    saver = QJsonSaver(model)
+    saver.failed.connect(errors.append)
+    saver.save(str(tmpdir.join('missing', 'document.json')))
+    saver.waitSaved()
+
+    assert errors
+    assert not saver.isSaving()
+
+
+def test_saved(model, tmpdir):
+    paths = list()
+    path = str(tmpdir.join('document.json'))
+    saver = QJsonSaver(model)
+    saver.saved.connect(paths.append)
+    saver.save(path)
+    saver.waitSaved()
+    assert paths == [path]
+
+
+def test_cached_text(model, tmpdir):
+    path = str(tmpdir.join('document.json'))
+    saver = QJsonSaver(model)
+    saver.save(path)
+    saver.waitSaved()
+
+    # the containers not edited are copied from the text of the last save
+    nested = model.index(list(DOCUMENT).index('nested'), 0)
+    model.setData(model.index(1, 1, nested), 'edited', QtCore.Qt.EditRole)
+    items = model.index(list(DOCUMENT).index('items'), 0)
+    model.removeRows(0, 1, items)
+    saver.save(path)
+    saver.waitSaved()
+    assert read(path) == model.asDict()
+
+    model.undo()
+    model.undo()
+    saver.save(path)
+    saver.waitSaved()
+    assert read(path) == DOCUMENT
+
+
+def test_overlapping_fetch(app, tmpdir):
+    value = {'rows': list(range(QJsonModel.batchSize * 3))}
+    model = QJsonModel(QJsonNode.load(value, lazy=True))
+    path = str(tmpdir.join('document.json'))
+    saver = QJsonSaver(model)
+    saver.save(path)
+    # fetching rows changes the tree read, not the value
+    model.fetchMore(QtCore.QModelIndex())
+    saver.waitSaved()
+    assert read(path) == value
+
+    model.fetchMore(model.index(0, 0))
+    saver.save(path)
+    saver.waitSaved()
+    assert read(path) == value
+
+
+def test_set_model(model, tmpdir):
+    path = str(tmpdir.join('document.json'))
+    saver = QJsonSaver(model)
+    other = QJsonModel(QJsonNode.load([1, 2]))
+    saver.setModel(other)
+    # the previous model is no longer followed
+    model.removeRows(0, 1)
+    assert not saver.isModified()
+
+    saver.save(path)
+    saver.waitSaved()
+    assert read(path) == [1, 2]
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='posix permissions')
+def test_permissions(model, tmpdir):
+    path = str(tmpdir.join('document.json'))
+    with open(path, 'w') as stream:
+        stream.write('{}')
+    os.chmod(path, 0o640)
+    saver = QJsonSaver(model)
+    saver.save(path)
+    saver.waitSaved()
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+    assert read(path) == DOCUMENT
@@ -0,0 +1,242 @@
+"""
+Check values and trees against JSON Schemas, and validate a model again
+entry by entry as it changes
+"""
+
+
+import pytest
+
+from Qt import QtCore
+
+from jsonViewer.qjsonnode import QJsonNode
+from jsonViewer.qjsonmodel import QJsonModel
+from jsonViewer.qjsonschema import QJsonSchema, QJsonValidator
+
+from conftest import DOCUMENT
+
+
+CASES = [
+    # type, an integral float is an integer
+    ({'type': 'integer'}, 1.0, []),
+    ({'type': 'integer'}, True, [('', 'expected integer, got boolean')]),
+    ({'type': ['string', 'null']}, None, []),
+    ({'type': 'number'}, 'a', [('', 'expected number, got string')]),
+    # numbers
+    ({'minimum': 1, 'maximum': 3}, 4, [('', 'must be <= 3')]),
+    ({'exclusiveMinimum': 1}, 1, [('', 'must be > 1')]),
+    ({'minimum': 1, 'exclusiveMinimum': True}, 1, [('', 'must be > 1')]),
+    ({'exclusiveMaximum': 3}, 2.5, []),
+    ({'multipleOf': 0.1}, 0.3, []),
+    ({'multipleOf': 2}, 3, [('', 'must be a multiple of 2')]),
+    # strings
+    ({'minLength': 2}, 'a', [('', 'must be at least 2 characters long')]),
+    ({'maxLength': 1}, 'ab', [('', 'must be at most 1 characters long')]),
+    ({'pattern': '^a+$'}, 'ab', [('', 'does not match "^a+$"')]),
+    # enum and const, true and 1 differ, 1 and 1.0 do not
+    ({'enum': [1, 'a', [True]]}, 1.0, []),
+    ({'enum': [1]}, True, [('', 'is not one of [1]')]),
+    ({'const': {'a': [1]}}, {'a': [1]}, []),
+    ({'const': {'a': [1]}}, {'a': [2]}, [('', 'must be {"a":[1]}')]),
+    # arrays
+    ({'items': {'type': 'string'}}, ['a', 1],
+     [('/1', 'expected string, got integer')]),
+    ({'items': [{'type': 'string'}], 'additionalItems': False}, ['a', 1],
+     [('/1', 'is not allowed by the schema')]),
+    ({'minItems': 3}, [1], [('', 'must have at least 3 items')]),
+    ({'maxItems': 1}, [1, 2], [('', 'must have at most 1 items')]),
+    ({'uniqueItems': True}, [{'a': 1}, {'a': 1.0}],
+     [('', 'has duplicate items')]),
+    ({'uniqueItems': True}, [1, True], []),
+    ({'contains': {'const': 2}}, [1, 3],
+     [('', 'does not contain a matching item')]),
+    # objects
+    ({'required': ['a', 'b']}, {'a': 1}, [('', '"b" is required')]),
+    ({'properties': {'a': {'type': 'string'}},
+      'patternProperties': {'^x': {'type': 'integer'}},
+      'additionalProperties': False},
+     {'a': 'ok', 'x1': 'no', 'b': 1},
+     [('/x1', 'expected integer, got string'),
+      ('/b', 'is not allowed by the schema')]),
+    ({'minProperties': 2}, {'a': 1},
+     [('', 'must have at least 2 properties')]),
+    ({'maxProperties': 0}, {'a': 1}, [('', 'must have at most 0 properties')]),
+    ({'propertyNames': {'maxLength': 1}}, {'ab': 1},
+     [('/ab', 'key must be at most 1 characters long')]),
+    ({'dependencies': {'a': ['b']}}, {'a': 1},
+     [('', '"b" is required by "a"')]),
+    ({'dependencies': {'a': {'required': ['c']}}}, {'a': 1},
+     [('', '"c" is required')]),
+    # combinators
+    ({'allOf': [{'type': 'integer'}, {'minimum': 2}]}, 1,
+     [('', 'must be >= 2')]),
+    ({'anyOf': [{'type': 'string'}, {'minimum': 2}]}, 1,
+     [('', 'does not match any of the anyOf schemas'),
+      ('', 'expected string, got integer')]),
+    ({'oneOf': [{'type': 'integer'}, {'minimum': 0}]}, 1,
+     [('', 'matches more than one of the oneOf schemas')]),
+    ({'not': {'type': 'integer'}}, 1, [('', 'must not match the not schema')]),
+    ({'if': {'type': 'integer'}, 'then': {'minimum': 2},
+      'else': {'type': 'string'}}, 1, [('', 'must be >= 2')]),
+    ({'if': {'type': 'integer'}, 'then': {'minimum': 2},
+      'else': {'type': 'string'}}, None, [('', 'expected string, got null')]),
+    # references, recursive included
+    ({'definitions': {'node': {'type': 'object', 'properties': {
+        'children': {'items': {'$ref': '#/definitions/node'}}}}},
+      '$ref': '#/definitions/node'},
+     {'children': [{'children': [1]}]},
+     [('/children/0/children/0', 'expected object, got integer')]),
+    (True, {'a': 1}, []),
+    (False, 1, [('', 'is not allowed by the schema')]),
+]
+
+
+@pytest.mark.parametrize('schema, value, expected', CASES)
+def test_keywords(schema, value, expected):
+    schema = QJsonSchema(schema)
+    assert schema.validate(value) == expected
+    # the same errors from a tree, whether its children are created or not
+    for lazy in (False, True):
+        assert schema.validate(QJsonNode.load(value, lazy=lazy)) == expected
+
+
+@pytest.mark.parametrize('schema', [
+    [], {'$ref': '#/missing'}, {'$ref': 'other.json#/a'},
+    {'a': 1, '$ref': '#/a'}, {'pattern': '('},
+])
+def test_invalid_schema(schema):
+    with pytest.raises(ValueError):
+        QJsonSchema(schema)
+
+
+def test_ref_cycle():
+    schema = QJsonSchema({'definitions': {
+        'a': {'$ref': '#/definitions/b', 'minimum': 1},
+        'b': {'$ref': '#/definitions/a'}}, '$ref': '#/definitions/a'})
+    assert schema.validate(0) == [('', 'must be >= 1')]
+
+
+def test_keys_prefix():
+    schema = QJsonSchema({'type': 'string'})
+    assert schema.validate(1, keys=['a', 0]) == \
+        [('/a/0', 'expected string, got integer')]
+
+
+SCHEMA = {
+    'type': 'object',
+    'required': ['name'],
+    'properties': {
+        'name': {'type': 'string'},
+        'count': {'type': 'integer', 'minimum': 0},
+        'items': {'type': 'array', 'uniqueItems': True},
+        'nested': {'properties': {'d': {'enum': ['e', 'f']}}},
+    },
+}
+
+
+@pytest.fixture
+def validator(model):
+    validator = QJsonValidator(model, QJsonSchema(SCHEMA))
+    validator.waitValidated()
+    yield validator
+    validator.setSchema(None)
+    validator.wait()
+
+
+def validatedPaths(validator, monkeypatch):
+    """
+    Record the JSON Pointers of the entries validated from now on
+    """
+    paths = list()
+    validate = QJsonSchema.validate
+
+    def record(schema, entry, schemas=None, keys=()):
+        paths.append('/' + '/'.join(str(key) for key in keys)
+                     if keys else '')
+        return validate(schema, entry, schemas, keys)
+
+    monkeypatch.setattr(QJsonSchema, 'validate', record)
+    return paths
+
+
+def test_validator(validator, model):
+    assert validator.errors() == []
+    assert not validator.isPending()
+
+    row = list(DOCUMENT).index('count')
+    model.setData(model.index(row, 1), -1, QtCore.Qt.EditRole)
+    assert validator.isPending()
+    validator.waitValidated()
+    assert validator.errors() == [('/count', 'must be >= 0')]
+    assert validator.messages('/count') == ['must be >= 0']
+    assert validator.errorCount() == 1
+
+    node = model.index(row, 0).internalPointer()
+    assert validator.toolTip(node) == 'must be >= 0'
+    assert validator.decoration(node) is not None
+    assert validator.decoration(model.getNode(QtCore.QModelIndex())) is None
+
+    model.undo()
+    validator.waitValidated()
+    assert validator.errors() == []
+
+
+def test_incremental(validator, model, monkeypatch):
+    paths = validatedPaths(validator, monkeypatch)
+
+    # a leaf is validated alone
+    row = list(DOCUMENT).index('name')
+    model.setData(model.index(row, 1), 1, QtCore.Qt.EditRole)
+    validator.waitValidated()
+    assert paths == ['/name']
+    assert validator.errors() == [('/name', 'expected string, got integer')]
+
+    # uniqueItems depends on the whole array, it is validated again
+    del paths[:]
+    items = model.index(list(DOCUMENT).index('items'), 0)
+    model.setData(model.index(1, 1, items), 1, QtCore.Qt.EditRole)
+    validator.waitValidated()
+    assert paths == ['/items']
+    assert validator.errors() == [
+        ('/items', 'has duplicate items'),
+        ('/name', 'expected string, got integer')]
+
+    # the errors of the other entries are kept
+    del paths[:]
+    nested = model.index(list(DOCUMENT).index('nested'), 0)
+    model.setData(model.index(1, 1, nested), 'g', QtCore.Qt.EditRole)
+    validator.waitValidated()
+    assert paths == ['/nested/d']
+    assert len(validator.errors()) == 3
+
+
+def test_removed_rows(validator, model):
+    model.removeRows(list(DOCUMENT).index('name'), 1)
+    validator.waitValidated()
+    assert validator.errors() == [('', '"name" is required')]
+
+
+def test_model_reset(validator, model):
+    model.setData(model.index(list(DOCUMENT).index('count'), 1), -1,
+                  QtCore.Qt.EditRole)
+    validator.waitValidated()
+    assert validator.errorCount() == 1
+
+    model.resetRoot(QJsonNode.load({'count': 1}))
+    validator.waitValidated()
+    assert validator.errors() == [('', '"name" is required')]
+
+    validator.setSchema(None)
+    assert validator.errors() == []
+    assert not validator.isPending()
+
+
+def test_errors_order(app):
+    model = QJsonModel(QJsonNode.load([str(row) for row in range(12)]))
+    validator = QJsonValidator(
+        model, QJsonSchema({'items': {'type': 'integer'}}))
+    validator.waitValidated()
+    paths = [path for path, _ in validator.errors()]
+    assert paths == ['/{}'.format(row) for row in range(12)]
+    assert [path for path, _ in validator.errors(3)] == ['/0', '/1', '/2']
+    validator.setSchema(None)
+    validator.wait()
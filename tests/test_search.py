@@ -0,0 +1,120 @@
+"""
+Find entries by the words of their key and value, the index follows
+the model edits
+"""
+
+
+import random
+import re
+
+import pytest
+
+from Qt import QtCore
+
+from jsonViewer.qjsonnode import QJsonNode
+from jsonViewer.qjsonmodel import QJsonModel
+from jsonViewer.qjsonsearch import QJsonSearchIndex, WIDE_COUNT, valueText
+
+from conftest import DOCUMENT
+
+
+WORDS = ['alpha', 'beta', 'gamma', 'alphabet', 'Beta_2', 'delta 3']
+
+
+def expected(model, text):
+    """
+    Find the matching entries by checking every entry of the tree
+    """
+    patterns = [re.compile(r'(?<!\w)' + re.escape(word))
+                for word in re.findall(r'\w+', text.lower())]
+    matches = dict()
+    stack = [model.getNode(QtCore.QModelIndex())]
+    while stack:
+        node = stack.pop()
+        for row in range(node.childCount):
+            child = node.child(row)
+            text = valueText(child.key).lower() \
+                if node.dtype is dict else ''
+            if child.dtype in (dict, list):
+                stack.append(child)
+            else:
+                text += ' ' + valueText(child.value).lower()
+            if all(pattern.search(text) for pattern in patterns):
+                matches.setdefault(node, set()).add(row)
+    return matches
+
+
+def randomDocument(size):
+    return [{random.choice(WORDS): random.choice(WORDS + [1, None, True]),
+             'tags': [random.choice(WORDS) for _ in range(3)]}
+            for _ in range(size)]
+
+
+def test_words(model):
+    assert model.search('three') \
+        == {model.getNode(model.indexFromPath('/items/2')): {0}}
+    assert model.search('TWO') \
+        == {model.getNode(model.indexFromPath('/items')): {1}}
+    # prefixes of words, keys and values, json spelling of the leaves
+    assert model.search('doc') == expected(model, 'doc')
+    assert model.search('nest') == expected(model, 'nest')
+    assert model.search('true') == expected(model, 'true')
+    assert model.search('null') == expected(model, 'null')
+    # every word must match
+    assert model.search('name doc') == expected(model, 'name doc')
+    assert not model.search('name missing')
+    assert not model.search('ocument')
+    assert not model.search('')
+
+
+@pytest.mark.parametrize('size', [10, WIDE_COUNT * 2])
+def test_queries(app, size):
+    random.seed(size)
+    model = QJsonModel(QJsonNode.load(randomDocument(size), lazy=True))
+    for text in ['alpha', 'alphabet', 'beta', 'beta_2', 'delta 3', 'al ga',
+                 'tags gamma', '1', 'null', 'zeta']:
+        assert model.search(text) == expected(model, text)
+
+
+@pytest.mark.parametrize('size', [10, WIDE_COUNT * 2])
+def test_edits(app, size):
+    random.seed(size)
+    model = QJsonModel(QJsonNode.load(randomDocument(size), lazy=True))
+    model.searchIndex()
+
+    for step in range(30):
+        count = model.rowCount()
+        draw = random.random()
+        if draw < 0.3:
+            model.addItems([(None, document)
+                            for document in randomDocument(3)])
+        elif draw < 0.5:
+            model.removeRows(random.randrange(count), 2)
+        elif draw < 0.8:
+            record = model.index(random.randrange(count), 0)
+            row = random.randrange(model.rowCount(record))
+            index = model.index(row, 0, record)
+            if model.getNode(index).dtype is not list:
+                model.setData(index.siblingAtColumn(1),
+                              random.choice(WORDS), QtCore.Qt.EditRole)
+        elif draw < 0.9:
+            record = model.index(random.randrange(count), 0)
+            model.setData(model.index(0, 0, record),
+                          random.choice(WORDS).split()[0], QtCore.Qt.EditRole)
+        elif model.history().canUndo():
+            model.undo()
+
+        for text in ['alpha', 'beta', 'gamma', 'delta']:
+            assert model.search(text) == expected(model, text)
+
+
+def test_ancestors(model):
+    matches = model.search('c')
+    rows = dict((node, set(found)) for node, found in matches.items())
+    QJsonSearchIndex.addAncestors(rows)
+
+    root = model.getNode(QtCore.QModelIndex())
+    for node in matches:
+        while node is not root:
+            assert node.row() in rows[node.parent]
+            node = node.parent
@@ -0,0 +1,167 @@
+"""
+Evict the trees of the idle tabs under the memory budget and read them
+again when they are shown
+"""
+
+
+import io
+import json
+import os
+
+import pytest
+
+from Qt import QtCore
+
+from jsonViewer.qjsonmmap import QJsonFile
+from jsonViewer.qjsonnode import QJsonNode
+from jsonViewer.qjsonmodel import QJsonModel
+from jsonViewer.qjsontabs import QJsonTab, QJsonTabWidget
+
+from conftest import DOCUMENT
+
+
+def makeTab(value=DOCUMENT, lazy=False):
+    model = QJsonModel(QJsonNode.load(value, lazy=lazy))
+    if not lazy:
+        model.fetchTree()
+    return QJsonTab(model)
+
+
+@pytest.fixture
+def tabs(app):
+    widget = QJsonTabWidget()
+    yield widget
+    while widget.count():
+        widget.closeDocument(0)
+    widget.deleteLater()
+
+
+def test_evict_restore(app):
+    tab = makeTab()
+    model = tab.model()
+    assert tab.canEvict()
+    assert tab.memoryCost(1 << 30) > 0
+
+    assert tab.evict()
+    path = tab._evictedPath
+    assert tab.isEvicted() and os.path.exists(path)
+    assert tab.memoryCost(1 << 30) == 0
+    assert model.asDict() == {}
+    assert not tab.canSave()
+    assert not tab.canEvict()
+
+    assert tab.restore()
+    assert not tab.isEvicted() and not os.path.exists(path)
+    assert model.asDict() == DOCUMENT
+    assert tab.canSave()
+    assert not tab.restore()
+    tab.close()
+
+
+def test_evict_lazy(app):
+    value = {'rows': list(range(QJsonModel.batchSize * 3)),
+             'deep': [[[{'a': None}]]]}
+    tab = makeTab(value, lazy=True)
+    model = tab.model()
+    model.fetchMore(QtCore.QModelIndex())
+    rows = model.index(list(value).index('rows'), 0)
+    model.fetchMore(rows)
+    fetched = model.rowCount(rows)
+    assert fetched < len(value['rows'])
+
+    assert tab.evict() and tab.restore()
+    # the rows not fetched yet are kept as they were
+    rows = model.index(list(value).index('rows'), 0)
+    assert model.rowCount(rows) == fetched
+    assert model.canFetchMore(rows)
+    assert model.asDict() == value
+    tab.close()
+
+
+def test_evict_list(app):
+    tab = makeTab([1, {'a': [2]}])
+    assert tab.evict()
+    assert tab.model().asDict() == []
+    assert tab.restore()
+    assert tab.model().asDict() == [1, {'a': [2]}]
+    tab.close()
+
+
+def test_not_evicted(app, tmpdir):
+    tab = makeTab()
+    model = tab.model()
+    model.setData(model.index(0, 1), 'edited', QtCore.Qt.EditRole)
+    # the commands of the history refer to the nodes
+    assert not tab.canEvict() and not tab.evict()
+
+    model.history().clear()
+    assert tab.canEvict()
+    tab.lines = object()
+    assert not tab.canEvict()
+    tab.lines = None
+    tab.close()
+
+
+def test_evict_file(app, tmpdir):
+    path = str(tmpdir.join('document.json'))
+    with io.open(path, 'w', encoding='utf-8') as stream:
+        json.dump(DOCUMENT, stream)
+    jsonFile = QJsonFile(path)
+    model = QJsonModel(jsonFile.root())
+    model.setReadOnly(True)
+    model.fetchTree()
+    tab = QJsonTab(model, path)
+    tab.file = jsonFile
+
+    # the nodes are dropped, the rows are read again from the file
+    assert tab.evict()
+    assert not tab.isEvicted()
+    assert model.rowCount() == 0
+    assert model.asDict() == DOCUMENT
+    tab.close()
+
+
+def test_close_evicted(app):
+    tab = makeTab()
+    assert tab.evict()
+    path = tab._evictedPath
+    tab.close()
+    assert not os.path.exists(path)
+
+
+def test_budget(tabs):
+    documents = [makeTab({'tab': row, 'items': list(range(200))})
+                 for row in range(4)]
+    for row, tab in enumerate(documents):
+        tabs.addDocument(tab, str(row))
+    assert tabs.currentWidget() is documents[-1]
+    cost = documents[0].memoryCost(tabs.memoryBudget)
+    assert tabs.memoryUsage() == cost * 4
+
+    # the least recently shown tabs go first, the current one stays
+    tabs.setCurrentIndex(1)
+    tabs.setMemoryBudget(cost * 2)
+    assert [tab.isEvicted() for tab in documents] == \
+        [True, False, True, False]
+    assert tabs.memoryUsage() <= cost * 2
+
+    # showing a tab reads its tree again and evicts the least recently
+    # shown one, the last tab added was shown before the second one
+    tabs.setCurrentIndex(0)
+    assert documents[0].model().asDict() == \
+        {'tab': 0, 'items': list(range(200))}
+    assert [tab.isEvicted() for tab in documents] == \
+        [False, False, True, True]
+
+    tabs.setMemoryBudget(cost * 10)
+    assert tabs.enforceBudget() == 0
+
+
+def test_find_path(tabs, tmpdir):
+    path = str(tmpdir.join('document.json'))
+    tab = makeTab()
+    tab.path = path
+    tabs.addDocument(tab, 'document')
+    assert tabs.findPath(os.path.join(str(tmpdir), '.', 'document.json')) \
+        is tab
+    assert tabs.findPath(str(tmpdir.join('other.json'))) is None
@@ -0,0 +1,142 @@
+"""
+Keep the json text of a document up to date with the model edits, the
+text must match a full render after every update
+"""
+
+
+import random
+
+import pytest
+
+from Qt import QtCore, QtGui
+
+from jsonViewer.qjsonnode import QJsonNode
+from jsonViewer.qjsonmodel import QJsonModel
+from jsonViewer.qjsontext import QJsonTextSync
+
+from conftest import DOCUMENT, randomValue
+
+
+def makeSync(model):
+    document = QtGui.QTextDocument()
+    sync = QJsonTextSync(document)
+    sync.setModel(model)
+    sync.update()
+    return document, sync
+
+
+def render(model):
+    return model.dumps(indent='    ', sortKeys=True)
+
+
+def containers(model, parent=QtCore.QModelIndex()):
+    """
+    Get the indices of the container rows under a parent, itself included
+    """
+    indices = [parent]
+    for row in range(model.rowCount(parent)):
+        index = model.index(row, 0, parent)
+        if model.getNode(index).dtype in (dict, list):
+            indices.extend(containers(model, index))
+    return indices
+
+
+def test_render(model):
+    document, sync = makeSync(model)
+    assert sync.isSynced()
+    assert document.toPlainText() == render(model)
+
+
+def test_edits(model):
+    document, sync = makeSync(model)
+    items = model.indexFromPath('/items')
+
+    model.addItems([(None, {'new': [1, 2]})], items)
+    sync.update()
+    assert document.toPlainText() == render(model)
+
+    model.removeRows(0, 2, items)
+    sync.update()
+    assert document.toPlainText() == render(model)
+
+    name = model.indexFromPath('/name')
+    model.setData(name.siblingAtColumn(1), 'edited', QtCore.Qt.EditRole)
+    sync.update()
+    assert document.toPlainText() == render(model)
+
+    model.undo()
+    model.undo()
+    sync.update()
+    assert sync.isSynced()
+    assert document.toPlainText() == render(model)
+
+
+def test_update_value(model):
+    document, sync = makeSync(model)
+    model.updateValue(dict(DOCUMENT, count=4, extra=[None]))
+    sync.update()
+    assert document.toPlainText() == render(model)
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_random_edits(app, seed):
+    random.seed(seed)
+    model = QJsonModel(QJsonNode.load(DOCUMENT))
+    model.fetchTree()
+    document, sync = makeSync(model)
+
+    for _ in range(8):
+        parent = random.choice(containers(model))
+        count = model.rowCount(parent)
+        draw = random.random()
+        if draw < 0.4 and count:
+            rows = random.sample(range(count), random.randint(1, count))
+            model.removeIndices([model.index(row, 0, parent)
+                                 for row in sorted(rows)])
+        elif draw < 0.8:
+            model.addItems([('n{}'.format(random.randint(0, 40)),
+                             randomValue(1))
+                            for _ in range(random.randint(1, 3))], parent)
+        elif draw < 0.9 and count:
+            row = random.randrange(count)
+            if model.getNode(model.index(row, 0, parent)).dtype \
+                    not in (dict, list):
+                model.setData(model.index(row, 1, parent),
+                              random.randint(0, 9), QtCore.Qt.EditRole)
+        elif model.history().canUndo():
+            model.undo()
+        if random.random() < 0.5:
+            sync.update()
+
+    sync.update()
+    assert document.toPlainText() == render(model)
+
+
+def test_tuple_leaves(app):
+    """
+    Tuples, from python literals, are written as lists over several lines
+    """
+    model = QJsonModel(QJsonNode.load(
+        {'a': (1, 2), 'b': 1, 'c': {'d': 1}}, lazy=True))
+    model.fetchTree()
+    document, sync = makeSync(model)
+
+    model.setData(model.indexFromPath('/c/d').siblingAtColumn(1), 5,
+                  QtCore.Qt.EditRole)
+    sync.update()
+    assert document.toPlainText() == render(model)
+
+    # a leaf becoming a tuple and back changes its number of lines
+    for value in [(3, [4, (5,)]), 6]:
+        model.setData(model.indexFromPath('/b').siblingAtColumn(1), value,
+                      QtCore.Qt.EditRole)
+        model.setData(model.indexFromPath('/c/d').siblingAtColumn(1), 7,
+                      QtCore.Qt.EditRole)
+        sync.update()
+        assert document.toPlainText() == render(model)
+
+    model.addItems([('e', {'f': (1, [2, 3])})])
+    model.setData(model.indexFromPath('/c/d').siblingAtColumn(1), 8,
+                  QtCore.Qt.EditRole)
+    sync.update()
+    assert document.toPlainText() == render(model)
@@ -0,0 +1,48 @@
+"""
+Generate the python ui class of the main window with the compiler of the
+current binding
+"""
+
+
+import subprocess
+
+import pytest
+
+from Qt import QtWidgets, __binding__
+
+from jsonViewer.ui import compileUi, jsonEditorUi
+
+
+@pytest.mark.parametrize('line, expected', [
+    ('from PyQt5 import QtCore, QtGui', 'from Qt import QtCore, QtGui'),
+    ('from PyQt6.QtCore import (QSize,', 'from Qt.QtCore import (QSize,'),
+    ('from PySide2.QtGui import QIcon', 'from Qt.QtGui import QIcon'),
+    ('from PySide6.QtWidgets import (QApplication,',
+     'from Qt.QtWidgets import (QApplication,'),
+    ('from PySide6Extra import x', 'from PySide6Extra import x'),
+    ('    from PySide6 import QtCore', '    from PySide6 import QtCore'),
+])
+def test_binding_import(line, expected):
+    code = compileUi.BINDING_IMPORT.sub(
+        lambda match: 'from Qt{} import '.format(match.group(1) or ''), line)
+    assert code == expected
+
+
+def test_compile(app):
+    try:
+        code = compileUi.compileUi(compileUi.UI_PATH)
+    except (OSError, subprocess.CalledProcessError, ImportError):
+        pytest.skip('no ui compiler for {}'.format(__binding__))
+
+    assert __binding__ not in code
+    assert 'from Qt' in code
+    namespace = dict()
+    exec(compile(code, compileUi.UI_PATH, 'exec'), namespace)
+    window = QtWidgets.QMainWindow()
+    namespace['Ui_MainWindow']().setupUi(window)
+    assert window.findChild(QtWidgets.QLineEdit, 'ui_filter_edit')
+
+
+def test_generated_class():
+    assert jsonEditorUi.SOURCE_HASH == \
+        compileUi.sourceHash(compileUi.UI_PATH)
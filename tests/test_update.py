@@ -0,0 +1,121 @@
+"""
+Update a model to a new value, only the rows that changed are signaled
+"""
+
+
+import copy
+import random
+
+import pytest
+
+from Qt import QtCore
+
+from jsonViewer.qjsonnode import QJsonNode
+from jsonViewer.qjsonmodel import QJsonModel
+
+from conftest import DOCUMENT, randomValue
+
+
+class Recorder(object):
+    """
+    Record the row changes signaled by a model
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.inserted = list()
+        self.removed = list()
+        self.changed = list()
+        self.resets = 0
+        model.rowsInserted.connect(self._onInserted)
+        model.rowsRemoved.connect(self._onRemoved)
+        model.dataChanged.connect(self._onChanged)
+        model.modelReset.connect(self._onReset)
+
+    def _onInserted(self, parent, first, last):
+        self.inserted.append((self.model.pathFromIndex(parent), first, last))
+
+    def _onRemoved(self, parent, first, last):
+        self.removed.append((self.model.pathFromIndex(parent), first, last))
+
+    def _onChanged(self, topLeft, bottomRight, roles=()):
+        self.changed.append(self.model.pathFromIndex(topLeft))
+
+    def _onReset(self):
+        self.resets += 1
+
+
+def test_same_value(model):
+    recorder = Recorder(model)
+    model.updateValue(copy.deepcopy(DOCUMENT))
+    assert not (recorder.inserted or recorder.removed or recorder.changed)
+    assert not model.history().canUndo()
+
+
+def test_leaf_changed(model):
+    value = copy.deepcopy(DOCUMENT)
+    value['nested']['a']['b']['c'][1] = 20
+    kept = QtCore.QPersistentModelIndex(model.indexFromPath('/items/2'))
+    recorder = Recorder(model)
+    model.updateValue(value)
+
+    assert model.asDict() == value
+    assert recorder.changed == [model.pathFromIndex(
+        model.indexFromPath('/nested/a/b/c/1'))]
+    assert not (recorder.inserted or recorder.removed or recorder.resets)
+    assert kept.isValid()
+
+
+def test_list_rows(app):
+    model = QJsonModel(QJsonNode.load(list(range(100))))
+    model.fetchAll()
+    value = list(range(100))
+    value[10:12] = ['a', 'b', 'c']
+    recorder = Recorder(model)
+    model.updateValue(value)
+
+    assert model.asDict() == value
+    # the common beginning and end are skipped
+    rows = recorder.inserted + recorder.removed
+    assert rows and all(first >= 10 and last <= 12
+                        for _, first, last in rows)
+
+
+def test_dict_keys(model):
+    value = copy.deepcopy(DOCUMENT)
+    del value['ratio']
+    value['added'] = [1, 2]
+    recorder = Recorder(model)
+    model.updateValue(value)
+
+    assert model.asDict() == value
+    assert [row for _, row, _ in recorder.removed] \
+        == [list(DOCUMENT).index('ratio')]
+    assert len(recorder.inserted) == 1
+    assert not recorder.resets
+
+
+def test_lazy(app):
+    value = [{'id': row} for row in range(50)]
+    model = QJsonModel(QJsonNode.load(value, lazy=True))
+    model.batchSize = 10
+    model.fetchMore(model.index(-1, -1))
+    value = copy.deepcopy(value)
+    value[5]['id'] = 'changed'
+    value[40]['id'] = 'pending'
+    model.updateValue(value)
+    assert model.asDict() == value
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_random(app, seed):
+    random.seed(seed)
+    values = [randomValue() for _ in range(6)]
+    model = QJsonModel(QJsonNode.load(values[0]))
+    model.fetchTree()
+    for value in values[1:]:
+        model.updateValue(value)
+        assert model.asDict() == value
+    for value in reversed(values[:-1]):
+        model.undo()
+        assert model.asDict() == value
@@ -0,0 +1,79 @@
+"""
+Generate the python ui class of the main window from its .ui file, so the
+editor starts without parsing the .ui file, run it after editing the .ui
+file: the generated class is ignored while its source hash is outdated
+
+Usage:
+    python ui/compileUi.py
+"""
+
+
+import io
+import os
+import re
+import sys
+import zlib
+
+UI_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+UI_PATH = os.path.join(UI_DIRECTORY, 'jsonEditor.ui')
+CLASS_PATH = os.path.join(UI_DIRECTORY, 'jsonEditorUi.py')
+# from PyQt5 import QtCore, or from PySide6.QtCore import (QSize, ...)
+BINDING_IMPORT = re.compile(
+    r'^from (?:PyQt[456]|PySide[26])(\.\w+)? import ', re.MULTILINE)
+
+
+def sourceHash(path):
+    """
+    Get the checksum of a .ui file, line endings aside, to detect a change
+    rather than to secure anything
+
+    :param path: str. path of the .ui file
+    :return: str. hexadecimal checksum
+    """
+    with io.open(path, 'rb') as stream:
+        data = stream.read()
+    return '{:08x}'.format(zlib.crc32(data.replace(b'\r\n', b'\n')))
+
+
+def compileUi(path):
+    """
+    Generate the python code of a .ui file with the compiler of the current
+    binding, importing its modules from Qt.py
+
+    :param path: str. path of the .ui file
+    :return: str. python code
+    """
+    from Qt import __binding__
+
+    if __binding__.startswith('PyQt'):
+        uic = __import__(__binding__ + '.uic', fromlist=['uic'])
+        output = io.StringIO()
+        uic.compileUi(path, output)
+        code = output.getvalue()
+    else:
+        import subprocess
+        code = subprocess.check_output(
+            ['{}-uic'.format(__binding__.lower()), path]).decode('utf-8')
+
+    # the header names the .ui file, not where it was compiled
+    code = code.replace(path, os.path.basename(path))
+    code, count = BINDING_IMPORT.subn(
+        lambda match: 'from Qt{} import '.format(match.group(1) or ''), code)
+    if not count:
+        raise ValueError(
+            'Unexpected {} ui code, the binding import is not found'.format(
+                __binding__))
+    return code
+
+
+def run():
+    code = compileUi(UI_PATH)
+    with io.open(CLASS_PATH, 'w', encoding='utf-8', newline='\n') as stream:
+        stream.write(code.rstrip('\n'))
+        stream.write(u'\n\n\n# checksum of the .ui file the class is generated '
+                     u'from\nSOURCE_HASH = {!r}\n'.format(sourceHash(UI_PATH)))
+    print('generated {}'.format(CLASS_PATH))
+
+
+if __name__ == '__main__':
+    sys.exit(run())
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+# Form implementation generated from reading ui file 'jsonEditor.ui'
+#
+# Created by: PyQt5 UI code generator 5.15.11
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic5 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from Qt import QtCore, QtGui, QtWidgets
+
+
+class Ui_MainWindow(object):
+    def setupUi(self, MainWindow):
+        MainWindow.setObjectName("MainWindow")
+        MainWindow.resize(780, 501)
+        self.centralwidget = QtWidgets.QWidget(MainWindow)
+        self.centralwidget.setObjectName("centralwidget")
+        self.verticalLayout = QtWidgets.QVBoxLayout(self.centralwidget)
+        self.verticalLayout.setObjectName("verticalLayout")
+        self.ui_grid_layout = QtWidgets.QGridLayout()
+        self.ui_grid_layout.setObjectName("ui_grid_layout")
+        self.ui_filter_edit = QtWidgets.QLineEdit(self.centralwidget)
+        font = QtGui.QFont()
+        font.setFamily("Bahnschrift")
+        font.setPointSize(10)
+        self.ui_filter_edit.setFont(font)
+        self.ui_filter_edit.setObjectName("ui_filter_edit")
+        self.ui_grid_layout.addWidget(self.ui_filter_edit, 0, 0, 1, 1)
+        self.ui_view_edit = QtWidgets.QPlainTextEdit(self.centralwidget)
+        font = QtGui.QFont()
+        font.setFamily("Bahnschrift")
+        font.setPointSize(10)
+        self.ui_view_edit.setFont(font)
+        self.ui_view_edit.setObjectName("ui_view_edit")
+        self.ui_grid_layout.addWidget(self.ui_view_edit, 0, 2, 2, 1)
+        self.verticalLayout_2 = QtWidgets.QVBoxLayout()
+        self.verticalLayout_2.setContentsMargins(-1, -1, 0, -1)
+        self.verticalLayout_2.setObjectName("verticalLayout_2")
+        spacerItem = QtWidgets.QSpacerItem(20, 40, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
+        self.verticalLayout_2.addItem(spacerItem)
+        self.ui_out_btn = QtWidgets.QPushButton(self.centralwidget)
+        font = QtGui.QFont()
+        font.setFamily("Bahnschrift")
+        font.setPointSize(10)
+        self.ui_out_btn.setFont(font)
+        self.ui_out_btn.setObjectName("ui_out_btn")
+        self.verticalLayout_2.addWidget(self.ui_out_btn)
+        self.ui_update_btn = QtWidgets.QPushButton(self.centralwidget)
+        font = QtGui.QFont()
+        font.setFamily("Bahnschrift")
+        font.setPointSize(10)
+        self.ui_update_btn.setFont(font)
+        self.ui_update_btn.setObjectName("ui_update_btn")
+        self.verticalLayout_2.addWidget(self.ui_update_btn)
+        spacerItem1 = QtWidgets.QSpacerItem(20, 40, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
+        self.verticalLayout_2.addItem(spacerItem1)
+        self.ui_grid_layout.addLayout(self.verticalLayout_2, 1, 1, 1, 1)
+        self.verticalLayout.addLayout(self.ui_grid_layout)
+        MainWindow.setCentralWidget(self.centralwidget)
+        self.menubar = QtWidgets.QMenuBar(MainWindow)
+        self.menubar.setGeometry(QtCore.QRect(0, 0, 780, 21))
+        self.menubar.setObjectName("menubar")
+        self.ui_file_menu = QtWidgets.QMenu(self.menubar)
+        self.ui_file_menu.setObjectName("ui_file_menu")
+        self.ui_edit_menu = QtWidgets.QMenu(self.menubar)
+        self.ui_edit_menu.setObjectName("ui_edit_menu")
+        self.ui_schema_menu = QtWidgets.QMenu(self.menubar)
+        self.ui_schema_menu.setObjectName("ui_schema_menu")
+        self.ui_debug_menu = QtWidgets.QMenu(self.menubar)
+        self.ui_debug_menu.setObjectName("ui_debug_menu")
+        MainWindow.setMenuBar(self.menubar)
+        self.statusbar = QtWidgets.QStatusBar(MainWindow)
+        self.statusbar.setObjectName("statusbar")
+        MainWindow.setStatusBar(self.statusbar)
+        self.ui_open_action = QtWidgets.QAction(MainWindow)
+        self.ui_open_action.setObjectName("ui_open_action")
+        self.ui_open_read_only_action = QtWidgets.QAction(MainWindow)
+        self.ui_open_read_only_action.setObjectName("ui_open_read_only_action")
+        self.ui_save_action = QtWidgets.QAction(MainWindow)
+        self.ui_save_action.setObjectName("ui_save_action")
+        self.ui_save_as_action = QtWidgets.QAction(MainWindow)
+        self.ui_save_as_action.setObjectName("ui_save_as_action")
+        self.ui_autosave_action = QtWidgets.QAction(MainWindow)
+        self.ui_autosave_action.setCheckable(True)
+        self.ui_autosave_action.setObjectName("ui_autosave_action")
+        self.ui_undo_action = QtWidgets.QAction(MainWindow)
+        self.ui_undo_action.setObjectName("ui_undo_action")
+        self.ui_redo_action = QtWidgets.QAction(MainWindow)
+        self.ui_redo_action.setObjectName("ui_redo_action")
+        self.ui_schema_action = QtWidgets.QAction(MainWindow)
+        self.ui_schema_action.setObjectName("ui_schema_action")
+        self.ui_clear_schema_action = QtWidgets.QAction(MainWindow)
+        self.ui_clear_schema_action.setObjectName("ui_clear_schema_action")
+        self.ui_errors_action = QtWidgets.QAction(MainWindow)
+        self.ui_errors_action.setObjectName("ui_errors_action")
+        self.ui_profiler_action = QtWidgets.QAction(MainWindow)
+        self.ui_profiler_action.setObjectName("ui_profiler_action")
+        self.ui_file_menu.addAction(self.ui_open_action)
+        self.ui_file_menu.addAction(self.ui_open_read_only_action)
+        self.ui_file_menu.addAction(self.ui_save_action)
+        self.ui_file_menu.addAction(self.ui_save_as_action)
+        self.ui_file_menu.addSeparator()
+        self.ui_file_menu.addAction(self.ui_autosave_action)
+        self.ui_edit_menu.addAction(self.ui_undo_action)
+        self.ui_edit_menu.addAction(self.ui_redo_action)
+        self.ui_schema_menu.addAction(self.ui_schema_action)
+        self.ui_schema_menu.addAction(self.ui_clear_schema_action)
+        self.ui_schema_menu.addSeparator()
+        self.ui_schema_menu.addAction(self.ui_errors_action)
+        self.ui_debug_menu.addAction(self.ui_profiler_action)
+        self.menubar.addAction(self.ui_file_menu.menuAction())
+        self.menubar.addAction(self.ui_edit_menu.menuAction())
+        self.menubar.addAction(self.ui_schema_menu.menuAction())
+        self.menubar.addAction(self.ui_debug_menu.menuAction())
+
+        self.retranslateUi(MainWindow)
+        QtCore.QMetaObject.connectSlotsByName(MainWindow)
+
+    def retranslateUi(self, MainWindow):
+        _translate = QtCore.QCoreApplication.translate
+        MainWindow.setWindowTitle(_translate("MainWindow", "MainWindow"))
+        self.ui_out_btn.setText(_translate("MainWindow", "Copy >"))
+        self.ui_update_btn.setText(_translate("MainWindow", "< Copy"))
+        self.ui_file_menu.setTitle(_translate("MainWindow", "File"))
+        self.ui_edit_menu.setTitle(_translate("MainWindow", "Edit"))
+        self.ui_schema_menu.setTitle(_translate("MainWindow", "Schema"))
+        self.ui_debug_menu.setTitle(_translate("MainWindow", "Debug"))
+        self.ui_open_action.setText(_translate("MainWindow", "Open..."))
+        self.ui_open_action.setShortcut(_translate("MainWindow", "Ctrl+O"))
+        self.ui_open_read_only_action.setText(_translate("MainWindow", "Open Read-Only..."))
+        self.ui_open_read_only_action.setShortcut(_translate("MainWindow", "Ctrl+Shift+O"))
+        self.ui_save_action.setText(_translate("MainWindow", "Save"))
+        self.ui_save_action.setShortcut(_translate("MainWindow", "Ctrl+S"))
+        self.ui_save_as_action.setText(_translate("MainWindow", "Save As..."))
+        self.ui_save_as_action.setShortcut(_translate("MainWindow", "Ctrl+Shift+S"))
+        self.ui_autosave_action.setText(_translate("MainWindow", "Autosave"))
+        self.ui_undo_action.setText(_translate("MainWindow", "Undo"))
+        self.ui_undo_action.setShortcut(_translate("MainWindow", "Ctrl+Z"))
+        self.ui_redo_action.setText(_translate("MainWindow", "Redo"))
+        self.ui_redo_action.setShortcut(_translate("MainWindow", "Ctrl+Shift+Z"))
+        self.ui_schema_action.setText(_translate("MainWindow", "Set Schema..."))
+        self.ui_clear_schema_action.setText(_translate("MainWindow", "Clear Schema"))
+        self.ui_errors_action.setText(_translate("MainWindow", "Errors"))
+        self.ui_profiler_action.setText(_translate("MainWindow", "Profiler"))
+
+
+# checksum of the .ui file the class is generated from
+SOURCE_HASH = 'a61fb533'